@@ -1,15 +1,24 @@
 import os
-import tempfile
+from dataclasses import replace
 from datetime import datetime
 
 import streamlit as st
 
 from questions import DEFAULT_QUESTIONS
-from processors.area import AreaService
-from processors.height import HeightService
+from processors.ifc_loader import LoadBudgetExceeded, LoadProgress, check_size, spool_to_tempfile
+from processors.pipeline import PROGRESS_STAGES, analyze_task
+from processors.store import ProjectStore
+from processors.worker import BackgroundTask
 
 # run with: streamlit run app.py
 
+# Budgets für das Laden von IFC-Dateien (leer = unbegrenzt), z.B. für kleine Container
+MAX_IFC_MB = float(os.environ.get("BRANDSCHUTZ_MAX_IFC_MB") or 0) or None
+MAX_LOAD_SECONDS = float(os.environ.get("BRANDSCHUTZ_MAX_LOAD_SECONDS") or 0) or None
+# Speicher- und Zeitlimit des Auswertungsprozesses (leer = unbegrenzt); schützt den App-Server vor OOM
+MAX_ANALYSIS_MB = float(os.environ.get("BRANDSCHUTZ_MAX_ANALYSIS_MB") or 0) or None
+MAX_ANALYSIS_SECONDS = float(os.environ.get("BRANDSCHUTZ_MAX_ANALYSIS_SECONDS") or 0) or None
+
 # Grundlayout und Metadaten der Seite setzen (Titel/Icon/Layout)
 st.set_page_config(page_title="Brandschutz • IFC Checker", page_icon="🧯", layout="wide")
 
@@ -22,6 +31,8 @@ st.session_state.setdefault("manual_inputs", {"height_m": None, "building_area_m
 st.session_state.setdefault("ifc_result", {"height": None, "area": None, "error": None})
 st.session_state.setdefault("active_tab", "Projektstart")  # erinnert an zuletzt genutzten Tab
 st.session_state.setdefault("has_ifc_choice", "Ja")
+st.session_state.setdefault("analysis_job", None)  # laufende IFC-Auswertung (BackgroundTask)
+st.session_state.setdefault("analysis_notice", None)  # (Art, Text) der letzten Auswertung
 
 # Titel-Header der App für sofortige Orientierung
 st.title("🧯 Brandschutzkochbuch")
@@ -42,39 +53,153 @@ with st.sidebar:
         "IFC geladen: "
         f"{'ja' if st.session_state['ifc_result'].get('height') or st.session_state['ifc_result'].get('area') else 'nein'}"
     )
+    # Laufzeiten der letzten IFC-Auswertung (Laden, Indizes, Höhe, Fläche) samt Modellumfang
+    if st.session_state["ifc_result"].get("timing_lines"):
+        with st.expander("Laufzeiten"):
+            st.code("\n".join(st.session_state["ifc_result"]["timing_lines"]), language=None)
 
-# Hilfsfunktion: IFC-Upload speichern, analysieren und Ergebnis zurückgeben
-def analyze_ifc(uploaded_file):
-    """Nimmt den Upload entgegen, schreibt ihn temporär und wertet Höhe/Fläche aus."""
-    temp_path = None
+# Hilfsfunktion: IFC-Auswertung im Hintergrund starten
+def start_analysis(uploaded_file) -> None:
+    """
+    Legt den Upload einmal blockweise auf die Platte (Prüfsumme dabei) und wertet
+    ihn in einem eigenen Prozess aus. Die App bleibt bedienbar. Liegt für die
+    Projektnummer eine gespeicherte Revision vor, werden nur geänderte Geschosse
+    neu berechnet und die Änderungen angezeigt.
+    """
+    cancel_analysis()
+    max_bytes = None if MAX_IFC_MB is None else int(MAX_IFC_MB * 1e6)
     try:
-        # Upload-Inhalt in eine temporäre Datei schreiben, damit ifcopenshell sie lesen kann
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".ifc") as tmp:
-            tmp.write(uploaded_file.getbuffer())
-            temp_path = tmp.name
-
-        # Auswertungen durchführen: Höhe und Flächen
-        height_result = HeightService().compute_from_path(temp_path, extra_answers=st.session_state.get("question_answers"))
-        area_result = AreaService().compute_from_path(temp_path)
-        return {"height": height_result, "area": area_result, "error": None}
-    except ImportError as exc:
-        missing = getattr(exc, "name", None) or "ifcopenshell"
-        return {"height": None, "area": None, "error": f"Fehlendes Paket: {missing} (pip install ifcopenshell)"}
-    except FileNotFoundError as exc:
-        return {"height": None, "area": None, "error": str(exc)}
-    except Exception as exc:
-        return {"height": None, "area": None, "error": f"Unerwarteter Fehler: {exc}"}
-    finally:
-        # Temporäre Datei aufräumen, damit keine Reste liegen bleiben
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-            except OSError:
-                pass
+        check_size(uploaded_file.size, max_bytes)  # vor dem Schreiben auf die Platte
+    except LoadBudgetExceeded as exc:
+        st.session_state["ifc_result"] = {"height": None, "area": None, "error": str(exc)}
+        st.session_state["analysis_notice"] = ("error", str(exc))
+        return
+    uploaded_file.seek(0)
+    path, digest, _size = spool_to_tempfile(uploaded_file)
+    task = {
+        "path": path,
+        "label": uploaded_file.name,
+        "content_hash": digest,
+        "max_bytes": max_bytes,
+        "max_seconds": MAX_LOAD_SECONDS,
+        "fingerprint": True,  # wird beim Speichern in der Projektablage abgelegt
+        "compartments": True,
+        "escape_routes": True,
+    }
+    previous = ProjectStore().get_fingerprint(st.session_state["project_info"].get("number", ""))
+    if previous is not None:
+        task["previous"] = previous.to_dict()
+    worker = BackgroundTask(analyze_task, task, timeout=MAX_ANALYSIS_SECONDS, memory_limit_mb=MAX_ANALYSIS_MB)
+    st.session_state["analysis_job"] = {"task": worker.start(), "path": path}
+    st.session_state["analysis_notice"] = None
+    st.session_state["ifc_result"] = {"height": None, "area": None, "error": None}
+
+# Hilfsfunktion: laufende Auswertung abbrechen und temporäre Datei entfernen
+def cancel_analysis() -> None:
+    job = st.session_state.get("analysis_job")
+    if job is None:
+        return
+    job["task"].cancel()
+    _cleanup_job(job)
+
+def _cleanup_job(job) -> None:
+    st.session_state["analysis_job"] = None
+    try:
+        os.unlink(job["path"])
+    except OSError:
+        pass
+
+# Hilfsfunktion: Ergebnis des Hintergrundprozesses in die Session übernehmen
+def ifc_result_from_outcome(outcome) -> dict:
+    """Höhe/Fläche samt Laufzeiten bei Erfolg, sonst eine lesbare Fehlermeldung."""
+    if outcome.ok:
+        analysis = outcome.value
+        height = replace(analysis.height, extra_answers=st.session_state.get("question_answers") or None)
+        timing_lines = analysis.timing_lines()
+        if outcome.peak_rss_mb is not None:
+            timing_lines.append(f"Spitzen-RSS des Auswertungsprozesses: {outcome.peak_rss_mb:.0f} MB")
+        return {
+            "height": height,
+            "area": analysis.area,
+            "error": None,
+            "timings": analysis.timings,
+            "timing_lines": timing_lines,
+            "peak_rss_mb": outcome.peak_rss_mb,
+            "fingerprint": analysis.fingerprint,
+            "revision_lines": analysis.revision.text_lines() if analysis.revision else None,
+            "compartments": analysis.compartments,
+            "escape_routes": analysis.escape_routes,
+            "buildings": analysis.buildings,
+        }
+    if outcome.status == "cancelled":
+        error = "Auswertung abgebrochen."
+    elif outcome.status == "error" and (outcome.error or "").startswith("LoadBudgetExceeded"):
+        error = outcome.error.split(": ", 1)[-1]
+    elif outcome.status == "error" and (outcome.error or "").startswith(("ImportError", "ModuleNotFoundError")):
+        error = f"Fehlendes Paket: {outcome.error.split(': ', 1)[-1]} (pip install ifcopenshell)"
+    elif outcome.status == "error" and (outcome.error or "").startswith("FileNotFoundError"):
+        error = outcome.error.split(": ", 1)[-1]
+    elif outcome.status in ("memory", "timeout"):
+        error = f"Auswertung abgebrochen: {outcome.error}"
+    elif outcome.status == "crashed":
+        error = f"Auswertung abgestürzt: {outcome.error}"
+    else:
+        error = f"Unerwarteter Fehler: {outcome.error}"
+    return {"height": None, "area": None, "error": error}
+
+# Statusanzeige der laufenden Auswertung: nur dieses Fragment läuft periodisch neu,
+# Eingaben in den Tabs werden dadurch nicht unterbrochen
+@st.fragment(run_every=1.0)
+def render_analysis_status():
+    job = st.session_state.get("analysis_job")
+    if job is None:
+        return
+    task = job["task"]
+    status = st.empty()
+    if st.button("Auswertung abbrechen", key="cancel_analysis"):
+        task.cancel()
+    outcome = task.poll()
+    if outcome is None:
+        stages = list(PROGRESS_STAGES)
+        stage = task.stage
+        position = stages.index(stage) + 1 if stage in stages else 0
+        label = PROGRESS_STAGES.get(stage, "Prozess wird gestartet")
+        text = f"{label} … ({task.seconds:.0f} s)"
+        load = task.detail
+        if stage == "load" and isinstance(load, LoadProgress):
+            # Ladefortschritt in Bytes (Scanner) bzw. Lebenszeichen mit Laufzeit (ifcopenshell)
+            position += load.fraction
+            text = f"{label}: {load.describe()}"
+        status.progress(position / (len(stages) + 1), text=text)
+        return
+
+    result = ifc_result_from_outcome(outcome)
+    st.session_state["ifc_result"] = result
+    _cleanup_job(job)
+    if result["error"]:
+        st.session_state["analysis_notice"] = ("error", result["error"])
+    else:
+        peak = "" if outcome.peak_rss_mb is None else f", Spitzen-RSS {outcome.peak_rss_mb:.0f} MB"
+        st.session_state["analysis_notice"] = ("success", f"IFC erfolgreich ausgewertet ({outcome.seconds:.1f} s{peak}).")
+        # IFC-Werte als Defaults für manuelle Eingaben setzen
+        st.session_state["manual_inputs"] = {
+            "height_m": result["height"].height_m if result["height"] else None,
+            "building_area_m2": result["area"].building_area_m2 if result["area"] else None,
+        }
+    st.rerun(scope="app")
+
+if st.session_state["analysis_job"] is not None:
+    with st.sidebar:
+        st.write("**IFC-Auswertung läuft**")
+        render_analysis_status()
 
 # Hilfsfunktion: fasst die wichtigsten Kennzahlen für die Übersicht zusammen
 def summary_values():
-    """Lieferte Höhe, VKF-Kategorie, Fläche und Geschossliste aus IFC oder manuellen Werten."""
+    """
+    Lieferte Höhe, VKF-Kategorie, Fläche und Geschossliste aus IFC oder manuellen Werten.
+    Bei mehreren Gebäuden gelten Höhe/Kategorie des höchsten Gebäudes, die Werte je
+    Gebäude stehen in "buildings".
+    """
     pi = st.session_state["project_info"]
     ifc_res = st.session_state["ifc_result"]
 
@@ -88,6 +213,14 @@ def summary_values():
     if ifc_res and ifc_res.get("area"):
         area_val = ifc_res["area"].rounded_area_m2
         storeys = ifc_res["area"].storeys
+    buildings = (ifc_res or {}).get("buildings") or []
+    if len(buildings) < 2:
+        buildings = []
+    measured = [b.height for b in buildings if b.height.height_m is not None]
+    if measured:
+        tallest = max(measured, key=lambda h: h.height_m)
+        height_val = tallest.rounded_height_m
+        vkf_cat = tallest.vkf_category
 
     # Falls keine IFC-Werte, auf manuelle zurückgreifen
     if height_val is None:
@@ -109,8 +242,35 @@ def summary_values():
         "vkf_cat": vkf_cat,
         "area_val": area_val,
         "storeys": storeys,
+        "buildings": buildings,
     }
 
+# Hilfsfunktion: aktuelles Projekt in der lokalen Ablage speichern (Seite "Portfolio")
+def save_to_store() -> str:
+    """Speichert Projektinfos, Höhe/Flächen (IFC oder manuell) und Antworten; gibt die Projektnummer zurück."""
+    from processors.area import AreaResult
+    from processors.height import HeightResult
+    from processors.vkf_rules import height_category
+
+    pi = st.session_state["project_info"]
+    ifc_res = st.session_state["ifc_result"]
+    manual = st.session_state["manual_inputs"]
+    height = ifc_res.get("height")
+    if height is None and manual.get("height_m") is not None:
+        height = HeightResult(ifc_path="", height_m=manual["height_m"], vkf_category=height_category(manual["height_m"]))
+    area = ifc_res.get("area")
+    if area is None and manual.get("building_area_m2") is not None:
+        area = AreaResult(ifc_path="", building_area_m2=manual["building_area_m2"], storeys=[])
+    ProjectStore().save_project(
+        pi.get("number", ""),
+        name=pi.get("name", ""),
+        height=height,
+        area=area,
+        answers=st.session_state["question_answers"],
+        fingerprint=ifc_res.get("fingerprint"),
+    )
+    return pi.get("number", "")
+
 # Tabs anlegen: Projektstart, Fragen, Dashboard (klassische Streamlit-Tabs)
 tab_start, tab_questions, tab_dashboard = st.tabs(["Objektinformationen", "Fragen", "Dashboard"])
 
@@ -183,18 +343,13 @@ with tab_start:
             st.session_state["dashboard_ready"] = True  # Dashboard sofort freischalten
 
             if has_ifc_choice == "Ja" and uploaded_ifc:
-                with st.spinner("IFC wird ausgewertet..."):
-                    st.session_state["ifc_result"] = analyze_ifc(uploaded_ifc)
-                if st.session_state["ifc_result"]["error"]:
-                    st.error(st.session_state["ifc_result"]["error"])
-                else:
-                    st.success("IFC erfolgreich ausgewertet.")
-                    # IFC-Werte als Defaults für manuelle Eingaben setzen
-                    height_val = st.session_state["ifc_result"]["height"].height_m if st.session_state["ifc_result"]["height"] else None
-                    area_val = st.session_state["ifc_result"]["area"].building_area_m2 if st.session_state["ifc_result"]["area"] else None
-                st.session_state["manual_inputs"] = {"height_m": height_val, "building_area_m2": area_val}
+                # Auswertung im Hintergrund; Fortschritt und Abbruch in der Seitenleiste
+                start_analysis(uploaded_ifc)
+                st.session_state["manual_inputs"] = {"height_m": None, "building_area_m2": None}
+                st.rerun()
             else:
                 # Kein IFC: manuelle Felder befüllen
+                cancel_analysis()
                 st.session_state["ifc_result"] = {"height": None, "area": None, "error": None}
                 st.session_state["manual_inputs"] = {
                     "height_m": manual_height_start,
@@ -202,8 +357,21 @@ with tab_start:
                 }
             st.success("Projekt gestartet.")
 
+    # Ergebnis der letzten Hintergrund-Auswertung
+    if st.session_state["analysis_notice"]:
+        kind, text = st.session_state["analysis_notice"]
+        (st.error if kind == "error" else st.success)(text)
+    # Änderungen gegenüber der zuletzt gespeicherten Revision des Projekts
+    if st.session_state["ifc_result"].get("revision_lines"):
+        with st.expander("Vergleich mit gespeicherter Revision", expanded=True):
+            st.code("\n".join(st.session_state["ifc_result"]["revision_lines"]), language=None)
+
+# Die folgenden Bereiche sind Fragmente: Interaktionen darin (z.B. Antworten
+# speichern) lösen nur einen Rerun des Fragments aus, nicht des ganzen Skripts.
+
 # --- Tab: Fragen und ggf. manuelle Werte ---
-with tab_questions:
+@st.fragment
+def render_questions():
     if not st.session_state.get("project_started"):
         st.warning("Bitte zuerst im Tab 'Projektstart' starten.")
     else:
@@ -248,6 +416,10 @@ with tab_questions:
             }
             # Nach dem Speichern gilt der Stand als bestätigt
             st.session_state["dashboard_ready"] = True
+            st.session_state["answers_saved_notice"] = True
+            # Kacheln und Übersicht neu zeichnen; die IFC-Auswertung wird dabei nicht berührt
+            st.rerun(scope="app")
+        if st.session_state.pop("answers_saved_notice", False):
             st.success("Antworten gespeichert. Dashboard ist freigegeben.")
 
         # Zwischenstand anzeigen
@@ -259,8 +431,10 @@ with tab_questions:
             }
         )
 
+
 # --- Tab: Übersicht/Dashboard ---
-with tab_dashboard:
+@st.fragment
+def render_dashboard():
     if not st.session_state.get("project_started"):
         st.info("Bitte zuerst im Tab 'Projektstart' starten.")
     else:
@@ -268,9 +442,6 @@ with tab_dashboard:
         if not st.session_state.get("dashboard_ready"):
             st.warning("Fragen noch nicht bestätigt. Werte können unvollständig sein.")
 
-        summary = summary_values()
-        storeys = summary["storeys"]
-
         # Antworten nach Kategorien als Karten anzeigen (Objektinfos werden oben angezeigt)
         grouped_answers: dict[str, list[tuple[str, str, str]]] = {}
         for q in DEFAULT_QUESTIONS:
@@ -297,8 +468,93 @@ with tab_dashboard:
                     unsafe_allow_html=True,
                 )
 
+        # Raumflächen aus dem IFC neu gruppieren (nur dieses Fragment läuft neu)
+        area = st.session_state["ifc_result"].get("area")
+        if area is not None and area.spaces is not None and len(area.spaces):
+            from processors.space_table import DIMENSION_LABELS, DIMENSIONS
+
+            st.markdown("**Raumflächen nach Geschoss, Nutzung und Zone**")
+            by = st.multiselect(
+                "Gruppieren nach",
+                DIMENSIONS,
+                default=["building", "storey", "usage"] if len(area.spaces.buildings) > 1 else ["storey", "usage"],
+                format_func=DIMENSION_LABELS.get,
+                key="area_breakdown_by",
+            )
+            table = area.spaces.aggregate(by)
+            st.dataframe(
+                {
+                    **{DIMENSION_LABELS[d]: table[d] for d in by},
+                    "Fläche aus Mengen [m²]": table["area_m2"].round(1),
+                    "Räume": table["spaces"],
+                    "davon ohne Fläche": table["spaces_without_area"],
+                },
+                hide_index=True,
+            )
+
+        # Brandabschnitte (Zonen/Raumbegrenzungen) mit Prüfung gegen den Flächengrenzwert
+        compartments = st.session_state["ifc_result"].get("compartments")
+        if compartments is not None and compartments.compartments:
+            st.markdown(
+                f"**Brandabschnitte** ({len(compartments.compartments)}, "
+                f"davon {len(compartments.exceeded)} über {compartments.limit_m2:.0f} m²)"
+            )
+            st.dataframe(
+                {
+                    "Brandabschnitt": [c.name for c in compartments.compartments],
+                    "Ermittelt über": [c.method_label for c in compartments.compartments],
+                    "Geschosse": [", ".join(c.storeys) for c in compartments.compartments],
+                    "Fläche aus Mengen [m²]": [round(c.area_m2, 1) for c in compartments.compartments],
+                    "Räume": [c.spaces for c in compartments.compartments],
+                    "Bemerkung": [c.comment for c in compartments.compartments],
+                },
+                hide_index=True,
+            )
+
+        # Fluchtweglängen je Geschoss und die längsten Wege
+        escape_routes = st.session_state["ifc_result"].get("escape_routes")
+        if escape_routes is not None and escape_routes.counts.get("doors"):
+            st.markdown(f"**Fluchtwege** (max. {escape_routes.limit_m:.0f} m bis Treppenhaus/Ausgang)")
+            st.dataframe(
+                {
+                    "Geschoss": [s.storey for s in escape_routes.storeys],
+                    "Längster Weg [m]": [
+                        round(s.max_distance_m, 1) if s.max_distance_m is not None else None for s in escape_routes.storeys
+                    ],
+                    "Raum": [s.worst_space for s in escape_routes.storeys],
+                    "Türen": [s.doors for s in escape_routes.storeys],
+                    "Treppenhäuser": [s.stairs for s in escape_routes.storeys],
+                    "Ausgänge": [s.exits for s in escape_routes.storeys],
+                    "Räume ohne Weg": [s.unreachable for s in escape_routes.storeys],
+                    "Bemerkung": [s.comment for s in escape_routes.storeys],
+                },
+                hide_index=True,
+            )
+            longest = escape_routes.longest(10)
+            if longest:
+                with st.expander("Längste Fluchtwege"):
+                    st.dataframe(
+                        {
+                            "Geschoss": [row[0] for row in longest],
+                            "Raum": [row[1] for row in longest],
+                            "Weglänge [m]": [round(row[2], 1) for row in longest],
+                            "Ziel": [row[3] for row in longest],
+                        },
+                        hide_index=True,
+                    )
+
+        # Projekt für Portfolio-Abfragen über alle Projekte ablegen (gleiche Nummer wird ersetzt)
+        if st.button("Im Portfolio speichern"):
+            try:
+                number = save_to_store()
+                st.success(f"Projekt {number} im Portfolio gespeichert.")
+            except Exception as exc:
+                st.error(f"Speichern fehlgeschlagen: {exc}")
+
+
 # Oberer Bereich: Kernübersicht direkt unter dem Untertitel, immer sichtbar (wenn Projekt gestartet)
-with summary_container:
+@st.fragment
+def render_summary():
     st.markdown("---")
     st.header("Objektinformationen")
     if not st.session_state.get("project_started"):
@@ -323,13 +579,49 @@ with summary_container:
             st.metric("VKF-Kategorie (aus Höhe)", vkf_cat or "n/a")
             # Gesamtfläche wird hier nicht mehr gezeigt; stattdessen die Geschossflächen unten
 
+        # Mehrere Gebäude: Höhe, Kategorie und Fläche je Gebäude, Geschosse mit Gebäude
+        buildings = summary.get("buildings") or []
+        if buildings:
+            from processors.vkf_rules import small_building_comment
+
+            st.markdown(f"**Gebäude** ({len(buildings)}, Höhe/Kategorie oben: höchstes Gebäude)")
+            st.table(
+                {
+                    "Gebäude": [b.name for b in buildings],
+                    "Höhe [m]": [b.height.rounded_height_m for b in buildings],
+                    "VKF-Kategorie": [b.height.vkf_category for b in buildings],
+                    "Fläche [m²]": [b.area.rounded_area_m2 for b in buildings],
+                    "VKF (Fläche)": [small_building_comment(b.area.building_area_m2) for b in buildings],
+                    "Geschosse": [len(b.area.storeys) for b in buildings],
+                }
+            )
+            st.markdown("**Geschossflächen (je Gebäude und Geschoss)**")
+            st.table(
+                {
+                    "Gebäude": [b.name for b in buildings for _ in b.area.storeys],
+                    "Geschoss": [s.name or "<ohne Name>" for b in buildings for s in b.area.storeys],
+                    "Fläche [m²]": [round(s.area_m2, 3) for b in buildings for s in b.area.storeys],
+                    "Quelle": [s.method_label for b in buildings for s in b.area.storeys],
+                }
+            )
         # Geschossflächen je Geschoss anzeigen, falls vorhanden
         storeys = summary.get("storeys") or []
-        if storeys:
+        if storeys and not buildings:
             st.markdown("**Geschossflächen (je Geschoss)**")
             st.table(
                 {
                     "Geschoss": [s.name or "<ohne Name>" for s in storeys],
                     "Fläche [m²]": [round(s.area_m2, 3) for s in storeys],
+                    "Quelle": [s.method_label for s in storeys],
                 }
             )
+
+
+with tab_questions:
+    render_questions()
+
+with tab_dashboard:
+    render_dashboard()
+
+with summary_container:
+    render_summary()
@@ -0,0 +1,308 @@
+"""
+Batch-Auswertung vieler IFC-Modelle ohne Rückfragen.
+
+Nutzung (im Projekt-Root):
+    python3 run.py --batch "/Pfad/zu/Modellen" --answers antworten.json --out-dir Exporte
+    python3 run.py --batch "/Pfad/zu/Modellen/*.ifc" --answers antworten.csv --jobs 4 --timeout 1800 --max-memory-mb 4096
+
+Jedes Modell läuft in einem eigenen Prozess; Absturz, Zeitüberschreitung oder
+überschrittenes Speicherlimit betrifft nur dieses Modell. Pro Modell wird eine JSON-Zeile ausgegeben, sobald
+es fertig ist, und eine Excel-Datei <Projektnummer>.xlsx geschrieben. Mit
+workbook (run.py --workbook) landen stattdessen alle Projekte als eigene
+Blätter in einer Datei; sie wird im Hauptprozess einmal gestreamt geschrieben.
+Mit store (run.py --store) werden alle Ergebnisse am Ende in einer Transaktion
+in der Projektablage (processors/store.py) gespeichert.
+
+Antwortdatei (nach Projektnummer):
+    JSON: {"P123": {"qs_level": "QS2", ...}, ...} oder [{"project_number": "P123", ...}, ...]
+    CSV:  Spalte project_number (oder Projektnummer), weitere Spalten je Frage
+Spalten/Felder dürfen Question.key oder Question.excel_header heissen. Ein
+optionales Feld "ifc" ordnet eine Datei explizit zu; sonst gilt der Dateiname
+ohne Endung als Projektnummer (bzw. der längste passende Präfix).
+"""
+from __future__ import annotations
+
+import csv
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable, Optional, TextIO
+
+from processors.worker import WorkerOutcome, WorkerPool
+from questions import DEFAULT_QUESTIONS, Question, answers_for_excel
+
+PROJECT_FIELDS = ("project_number", "Projektnummer", "number")
+
+
+def find_ifc_files(source: str) -> list[str]:
+    """Alle IFC-Dateien in einem Ordner (rekursiv) oder passend zu einem Glob-Muster."""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*.ifc")
+        files = glob.glob(pattern, recursive=True) + glob.glob(pattern[:-3] + "IFC", recursive=True)
+    else:
+        files = glob.glob(source, recursive=True)
+    return sorted({os.path.abspath(f) for f in files if os.path.isfile(f)})
+
+
+def _normalize_answers(raw: dict, questions: Iterable[Question] = DEFAULT_QUESTIONS) -> dict[str, str]:
+    """Akzeptiert Question.key oder Question.excel_header als Feldname."""
+    answers: dict[str, str] = {}
+    for question in questions:
+        value = raw.get(question.key, raw.get(question.excel_header))
+        if value is None or str(value).strip() == "":
+            value = question.default
+        answers[question.key] = str(value).strip()
+    for extra in ("usage", "construction_type", "ifc"):
+        if raw.get(extra):
+            answers[extra] = str(raw[extra]).strip()
+    return answers
+
+
+def load_answers(path: Optional[str]) -> dict[str, dict[str, str]]:
+    """Liest die Antwortdatei (JSON oder CSV) und liefert Antworten je Projektnummer."""
+    if not path:
+        return {}
+
+    records: list[dict] = []
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            records = list(csv.DictReader(fh))
+    else:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if isinstance(data, dict):
+            records = [{"project_number": number, **values} for number, values in data.items()]
+        else:
+            records = list(data)
+
+    by_project: dict[str, dict[str, str]] = {}
+    for record in records:
+        number = next((str(record[f]).strip() for f in PROJECT_FIELDS if record.get(f)), "")
+        if not number:
+            continue
+        by_project[number] = _normalize_answers(record)
+    return by_project
+
+
+def match_project(ifc_path: str, answers: dict[str, dict[str, str]]) -> tuple[str, dict[str, str]]:
+    """Ordnet eine IFC-Datei einer Projektnummer zu (explizit über "ifc", Dateiname oder Präfix)."""
+    name = os.path.basename(ifc_path)
+    stem = Path(ifc_path).stem
+    for number, values in answers.items():
+        if values.get("ifc") and os.path.basename(values["ifc"]) == name:
+            return number, values
+    if stem in answers:
+        return stem, answers[stem]
+    prefixes = [n for n in answers if stem.startswith(n)]
+    if prefixes:
+        number = max(prefixes, key=len)
+        return number, answers[number]
+    return stem, _normalize_answers({})
+
+
+def analyze_model(task: dict) -> dict:
+    """Wertet ein Modell aus und schreibt die Excel-Datei (läuft im Worker-Prozess)."""
+    from processors.cache import ResultCache
+    from processors.ifc_loader import IfcLoader
+    from processors.pipeline import AnalysisService
+    from excel import build_rows, summary_row, write_result_to_excel
+
+    cache = ResultCache() if task["use_cache"] else None
+    loader = IfcLoader(
+        mode=task.get("loader_mode", "full"),
+        max_bytes=task.get("max_bytes"),
+        max_seconds=task.get("max_load_seconds"),
+    )
+    analysis = AnalysisService(loader=loader, cache=cache).compute_from_path(task["path"], extra_answers=task["answers"])
+
+    extra_columns = answers_for_excel(task["answers"], DEFAULT_QUESTIONS)
+    extra_columns.setdefault("Nutzung", task["answers"].get("usage", "-"))
+    extra_columns.setdefault("Bauweise", task["answers"].get("construction_type", "-"))
+    sheet = None
+    if task.get("workbook"):
+        # Blatt wird im Hauptprozess in die gemeinsame Arbeitsmappe geschrieben
+        excel_path = task["workbook"]
+        sheet = {
+            "rows": build_rows(analysis.height, analysis.area, extra_columns, analysis.buildings),
+            "summary": summary_row(task["project"], analysis.height, analysis.area, analysis.buildings),
+        }
+    else:
+        excel_path = os.path.join(task["out_dir"], f"{task['project']}.xlsx")
+        write_result_to_excel(
+            analysis.height, analysis.area, excel_path, extra_columns=extra_columns, buildings=analysis.buildings
+        )
+
+    return {
+        "excel_sheet": sheet,
+        "height_m": analysis.height.height_m,
+        "vkf_category": analysis.height.vkf_category,
+        "building_area_m2": analysis.area.building_area_m2,
+        "storeys": [asdict(s) for s in analysis.area.storeys],
+        "buildings": [
+            {
+                "name": b.name,
+                "height_m": b.height.height_m,
+                "vkf_category": b.height.vkf_category,
+                "building_area_m2": b.area.building_area_m2,
+                "storeys": [asdict(s) for s in b.area.storeys],
+            }
+            for b in analysis.buildings
+        ],
+        "excel_path": excel_path,
+        "cached": analysis.cached,
+        "timings": analysis.timings,
+        "counts": analysis.counts,
+        "load_mb_per_s": None if analysis.load is None else analysis.load.mb_per_s,
+    }
+
+
+def _store_entry(task: dict, record: dict) -> dict:
+    """Argumente für ProjectStore.save_project aus dem Ergebnis eines Modells."""
+    from processors.area import AreaResult
+    from processors.height import HeightResult
+
+    return {
+        "number": task["project"],
+        "height": HeightResult(
+            ifc_path=task["path"],
+            height_m=record.get("height_m"),
+            vkf_category=record.get("vkf_category", "n/a"),
+        ),
+        "area": AreaResult.from_dict(
+            {"ifc_path": task["path"], "building_area_m2": record.get("building_area_m2"), "storeys": record.get("storeys")}
+        ),
+        "answers": {k: v for k, v in task["answers"].items() if k != "ifc"},
+    }
+
+
+def run_batch(
+    source: str,
+    answers_path: Optional[str] = None,
+    out_dir: str = "batch_output",
+    jobs: Optional[int] = None,
+    timeout: Optional[float] = None,
+    memory_limit_mb: Optional[float] = None,
+    use_cache: bool = True,
+    loader_mode: str = "full",
+    workbook: Optional[str] = None,
+    store: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    max_load_seconds: Optional[float] = None,
+    out: TextIO = sys.stdout,
+    log: TextIO = sys.stderr,
+) -> int:
+    """
+    Wertet alle Modelle aus und schreibt je Modell eine JSON-Zeile nach out.
+    Gibt die Anzahl fehlgeschlagener Modelle zurück (inkl. über dem Grössenbudget);
+    Modelle/min und MB/s in der Schlusszeile zählen nur erfolgreiche Modelle.
+
+    workbook: Pfad einer gemeinsamen Excel-Datei für alle Projekte (je Projekt
+    ein Blatt, Blatt "Übersicht"); sonst eine Datei je Projekt in out_dir.
+    store: Pfad der Projektablage ("" = Standardpfad, None = nicht speichern).
+    max_bytes / max_load_seconds: Budgets je Modell für das Laden (siehe IfcLoader);
+    zu grosse Dateien scheitern ohne eigenen Prozess.
+    timeout / memory_limit_mb: Zeit- und Speicherlimit je Prozess (siehe WorkerPool);
+    jede JSON-Zeile nennt den Spitzen-RSS des Modells (peak_rss_mb).
+    """
+    files = find_ifc_files(source)
+    if not files:
+        print(f"Keine IFC-Dateien gefunden: {source}", file=log)
+        return 0
+
+    answers = load_answers(answers_path)
+    book = None
+    if workbook:
+        from excel import ProjectWorkbook
+
+        book = ProjectWorkbook(workbook)
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+
+    tasks = []
+    for path in files:
+        project, project_answers = match_project(path, answers)
+        tasks.append(
+            {
+                "path": path,
+                "project": project,
+                "answers": project_answers,
+                "out_dir": out_dir,
+                "use_cache": use_cache,
+                "loader_mode": loader_mode,
+                "workbook": workbook,
+                "size_bytes": os.path.getsize(path),
+                "max_bytes": max_bytes,
+                "max_load_seconds": max_load_seconds,
+            }
+        )
+
+    # Zu grosse Dateien scheitern sofort, ohne Worker-Prozess
+    from processors.ifc_loader import LoadBudgetExceeded, check_size
+
+    rejected = []
+    for task in list(tasks):
+        try:
+            check_size(task["size_bytes"], max_bytes)
+        except LoadBudgetExceeded as exc:
+            tasks.remove(task)
+            rejected.append((task, WorkerOutcome("error", error=f"{type(exc).__name__}: {exc}")))
+
+    skipped = {task["path"] for task, _outcome in rejected}
+
+    pool = WorkerPool(max_workers=jobs, timeout=timeout, memory_limit_mb=memory_limit_mb)
+    print(f"{len(tasks)} Modelle, {pool.max_workers} parallele Prozesse", file=log)
+    if rejected:
+        print(f"{len(rejected)} Modelle über dem Grössenbudget werden übersprungen", file=log)
+
+    stored: list[dict] = []
+    started = time.perf_counter()
+    ok = failed = 0
+    ok_bytes = 0  # Durchsatz nur aus erfolgreich ausgewerteten Modellen
+    for task, outcome in itertools.chain(rejected, pool.imap_unordered(analyze_model, tasks)):
+        record = {
+            "project": task["project"],
+            "ifc_path": task["path"],
+            "size_mb": round(task["size_bytes"] / 1e6, 3),
+            "status": outcome.status,
+            "seconds": round(outcome.seconds, 3),
+            "peak_rss_mb": None if outcome.peak_rss_mb is None else round(outcome.peak_rss_mb, 1),
+        }
+        if outcome.ok:
+            ok += 1
+            ok_bytes += task["size_bytes"]
+            record.update(outcome.value)
+            sheet = record.pop("excel_sheet", None)
+            if book is not None and sheet is not None:
+                record["excel_sheet"] = book.add_rows(task["project"], sheet["rows"], sheet["summary"])
+            if store is not None:
+                stored.append(_store_entry(task, record))
+        else:
+            if task["path"] not in skipped:  # Grössenbudget separat gezählt
+                failed += 1
+            record["error"] = outcome.error
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    if stored:
+        from processors.store import ProjectStore
+
+        project_store = ProjectStore(store or None)
+        project_store.save_many(stored)
+        print(f"{len(stored)} Projekte in der Projektablage gespeichert: {project_store.path}", file=log)
+
+    if book is not None and book.projects:
+        book.save()
+        print(f"{book.projects} Projekte in {workbook} geschrieben", file=log)
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(
+        f"Fertig: {ok} ok, {failed} fehlgeschlagen, {len(rejected)} über dem Grössenbudget in {elapsed:.1f} s "
+        f"({ok / elapsed * 60:.1f} Modelle/min, {ok_bytes / 1e6 / elapsed:.2f} MB/s, nur erfolgreiche)",
+        file=log,
+    )
+    return failed + len(rejected)
@@ -0,0 +1,63 @@
+"""
+Misst, wie BuildingAreaCalculator mit der Anzahl Räume skaliert.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_area_scaling.py
+    python3 benchmarks/bench_area_scaling.py --sizes 1000 10000 50000 --repeat 5
+
+Je Grösse wird ein synthetisches Modell erzeugt (benchmarks/ifc_generator.py,
+10 Geschosse) und in beiden Lademodi ausgewertet. Gemessen wird
+compute_storey_areas() inkl. Aufbau der Indizes (bestes von --repeat Läufen,
+jeweils mit frisch geladenem Modell, Laden selbst wird nicht gemessen). Bei linearem Verhalten bleibt µs/Raum konstant.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ifc_generator import ModelSpec, write_model  # noqa: E402
+from processors.area import BuildingAreaCalculator  # noqa: E402
+from processors.ifc_loader import IfcLoader  # noqa: E402
+
+STOREYS = 10
+
+
+def best_of(repeat: int, path: str, mode: str) -> float:
+    """Bestes Ergebnis; das Modell wird je Lauf neu geladen (Laden wird nicht gemessen)."""
+    best = float("inf")
+    for _ in range(repeat):
+        model = IfcLoader(mode=mode).load(path)
+        start = time.perf_counter()
+        BuildingAreaCalculator(model).compute_storey_areas()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Skalierung der Flächenberechnung mit der Anzahl Räume.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 20000], help="Anzahl Räume")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Räume':>8} {'Modus':>6} {'Zeit [s]':>10} {'µs/Raum':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_spaces in args.sizes:
+            spec = ModelSpec(storeys=STOREYS, spaces_per_storey=max(1, n_spaces // STOREYS))
+            path = write_model(spec, os.path.join(tmp, f"area_{n_spaces}.ifc"))
+            for mode in ("full", "fast"):
+                model = IfcLoader(mode=mode).load(path)
+                storeys = BuildingAreaCalculator(model).compute_storey_areas()
+                total = sum(s.area_m2 for s in storeys)
+                assert abs(total - spec.expected_area_m2) < 1e-6, (total, spec.expected_area_m2)
+
+                seconds = best_of(args.repeat, path, mode)
+                print(f"{spec.n_spaces:>8} {mode:>6} {seconds:>10.3f} {seconds / spec.n_spaces * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
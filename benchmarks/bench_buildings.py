@@ -0,0 +1,119 @@
+"""
+Misst die Aufteilung nach Gebäude (processors/buildings.py) für Areale mit
+vielen IfcBuilding.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_buildings.py
+    python3 benchmarks/bench_buildings.py --buildings 1 10 100 --storeys 6 --spaces 200 --repeat 5
+
+Je Stufe wird ein synthetisches Modell erzeugt (benchmarks/ifc_generator.py)
+mit --buildings Gebäuden zu je --storeys Geschossen und --spaces Räumen je
+Geschoss; Gebäude k steht k × TERRAIN_STEP_M höher (Hanglage), damit die
+Höhe über alle Geschosse nicht der Gebäudehöhe entspricht. Gemessen werden
+(bestes von --repeat, Laden und Raumtabelle nicht gemessen):
+- vektor:   BuildingService.compute() (ein Durchgang über die Raumtabelle)
+- je Geb.:  Maske und Teiltabelle je Gebäude in einer Schleife (Vergleich)
+Endet mit Exit-Code 1, wenn Höhe oder Fläche eines Gebäudes nicht den
+erwarteten Werten entspricht, beide Varianten verschiedene Flächen liefern
+oder µs/Raum der grössten Stufe mehr als --max-growth mal so hoch ist wie
+bei der kleinsten.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ifc_generator import SPACE_AREA_M2, ModelSpec, write_model  # noqa: E402
+from processors.area import AreaService  # noqa: E402
+from processors.buildings import BuildingService  # noqa: E402
+from processors.height import HeightService  # noqa: E402
+from processors.ifc_loader import IfcLoader  # noqa: E402
+
+TERRAIN_STEP_M = 1.5
+
+
+def best_of(repeat: int, fn):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def per_building_loop(table) -> list[float]:
+    """Fläche aus Mengen je Gebäude über eine Maske je Gebäude (O(Gebäude × Räume))."""
+    areas = []
+    building = table.building
+    for i in range(len(table.buildings)):
+        spaces = table.select(building == i)
+        areas.append(float(np.nansum(spaces.area_m2)))
+    return areas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aufteilung nach Gebäude für Areale.")
+    parser.add_argument("--buildings", type=int, nargs="+", default=[1, 10, 50], help="Gebäude je Modell")
+    parser.add_argument("--storeys", type=int, default=4, help="Geschosse je Gebäude")
+    parser.add_argument("--spaces", type=int, default=50, help="Räume je Geschoss")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-growth", type=float, default=3.0, help="Erlaubter Anstieg von µs/Raum")
+    args = parser.parse_args()
+
+    failures: list[str] = []
+    per_space: list[float] = []
+    print(
+        f"{'Gebäude':>8} {'Räume':>8} {'Höhe Areal':>11} {'Höhe Geb.':>10} "
+        f"{'vektor [s]':>11} {'je Geb. [s]':>12} {'µs/Raum':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.buildings:
+            spec = ModelSpec(
+                storeys=args.storeys, spaces_per_storey=args.spaces, buildings=n, terrain_step_m=TERRAIN_STEP_M
+            )
+            path = write_model(spec, os.path.join(tmp, f"buildings_{n}.ifc"))
+            model = IfcLoader().load(path)
+            height = HeightService().compute_from_ifc(model, path)
+            area = AreaService(geometry_fallback=False).compute_from_ifc(model, path)
+
+            service = BuildingService()
+            t_vector, buildings = best_of(args.repeat, lambda: service.compute(height, area))
+            t_loop, loop_areas = best_of(args.repeat, lambda: per_building_loop(area.spaces))
+
+            expected_area = spec.storeys * spec.spaces_per_storey * SPACE_AREA_M2
+            if len(buildings) != n:
+                failures.append(f"{spec.label}: {len(buildings)} statt {n} Gebäude")
+            for b in buildings:
+                if b.height.height_m is None or abs(b.height.height_m - spec.expected_height_m) > 1e-6:
+                    failures.append(f"{spec.label}/{b.name}: Höhe {b.height.height_m} statt {spec.expected_height_m}")
+                if b.area.building_area_m2 is None or abs(b.area.building_area_m2 - expected_area) > 1e-6:
+                    failures.append(f"{spec.label}/{b.name}: Fläche {b.area.building_area_m2} statt {expected_area}")
+            if not np.allclose([b.area.building_area_m2 or 0.0 for b in buildings], loop_areas):
+                failures.append(f"{spec.label}: Flächen je Gebäude weichen von der Schleife ab")
+            if height.height_m is None or abs(height.height_m - spec.expected_site_height_m) > 1e-6:
+                failures.append(f"{spec.label}: Höhe über alle Geschosse {height.height_m} statt {spec.expected_site_height_m}")
+
+            us = t_vector / spec.n_spaces * 1e6
+            per_space.append(us)
+            print(
+                f"{n:>8} {spec.n_spaces:>8} {height.height_m:>11.1f} {spec.expected_height_m:>10.1f} "
+                f"{t_vector:>11.4f} {t_loop:>12.4f} {us:>9.2f}"
+            )
+
+    if len(per_space) > 1 and per_space[-1] > args.max_growth * per_space[0]:
+        failures.append(f"{per_space[-1]:.2f} µs/Raum gegenüber {per_space[0]:.2f} µs/Raum (nicht linear)")
+    for message in failures:
+        print(f"[FEHLER] {message}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Misst, wie die Brandabschnitts-Erkennung (processors/compartments.py) mit der
+Anzahl Räume je Geschoss skaliert.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_compartments.py
+    python3 benchmarks/bench_compartments.py --sizes 1000 5000 20000 --columns 10 --repeat 5
+
+Je Grösse wird ein synthetisches Modell mit STOREYS Geschossen erzeugt
+(benchmarks/ifc_generator.py): Räume im Raster, Wände mit Raumbegrenzungen
+zwischen Nachbarräumen und nach je --columns Rasterspalten eine Brandwand.
+Gemessen wird CompartmentService.compute_from_ifc() bei vorhandener
+Raumtabelle (bestes von --repeat, Laden nicht gemessen). Bei nahezu linearem
+Verhalten bleibt µs/Raum konstant. Endet mit Exit-Code 1, wenn die Anzahl
+Brandabschnitte nicht der erwarteten entspricht oder µs/Raum der grössten
+Stufe mehr als --max-growth mal so hoch ist wie bei der kleinsten.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ifc_generator import ModelSpec, write_model  # noqa: E402
+from processors.area import BuildingAreaCalculator  # noqa: E402
+from processors.compartments import CompartmentService  # noqa: E402
+from processors.ifc_loader import IfcLoader  # noqa: E402
+
+STOREYS = 2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Skalierung der Brandabschnitts-Erkennung.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000], help="Räume je Geschoss")
+    parser.add_argument("--columns", type=int, default=8, help="Rasterspalten je Brandabschnitt")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-growth", type=float, default=3.0, help="Erlaubter Anstieg von µs/Raum")
+    args = parser.parse_args()
+
+    failures: list[str] = []
+    per_space: dict[str, list[float]] = {"full": [], "fast": []}
+    print(f"{'Räume':>8} {'Begrenzungen':>13} {'Abschnitte':>11} {'Modus':>6} {'Zeit [s]':>10} {'µs/Raum':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            spec = ModelSpec(storeys=STOREYS, spaces_per_storey=size, boundaries=True, compartment_columns=args.columns)
+            path = write_model(spec, os.path.join(tmp, f"compartments_{size}.ifc"))
+            for mode in ("full", "fast"):
+                model = IfcLoader(mode=mode).load(path)
+                spaces = BuildingAreaCalculator(model, geometry_fallback=False).space_table()
+                best, result = float("inf"), None
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    result = CompartmentService().compute_from_ifc(model, path, spaces=spaces)
+                    best = min(best, time.perf_counter() - start)
+                found = len(result.compartments)
+                if found != spec.expected_compartments:
+                    failures.append(f"{spec.label}/{mode}: {found} statt {spec.expected_compartments} Brandabschnitte")
+                us = best / spec.n_spaces * 1e6
+                per_space[mode].append(us)
+                print(
+                    f"{spec.n_spaces:>8} {result.counts.get('boundaries', 0):>13} {found:>11} "
+                    f"{mode:>6} {best:>10.3f} {us:>10.1f}"
+                )
+
+    for mode, values in per_space.items():
+        if len(values) > 1 and values[-1] > args.max_growth * values[0]:
+            failures.append(f"{mode}: {values[-1]:.1f} µs/Raum gegenüber {values[0]:.1f} µs/Raum (nicht linear)")
+    for message in failures:
+        print(f"[FEHLER] {message}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
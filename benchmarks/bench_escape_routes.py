@@ -0,0 +1,112 @@
+"""
+Misst, wie die Fluchtweg-Analyse (processors/escape_routes.py) mit der Anzahl
+Räume je Geschoss skaliert, mit einem und mit mehreren Threads (für die
+Raumgrundrisse; die Wegsuche läuft je Geschoss nacheinander).
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_escape_routes.py
+    python3 benchmarks/bench_escape_routes.py --sizes 1000 5000 20000 --storeys 8 --threads 4
+
+Je Grösse wird ein synthetisches Modell erzeugt (benchmarks/ifc_generator.py,
+--doors): Räume im Raster mit einer Tür in jeder Wand zwischen Nachbarräumen,
+je Geschoss eine Treppe im ersten Raum und im untersten Geschoss ein Ausgang.
+Gemessen wird EscapeRouteService.compute_from_ifc() bei vorhandener
+Raumtabelle (bestes von --repeat, Laden nicht gemessen). Jede Weglänge muss
+zwischen der Luftlinie und dem Weg entlang der Rasterachsen zum nächsten Ziel
+liegen. Endet mit Exit-Code 1, wenn ein Raum ohne Weg bleibt, eine Weglänge
+ausserhalb dieser Grenzen liegt oder µs/Raum der grössten Stufe mehr als
+--max-growth mal so hoch ist wie bei der kleinsten.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ifc_generator import SPACE_SIZE_M, ModelSpec, write_model  # noqa: E402
+from processors.area import BuildingAreaCalculator  # noqa: E402
+from processors.escape_routes import EscapeRouteService  # noqa: E402
+from processors.ifc_loader import IfcLoader  # noqa: E402
+from processors.worker import default_worker_count  # noqa: E402
+
+
+def check_bounds(spec: ModelSpec, result, label: str) -> list[str]:
+    """Weglänge je Raum gegen Luftlinie (untere) und Rasterweg (obere Grenze) zum nächsten Ziel."""
+    table = result.spaces
+    failures = []
+    unreachable = int(np.isnan(result.distance_m).sum())
+    if unreachable:
+        failures.append(f"{label}: {unreachable} Räume ohne Fluchtweg")
+    xy = np.array([spec.space_xy(j) for j in range(spec.spaces_per_storey)])
+    half = SPACE_SIZE_M / 2
+    stair = np.array(spec.stair_xy)
+    exit_door = np.array(spec.exit_xy)
+    # Luftlinie bis zur nächsten Tür des Treppenhauses bzw. zur Ausgangstür
+    lower = np.maximum(np.hypot(*(xy - stair).T) - half * np.sqrt(2), 0.0)
+    upper = np.maximum(np.abs(xy - stair).sum(axis=1) - half, 0.0)
+    exit_lower = np.hypot(*(xy - exit_door).T)
+    exit_upper = np.abs(xy - exit_door).sum(axis=1) + half
+    local = np.arange(len(table)) % spec.spaces_per_storey
+    ground = table.storey == 0
+    low = np.where(ground, np.minimum(lower[local], exit_lower[local]), lower[local])
+    high = np.where(ground, np.minimum(upper[local], exit_upper[local]), upper[local])
+    wrong = (result.distance_m < low - 1e-6) | (result.distance_m > high + 1e-6)
+    if wrong.any():
+        row = int(np.flatnonzero(wrong)[0])
+        failures.append(
+            f"{label}: {int(wrong.sum())} Weglängen ausserhalb der Grenzen, z.B. {table.name[row]} "
+            f"{result.distance_m[row]:.2f} m nicht in [{low[row]:.2f}, {high[row]:.2f}]"
+        )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Skalierung der Fluchtweg-Analyse.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000], help="Räume je Geschoss")
+    parser.add_argument("--storeys", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=default_worker_count())
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-growth", type=float, default=3.0, help="Erlaubter Anstieg von µs/Raum")
+    args = parser.parse_args()
+
+    failures: list[str] = []
+    per_space: list[float] = []
+    print(f"{'Räume':>8} {'Türen':>8} {'Threads':>8} {'Zeit [s]':>10} {'µs/Raum':>10} {'max. Weg [m]':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            spec = ModelSpec(storeys=args.storeys, spaces_per_storey=size, boundaries=True, doors=True)
+            path = write_model(spec, os.path.join(tmp, f"escape_{size}.ifc"))
+            model = IfcLoader().load(path)
+            spaces = BuildingAreaCalculator(model, geometry_fallback=False).space_table()
+            for threads in sorted({1, args.threads}):
+                best, result = float("inf"), None
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    result = EscapeRouteService(threads=threads).compute_from_ifc(model, path, spaces=spaces)
+                    best = min(best, time.perf_counter() - start)
+                failures.extend(check_bounds(spec, result, f"{spec.label}/{threads} Threads"))
+                us = best / spec.n_spaces * 1e6
+                if threads == args.threads:
+                    per_space.append(us)
+                longest = max((s.max_distance_m or 0.0) for s in result.storeys)
+                print(
+                    f"{spec.n_spaces:>8} {result.counts.get('doors', 0):>8} {threads:>8} "
+                    f"{best:>10.3f} {us:>10.1f} {longest:>13.1f}"
+                )
+
+    if len(per_space) > 1 and per_space[-1] > args.max_growth * per_space[0]:
+        failures.append(f"{per_space[-1]:.1f} µs/Raum gegenüber {per_space[0]:.1f} µs/Raum (nicht linear)")
+    for message in failures:
+        print(f"[FEHLER] {message}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
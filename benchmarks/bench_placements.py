@@ -0,0 +1,55 @@
+"""
+Misst das Auflösen aller IfcLocalPlacement mit PlacementResolver.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_placements.py
+    python3 benchmarks/bench_placements.py --sizes 10000 50000 --repeat 5
+
+Je Grösse wird ein synthetisches Modell erzeugt (benchmarks/ifc_generator.py,
+10 Geschosse, eine Placement je Raum) und in beiden Lademodi ausgewertet.
+Gemessen wird resolve_all() mit frischem Resolver (bestes von --repeat).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ifc_generator import ModelSpec, write_model  # noqa: E402
+from processors.ifc_loader import IfcLoader  # noqa: E402
+from processors.placement import PlacementResolver  # noqa: E402
+
+STOREYS = 10
+
+
+def best_of(repeat: int, model) -> tuple[float, int]:
+    best, count = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = PlacementResolver(model).resolve_all()
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Laufzeit von PlacementResolver.resolve_all().")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Anzahl Räume")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Placements':>10} {'Modus':>6} {'Zeit [s]':>10} {'µs/Placement':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_spaces in args.sizes:
+            spec = ModelSpec(storeys=STOREYS, spaces_per_storey=max(1, n_spaces // STOREYS))
+            path = write_model(spec, os.path.join(tmp, f"placements_{n_spaces}.ifc"))
+            for mode in ("full", "fast"):
+                seconds, count = best_of(args.repeat, IfcLoader(mode=mode).load(path))
+                print(f"{count:>10} {mode:>6} {seconds:>10.3f} {seconds / max(count, 1) * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
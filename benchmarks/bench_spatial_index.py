@@ -0,0 +1,167 @@
+"""
+Vergleicht den räumlichen Index (processors/spatial_index.py) mit der
+paarweisen Prüfung aller Raumgrundrisse (brute force).
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_spatial_index.py
+    python3 benchmarks/bench_spatial_index.py --sizes 500 2000 8000 --storeys 3 --repeat 5
+
+Je Grösse werden STOREYS Geschosse mit Räumen im Raster erzeugt (Rechtecke
+ROOM_X × ROOM_Y mit WALL m Wandstärke dazwischen, direkt als shapely-
+Geometrie, ohne IFC). Gemessen werden (bestes von --repeat):
+- build:     Aufbau des Index (STRtree je Geschoss)
+- points:    Raum je Zufallspunkt (spaces_at) gegen intersects_xy über alle Räume
+- adjacent:  Nachbarpaare (adjacent_pairs) gegen dwithin über alle Raumpaare
+- overlap:   Räume je Bauteil-Rechteck (overlapping) gegen intersects über alle Räume
+Endet mit Exit-Code 1, wenn Index und brute force unterschiedliche Ergebnisse
+liefern, die Anzahl Nachbarpaare nicht der des Rasters entspricht oder der
+Index bei der grössten Stufe langsamer ist als brute force.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processors.spatial_index import WALL_GAP_M, ElevationBands, SpatialIndex  # noqa: E402
+
+ROOM_X, ROOM_Y, WALL = 5.0, 4.0, 0.2
+STOREY_HEIGHT = 3.0
+
+
+def grid(n: int) -> tuple[np.ndarray, int, int]:
+    """n Raumrechtecke im Raster (Spalten × Zeilen) als shapely-Array."""
+    columns = math.ceil(math.sqrt(n))
+    j = np.arange(n)
+    x0 = (j % columns) * (ROOM_X + WALL)
+    y0 = (j // columns) * (ROOM_Y + WALL)
+    return shapely.box(x0, y0, x0 + ROOM_X, y0 + ROOM_Y), columns, math.ceil(n / columns)
+
+
+def expected_pairs(n: int, columns: int) -> int:
+    """Nachbarpaare im Raster: waagrecht, senkrecht und diagonal (Ecken im Abstand WALL·√2 <= WALL_GAP_M)."""
+    j = np.arange(n)
+    col = j % columns
+    right = np.count_nonzero((col + 1 < columns) & (j + 1 < n))
+    up = np.count_nonzero(j + columns < n)
+    diagonal = np.count_nonzero((col + 1 < columns) & (j + columns + 1 < n))
+    anti = np.count_nonzero((col > 0) & (j + columns - 1 < n))
+    return int(right + up + (diagonal + anti if WALL * math.sqrt(2) <= WALL_GAP_M else 0))
+
+
+def best_of(repeat: int, fn):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def brute_points(shapes, storeys, xy, point_storeys) -> np.ndarray:
+    result = np.full(len(xy), -1, dtype=np.int64)
+    for storey in np.unique(point_storeys).tolist():
+        rows = np.flatnonzero(storeys == storey)
+        points = np.flatnonzero(point_storeys == storey)
+        inside = shapely.intersects_xy(shapes[rows][:, None], xy[points, 0][None, :], xy[points, 1][None, :])
+        hit = inside.any(axis=0)
+        result[points[hit]] = rows[inside.argmax(axis=0)[hit]]
+    return result
+
+
+def brute_pairs(shapes, storeys) -> np.ndarray:
+    pairs = []
+    for storey in np.unique(storeys).tolist():
+        rows = np.flatnonzero(storeys == storey)
+        near = shapely.dwithin(shapes[rows][:, None], shapes[rows][None, :], WALL_GAP_M)
+        a, b = np.nonzero(np.triu(near, k=1))
+        pairs.append(np.stack([rows[a], rows[b]], axis=1))
+    return np.concatenate(pairs)
+
+
+def brute_overlap(shapes, storeys, boxes, box_storeys) -> list[np.ndarray]:
+    return [np.flatnonzero((storeys == s) & shapely.intersects(shapes, box)) for box, s in zip(boxes, box_storeys)]
+
+
+def sorted_pairs(pairs: np.ndarray) -> np.ndarray:
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Räumlicher Index gegen paarweise Prüfung.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1000, 4000], help="Räume je Geschoss")
+    parser.add_argument("--storeys", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    failures: list[str] = []
+    speedups: dict[str, float] = {}
+    print(f"{'Räume':>8} {'Abfrage':>9} {'Index [s]':>10} {'brute [s]':>10} {'Faktor':>8} {'Treffer':>9}")
+    for size in args.sizes:
+        per_storey, columns, rows_count = grid(size)
+        shapes = np.concatenate([per_storey] * args.storeys)
+        storeys = np.repeat(np.arange(args.storeys), size)
+        elevations = [i * STOREY_HEIGHT for i in range(args.storeys)]
+        n = len(shapes)
+
+        build, index = best_of(args.repeat, lambda: SpatialIndex(shapes, storeys, ElevationBands(elevations)))
+
+        extent = np.array([columns * (ROOM_X + WALL), rows_count * (ROOM_Y + WALL)])
+        xy = rng.random((n, 2)) * extent
+        z = rng.integers(0, args.storeys, n) * STOREY_HEIGHT + 1.0
+        point_storeys = index.bands.storeys_at(z)
+        centres = rng.random((max(1, n // 10), 2)) * extent
+        boxes = shapely.box(centres[:, 0] - 0.1, centres[:, 1] - 1.0, centres[:, 0] + 0.1, centres[:, 1] + 1.0)
+        box_storeys = rng.integers(0, args.storeys, len(boxes))
+
+        queries = {
+            "points": (
+                lambda: index.spaces_at(xy, z=z),
+                lambda: brute_points(shapes, storeys, xy, point_storeys),
+                np.array_equal,
+                lambda found: int(np.count_nonzero(found >= 0)),
+            ),
+            "adjacent": (
+                lambda: sorted_pairs(index.adjacent_pairs()),
+                lambda: sorted_pairs(brute_pairs(shapes, storeys)),
+                np.array_equal,
+                len,
+            ),
+            "overlap": (
+                lambda: [index.overlapping(box, int(s)) for box, s in zip(boxes, box_storeys)],
+                lambda: brute_overlap(shapes, storeys, boxes, box_storeys),
+                lambda a, b: all(np.array_equal(x, y) for x, y in zip(a, b)),
+                lambda found: sum(len(rows) for rows in found),
+            ),
+        }
+        print(f"{n:>8} {'build':>9} {build:>10.4f} {'':>10} {'':>8} {'':>9}")
+        for name, (indexed, brute, same, count) in queries.items():
+            t_index, found = best_of(args.repeat, indexed)
+            t_brute, reference = best_of(args.repeat, brute)
+            if not same(found, reference):
+                failures.append(f"{n} Räume/{name}: Index und brute force verschieden")
+            hits = count(found)
+            speedups[name] = t_brute / t_index if t_index else float("inf")
+            print(f"{n:>8} {name:>9} {t_index:>10.4f} {t_brute:>10.4f} {speedups[name]:>8.1f} {hits:>9}")
+            if name == "adjacent" and hits != expected_pairs(size, columns) * args.storeys:
+                failures.append(f"{n} Räume: {hits} statt {expected_pairs(size, columns) * args.storeys} Nachbarpaare")
+
+    for name, factor in speedups.items():
+        if factor < 1.0:
+            failures.append(f"{name}: Index bei {args.sizes[-1]} Räumen je Geschoss langsamer als brute force")
+    for message in failures:
+        print(f"[FEHLER] {message}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Misst die Startzeit (Importe) der Einstiegsmodule und prüft, dass schwere
+Abhängigkeiten nur bei Bedarf geladen werden.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_startup.py
+    python3 benchmarks/bench_startup.py --repeat 5 --top 8
+
+Je Modul wird ein frischer Interpreter mit -X importtime gestartet (bestes
+von --repeat). Ausgegeben werden die Importzeit des Moduls, die teuersten
+Unter-Importe und welche schweren Pakete (HEAVY) dabei geladen wurden.
+
+Prüfungen (Exit-Code 1 bei Verstoss):
+- Kein Einstiegsmodul lädt beim Import eines der HEAVY-Pakete.
+- Der manuelle Pfad der App (Projekt ohne IFC, Höhe/Fläche von Hand,
+  Fragen speichern) importiert ifcopenshell nie (streamlit.testing, falls
+  Streamlit installiert ist).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ENTRY_MODULES = (
+    "questions",
+    "processors.pipeline",
+    "processors.store",
+    "excel",
+    "batch",
+    "run",
+)
+HEAVY = ("ifcopenshell", "numpy", "shapely", "pandas", "openpyxl")
+
+
+def measure_import(module: str) -> dict:
+    """Importzeiten (ms) von module in einem frischen Interpreter."""
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # "import time: self [us] | cumulative | imported package"; Unter-Importe stehen
+    # eingerückt vor ihrem Modul, Interpreter-Start (site, ...) davor auf oberster Ebene
+    pending: dict[str, float] = {}
+    children: dict[str, float] = {}
+    total_ms = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        ms = int(cumulative_us) / 1000
+        if name.startswith("  "):
+            pending[name.strip()] = ms
+        elif name.strip() == module:
+            total_ms, children = ms, pending
+        else:
+            pending = {}
+    return {
+        "total_ms": total_ms,
+        "cumulative": children,
+        "heavy": json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def manual_path_imports() -> list[str]:
+    """Schwere Pakete, die der manuelle App-Pfad lädt (läuft im eigenen Interpreter)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60).run()
+    at.text_input[0].input("P-START")
+    at.text_input[1].input("Startzeit")
+    at.radio(key="has_ifc_choice").set_value("Nein").run()
+    at.number_input(key="manual_height_start").set_value(12.5)
+    at.number_input(key="manual_area_start").set_value(800.0)
+    at.button[0].click().run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    if not at.session_state["project_started"]:
+        raise RuntimeError("Projekt wurde nicht gestartet")
+    at.button[1].click().run()  # Fragen speichern (Formular-Button)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return [m for m in HEAVY if m in sys.modules]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importzeiten der Einstiegsmodule.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="Teuerste Unter-Importe je Modul")
+    parser.add_argument("--manual-path", action="store_true", help=argparse.SUPPRESS)  # interner Unterprozess
+    args = parser.parse_args()
+
+    if args.manual_path:
+        print(json.dumps(manual_path_imports()))
+        return
+
+    failures: list[str] = []
+    print(f"{'Modul':<22} {'Import [ms]':>12}  schwere Pakete")
+    for module in ENTRY_MODULES:
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["total_ms"])
+        print(f"{module:<22} {best['total_ms']:>12.1f}  {', '.join(best['heavy']) or '-'}")
+        children = sorted(((ms, name) for name, ms in best["cumulative"].items()), reverse=True)[: args.top]
+        for ms, name in children:
+            print(f"    {name:<36} {ms:>8.1f} ms")
+        if best["heavy"]:
+            failures.append(f"{module} lädt beim Import: {', '.join(best['heavy'])}")
+
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        print("Streamlit nicht installiert: manueller App-Pfad nicht geprüft.")
+    else:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--manual-path"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            failures.append(f"manueller App-Pfad fehlgeschlagen: {proc.stderr.strip().splitlines()[-1:]}")
+        else:
+            loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"Manueller App-Pfad (ohne IFC) lädt: {', '.join(loaded) or '-'}")
+            if "ifcopenshell" in loaded:
+                failures.append("manueller App-Pfad importiert ifcopenshell")
+
+    for message in failures:
+        print(f"[FEHLER] {message}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Misst Speichern und Portfolio-Abfragen der Projektablage (processors/store.py).
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_store.py
+    python3 benchmarks/bench_store.py --projects 50000 --budget-ms 150
+
+Es wird eine temporäre Datenbank mit --projects synthetischen Projekten
+(1-40 Geschosse, zufällige Flächen und Antworten) gefüllt. Danach laufen die
+Abfragen der Portfolio-Seite (Anzahl je Kategorie + eine Seite mit 200
+Projekten) für typische Filter. Überschreitet eine Abfrage --budget-ms,
+endet das Skript mit Exit-Code 1.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processors.area import AreaResult, StoreyArea  # noqa: E402
+from processors.height import HeightResult  # noqa: E402
+from processors.store import ProjectQuery, ProjectStore  # noqa: E402
+from processors.vkf_rules import STOREY_AREA_LIMIT_M2, height_category  # noqa: E402
+
+QUERIES = {
+    "alle": ProjectQuery(),
+    "Hochhaus": ProjectQuery(categories=("Hochhaus",)),
+    f"Geschoss > {STOREY_AREA_LIMIT_M2:.0f} m²": ProjectQuery(min_storey_area_m2=STOREY_AREA_LIMIT_M2),
+    "Antwort qs_level=QS3": ProjectQuery(answers={"qs_level": "QS3"}),
+    "Suche '123'": ProjectQuery(search="123"),
+}
+
+
+def synthetic_projects(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    for i in range(n):
+        storeys = [StoreyArea(f"Geschoss {k}", k * 3.0, rng.uniform(100.0, 1500.0)) for k in range(rng.randint(1, 40))]
+        height_m = (len(storeys) - 1) * 3.0
+        yield {
+            "number": f"P{i:06d}",
+            "name": f"Projekt {i}",
+            "height": HeightResult("modell.ifc", height_m, height_category(height_m)),
+            "area": AreaResult("modell.ifc", sum(s.area_m2 for s in storeys), storeys),
+            "answers": {"qs_level": rng.choice(("QS1", "QS2", "QS3")), "usage": rng.choice(("Wohnen", "Büro"))},
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Projektablage: Speichern und Portfolio-Abfragen.")
+    parser.add_argument("--projects", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=200.0, help="Maximale Zeit je Abfrage")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProjectStore(os.path.join(tmp, "projects.sqlite3"))
+        start = time.perf_counter()
+        store.save_many(synthetic_projects(args.projects))
+        seconds = time.perf_counter() - start
+        print(f"{args.projects} Projekte gespeichert: {seconds:.2f} s ({args.projects / seconds:.0f} Projekte/s)")
+
+        slow = []
+        print(f"{'Abfrage':<28} {'Treffer':>8} {'Zeit [ms]':>10}")
+        for label, filters in QUERIES.items():
+            best, total = float("inf"), 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                total = sum(store.category_counts(filters).values())
+                store.query(filters, order_by="height", limit=200)
+                best = min(best, time.perf_counter() - start)
+            print(f"{label:<28} {total:>8} {best * 1000:>10.1f}")
+            if best * 1000 > args.budget_ms:
+                slow.append(label)
+
+        start = time.perf_counter()
+        store.get_project(f"P{args.projects // 2:06d}")
+        print(f"{'Detail (get_project)':<28} {1:>8} {(time.perf_counter() - start) * 1000:>10.1f}")
+
+    if slow:
+        print(f"Über dem Budget von {args.budget_ms:.0f} ms: {', '.join(slow)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
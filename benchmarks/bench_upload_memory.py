@@ -0,0 +1,83 @@
+"""
+Misst den Spitzen-Speicher (RSS) beim Laden eines Uploads je Strategie.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_upload_memory.py "/Pfad/zum/Modell.ifc"
+
+Jede Strategie läuft in einem eigenen Prozess. Ausgangslage ist wie in der
+App ein Upload, der bereits als io.BytesIO im Speicher liegt (Grösse N).
+Ausgegeben werden RSS vor dem Laden, Spitze danach und die Differenz.
+
+Strategien:
+    tempfile     - bisheriger Weg: getbuffer() -> NamedTemporaryFile -> ifcopenshell.open
+    from_string  - IfcLoader("full").load_source(upload), Puffer direkt an ifcopenshell
+    spool        - wie from_string, aber erzwungen über blockweises Streamen auf die Platte
+    fast         - IfcLoader("fast").load_source(upload), Scanner direkt auf dem Puffer
+"""
+from __future__ import annotations
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STRATEGIES = ("tempfile", "from_string", "spool", "fast")
+
+
+def _rss_peak_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _run_strategy(strategy: str, path: str) -> None:
+    from processors.ifc_loader import IfcLoader
+
+    with open(path, "rb") as fh:
+        upload = io.BytesIO(fh.read())
+    before = _rss_peak_mb()
+    start = time.perf_counter()
+
+    if strategy == "tempfile":
+        loader = IfcLoader()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".ifc") as tmp:
+            tmp.write(upload.getbuffer())
+        try:
+            model = loader.load(tmp.name)
+        finally:
+            os.unlink(tmp.name)
+    elif strategy == "from_string":
+        model = IfcLoader().load_source(upload)
+    elif strategy == "spool":
+        model = IfcLoader(in_memory_limit_bytes=0).load_source(upload)
+    else:
+        model = IfcLoader(mode="fast").load_source(upload)
+    n_spaces = len(model.by_type("IfcSpace"))
+
+    seconds = time.perf_counter() - start
+    peak = _rss_peak_mb()
+    print(f"{strategy:<12} {before:8.1f} {peak:8.1f} {peak - before:8.1f} {seconds:8.2f}  (Räume: {n_spaces})")
+
+
+def main() -> None:
+    if len(sys.argv) >= 3 and sys.argv[1] == "--strategy":
+        _run_strategy(sys.argv[2], sys.argv[3])
+        return
+    if len(sys.argv) < 2:
+        print(__doc__)
+        raise SystemExit(2)
+
+    path = sys.argv[1]
+    print(f"Datei: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"{'Strategie':<12} {'RSS vor':>8} {'Spitze':>8} {'Delta':>8} {'Zeit':>8}   [MB, s]")
+    for strategy in STRATEGIES:
+        subprocess.run([sys.executable, __file__, "--strategy", strategy, path], check=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Misst die vektorisierte Auswertung der VKF-Regeln (processors/vkf_rules.py)
+gegen den Aufruf der skalaren Funktionen je Zeile.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_vkf_rules.py
+    python3 benchmarks/bench_vkf_rules.py --storeys 5000000 --budget-s 2
+
+Erzeugt --storeys zufällige Geschosse (Fläche, inkl. fehlender Werte und
+Werte genau auf den Grenzen) sowie je 20 Geschosse ein Gebäude (Höhe,
+Gesamtfläche) und wertet alle Regeln über RuleSet.evaluate und, falls pandas
+installiert ist, über RuleSet.evaluate_frame aus (bestes von --repeat). Die
+skalare Schleife läuft nur über --sample Zeilen und wird hochgerechnet.
+Endet mit Exit-Code 1, wenn vektorisierte und skalare Auswertung
+verschiedene Texte liefern oder die Auswertung aller Geschosse länger als
+--budget-s dauert.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processors.vkf_rules import (  # noqa: E402
+    HEIGHT_LIMITS_M,
+    SMALL_BUILDING_LIMIT_M2,
+    STOREY_AREA_LIMIT_M2,
+    height_category,
+    rule_set,
+    small_building_comment,
+    storey_area_comment,
+)
+
+STOREYS_PER_BUILDING = 20
+
+
+def values(rng: np.random.Generator, n: int, high: float, limits: tuple[float, ...]) -> np.ndarray:
+    """Zufallswerte in [0, high) mit 1 % NaN und 1 % Werten genau auf den Grenzen."""
+    result = rng.random(n) * high
+    result[rng.random(n) < 0.01] = np.nan
+    on_limit = rng.random(n) < 0.01
+    result[on_limit] = rng.choice(limits, int(on_limit.sum()))
+    return result
+
+
+def best_of(repeat: int, fn):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vektorisierte VKF-Regeln gegen skalare Auswertung.")
+    parser.add_argument("--storeys", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=50_000, help="Zeilen für die skalare Schleife")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-s", type=float, default=1.0, help="Maximale Zeit für alle Geschosse")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n_buildings = max(1, args.storeys // STOREYS_PER_BUILDING)
+    storey_area = values(rng, args.storeys, 2 * STOREY_AREA_LIMIT_M2, (STOREY_AREA_LIMIT_M2,))
+    height = values(rng, n_buildings, 60.0, HEIGHT_LIMITS_M)
+    total_area = values(rng, n_buildings, 2 * SMALL_BUILDING_LIMIT_M2, (SMALL_BUILDING_LIMIT_M2,))
+    rules = rule_set()
+
+    checks = {
+        "storey_area": (storey_area, storey_area_comment),
+        "height_category": (height, height_category),
+        "small_building": (total_area, small_building_comment),
+    }
+    failures: list[str] = []
+    print(f"Ausgabe: {rules.edition}")
+    print(f"{'Regel':>16} {'Zeilen':>10} {'Vektor [s]':>11} {'skalar [s]':>11} {'Faktor':>8}")
+    total = 0.0
+    for name, (data, scalar) in checks.items():
+        t_vector, result = best_of(args.repeat, lambda: rules.evaluate(name, data))
+        sample = data[: args.sample]
+        start = time.perf_counter()
+        expected = [scalar(None if np.isnan(v) else float(v)) for v in sample.tolist()]
+        t_scalar = (time.perf_counter() - start) * len(data) / max(1, len(sample))
+        if result[: len(sample)].tolist() != expected:
+            failures.append(f"{name}: vektorisierte und skalare Auswertung verschieden")
+        total += t_vector
+        print(f"{name:>16} {len(data):>10} {t_vector:>11.4f} {t_scalar:>11.2f} {t_scalar / t_vector:>8.0f}")
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+    if pd is not None:
+        frame = pd.DataFrame({"storey_area_m2": storey_area})
+        t_frame, evaluated = best_of(args.repeat, lambda: rules.evaluate_frame(frame))
+        if not (evaluated["storey_area"].to_numpy() == rules.evaluate("storey_area", storey_area)).all():
+            failures.append("evaluate_frame: abweichend von evaluate")
+        print(f"{'DataFrame':>16} {len(frame):>10} {t_frame:>11.4f}")
+
+    print(f"Alle Regeln: {total:.3f} s (Budget {args.budget_s:.1f} s)")
+    if total > args.budget_s:
+        failures.append(f"{total:.3f} s für {args.storeys} Geschosse, Budget {args.budget_s:.1f} s")
+    for message in failures:
+        print(f"[FEHLER] {message}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
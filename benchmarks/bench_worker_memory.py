@@ -0,0 +1,110 @@
+"""
+Misst die Speicher-Isolation der Auswertung im Worker-Prozess
+(processors/worker.py, BackgroundTask mit memory_limit_mb/timeout).
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/bench_worker_memory.py
+    python3 benchmarks/bench_worker_memory.py --storeys 10 --spaces 2000 --limit-mb 250
+
+Ein synthetisches Modell (benchmarks/ifc_generator.py, erzeugt in einem
+eigenen Prozess) wird ausgewertet:
+- worker:      pipeline.analyze_task in einem BackgroundTask; gemessen werden
+               Laufzeit, Spitzen-RSS des Workers, Grösse des zurückgegebenen
+               Ergebnisses (pickle) und der Zuwachs des Spitzen-RSS im Hauptprozess
+- im Prozess:  dieselbe Auswertung direkt im Hauptprozess (Vergleich, zuletzt,
+               da der Spitzen-RSS danach nicht mehr sinkt)
+- limit:       Worker mit --limit-mb (muss scheitern: "memory", bzw. "crashed",
+               wenn ifcopenshell eine Speicheranforderung nicht abfängt)
+- timeout:     Worker mit 0.05 s Zeitlimit (muss mit "timeout" scheitern)
+Endet mit Exit-Code 1, wenn Höhe oder Fläche nicht den erwarteten Werten
+entsprechen, der Hauptprozess durch die Auswertung im Worker um mehr als
+--max-parent-mb wächst, kein Spitzen-RSS gemeldet wird oder Limit bzw.
+Zeitlimit nicht greifen.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ifc_generator import ModelSpec, write_model  # noqa: E402
+from processors.pipeline import AnalysisService, analyze_task  # noqa: E402
+from processors.worker import BackgroundTask, WorkerPool, peak_rss_mb  # noqa: E402
+
+
+def _generate(task: tuple[ModelSpec, str]) -> str:
+    spec, path = task
+    return write_model(spec, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Speicher-Isolation der Auswertung im Worker-Prozess.")
+    parser.add_argument("--storeys", type=int, default=8, help="Geschosse")
+    parser.add_argument("--spaces", type=int, default=1500, help="Räume je Geschoss")
+    parser.add_argument("--limit-mb", type=float, default=250.0, help="Zu knappes Speicherlimit für den Fall 'limit'")
+    parser.add_argument("--max-parent-mb", type=float, default=30.0, help="Erlaubter RSS-Zuwachs im Hauptprozess")
+    args = parser.parse_args()
+
+    spec = ModelSpec(storeys=args.storeys, spaces_per_storey=args.spaces)
+    failures: list[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "worker_memory.ifc")
+        # Modell in eigenem Prozess erzeugen, damit ifcopenshell den Hauptprozess nicht aufbläht
+        (_item, generated), = WorkerPool(max_workers=1).imap_unordered(_generate, [(spec, path)])
+        if not generated.ok:
+            raise SystemExit(f"Modell nicht erzeugt: {generated.error}")
+        size_mb = os.path.getsize(path) / 1e6
+        task = {"path": path, "use_cache": False}
+        print(f"{spec.label}: {spec.n_spaces} Räume, {size_mb:.1f} MB")
+        print(f"{'Fall':<12} {'Status':<9} {'Zeit [s]':>9} {'RSS Worker':>11} {'Δ RSS Haupt':>12} {'Ergebnis':>10}")
+
+        def row(name, status, seconds, worker_mb, parent_mb, result_kb=None):
+            worker = "-" if worker_mb is None else f"{worker_mb:.0f} MB"
+            result = "-" if result_kb is None else f"{result_kb:.0f} kB"
+            print(f"{name:<12} {status:<9} {seconds:>9.2f} {worker:>11} {parent_mb:>9.0f} MB {result:>10}")
+
+        before = peak_rss_mb() or 0.0
+        outcome = BackgroundTask(analyze_task, task).start().wait()
+        parent_growth = (peak_rss_mb() or 0.0) - before
+        result_kb = len(pickle.dumps(outcome.value)) / 1e3 if outcome.ok else None
+        row("worker", outcome.status, outcome.seconds, outcome.peak_rss_mb, parent_growth, result_kb)
+        if not outcome.ok:
+            failures.append(f"worker: {outcome.status} ({outcome.error})")
+        else:
+            analysis = outcome.value
+            if analysis.area.building_area_m2 is None or abs(analysis.area.building_area_m2 - spec.expected_area_m2) > 1e-6:
+                failures.append(f"worker: Fläche {analysis.area.building_area_m2} statt {spec.expected_area_m2}")
+            if analysis.height.height_m is None or abs(analysis.height.height_m - spec.expected_height_m) > 1e-6:
+                failures.append(f"worker: Höhe {analysis.height.height_m} statt {spec.expected_height_m}")
+        if outcome.peak_rss_mb is None:
+            failures.append("worker: kein Spitzen-RSS gemeldet")
+        if parent_growth > args.max_parent_mb:
+            failures.append(f"worker: Hauptprozess um {parent_growth:.0f} MB gewachsen (erlaubt {args.max_parent_mb:.0f} MB)")
+
+        limited = BackgroundTask(analyze_task, task, memory_limit_mb=args.limit_mb).start().wait()
+        row("limit", limited.status, limited.seconds, limited.peak_rss_mb, (peak_rss_mb() or 0.0) - before)
+        if limited.ok:
+            failures.append(f"limit: Auswertung trotz Speicherlimit von {args.limit_mb:.0f} MB erfolgreich")
+
+        timed_out = BackgroundTask(analyze_task, task, timeout=0.05).start().wait()
+        row("timeout", timed_out.status, timed_out.seconds, timed_out.peak_rss_mb, (peak_rss_mb() or 0.0) - before)
+        if timed_out.status != "timeout":
+            failures.append(f"timeout: Status {timed_out.status} statt timeout")
+
+        start = time.perf_counter()
+        AnalysisService().compute_from_path(path)
+        row("im Prozess", "ok", time.perf_counter() - start, None, (peak_rss_mb() or 0.0) - before)
+
+    for message in failures:
+        print(f"[FEHLER] {message}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
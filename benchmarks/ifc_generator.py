@@ -0,0 +1,329 @@
+"""
+Erzeugt synthetische IFC-Modelle für Benchmarks.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/ifc_generator.py out.ifc --storeys 10 --spaces 1000
+    python3 benchmarks/ifc_generator.py out.ifc --schema IFC2X3 --buildings 3 --depth 8 --no-elevation
+    python3 benchmarks/ifc_generator.py out.ifc --spaces 2500 --boundaries --compartment-columns 10 --zones 2
+    python3 benchmarks/ifc_generator.py out.ifc --spaces 2500 --doors
+    python3 benchmarks/ifc_generator.py out.ifc --buildings 40 --terrain-step 1.5
+
+Die Modelle enthalten nur, was die Prozessoren lesen: Projekt, Grundstück,
+ein oder mehrere Gebäude, Geschosse mit Placement (und Elevation), Räume
+(über IfcRelAggregates an die Geschosse gehängt) und pro Raum eine
+IfcElementQuantity mit NetFloorArea. Mit placement_depth hängt jeder Raum an
+einer eigenen Kette zusätzlicher IfcLocalPlacement unter dem Geschoss.
+Optional kommen Zonen, Wände mit Raumbegrenzungen und FireRating sowie
+Türen, Treppen und Ausgänge (Fluchtwege) dazu.
+Entitäten werden direkt angelegt (ohne ifcopenshell.api), damit auch Modelle
+mit zehntausenden Räumen in Sekunden entstehen.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+STOREY_HEIGHT_M = 3.0
+SPACE_AREA_M2 = 25.0
+BUILDING_SPACING_M = 100.0
+SPACE_SIZE_M = 5.0  # Rastermass der Räume (quadratisch, zeilenweise je Geschoss, Placement in der Raummitte)
+USAGES = ("Wohnen", "Büro", "Verkauf", "Lager")  # LongName der Räume, reihum
+FIRE_RATING = "EI 60"
+
+
+@dataclass
+class ModelSpec:
+    """
+    Parameter eines synthetischen Modells.
+
+    storeys/spaces_per_storey gelten je Gebäude; placement_depth = Anzahl
+    zusätzlicher Placements zwischen Geschoss und Raum; ohne with_elevation
+    muss die Höhe über die Placements bestimmt werden. zones_per_storey
+    teilt die Räume jedes Geschosses reihum auf so viele IfcZone auf.
+    terrain_step_m hebt Gebäude k um k × terrain_step_m an (Hanglage): die
+    Höhe je Gebäude bleibt expected_height_m, über alle Geschosse gerechnet
+    ergäbe sich expected_site_height_m.
+
+    Die Räume liegen je Geschoss in einem quadratischen Raster. Mit
+    boundaries trennt je eine Wand benachbarte Räume (IfcRelSpaceBoundary
+    auf beiden Seiten); compartment_columns > 0 versieht jede Wand nach so
+    vielen Rasterspalten mit FireRating, das Geschoss zerfällt so in
+    Brandabschnitte aus Spaltenstreifen (expected_compartments).
+
+    doors (setzt boundaries voraus) setzt in jede dieser Wände eine Tür in
+    der Mitte der gemeinsamen Kante (Raumbegrenzungen zur Tür, in Brandwänden
+    mit FireRating), je Geschoss eine IfcStair im ersten Raum (stair_xy) und
+    im untersten Geschoss einen Ausgang ins Freie am letzten Raum (exit_xy).
+    """
+    storeys: int = 5
+    spaces_per_storey: int = 20
+    schema: str = "IFC4"
+    with_quantities: bool = True
+    buildings: int = 1
+    placement_depth: int = 0
+    with_elevation: bool = True
+    zones_per_storey: int = 0
+    boundaries: bool = False
+    compartment_columns: int = 0
+    doors: bool = False
+    terrain_step_m: float = 0.0
+
+    @property
+    def n_spaces(self) -> int:
+        return self.buildings * self.storeys * self.spaces_per_storey
+
+    @property
+    def n_placements(self) -> int:
+        per_storey = 1 + self.spaces_per_storey * (1 + self.placement_depth)
+        return 1 + self.buildings * (1 + self.storeys * per_storey)
+
+    @property
+    def expected_area_m2(self) -> float:
+        return self.n_spaces * SPACE_AREA_M2 if self.with_quantities else 0.0
+
+    @property
+    def expected_height_m(self) -> Optional[float]:
+        return (self.storeys - 1) * STOREY_HEIGHT_M if self.storeys else None
+
+    @property
+    def expected_site_height_m(self) -> Optional[float]:
+        """Tiefstes bis höchstes Geschoss über alle Gebäude (nicht die Gebäudehöhe)."""
+        if not self.storeys:
+            return None
+        return (self.storeys - 1) * STOREY_HEIGHT_M + (self.buildings - 1) * self.terrain_step_m
+
+    @property
+    def grid_columns(self) -> int:
+        return max(1, math.ceil(math.sqrt(self.spaces_per_storey)))
+
+    @property
+    def expected_compartments(self) -> int:
+        """Brandabschnitte nach Raumbegrenzungen (ohne Zonen), je Modell."""
+        if not self.spaces_per_storey:
+            return 0
+        used_columns = min(self.grid_columns, self.spaces_per_storey)
+        per_storey = math.ceil(used_columns / self.compartment_columns) if self.compartment_columns else 1
+        return self.buildings * self.storeys * per_storey
+
+    def space_xy(self, j: int) -> tuple[float, float]:
+        """Mitte des j-ten Raums eines Geschosses (relativ zum Geschoss)."""
+        columns = self.grid_columns
+        return (j % columns + 0.5) * SPACE_SIZE_M, (j // columns + 0.5) * SPACE_SIZE_M
+
+    @property
+    def stair_xy(self) -> tuple[float, float]:
+        return self.space_xy(0)
+
+    @property
+    def exit_xy(self) -> tuple[float, float]:
+        """Ausgangstür an der rechten Kante des letzten Raums (nur unterstes Geschoss)."""
+        x, y = self.space_xy(self.spaces_per_storey - 1)
+        return x + SPACE_SIZE_M / 2, y
+
+    @property
+    def label(self) -> str:
+        parts = [self.schema, f"{self.buildings}x{self.storeys}x{self.spaces_per_storey}"]
+        if self.placement_depth:
+            parts.append(f"depth{self.placement_depth}")
+        if not self.with_quantities:
+            parts.append("noqto")
+        if not self.with_elevation:
+            parts.append("noelev")
+        if self.zones_per_storey:
+            parts.append(f"zones{self.zones_per_storey}")
+        if self.boundaries:
+            parts.append(f"walls{self.compartment_columns}" if self.compartment_columns else "walls")
+        if self.doors:
+            parts.append("doors")
+        if self.terrain_step_m:
+            parts.append(f"step{self.terrain_step_m:g}")
+        return "-".join(parts)
+
+
+def _guid() -> str:
+    import ifcopenshell.guid
+
+    return ifcopenshell.guid.compress(uuid.uuid4().hex)
+
+
+class _Builder:
+    def __init__(self, schema: str):
+        import ifcopenshell
+
+        self.f = ifcopenshell.file(schema=schema)
+        self.schema = schema
+        person = self.f.createIfcPerson(FamilyName="Benchmark")
+        org = self.f.createIfcOrganization(Name="Brandschutzkochbuch")
+        user = self.f.createIfcPersonAndOrganization(person, org)
+        app = self.f.createIfcApplication(org, "1.0", "ifc_generator", "ifc_generator")
+        self.owner = self.f.createIfcOwnerHistory(user, app, None, "ADDED", None, None, None, 0)
+        self.origin = self.f.createIfcCartesianPoint((0.0, 0.0, 0.0))
+
+    def placement(self, relative_to=None, xyz=(0.0, 0.0, 0.0)):
+        point = self.origin if xyz == (0.0, 0.0, 0.0) else self.f.createIfcCartesianPoint(tuple(map(float, xyz)))
+        axis = self.f.createIfcAxis2Placement3D(point, None, None)
+        return self.f.createIfcLocalPlacement(relative_to, axis)
+
+    def aggregate(self, parent, children) -> None:
+        self.f.createIfcRelAggregates(_guid(), self.owner, None, None, parent, children)
+
+    def fire_rating(self, products, rating: str, pset_name: str = "Pset_WallCommon") -> None:
+        prop = self.f.createIfcPropertySingleValue("FireRating", None, self.f.createIfcLabel(rating), None)
+        pset = self.f.createIfcPropertySet(_guid(), self.owner, pset_name, None, (prop,))
+        self.f.createIfcRelDefinesByProperties(_guid(), self.owner, None, None, products, pset)
+
+    def wall_between(self, a, b):
+        """Wand zwischen zwei Räumen mit je einer Raumbegrenzung."""
+        wall = self.f.createIfcWall(_guid(), self.owner, None)
+        for space in (a, b):
+            self.f.createIfcRelSpaceBoundary(_guid(), self.owner, None, None, space, wall, None, "PHYSICAL", "INTERNAL")
+        return wall
+
+    def door(self, spaces, placement, boundary: str = "INTERNAL"):
+        """Tür mit je einer Raumbegrenzung zu den angrenzenden Räumen."""
+        door = self.f.createIfcDoor(_guid(), self.owner, None, None, None, placement)
+        for space in spaces:
+            self.f.createIfcRelSpaceBoundary(_guid(), self.owner, None, None, space, door, None, "PHYSICAL", boundary)
+        return door
+
+    def area_quantity(self, products, area: float) -> None:
+        quantity = self.f.createIfcQuantityArea("NetFloorArea", None, None, area)
+        qset = self.f.createIfcElementQuantity(_guid(), self.owner, "Qto_SpaceBaseQuantities", None, None, (quantity,))
+        self.f.createIfcRelDefinesByProperties(_guid(), self.owner, None, None, products, qset)
+
+
+def generate_model(spec: ModelSpec):
+    """Baut das Modell im Speicher und liefert ein ifcopenshell.file."""
+    b = _Builder(spec.schema)
+    f = b.f
+
+    project = f.createIfcProject(_guid(), b.owner, "Benchmark")
+    site_placement = b.placement()
+    site = f.createIfcSite(_guid(), b.owner, "Grundstück", None, None, site_placement, None, None, "ELEMENT")
+    b.aggregate(project, (site,))
+
+    buildings = []
+    for k in range(spec.buildings):
+        base_z = k * spec.terrain_step_m
+        building_placement = b.placement(site_placement, (k * BUILDING_SPACING_M, 0.0, base_z))
+        name = "Gebäude" if spec.buildings == 1 else f"Gebäude {k + 1}"
+        building = f.createIfcBuilding(_guid(), b.owner, name, None, None, building_placement, None, None, "ELEMENT")
+        buildings.append(building)
+
+        storeys = []
+        for i in range(spec.storeys):
+            z = i * STOREY_HEIGHT_M
+            storey_placement = b.placement(building_placement, (0.0, 0.0, z))
+            storey = f.createIfcBuildingStorey(
+                _guid(), b.owner, f"Geschoss {i}", None, None, storey_placement, None, None, "ELEMENT",
+                base_z + z if spec.with_elevation else None,
+            )
+            storeys.append(storey)
+
+            spaces = []
+            columns = spec.grid_columns
+            for j in range(spec.spaces_per_storey):
+                parent = storey_placement
+                for _ in range(spec.placement_depth):
+                    parent = b.placement(parent)
+                xyz = (*spec.space_xy(j), 0.0)
+                space = f.createIfcSpace(_guid(), b.owner, f"R{i:02d}.{j:04d}", None, None, b.placement(parent, xyz))
+                space.CompositionType = "ELEMENT"
+                space.LongName = USAGES[j % len(USAGES)]
+                spaces.append(space)
+                if spec.with_quantities:
+                    b.area_quantity((space,), SPACE_AREA_M2)
+            if spaces:
+                b.aggregate(storey, tuple(spaces))
+            if spec.boundaries:
+                walls, rated, doors, rated_doors = [], [], [], []
+                half = SPACE_SIZE_M / 2
+                for j, space in enumerate(spaces):
+                    column = j % columns
+                    x, y = spec.space_xy(j)
+                    if column + 1 < columns and j + 1 < len(spaces):  # rechter Nachbar
+                        walls.append(b.wall_between(space, spaces[j + 1]))
+                        fire_wall = spec.compartment_columns and (column + 1) % spec.compartment_columns == 0
+                        if fire_wall:
+                            rated.append(walls[-1])
+                        if spec.doors:
+                            doors.append(b.door((space, spaces[j + 1]), b.placement(storey_placement, (x + half, y, 0.0))))
+                            if fire_wall:
+                                rated_doors.append(doors[-1])
+                    if j + columns < len(spaces):  # Nachbar in der nächsten Zeile
+                        walls.append(b.wall_between(space, spaces[j + columns]))
+                        if spec.doors:
+                            doors.append(b.door((space, spaces[j + columns]), b.placement(storey_placement, (x, y + half, 0.0))))
+                if spec.doors and spaces:
+                    stair = f.createIfcStair(
+                        _guid(), b.owner, f"Treppe {i}", None, None, b.placement(storey_placement, (*spec.stair_xy, 0.0))
+                    )
+                    doors.append(stair)
+                    if i == 0:
+                        exit_placement = b.placement(storey_placement, (*spec.exit_xy, 0.0))
+                        doors.append(b.door((spaces[-1],), exit_placement, boundary="EXTERNAL"))
+                if walls:
+                    f.createIfcRelContainedInSpatialStructure(_guid(), b.owner, None, None, walls + doors, storey)
+                if rated:
+                    b.fire_rating(rated, FIRE_RATING)
+                if rated_doors:
+                    b.fire_rating(rated_doors, FIRE_RATING, "Pset_DoorCommon")
+            for z in range(spec.zones_per_storey):
+                members = tuple(spaces[z :: spec.zones_per_storey])
+                if members:
+                    zone = f.createIfcZone(_guid(), b.owner, f"Zone {k + 1}.{i}.{z + 1}")
+                    f.createIfcRelAssignsToGroup(_guid(), b.owner, None, None, members, None, zone)
+
+        if storeys:
+            b.aggregate(building, tuple(storeys))
+    b.aggregate(site, tuple(buildings))
+    return f
+
+
+def write_model(spec: ModelSpec, path: str) -> str:
+    generate_model(spec).write(path)
+    return path
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description="Erzeugt ein synthetisches IFC-Modell.")
+    parser.add_argument("path", help="Ziel-Datei (.ifc)")
+    parser.add_argument("--storeys", type=int, default=ModelSpec.storeys)
+    parser.add_argument("--spaces", type=int, default=ModelSpec.spaces_per_storey, help="Räume je Geschoss")
+    parser.add_argument("--schema", default=ModelSpec.schema, choices=["IFC2X3", "IFC4"])
+    parser.add_argument("--no-quantities", action="store_true", help="Räume ohne IfcElementQuantity")
+    parser.add_argument("--buildings", type=int, default=ModelSpec.buildings, help="Anzahl Gebäude")
+    parser.add_argument("--depth", type=int, default=ModelSpec.placement_depth, help="Zusätzliche Placements je Raum")
+    parser.add_argument("--no-elevation", action="store_true", help="Geschosse ohne Elevation")
+    parser.add_argument("--zones", type=int, default=0, help="IfcZone je Geschoss (Räume reihum verteilt)")
+    parser.add_argument("--boundaries", action="store_true", help="Wände mit Raumbegrenzungen zwischen Nachbarräumen")
+    parser.add_argument("--doors", action="store_true", help="Türen in allen Wänden, Treppe und Ausgang (setzt --boundaries)")
+    parser.add_argument(
+        "--compartment-columns", type=int, default=0, help="Brandwand nach je so vielen Rasterspalten (mit --boundaries)"
+    )
+    parser.add_argument("--terrain-step", type=float, default=0.0, help="Gebäude k steht k × so viele Meter höher")
+    args = parser.parse_args()
+
+    spec = ModelSpec(
+        storeys=args.storeys,
+        spaces_per_storey=args.spaces,
+        schema=args.schema,
+        with_quantities=not args.no_quantities,
+        buildings=args.buildings,
+        placement_depth=args.depth,
+        with_elevation=not args.no_elevation,
+        zones_per_storey=args.zones,
+        boundaries=args.boundaries or args.doors,
+        doors=args.doors,
+        compartment_columns=args.compartment_columns,
+        terrain_step_m=args.terrain_step,
+    )
+    write_model(spec, args.path)
+    print(f"[OK] {args.path}: {spec.label}, {spec.n_spaces} Räume, {spec.n_placements} Placements")
+
+
+if __name__ == "__main__":
+    _main()
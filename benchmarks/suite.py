@@ -0,0 +1,288 @@
+"""
+Benchmark-Suite für Laden, Höhe, Fläche und Excel-Export.
+
+Nutzung (im Projekt-Root):
+    python3 benchmarks/suite.py                                   # Standard-Modelle messen
+    python3 benchmarks/suite.py --preset small --repeat 5
+    python3 benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python3 benchmarks/suite.py --baseline benchmarks/baseline.json --threshold 0.25
+
+Die Modelle werden mit benchmarks/ifc_generator.py erzeugt (IFC2X3/IFC4,
+mit/ohne Mengen, tiefe Placement-Ketten, mehrere Gebäude). Jeder Fall
+(Modell × Lademodus) läuft in einem eigenen Prozess, damit der Speicher
+sauber je Fall gemessen wird. Stufen:
+
+    load    IfcLoader(mode).load
+    height  HeightCalculator.compute_height_m
+    area    BuildingAreaCalculator.compute_storey_areas
+    excel   excel.write_result_to_excel (nur Lademodus "full")
+
+Je Stufe: Zeit (bestes von --repeat), Spitzen-RSS des Prozesses danach und
+Zuwachs während der Stufe (MB). Höhe und Fläche werden gegen die erwarteten
+Werte des Generators geprüft.
+
+Mit --baseline endet das Skript mit Exit-Code 1, wenn eine Stufe mehr als
+--threshold (Anteil, 0.25 = +25 %) und mindestens --min-delta Sekunden
+langsamer ist oder ihr Spitzen-RSS um mehr als --rss-threshold wächst.
+Baselines sind rechnerabhängig und sollten auf derselben Maschine erstellt werden.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ifc_generator import ModelSpec, write_model  # noqa: E402
+from processors.worker import WorkerPool  # noqa: E402
+
+STAGES = ("load", "height", "area", "excel")
+
+PRESETS: dict[str, list[ModelSpec]] = {
+    "small": [
+        ModelSpec(storeys=5, spaces_per_storey=20),
+        ModelSpec(storeys=5, spaces_per_storey=20, schema="IFC2X3"),
+    ],
+    "default": [
+        ModelSpec(storeys=10, spaces_per_storey=100),
+        ModelSpec(storeys=10, spaces_per_storey=1000),
+        ModelSpec(storeys=10, spaces_per_storey=1000, schema="IFC2X3"),
+        ModelSpec(storeys=10, spaces_per_storey=1000, with_quantities=False),
+        ModelSpec(storeys=10, spaces_per_storey=500, placement_depth=8, with_elevation=False),
+        ModelSpec(storeys=10, spaces_per_storey=200, buildings=5),
+    ],
+    "large": [
+        ModelSpec(storeys=20, spaces_per_storey=2500),
+        ModelSpec(storeys=20, spaces_per_storey=2500, schema="IFC2X3"),
+        ModelSpec(storeys=20, spaces_per_storey=1000, placement_depth=8, with_elevation=False),
+        ModelSpec(storeys=20, spaces_per_storey=500, buildings=10),
+    ],
+}
+
+
+@dataclass
+class Case:
+    spec: ModelSpec
+    mode: str
+    path: str
+    repeat: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.spec.label}/{self.mode}"
+
+
+def _rss_mb() -> float:
+    """Spitzen-RSS des aktuellen Prozesses in MB."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _generate(task: tuple[ModelSpec, str]) -> str:
+    spec, path = task
+    return write_model(spec, path)
+
+
+def run_case(case: Case) -> dict[str, dict[str, float]]:
+    """Misst alle Stufen eines Falls (läuft im eigenen Prozess)."""
+    from processors.area import AreaService, BuildingAreaCalculator
+    from processors.height import HeightCalculator, HeightService
+    from processors.ifc_loader import IfcLoader
+    from processors.placement import PlacementResolver
+
+    results: dict[str, dict[str, float]] = {}
+
+    def stage(name: str, func: Callable[[], Any]) -> Any:
+        before = _rss_mb()
+        best, value = float("inf"), None
+        for _ in range(case.repeat):
+            start = time.perf_counter()
+            value = func()
+            best = min(best, time.perf_counter() - start)
+        after = _rss_mb()
+        results[name] = {"seconds": best, "rss_mb": after, "rss_delta_mb": after - before}
+        return value
+
+    loader = IfcLoader(mode=case.mode)
+    model = stage("load", lambda: loader.load(case.path))
+
+    # Je Lauf ein frischer PlacementResolver, sonst misst die Wiederholung nur den Cache
+    height = stage("height", lambda: HeightCalculator(model, PlacementResolver(model)).compute_height_m())
+    storeys = stage("area", lambda: BuildingAreaCalculator(model, PlacementResolver(model)).compute_storey_areas())
+
+    spec = case.spec
+    if height is None or abs(height - spec.expected_height_m) > 1e-6:
+        raise AssertionError(f"Höhe {height} statt {spec.expected_height_m}")
+    area = sum(s.area_m2 for s in storeys)
+    if abs(area - spec.expected_area_m2) > 1e-6:
+        raise AssertionError(f"Fläche {area} statt {spec.expected_area_m2}")
+
+    if case.mode == "full":
+        from excel import write_result_to_excel
+
+        height_result = HeightService(loader).compute_from_ifc(model, case.path)
+        area_result = AreaService(loader).compute_from_ifc(model, case.path)
+        with tempfile.TemporaryDirectory() as tmp:
+            excel_path = os.path.join(tmp, "bench.xlsx")
+            stage("excel", lambda: write_result_to_excel(height_result, area_result, excel_path))
+    return results
+
+
+# ------------------------------------------------------------
+# Baseline-Vergleich
+# ------------------------------------------------------------
+
+
+@dataclass
+class Regression:
+    case: str
+    stage: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def describe(self) -> str:
+        unit = "s" if self.metric == "seconds" else "MB"
+        return (
+            f"{self.case} {self.stage}: {self.metric} {self.baseline:.3f} -> {self.current:.3f} {unit} "
+            f"(+{(self.ratio - 1) * 100:.0f} %)"
+        )
+
+
+def compare(
+    current: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    threshold: float,
+    rss_threshold: float,
+    min_delta: float,
+) -> list[Regression]:
+    """Stufen, die gegenüber der Baseline über die Schwellen hinaus schlechter sind."""
+    regressions: list[Regression] = []
+    for case, stages in current.items():
+        for stage, now in stages.items():
+            before = baseline.get(case, {}).get(stage)
+            if not before:
+                continue
+            if (
+                now["seconds"] > before["seconds"] * (1 + threshold)
+                and now["seconds"] - before["seconds"] >= min_delta
+            ):
+                regressions.append(Regression(case, stage, "seconds", before["seconds"], now["seconds"]))
+            if now["rss_mb"] > before["rss_mb"] * (1 + rss_threshold):
+                regressions.append(Regression(case, stage, "rss_mb", before["rss_mb"], now["rss_mb"]))
+    return regressions
+
+
+def _meta() -> dict[str, str]:
+    try:
+        import ifcopenshell
+
+        ifc_version = ifcopenshell.version
+    except Exception:
+        ifc_version = "n/a"
+    return {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "ifcopenshell": ifc_version,
+    }
+
+
+def _print_results(results: dict, baseline: Optional[dict]) -> None:
+    print(f"{'Fall':<40} {'Stufe':<7} {'Zeit [s]':>9} {'Basis [s]':>10} {'Δ':>7} {'RSS [MB]':>9} {'+RSS':>7}")
+    for case, stages in results.items():
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            m = stages[stage]
+            base = (baseline or {}).get(case, {}).get(stage)
+            base_s = f"{base['seconds']:>10.3f}" if base else f"{'-':>10}"
+            delta = f"{(m['seconds'] / base['seconds'] - 1) * 100:>+6.0f}%" if base and base["seconds"] else f"{'-':>7}"
+            print(
+                f"{case:<40} {stage:<7} {m['seconds']:>9.3f} {base_s} {delta} "
+                f"{m['rss_mb']:>9.1f} {m['rss_delta_mb']:>7.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark-Suite mit Baseline-Vergleich.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    parser.add_argument("--modes", nargs="+", choices=["full", "fast"], default=["full", "fast"])
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen je Stufe (bestes Ergebnis zählt)")
+    parser.add_argument("--timeout", type=float, default=900, help="Zeitlimit je Fall in Sekunden")
+    parser.add_argument("--baseline", help="Baseline-JSON zum Vergleich")
+    parser.add_argument("--save-baseline", help="Ergebnisse als Baseline-JSON speichern")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Erlaubte Verlangsamung (Anteil)")
+    parser.add_argument("--rss-threshold", type=float, default=0.25, help="Erlaubter RSS-Zuwachs (Anteil)")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="Kleinere Zeitdifferenzen (s) ignorieren")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    failed: list[str] = []
+    # Ein Prozess nach dem anderen: parallele Fälle würden sich gegenseitig bremsen
+    pool = WorkerPool(max_workers=1, timeout=args.timeout)
+    with tempfile.TemporaryDirectory() as tmp:
+        specs = PRESETS[args.preset]
+        tasks = [(spec, os.path.join(tmp, f"{spec.label}.ifc")) for spec in specs]
+        for (spec, _path), outcome in pool.imap_unordered(_generate, tasks):
+            if not outcome.ok:
+                failed.append(f"{spec.label}: Erzeugen fehlgeschlagen ({outcome.error})")
+
+        cases = [
+            Case(spec, mode, path, args.repeat)
+            for spec, path in tasks
+            if os.path.exists(path)
+            for mode in args.modes
+        ]
+        for case, outcome in pool.imap_unordered(run_case, cases):
+            if outcome.ok:
+                results[case.name] = outcome.value
+                print(f"[OK] {case.name} ({outcome.seconds:.1f} s)", file=sys.stderr)
+            else:
+                failed.append(f"{case.name}: {outcome.status} ({outcome.error})")
+
+    # Ausgabe in Reihenfolge der Fälle
+    ordered = {c.name: results[c.name] for c in cases if c.name in results}
+    _print_results(ordered, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"meta": _meta(), "preset": args.preset, "repeat": args.repeat, "results": ordered},
+                fh,
+                indent=2,
+            )
+        print(f"Baseline gespeichert: {args.save_baseline}")
+
+    regressions = (
+        compare(ordered, baseline, args.threshold, args.rss_threshold, args.min_delta) if baseline else []
+    )
+    for message in failed:
+        print(f"[FEHLER] {message}")
+    for regression in regressions:
+        print(f"[REGRESSION] {regression.describe()}")
+    if failed or regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
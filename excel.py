@@ -1,30 +1,43 @@
+"""
+Excel-Export der Ergebnisse (openpyxl, Write-Only-Modus).
+
+Die Zeilen werden in einem Durchgang geschrieben, Überschriften dabei direkt
+fett formatiert; die Datei wird nur einmal gespeichert und nie neu eingelesen.
+
+    write_result_to_excel(...)   ein Projekt, eine Datei (wird überschrieben)
+    ProjectWorkbook(...)         viele Projekte in einer Arbeitsmappe: je
+                                 Projekt ein Blatt plus Übersicht mit einer
+                                 Zeile je Projekt (z.B. für den Batch-Export)
+
+Modelle mit mehreren Gebäuden (buildings, siehe processors/buildings.py)
+erhalten je Gebäude einen Abschnitt mit Höhe, Kategorie und Geschossflächen.
+"""
 from __future__ import annotations
 
+import os
+import tempfile
 from pathlib import Path
-from typing import List, Optional
-
-import pandas as pd
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence
 
 from processors.height import HeightResult
 from processors.area import AreaResult
 from processors.vkf_rules import small_building_comment, storey_area_comment
 
+if TYPE_CHECKING:
+    from processors.buildings import BuildingResult
 
-def _build_rows(
-    height_result: HeightResult,
-    area_result: AreaResult,
-    extra_columns: Optional[dict[str, str]] = None,
-) -> List[dict[str, str]]:
-    """Erzeugt die feste Tabellenstruktur mit Überschriften und Antworten."""
-    extra_columns = extra_columns or {}
+COLUMNS = ("Beschrieb", "Antwort/Wert", "VKF")
+OVERVIEW_SHEET = "Übersicht"
+OVERVIEW_COLUMNS = ("Projekt", "Blatt", "IFC-Datei", "Höhe [m]", "VKF (Höhe)", "Geschossfläche [m²]", "VKF (Fläche)")
 
-    def answer(label: str) -> str:
-        return extra_columns.get(label, "-")
+# Excel: Blattnamen max. 31 Zeichen, ohne []:*?/\
+_SHEET_TITLE_MAX = 31
+_SHEET_TITLE_INVALID = str.maketrans({c: "_" for c in "[]:*?/\\"})
 
-    rows: List[dict[str, str]] = []
 
-    rows.append({"Beschrieb": "Objektinformationen", "Antwort/Wert": "", "VKF": ""})
-    rows.append({"Beschrieb": "Nutzung", "Antwort/Wert": answer("Nutzung"), "VKF": ""})
+def _building_rows(height_result: HeightResult, area_result: AreaResult) -> List[dict[str, Any]]:
+    """Gebäudehöhe, Geschossfläche und Geschossflächen je Geschoss."""
+    rows: List[dict[str, Any]] = []
     rows.append(
         {
             "Beschrieb": "Gebäudehöhe",
@@ -55,6 +68,8 @@ def _build_rows(
             label = storey.name or "Geschoss"
             if storey.elevation is not None:
                 label += f" (z = {storey.elevation:.2f} m)"
+            if storey.method != "quantities":
+                label += f" [{storey.method_label}]"
             storey_vkf = storey_area_comment(storey.area_m2)
             rows.append(
                 {
@@ -63,8 +78,47 @@ def _build_rows(
                     "VKF": storey_vkf,
                 }
             )
+    return rows
+
+
+def build_rows(
+    height_result: HeightResult,
+    area_result: AreaResult,
+    extra_columns: Optional[dict[str, str]] = None,
+    buildings: Sequence[BuildingResult] = (),
+) -> List[dict[str, str]]:
+    """
+    Erzeugt die feste Tabellenstruktur mit Überschriften und Antworten.
+    Mit mehr als einem Gebäude stehen Höhe und Geschossflächen je Gebäude in
+    eigenen Abschnitten nach den Objektinformationen, dort nur die Gesamtfläche.
+    """
+    extra_columns = extra_columns or {}
+    per_building = len(buildings) > 1
+
+    def answer(label: str) -> str:
+        return extra_columns.get(label, "-")
+
+    rows: List[dict[str, str]] = []
+
+    rows.append({"Beschrieb": "Objektinformationen", "Antwort/Wert": "", "VKF": ""})
+    rows.append({"Beschrieb": "Nutzung", "Antwort/Wert": answer("Nutzung"), "VKF": ""})
+    if per_building:
+        rows.append({"Beschrieb": "Anzahl Gebäude", "Antwort/Wert": len(buildings), "VKF": ""})
+        rows.append(
+            {
+                "Beschrieb": "Geschossfläche (alle Gebäude)",
+                "Antwort/Wert": area_result.rounded_area_m2 if area_result.building_area_m2 is not None else "n/a",
+                "VKF": "",
+            }
+        )
+    else:
+        rows.extend(_building_rows(height_result, area_result))
     rows.append({"Beschrieb": "Bauweise", "Antwort/Wert": answer("Bauweise"), "VKF": ""})
     rows.append({"Beschrieb": "Sicherheitsabstand", "Antwort/Wert": answer("Sicherheitsabstand"), "VKF": ""})
+    if per_building:
+        for building in buildings:
+            rows.append({"Beschrieb": f"Gebäude: {building.name}", "Antwort/Wert": "", "VKF": ""})
+            rows.extend(_building_rows(building.height, building.area))
 
     rows.append({"Beschrieb": "Qualitätssicherung", "Antwort/Wert": "", "VKF": ""})
     rows.append({"Beschrieb": "QS-Stufe", "Antwort/Wert": answer("QS-Stufe"), "VKF": ""})
@@ -79,40 +133,185 @@ def _build_rows(
     return rows
 
 
+def _is_header(row: dict[str, Any]) -> bool:
+    """Abschnittsüberschrift: nur Beschrieb, keine Werte."""
+    return bool(row["Beschrieb"]) and not row["Antwort/Wert"] and not row["VKF"]
+
+
+def summary_row(
+    project: str,
+    height_result: HeightResult,
+    area_result: AreaResult,
+    buildings: Sequence[BuildingResult] = (),
+) -> list[Any]:
+    """
+    Zeile der Übersicht (ohne Blattname, siehe OVERVIEW_COLUMNS). Bei mehreren
+    Gebäuden zählen für die VKF-Spalten das höchste bzw. grösste Gebäude, die
+    Fläche bleibt die Summe aller Gebäude.
+    """
+    governing_area = area_result.building_area_m2
+    if len(buildings) > 1:
+        measured = [b.height for b in buildings if b.height.height_m is not None]
+        if measured:
+            height_result = max(measured, key=lambda h: h.height_m)
+        areas = [b.area.building_area_m2 for b in buildings if b.area.building_area_m2 is not None]
+        governing_area = max(areas) if areas else None
+    return [
+        project,
+        height_result.ifc_path,
+        height_result.rounded_height_m,
+        height_result.vkf_category,
+        area_result.rounded_area_m2,
+        small_building_comment(governing_area),
+    ]
+
+
+def _new_workbook():
+    from openpyxl import Workbook
+
+    return Workbook(write_only=True)
+
+
+def _bold_cells(ws, values) -> list:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    bold = Font(bold=True)
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = bold
+        cells.append(cell)
+    return cells
+
+
+def _append_rows(ws, rows: List[dict[str, Any]]) -> None:
+    """Kopfzeile und Zeilen anhängen, Überschriften fett."""
+    ws.append(_bold_cells(ws, COLUMNS))
+    for row in rows:
+        values = [row[c] for c in COLUMNS]
+        ws.append(_bold_cells(ws, values) if _is_header(row) else values)
+
+
+def _save(wb, excel_path: Path) -> None:
+    """Atomar speichern (temporäre Datei im Zielordner, dann umbenennen)."""
+    excel_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=excel_path.parent, suffix=".xlsx.tmp")
+    os.close(fd)
+    try:
+        wb.save(tmp_name)
+        os.replace(tmp_name, excel_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
 def write_result_to_excel(
     height_result: HeightResult,
     area_result: AreaResult,
     excel_path: str,
     extra_columns: Optional[dict[str, str]] = None,
+    buildings: Sequence[BuildingResult] = (),
 ) -> None:
-    excel_path = Path(excel_path)
-    rows = _build_rows(height_result, area_result, extra_columns)
-    df = pd.DataFrame(rows, columns=["Beschrieb", "Antwort/Wert", "VKF"])
-    excel_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(excel_path, index=False)
-    _apply_header_formatting(excel_path, rows)
+    """Schreibt ein Projekt als einzelnes Blatt in excel_path (bestehende Datei wird ersetzt)."""
+    wb = _new_workbook()
+    ws = wb.create_sheet("Sheet1")
+    _append_rows(ws, build_rows(height_result, area_result, extra_columns, buildings))
+    _save(wb, Path(excel_path))
 
 
-def _apply_header_formatting(excel_path: Path, rows: List[dict[str, str]]) -> None:
-    """Setzt Überschriften fett (benötigt openpyxl)."""
-    try:
+class ProjectWorkbook:
+    """
+    Arbeitsmappe mit vielen Projekten: Blatt "Übersicht" plus je Projekt ein Blatt.
+
+    Alle Blätter werden im Write-Only-Modus gestreamt und beim Schliessen in
+    einem Durchgang gespeichert, der Aufwand wächst also linear mit der Anzahl
+    Projekte. Mit keep_existing=True werden die Blätter einer bestehenden Datei
+    zeilenweise übernommen (Read-Only) und die neuen Projekte angehängt;
+    xlsx-Dateien sind ZIP-Archive und lassen sich nicht an Ort und Stelle
+    erweitern.
+
+        with ProjectWorkbook("Brandschutzkochbuch.xlsx", keep_existing=True) as book:
+            book.add_project("P123", height_result, area_result, extra_columns)
+    """
+
+    def __init__(self, excel_path: str, keep_existing: bool = False):
+        self.excel_path = Path(excel_path)
+        self._wb = _new_workbook()
+        self._titles: set[str] = set()
+        self._overview = None
+        self.projects = 0
+        if keep_existing and self.excel_path.exists():
+            self._copy_existing()
+        if self._overview is None:
+            self._overview = self._create_sheet(OVERVIEW_SHEET)
+            self._overview.append(_bold_cells(self._overview, OVERVIEW_COLUMNS))
+
+    def __enter__(self) -> "ProjectWorkbook":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.save()
+
+    def _create_sheet(self, title: str):
+        ws = self._wb.create_sheet(title)
+        self._titles.add(title.lower())
+        return ws
+
+    def _copy_existing(self) -> None:
+        """Übernimmt Werte und fette Schrift der bestehenden Blätter."""
         from openpyxl import load_workbook
-        from openpyxl.styles import Font
-    except ModuleNotFoundError:
-        return
-
-    header_rows = [
-        idx
-        for idx, row in enumerate(rows, start=2)
-        if row["Beschrieb"] and not row["Antwort/Wert"] and not row["VKF"]
-    ]
-    if not header_rows:
-        return
-
-    wb = load_workbook(excel_path)
-    ws = wb.active
-    bold_font = Font(bold=True)
-    for row_idx in header_rows:
-        for col in ("A", "B", "C"):
-            ws[f"{col}{row_idx}"].font = bold_font
-    wb.save(excel_path)
+
+        source = load_workbook(self.excel_path, read_only=True)
+        try:
+            for src in source.worksheets:
+                ws = self._create_sheet(src.title)
+                if src.title == OVERVIEW_SHEET:
+                    self._overview = ws
+                for row in src.iter_rows():
+                    values = [cell.value for cell in row]
+                    if any(getattr(getattr(cell, "font", None), "b", False) for cell in row):
+                        ws.append(_bold_cells(ws, values))
+                    else:
+                        ws.append(values)
+        finally:
+            source.close()
+
+    def sheet_title(self, project: str) -> str:
+        """Gültiger, noch freier Blattname (Suffix " (2)", " (3)", ... bei Dubletten)."""
+        base = (str(project).translate(_SHEET_TITLE_INVALID).strip("' ") or "Projekt")[:_SHEET_TITLE_MAX]
+        title, n = base, 1
+        while title.lower() in self._titles:
+            n += 1
+            suffix = f" ({n})"
+            title = base[: _SHEET_TITLE_MAX - len(suffix)] + suffix
+        return title
+
+    def add_rows(self, project: str, rows: List[dict[str, Any]], summary: list[Any]) -> str:
+        """Hängt ein Projektblatt aus fertigen Zeilen (build_rows) an; gibt den Blattnamen zurück."""
+        title = self.sheet_title(project)
+        _append_rows(self._create_sheet(title), rows)
+        self._overview.append([summary[0], title, *summary[1:]])
+        self.projects += 1
+        return title
+
+    def add_project(
+        self,
+        project: str,
+        height_result: HeightResult,
+        area_result: AreaResult,
+        extra_columns: Optional[dict[str, str]] = None,
+        buildings: Sequence[BuildingResult] = (),
+    ) -> str:
+        return self.add_rows(
+            project,
+            build_rows(height_result, area_result, extra_columns, buildings),
+            summary_row(project, height_result, area_result, buildings),
+        )
+
+    def save(self) -> None:
+        _save(self._wb, self.excel_path)
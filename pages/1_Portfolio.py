@@ -0,0 +1,124 @@
+import streamlit as st
+
+from processors.store import ORDER_BY, ProjectQuery, ProjectStore
+from processors.vkf_rules import STOREY_AREA_LIMIT_M2, rule_set
+from questions import DEFAULT_QUESTIONS
+
+# Portfolio: alle gespeicherten Projekte der lokalen Ablage (processors/store.py)
+st.set_page_config(page_title="Portfolio", page_icon="📚", layout="wide")
+
+PAGE_SIZE = 200
+SORT_LABELS = {
+    "number": "Projektnummer",
+    "name": "Projektname",
+    "height": "Höhe (absteigend)",
+    "area": "Gebäudefläche (absteigend)",
+    "max_storey_area": "Grösste Geschossfläche (absteigend)",
+    "updated": "Zuletzt gespeichert",
+}
+QUESTIONS_BY_KEY = {q.key: q for q in DEFAULT_QUESTIONS}
+
+
+@st.cache_resource
+def get_store() -> ProjectStore:
+    """Eine Ablage je Server-Prozess (Verbindungen werden je Abfrage geöffnet)."""
+    return ProjectStore()
+
+
+store = get_store()
+
+st.title("📚 Portfolio")
+st.caption(f"Ablage: {store.path}")
+
+# Filter in der Seitenleiste; jede Änderung ist eine indizierte Abfrage, es wird nichts vorgeladen
+with st.sidebar:
+    st.header("Filter")
+    search = st.text_input("Projektnummer / -name enthält")
+    all_counts = store.category_counts()
+    categories = st.multiselect("VKF-Kategorie (Höhe)", options=list(all_counts))
+    large_storeys = st.checkbox(f"Nur mit Geschoss über {STOREY_AREA_LIMIT_M2:.0f} m²")
+    answer_key = st.selectbox(
+        "Antwort filtern",
+        options=[""] + [q.key for q in DEFAULT_QUESTIONS],
+        format_func=lambda k: "(keine)" if not k else QUESTIONS_BY_KEY[k].excel_header,
+    )
+    answer_value = None
+    if answer_key:
+        answer_value = st.selectbox("Antwort", options=store.answer_values(answer_key) or ["-"])
+    order_by = st.selectbox("Sortierung", options=list(ORDER_BY), format_func=lambda k: SORT_LABELS.get(k, k))
+
+filters = ProjectQuery(
+    categories=tuple(categories),
+    min_storey_area_m2=STOREY_AREA_LIMIT_M2 if large_storeys else None,
+    answers={answer_key: answer_value} if answer_key and answer_value else {},
+    search=search.strip(),
+)
+counts = store.category_counts(filters)
+total = sum(counts.values())
+
+# Kennzahlen je Kategorie für die aktuelle Auswahl
+cols = st.columns(max(len(counts), 1) + 1)
+cols[0].metric("Projekte", total)
+for col, (category, n) in zip(cols[1:], counts.items()):
+    col.metric(category, n)
+
+if not total:
+    st.info("Keine Projekte gefunden. Projekte werden im Dashboard der App oder mit `run.py --store` gespeichert.")
+    st.stop()
+
+pages = (total - 1) // PAGE_SIZE + 1
+page = st.number_input(f"Seite (von {pages})", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+records = store.query(filters, order_by=order_by, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+# VKF-Bewertung der ganzen Seite auf einmal (vektorisiert, processors/vkf_rules.py)
+rules = rule_set()
+small_building = rules.evaluate("small_building", [r.building_area_m2 for r in records])
+storey_area = rules.evaluate("storey_area", [r.max_storey_area_m2 for r in records])
+st.dataframe(
+    {
+        "Projektnummer": [r.number for r in records],
+        "Projektname": [r.name for r in records],
+        "Nutzung": [r.usage for r in records],
+        "Bauweise": [r.construction_type for r in records],
+        "Höhe [m]": [None if r.height_m is None else round(r.height_m, 2) for r in records],
+        "VKF-Kategorie": [r.vkf_category for r in records],
+        "Gebäudefläche [m²]": [None if r.building_area_m2 is None else round(r.building_area_m2, 1) for r in records],
+        "Grösstes Geschoss [m²]": [
+            None if r.max_storey_area_m2 is None else round(r.max_storey_area_m2, 1) for r in records
+        ],
+        "Geschosse": [r.storey_count for r in records],
+        f"Abmessung ({rules.edition})": small_building.tolist(),
+        f"Geschossfläche ({rules.edition})": storey_area.tolist(),
+        "Gespeichert": [r.updated_at for r in records],
+    },
+    hide_index=True,
+    width="stretch",
+)
+
+# Detailansicht eines Projekts der aktuellen Seite
+number = st.selectbox("Projekt anzeigen", options=[""] + [r.number for r in records], key="portfolio_project")
+if number:
+    project = store.get_project(number)
+    if project is None:
+        st.warning("Projekt nicht mehr vorhanden.")
+    else:
+        st.subheader(f"{project.number} {project.name}")
+        left, right = st.columns(2)
+        with left:
+            st.markdown("**Geschossflächen**")
+            st.table(
+                {
+                    "Geschoss": [s.name or "<ohne Name>" for s in project.storeys],
+                    "Fläche [m²]": [round(s.area_m2, 3) for s in project.storeys],
+                    "Quelle": [s.method_label for s in project.storeys],
+                }
+            )
+        with right:
+            st.markdown("**Antworten**")
+            st.table(
+                {
+                    "Frage": [
+                        QUESTIONS_BY_KEY[k].excel_header if k in QUESTIONS_BY_KEY else k for k in project.answers
+                    ],
+                    "Antwort": list(project.answers.values()),
+                }
+            )
@@ -1,16 +1,37 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional, List
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, List
 
 # Kompatibilitäts-Import wie bei HeightService / ifc_loader
 if __package__ in (None, ""):
     import os as _os, sys as _sys
 
     _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.footprint import FootprintAreaCalculator, floor_slabs, supports_geometry
+    from processors.height import unit_scale
     from processors.ifc_loader import IfcLoader
+    from processors.timing import Timings
 else:
+    from .footprint import FootprintAreaCalculator, floor_slabs, supports_geometry
+    from .height import unit_scale
     from .ifc_loader import IfcLoader
+    from .timing import Timings
+
+if TYPE_CHECKING:  # placement/space_table ziehen NumPy nach, erst bei Bedarf importieren
+    from .placement import PlacementResolver
+    from .space_table import SpaceTable
+
+# Herkunft einer Geschossfläche (StoreyArea.method)
+METHOD_QUANTITIES = "quantities"  # Summe der IfcQuantityArea der Räume
+METHOD_GEOMETRY = "geometry"  # Grundriss aus Geometrie (Räume ohne Mengen bzw. Bodenplatten)
+METHOD_MIXED = "mixed"  # teils Mengen, teils Geometrie
+METHOD_LABELS = {
+    METHOD_QUANTITIES: "Mengen",
+    METHOD_GEOMETRY: "Geometrie",
+    METHOD_MIXED: "Mengen + Geometrie",
+}
 
 
 @dataclass
@@ -19,6 +40,11 @@ class StoreyArea:
     name: str
     elevation: Optional[float]
     area_m2: float
+    method: str = METHOD_QUANTITIES
+
+    @property
+    def method_label(self) -> str:
+        return METHOD_LABELS.get(self.method, self.method)
 
 
 @dataclass
@@ -28,10 +54,41 @@ class AreaResult:
 
     building_area_m2 = Summe aller Geschossflächen (aus Räumen)
     storeys          = Liste der einzelnen Geschossflächen
+    timings          = Laufzeit je Teilschritt in Sekunden ("quantities", "mapping", "geometry", "sum")
+    counts           = Umfang des Modells ("buildings", "storeys", "spaces", "spaces_with_area", "quantity_sets")
+    spaces           = Raumtabelle (space_table.SpaceTable), aus der storeys abgeleitet sind;
+                       None bei manuell erfassten Flächen
     """
     ifc_path: str
     building_area_m2: Optional[float]
     storeys: List[StoreyArea]
+    timings: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    spaces: Optional[SpaceTable] = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> dict:
+        """Serialisierbare Form (z.B. für den Ergebnis-Cache)."""
+        data = asdict(replace(self, spaces=None))
+        data["spaces"] = self.spaces.to_dict() if self.spaces is not None else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AreaResult":
+        spaces = None
+        if data.get("spaces"):
+            if __package__ in (None, ""):
+                from processors.space_table import SpaceTable
+            else:
+                from .space_table import SpaceTable
+            spaces = SpaceTable.from_dict(data["spaces"])
+        return cls(
+            ifc_path=data["ifc_path"],
+            building_area_m2=data.get("building_area_m2"),
+            storeys=[StoreyArea(**s) for s in data.get("storeys") or []],
+            timings=data.get("timings") or {},
+            counts=data.get("counts") or {},
+            spaces=spaces,
+        )
 
     @property
     def rounded_area_m2(self) -> Optional[float]:
@@ -54,7 +111,10 @@ class AreaResult:
             f"{self.building_area_m2:.1f} m²"
         )
         lines.append("")
-        lines.append("Geschossflächen (aus IfcSpace-Quantities):")
+        if all(s.method == METHOD_QUANTITIES for s in self.storeys):
+            lines.append("Geschossflächen (aus IfcSpace-Quantities):")
+        else:
+            lines.append("Geschossflächen (aus IfcSpace-Quantities, fehlende Mengen aus Geometrie):")
 
         # nach Höhe sortieren (falls Höhe vorhanden)
         for s in sorted(
@@ -64,62 +124,334 @@ class AreaResult:
             label = s.name or "<ohne Name>"
             if s.elevation is not None:
                 label += f" (z = {s.elevation:.2f} m)"
-            lines.append(f"  - {label}: {s.area_m2:.1f} m²")
+            source = "" if s.method == METHOD_QUANTITIES else f" [{s.method_label}]"
+            lines.append(f"  - {label}: {s.area_m2:.1f} m²{source}")
 
         return lines
 
 
+# Erkannte Mengennamen (normalisiert: Grossbuchstaben, ohne Leerzeichen/_)
+AREA_QUANTITY_NAMES = frozenset({
+    "NETFLOORAREA",
+    "GROSSFLOORAREA",
+    "NETAREA",
+    "GROSSAREA",
+    "AREA",
+})
+_NAME_SEPARATORS = str.maketrans("", "", " _")
+
+
+def storey_areas_from_table(table: SpaceTable) -> dict[int, StoreyArea]:
+    """
+    Geschossflächen (Mengen + Geometrie-Anteil) je Geschoss-#id aus der
+    Raumtabelle, in Modell-Reihenfolge; Geschosse ohne Fläche fehlen. Die
+    Kote wird in Meter umgerechnet.
+    """
+    quantity = table.storey_quantity_m2()
+    geometry = table.storey_geometry_m2
+    result: dict[int, StoreyArea] = {}
+    for i in (quantity + geometry > 0.0).nonzero()[0].tolist():
+        if geometry[i] <= 0.0:
+            method = METHOD_QUANTITIES
+        elif quantity[i] <= 0.0:
+            method = METHOD_GEOMETRY
+        else:
+            method = METHOD_MIXED
+        elevation = float(table.storey_elevation[i]) * table.unit_scale  # Meter
+        result[int(table.storey_id[i])] = StoreyArea(
+            name=str(table.storey_name[i]),
+            elevation=None if elevation != elevation else elevation,  # NaN = unbekannt
+            area_m2=float(quantity[i] + geometry[i]),
+            method=method,
+        )
+    return result
+
+
+@lru_cache(maxsize=1024)
+def is_area_quantity_name(name: Optional[str]) -> bool:
+    """Prüft einen Mengennamen gegen AREA_QUANTITY_NAMES (gemerkt je Rohname)."""
+    return (name or "").upper().translate(_NAME_SEPARATORS) in AREA_QUANTITY_NAMES
+
+
 class BuildingAreaCalculator:
     """
     Ermittelt Geschossflächen und Gebäudefläche aus allen Räumen (IfcSpace).
 
     Strategie:
-    - Räume je Geschoss über IfcRelContainedInSpatialStructure finden.
-    - Für jeden Raum eine IfcQuantityArea (Net/Gross) aus den Mengen lesen.
-    - Pro Geschoss aufsummieren; Summe aller Geschosse = Gebäudefläche nach VKF.
+    - In einem Durchgang über IfcRelDefinesByProperties je Raum die erste
+      passende IfcQuantityArea (Net/Gross) merken (Index Raum -> Fläche).
+    - In einem Durchgang über IfcRelAggregates (bzw. ergänzend
+      IfcRelContainedInSpatialStructure) je Raum das Geschoss merken
+      (Index Raum -> Geschoss).
+    - Daraus eine spaltenweise Raumtabelle bilden (space_table(), inkl.
+      Nutzung = LongName und Zone = IfcZone) und pro Geschoss vektorisiert
+      aufsummieren; Summe aller Geschosse = Gebäudefläche nach VKF.
+    - Räume ohne Flächenmenge (bzw. bei Modellen ganz ohne Räume die
+      Bodenplatten) werden mit geometry_fallback über ihren Grundriss
+      ergänzt (siehe footprint.py). Nur diese Bauteile werden trianguliert,
+      vollständig bemasste Modelle bleiben so schnell wie bisher.
+
+    Die Indizes werden einmal pro Calculator aufgebaut (siehe build_indexes).
+    Geschosse ohne Elevation erhalten die Z-Lage ihrer Placement.
+    Laufzeiten der Teilschritte landen in .timings, der Modellumfang in counts().
+    Nach compute_storey_areas() stehen je Geschoss-#id das Ergebnis in
+    storey_areas und der Geometrie-Anteil in geometry_areas (siehe revision.py).
     """
 
-    def __init__(self, ifc_file):
+    def __init__(
+        self,
+        ifc_file,
+        placements: Optional[PlacementResolver] = None,
+        geometry_fallback: bool = True,
+        threads: Optional[int] = None,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ):
         self.ifc = ifc_file
+        if placements is None:
+            if __package__ in (None, ""):
+                from processors.placement import PlacementResolver
+            else:
+                from .placement import PlacementResolver
+            placements = PlacementResolver.for_model(ifc_file)
+        self.placements = placements
+        self.geometry_fallback = geometry_fallback
+        self.threads = threads
+        self._area_by_space: Optional[dict[int, float]] = None
+        self._storey_by_space: Optional[dict[int, object]] = None
+        self._zone_by_space: Optional[dict[int, str]] = None
+        self._space_table: Optional[SpaceTable] = None
+        self._space_count = 0
+        self._quantity_sets = 0
+        self.timings = Timings(on_span=on_progress)
+        self.storey_areas: dict[int, StoreyArea] = {}
+        self.geometry_areas: dict[int, float] = {}
 
     # ------------------------------------------------------------
-    # Hilfsfunktionen
+    # Indizes
     # ------------------------------------------------------------
 
-    def _space_area_m2(self, space) -> Optional[float]:
-        """
-        Liest die Raumfläche aus IfcElementQuantity (IfcQuantityArea).
+    @staticmethod
+    def _quantity_set_area(qset) -> Optional[float]:
+        """Erste passende Fläche einer IfcElementQuantity oder None."""
+        for q in qset.Quantities or []:
+            if q.is_a("IfcQuantityArea") and is_area_quantity_name(q.Name):
+                if q.AreaValue is not None:
+                    return float(q.AreaValue)
+        return None
 
-        Es werden typische Namen aus BIM-Tools erkannt:
-        NETFLOORAREA, GROSSFLOORAREA, NETAREA, GROSSAREA, AREA (mit/ohne _ / Leerzeichen).
-        """
-        for rel in getattr(space, "IsDefinedBy", []) or []:
-            if not rel.is_a("IfcRelDefinesByProperties"):
-                continue
+    def _index_space_areas(self, space_ids: set) -> dict[int, float]:
+        """Raum-ID -> Fläche aus einem Durchgang über IfcRelDefinesByProperties."""
+        qset_area: dict[int, Optional[float]] = {}
+        areas: dict[int, float] = {}
 
-            prop_def = getattr(rel, "RelatingPropertyDefinition", None)
-            if prop_def is None:
+        for rel in self.ifc.by_type("IfcRelDefinesByProperties") or []:
+            prop_defs = rel.RelatingPropertyDefinition
+            if prop_defs is None:
                 continue
-            if not prop_def.is_a("IfcElementQuantity"):
+            # IFC4: auch IfcPropertySetDefinitionSet (Tupel) möglich
+            if not isinstance(prop_defs, (list, tuple)):
+                prop_defs = (prop_defs,)
+
+            area = None
+            for prop_def in prop_defs:
+                key = prop_def.id()
+                if key not in qset_area:
+                    if prop_def.is_a("IfcElementQuantity"):
+                        self._quantity_sets += 1
+                        qset_area[key] = self._quantity_set_area(prop_def)
+                    else:
+                        qset_area[key] = None
+                area = qset_area[key]
+                if area is not None:
+                    break
+            if area is None:
                 continue
 
-            for q in prop_def.Quantities or []:
-                if not q.is_a("IfcQuantityArea"):
+            for obj in rel.RelatedObjects or []:
+                obj_id = obj.id()
+                if obj_id in space_ids and obj_id not in areas:
+                    areas[obj_id] = area
+        return areas
+
+    def _index_space_storeys(self, space_ids: set) -> dict[int, object]:
+        """
+        Raum-ID -> Geschoss (IfcRelAggregates, ergänzend ContainedInSpatialStructure,
+        zuletzt Höhenband der Placement).
+        """
+        storeys: dict[int, object] = {}
+        nested: set[int] = set()  # Teilräume eines Raums (Fläche zählt beim übergeordneten Raum)
+
+        # 1) Üblicher Weg: Geschoss aggregiert Räume (Space.Decomposes)
+        for rel in self.ifc.by_type("IfcRelAggregates") or []:
+            parent = rel.RelatingObject
+            if parent is None:
+                continue
+            if not parent.is_a("IfcBuildingStorey"):
+                if parent.is_a("IfcSpace"):
+                    nested.update(obj.id() for obj in rel.RelatedObjects or [])
+                continue
+            for obj in rel.RelatedObjects or []:
+                obj_id = obj.id()
+                if obj_id in space_ids and obj_id not in storeys:
+                    storeys[obj_id] = parent
+
+        # 2) Fallback: ContainedInStructure (manchmal für Räume verwendet);
+        #    nur nötig, wenn noch Räume ohne Geschoss übrig sind
+        if len(storeys) < len(space_ids):
+            for rel in self.ifc.by_type("IfcRelContainedInSpatialStructure") or []:
+                parent = rel.RelatingStructure
+                if parent is None or not parent.is_a("IfcBuildingStorey"):
                     continue
+                for obj in rel.RelatedElements or []:
+                    obj_id = obj.id()
+                    if obj_id in space_ids and obj_id not in storeys:
+                        storeys[obj_id] = parent
+
+        # 3) Räume ohne Geschoss-Beziehung (z.B. direkt am Gebäude): Höhenband
+        orphans = space_ids - storeys.keys() - nested
+        if orphans:
+            storeys.update(self._storeys_by_elevation(orphans))
+        return storeys
+
+    def _storeys_by_elevation(self, space_ids: set) -> dict[int, object]:
+        """Raum-ID -> Geschoss, in dessen Höhenband (spatial_index.ElevationBands) die Placement liegt."""
+        all_storeys = self.ifc.by_type("IfcBuildingStorey") or []
+        spaces = [self.ifc.by_id(i) for i in sorted(space_ids)]
+        spaces = [s for s in spaces if s.ObjectPlacement is not None]
+        if not all_storeys or not spaces:
+            return {}
+        if __package__ in (None, ""):
+            from processors.spatial_index import ElevationBands
+        else:
+            from .spatial_index import ElevationBands
+
+        bands = ElevationBands([self._storey_elevation(s) for s in all_storeys], unit_scale(self.ifc))
+        z = self.placements.matrices(s.ObjectPlacement for s in spaces)[:, 2, 3]
+        return {
+            space.id(): all_storeys[i]
+            for space, i in zip(spaces, bands.storeys_at(z).tolist())
+            if i >= 0
+        }
+
+    def _index_space_zones(self, space_ids: set) -> dict[int, str]:
+        """Raum-ID -> Name der (ersten) IfcZone aus IfcRelAssignsToGroup."""
+        zones: dict[int, str] = {}
+        for rel in self.ifc.by_type("IfcRelAssignsToGroup") or []:
+            group = rel.get_argument(6)  # RelatingGroup
+            if group is None or not group.is_a("IfcZone"):
+                continue
+            name = group.get_argument(2) or ""  # Name
+            for obj in rel.get_argument(4) or ():  # RelatedObjects
+                obj_id = obj.id()
+                if obj_id in space_ids and obj_id not in zones:
+                    zones[obj_id] = name
+        return zones
+
+    def build_indexes(self) -> None:
+        """Baut die Indizes (Raum -> Fläche, Raum -> Geschoss, Raum -> Zone) in je einem Durchgang."""
+        with self.timings.span("quantities"):
+            space_ids = {space.id() for space in self.ifc.by_type("IfcSpace") or []}
+            self._space_count = len(space_ids)
+            self._quantity_sets = 0
+            self._area_by_space = self._index_space_areas(space_ids)
+        with self.timings.span("mapping"):
+            self._storey_by_space = self._index_space_storeys(space_ids)
+            self._zone_by_space = self._index_space_zones(space_ids)
+        self._space_table = None
+
+    def _ensure_indexes(self) -> None:
+        if self._area_by_space is None or self._storey_by_space is None:
+            self.build_indexes()
+
+    def space_table(self) -> SpaceTable:
+        """
+        Alle Räume als Spalten (#id, GlobalId, Name, Geschoss, Fläche, Nutzung, Zone);
+        einmal je Calculator aufgebaut. Den Geometrie-Anteil je Geschoss setzt
+        compute_storey_areas().
+        """
+        self._ensure_indexes()
+        if self._space_table is not None:
+            return self._space_table
+        if __package__ in (None, ""):
+            from processors.space_table import SpaceTable
+        else:
+            from .space_table import SpaceTable
+
+        storeys = self.ifc.by_type("IfcBuildingStorey") or []
+        storey_index = {storey.id(): i for i, storey in enumerate(storeys)}
+        areas, storey_by_space, zones = self._area_by_space, self._storey_by_space, self._zone_by_space
+        rows = []
+        for space in self.ifc.by_type("IfcSpace") or []:
+            space_id = space.id()
+            storey = storey_by_space.get(space_id)
+            rows.append((
+                space_id,
+                space.get_argument(0) or f"#{space_id}",  # GlobalId
+                space.get_argument(2) or "",  # Name
+                -1 if storey is None else storey_index.get(storey.id(), -1),
+                areas.get(space_id),
+                space.get_argument(7),  # LongName (Nutzung)
+                zones.get(space_id),
+            ))
+        buildings, building_by_storey = self._building_storeys()
+        self._space_table = SpaceTable.from_rows(
+            rows,
+            [
+                (
+                    storey.id(),
+                    getattr(storey, "LongName", None) or getattr(storey, "Name", None) or "",
+                    self._storey_elevation(storey),
+                    building_by_storey.get(storey.id(), -1),
+                )
+                for storey in storeys
+            ],
+            buildings,
+            unit_scale(self.ifc),
+        )
+        return self._space_table
+
+    def _building_storeys(self) -> tuple[list[str], dict[int, int]]:
+        """Gebäudenamen (eindeutig, Suffix " (2)" bei Dubletten) und Geschoss-#id -> Gebäude-Index."""
+        if __package__ in (None, ""):
+            from processors.buildings import building_name, building_storeys
+        else:
+            from .buildings import building_name, building_storeys
+
+        buildings, storeys = building_storeys(self.ifc)
+        names: list[str] = []
+        for building in buildings:
+            base = name = building_name(building)
+            n = 1
+            while name in names:
+                n += 1
+                name = f"{base} ({n})"
+            names.append(name)
+        return names, storeys
+
+    def counts(self) -> dict[str, int]:
+        """Modellumfang zum Normieren der Laufzeiten (baut die Indizes bei Bedarf)."""
+        self._ensure_indexes()
+        return {
+            "buildings": len(self.space_table().buildings),
+            "storeys": len(self.ifc.by_type("IfcBuildingStorey") or []),
+            "spaces": self._space_count,
+            "spaces_with_area": len(self._area_by_space),
+            "quantity_sets": self._quantity_sets,
+        }
 
-                q_name = (q.Name or "").upper().replace(" ", "").replace("_", "")
-                if q_name in {
-                    "NETFLOORAREA",
-                    "GROSSFLOORAREA",
-                    "NETAREA",
-                    "GROSSAREA",
-                    "AREA",
-                }:
-                    if q.AreaValue is not None:
-                        return float(q.AreaValue)
-
-        # Kein passender Quantity-Eintrag gefunden
-        return None
+    # ------------------------------------------------------------
+    # Hilfsfunktionen
+    # ------------------------------------------------------------
+
+    def _space_area_m2(self, space) -> Optional[float]:
+        """
+        Raumfläche aus IfcElementQuantity (IfcQuantityArea) über den Index.
+
+        Es werden typische Namen aus BIM-Tools erkannt:
+        NETFLOORAREA, GROSSFLOORAREA, NETAREA, GROSSAREA, AREA (mit/ohne _ / Leerzeichen).
+        """
+        self._ensure_indexes()
+        return self._area_by_space.get(space.id())
 
     def _spaces_by_storey(self) -> dict:
         """
@@ -128,70 +460,86 @@ class BuildingAreaCalculator:
         Viele Modelle hängen Räume nicht über ContainsElements an, sondern
         über IfcRelAggregates / Decomposes. Wir berücksichtigen beide Varianten.
         """
+        self._ensure_indexes()
         mapping = {s: [] for s in self.ifc.by_type("IfcBuildingStorey") or []}
-
         for space in self.ifc.by_type("IfcSpace") or []:
-            storey = None
+            storey = self._storey_by_space.get(space.id())
+            if storey is not None:
+                mapping.setdefault(storey, []).append(space)
+        return mapping
 
-            # 1) Üblicher Weg: Space.Decomposes -> IfcRelAggregates
-            for rel in getattr(space, "Decomposes", []) or []:
-                parent = getattr(rel, "RelatingObject", None)
-                if parent and parent.is_a("IfcBuildingStorey"):
-                    storey = parent
-                    break
+    def _storey_elevation(self, storey) -> Optional[float]:
+        elevation = getattr(storey, "Elevation", None)
+        if elevation is not None:
+            return elevation
+        placement = getattr(storey, "ObjectPlacement", None)
+        if placement is None:
+            return None
+        try:
+            return self.placements.origin(placement)[2]
+        except Exception:
+            return None
 
-            # 2) Fallback: ContainedInStructure (manchmal für Räume verwendet)
-            if storey is None:
-                for rel in getattr(space, "ContainedInStructure", []) or []:
-                    if not rel.is_a("IfcRelContainedInSpatialStructure"):
-                        continue
-                    parent = getattr(rel, "RelatingStructure", None)
-                    if parent and parent.is_a("IfcBuildingStorey"):
-                        storey = parent
-                        break
-
-            if storey is None:
+    def _missing_elements_by_storey(self) -> dict[int, list]:
+        """Bauteile ohne Flächenmenge je Geschoss-#id (Räume, ohne Räume die Bodenplatten)."""
+        self._ensure_indexes()
+        spaces = self.ifc.by_type("IfcSpace") or []
+        missing: dict[int, list] = {}
+        for space in spaces:
+            if space.id() in self._area_by_space:
                 continue
-
-            mapping.setdefault(storey, []).append(space)
-
-        return mapping
+            storey = self._storey_by_space.get(space.id())
+            if storey is not None:
+                missing.setdefault(storey.id(), []).append(space)
+        if not spaces:
+            for storey in self.ifc.by_type("IfcBuildingStorey") or []:
+                slabs = floor_slabs(storey)
+                if slabs:
+                    missing[storey.id()] = slabs
+        return missing
+
+    def compute_fallback_areas(self, skip: Iterable[int] = ()) -> dict[int, float]:
+        """
+        Grundrissfläche (m²) der Bauteile ohne Mengen je Geschoss-#id; leer ohne Geometrie-Unterstützung.
+        Geschosse in skip (Geometrie-Anteil schon bekannt) werden nicht trianguliert.
+        """
+        if not supports_geometry(self.ifc):
+            return {}
+        skip = set(skip)
+        missing = {sid: elements for sid, elements in self._missing_elements_by_storey().items() if sid not in skip}
+        if not missing:
+            return {}
+        try:
+            with self.timings.span("geometry"):
+                return FootprintAreaCalculator(self.ifc, threads=self.threads).areas_m2(missing)
+        except Exception:  # z.B. shapely/ifcopenshell.geom nicht installiert
+            return {}
 
     # ------------------------------------------------------------
     # Hauptlogik
     # ------------------------------------------------------------
 
-    def compute_storey_areas(self) -> List[StoreyArea]:
-        """Berechnet die Geschossflächen aus den Raumflächen."""
-        storeys_spaces = self._spaces_by_storey()
-        storey_results: List[StoreyArea] = []
-
-        for storey, spaces in storeys_spaces.items():
-            storey_area = 0.0
-
-            for space in spaces:
-                area = self._space_area_m2(space)
-                if area is None:
-                    continue
-                storey_area += area
-
-            if storey_area > 0.0:
-                name = (
-                    getattr(storey, "LongName", None)
-                    or getattr(storey, "Name", None)
-                    or ""
-                )
-                elevation = getattr(storey, "Elevation", None)
-
-                storey_results.append(
-                    StoreyArea(
-                        name=name,
-                        elevation=elevation,
-                        area_m2=storey_area,
-                    )
-                )
+    def compute_storey_areas(self, known_geometry: Optional[dict[int, float]] = None) -> List[StoreyArea]:
+        """
+        Berechnet die Geschossflächen aus den Raumflächen.
 
-        return storey_results
+        known_geometry: Geometrie-Anteil (m²) je Geschoss-#id aus einer früheren
+        Revision; für diese Geschosse entfällt die Grundrissberechnung.
+        """
+        self._ensure_indexes()
+        fallback: dict[int, float] = {}
+        if self.geometry_fallback:
+            fallback.update(known_geometry or {})
+            fallback.update(self.compute_fallback_areas(skip=fallback))
+        self.geometry_areas = fallback
+        with self.timings.span("sum"):
+            return self._storey_results(fallback)
+
+    def _storey_results(self, fallback: dict[int, float]) -> List[StoreyArea]:
+        table = self.space_table()
+        table.storey_geometry_m2[:] = [fallback.get(storey_id, 0.0) for storey_id in table.storey_id.tolist()]
+        self.storey_areas = storey_areas_from_table(table)
+        return list(self.storey_areas.values())
 
     def compute_building_area_m2(self) -> Optional[float]:
         """
@@ -207,11 +555,24 @@ class BuildingAreaCalculator:
 class AreaService:
     """Service-Klasse analog zu HeightService, aber für die Gebäudefläche."""
 
+    def __init__(
+        self,
+        loader: Optional[IfcLoader] = None,
+        geometry_fallback: bool = True,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ):
+        self.loader = loader
+        self.geometry_fallback = geometry_fallback
+        self.on_progress = on_progress  # erhält die Teilschritte ("quantities", "mapping", ...)
+
     def compute_from_path(self, ifc_path: str) -> AreaResult:
-        loader = IfcLoader()
+        loader = self.loader or IfcLoader()
         ifc = loader.load(ifc_path)
+        return self.compute_from_ifc(ifc, ifc_path)
 
-        calc = BuildingAreaCalculator(ifc)
+    def compute_from_ifc(self, ifc, ifc_path: str) -> AreaResult:
+        """Wie compute_from_path, aber mit einem bereits geladenen Modell."""
+        calc = BuildingAreaCalculator(ifc, geometry_fallback=self.geometry_fallback, on_progress=self.on_progress)
         storeys = calc.compute_storey_areas()
         building_area_m2 = (
             sum(s.area_m2 for s in storeys) if storeys else None
@@ -221,4 +582,7 @@ class AreaService:
             ifc_path=ifc_path,
             building_area_m2=building_area_m2,
             storeys=storeys,
+            timings=dict(calc.timings),
+            counts=calc.counts(),
+            spaces=calc.space_table(),
         )
@@ -0,0 +1,234 @@
+"""
+processors/buildings.py
+
+Höhe, VKF-Kategorie und Geschossflächen je IfcBuilding.
+
+Ein Modell mit mehreren Gebäuden (Areal, Campus) liefert über alle Geschosse
+gerechnet keine sinnvolle Höhe (tiefstes Geschoss des einen bis höchstes
+des anderen Gebäudes) und summiert die Flächen aller Gebäude. Hier werden
+die Ergebnisse daher je Gebäude aufgeteilt:
+
+- building_storeys(): Gebäude -> Geschosse in einem Durchgang über
+  IfcRelAggregates (auch über Teilgebäude und verschachtelte Geschosse);
+  das Ergebnis steht als storey_building in der Raumtabelle (space_table.py).
+- BuildingService.compute(): alle Gebäude in einem vektorisierten Durchgang
+  über die Raumtabelle (Höhe = höchste - tiefste Geschosskote, Kategorie über
+  RuleSet.evaluate, Geschossflächen wie in area.py). Der Aufwand wächst mit
+  Räumen und Geschossen, nicht mit der Anzahl Gebäude; die teuren Schritte
+  (Grundrisse, Geometrie-Höhe) laufen einmal für das ganze Modell parallel
+  über alle Geschosse bzw. Bauteile.
+- Mit exakter Höhe (geometry_height.py) wird der höchste Vertex je Gebäude
+  aus derselben Triangulierung genommen (element_buildings(), geometry_tops()).
+
+Gebraucht werden nur die Raumtabelle und mit exakter Höhe die Oberkanten je
+Gebäude; beide liegen im Ergebnis-Cache, die Aufteilung funktioniert daher
+auch für Ergebnisse aus dem Cache.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Sequence
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.area import AreaResult, storey_areas_from_table
+    from processors.height import HeightResult
+    from processors.vkf_rules import rule_set
+else:
+    from .area import AreaResult, storey_areas_from_table
+    from .height import HeightResult
+    from .vkf_rules import rule_set
+
+if TYPE_CHECKING:  # geometry_height zieht NumPy nach, erst bei Bedarf importieren
+    from .geometry_height import GeometryHeight
+
+
+def _children(ifc) -> dict[int, list]:
+    """Objekt-#id -> Teile aus allen IfcRelAggregates (ein Durchgang)."""
+    children: dict[int, list] = {}
+    for rel in ifc.by_type("IfcRelAggregates") or []:
+        parent = rel.RelatingObject
+        if parent is not None:
+            children.setdefault(parent.id(), []).extend(rel.RelatedObjects or ())
+    return children
+
+
+def building_name(building) -> str:
+    return getattr(building, "LongName", None) or getattr(building, "Name", None) or f"Gebäude #{building.id()}"
+
+
+def building_storeys(ifc, children: Optional[dict[int, list]] = None) -> tuple[list, dict[int, int]]:
+    """
+    (Gebäude, Geschoss-#id -> Index in Gebäude). Teilgebäude (IfcBuilding unter
+    IfcBuilding) zählen zum übergeordneten Gebäude, Geschosse ohne Gebäude fehlen.
+    """
+    buildings = ifc.by_type("IfcBuilding") or []
+    if not buildings:
+        return [], {}
+    children = _children(ifc) if children is None else children
+    parts = {c.id() for b in buildings for c in children.get(b.id(), ()) if c.is_a("IfcBuilding")}
+    buildings = [b for b in buildings if b.id() not in parts]
+    storeys: dict[int, int] = {}
+    for index, building in enumerate(buildings):
+        stack = list(children.get(building.id(), ()))
+        while stack:
+            obj = stack.pop()
+            if obj.is_a("IfcBuildingStorey"):
+                storeys.setdefault(obj.id(), index)
+            elif not obj.is_a("IfcBuilding"):
+                continue
+            stack.extend(c for c in children.get(obj.id(), ()) if c.is_a("IfcBuildingStorey") or c.is_a("IfcBuilding"))
+    return buildings, storeys
+
+
+def element_buildings(ifc) -> dict[int, int]:
+    """
+    Bauteil-#id -> Index in building_storeys() über IfcRelContainedInSpatialStructure
+    (Geschoss oder direkt das Gebäude), inkl. der Teile zusammengesetzter Bauteile
+    (z.B. Platten eines IfcRoof).
+    """
+    children = _children(ifc)
+    buildings, storeys = building_storeys(ifc, children)
+    structures = {**storeys, **{b.id(): i for i, b in enumerate(buildings)}}
+    result: dict[int, int] = {}
+    for rel in ifc.by_type("IfcRelContainedInSpatialStructure") or []:
+        structure = rel.RelatingStructure
+        index = structures.get(structure.id()) if structure is not None else None
+        if index is None:
+            continue
+        stack = list(rel.RelatedElements or ())
+        while stack:
+            element = stack.pop()
+            if element.id() not in result:
+                result[element.id()] = index
+                stack.extend(children.get(element.id(), ()))
+    return result
+
+
+@dataclass
+class BuildingResult:
+    """Höhe und Geschossflächen eines Gebäudes (Teilmenge des Modells)."""
+    name: str
+    height: HeightResult
+    area: AreaResult
+
+    def text_lines(self) -> list[str]:
+        lines = [f"Gebäude: {self.name}"]
+        lines.extend(f"  {line}" for line in self.height.text_lines())
+        lines.extend(f"  {line}" for line in self.area.text_lines()[1:])  # ohne Zeile "IFC-Datei"
+        return lines
+
+
+class BuildingService:
+    """Teilt Höhe und Flächen eines ausgewerteten Modells nach Gebäude auf (siehe Modul-Doku)."""
+
+    def __init__(self, edition: Optional[str] = None):
+        self.rules = rule_set(edition)
+
+    def compute(
+        self,
+        height: HeightResult,
+        area: AreaResult,
+        geometry: Optional[GeometryHeight] = None,
+        ifc=None,
+        tops_m: Optional[Sequence[Optional[float]]] = None,
+    ) -> list[BuildingResult]:
+        """
+        Ergebnis je Gebäude aus der Raumtabelle von area (leer ohne Raumtabelle
+        bzw. ohne IfcBuilding). Mit geometry und ifc (exakte Höhe) wird die Höhe
+        je Gebäude aus den Bauteilen des Gebäudes bestimmt, mit tops_m
+        (geometry_tops(), z.B. aus dem Cache) ohne Modell.
+        """
+        table = area.spaces
+        if table is None or not table.buildings:
+            return []
+        import numpy as np
+
+        n = len(table.buildings)
+        storey_building = table.storey_building
+        elevation = table.storey_elevation
+        known = (storey_building >= 0) & ~np.isnan(elevation)
+        top = np.full(n, -np.inf)
+        base = np.full(n, np.inf)
+        np.maximum.at(top, storey_building[known], elevation[known])
+        np.minimum.at(base, storey_building[known], elevation[known])
+        base = base * table.unit_scale  # Koten in Projekteinheiten -> Meter, wie die Höhe des Modells
+        top = top * table.unit_scale
+        heights = np.where(top >= base, top - base, np.nan)
+        methods = ["storeys"] * n
+        if tops_m is None and geometry is not None and ifc is not None:
+            tops_m = self.geometry_tops(ifc, geometry, n)
+        if tops_m is not None:
+            heights, methods = self._geometry_heights(tops_m, heights, base, methods)
+        categories = self.rules.evaluate("height_category", heights).tolist()
+
+        # Geschosse und Räume je Gebäude (stabil sortiert, Modell-Reihenfolge bleibt)
+        storey_order = np.argsort(storey_building, kind="stable")
+        storey_bounds = np.searchsorted(storey_building[storey_order], np.arange(n + 1))
+        space_building = table.building
+        space_order = np.argsort(space_building, kind="stable")
+        space_bounds = np.searchsorted(space_building[space_order], np.arange(n + 1))
+        storey_counts = np.diff(storey_bounds).tolist()
+        by_storey = storey_areas_from_table(table)
+        storey_ids = table.storey_id[storey_order].tolist()
+
+        results = []
+        for i, name in enumerate(table.buildings):
+            storeys = [
+                by_storey[sid] for sid in storey_ids[storey_bounds[i] : storey_bounds[i + 1]] if sid in by_storey
+            ]
+            spaces = table.select(space_order[space_bounds[i] : space_bounds[i + 1]])
+            height_m = None if np.isnan(heights[i]) else float(heights[i])
+            results.append(
+                BuildingResult(
+                    name=name,
+                    height=HeightResult(
+                        ifc_path=height.ifc_path,
+                        height_m=height_m,
+                        vkf_category=categories[i],
+                        extra_answers=height.extra_answers,
+                        method=methods[i],
+                        counts={"storeys": storey_counts[i]},
+                    ),
+                    area=AreaResult(
+                        ifc_path=area.ifc_path,
+                        building_area_m2=sum(s.area_m2 for s in storeys) if storeys else None,
+                        storeys=storeys,
+                        counts={
+                            "storeys": storey_counts[i],
+                            "spaces": len(spaces),
+                            "spaces_with_area": int(np.count_nonzero(~np.isnan(spaces.area_m2))),
+                        },
+                        spaces=spaces,
+                    ),
+                )
+            )
+        return results
+
+    @staticmethod
+    def geometry_tops(ifc, geometry: GeometryHeight, n: int) -> list[Optional[float]]:
+        """Höchster Vertex je Gebäude in Meter (None = ohne Bauteile), Reihenfolge wie building_storeys()."""
+        result: list[Optional[float]] = [None] * n
+        tops = geometry.element_top_z_m
+        if not tops:
+            return result
+        for element_id, index in element_buildings(ifc).items():
+            z = tops.get(element_id)
+            if z is not None and index < n and (result[index] is None or z > result[index]):
+                result[index] = z
+        return result
+
+    @staticmethod
+    def _geometry_heights(tops_m: Sequence[Optional[float]], heights, base, methods: list[str]):
+        """Höchster Vertex je Gebäude - tiefstes Geschoss des Gebäudes (beides Meter); ohne Bauteile bleibt die Schätzung."""
+        import numpy as np
+
+        top = np.array([-np.inf if z is None else z for z in tops_m], dtype=np.float64)
+        exact = np.isfinite(top) & np.isfinite(base)
+        heights = np.where(exact, top - base, heights)
+        methods = ["geometry" if e else m for e, m in zip(exact.tolist(), methods)]
+        return heights, methods
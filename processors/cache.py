@@ -0,0 +1,225 @@
+"""
+processors/cache.py
+
+Persistenter Ergebnis-Cache für IFC-Auswertungen.
+
+Schlüssel = SHA-256 der IFC-Bytes + Prozessor-Version. Die Prozessor-Version
+wird aus dem Quelltext von processors/*.py abgeleitet; ändert sich die Logik,
+ändert sich die Version und alte Einträge werden nicht mehr getroffen (und
+später per LRU verdrängt). Einträge sind kleine JSON-Dateien mit
+HeightResult/AreaResult, ein Treffer braucht also kein ifcopenshell.open.
+Zusätzliche Stufen (Fingerabdruck, Brandabschnitte, Fluchtwege) legen ihr
+Ergebnis als "section" im selben Eintrag ab (siehe pipeline.AnalysisService);
+fehlt eine angeforderte section, wird nur sie nachgerechnet und ergänzt.
+
+Mehrere Streamlit-Sessions und CLI-Läufe dürfen denselben Cache nutzen:
+Schreiben erfolgt atomar (temporäre Datei + os.replace), Verdrängen läuft
+unter einer Dateisperre.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.height import HeightResult
+    from processors.area import AreaResult
+    from processors.ifc_loader import sha256_file, sha256_stream  # noqa: F401 (Re-Export)
+else:
+    from .height import HeightResult
+    from .area import AreaResult
+    from .ifc_loader import sha256_file, sha256_stream  # noqa: F401 (Re-Export)
+
+# Manuell erhöhen, wenn sich das Format der Cache-Einträge ändert
+CACHE_FORMAT_VERSION = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_processor_version: Optional[str] = None
+
+
+def processor_version() -> str:
+    """Kurzer Hash über Cache-Format und Quelltext aller Prozessor-Module."""
+    global _processor_version
+    if _processor_version is None:
+        digest = hashlib.sha256(f"format={CACHE_FORMAT_VERSION}".encode())
+        for source in sorted(Path(__file__).parent.glob("*.py")):
+            digest.update(source.name.encode())
+            digest.update(source.read_bytes())
+        _processor_version = digest.hexdigest()[:16]
+    return _processor_version
+
+
+def default_cache_dir() -> Path:
+    """Cache-Ordner: $BRANDSCHUTZ_CACHE_DIR oder ~/.cache/brandschutzkochbuch."""
+    env = os.environ.get("BRANDSCHUTZ_CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / ".cache" / "brandschutzkochbuch"
+
+
+@dataclass
+class CacheEntry:
+    """Ein Cache-Eintrag: Höhe, Fläche und Ergebnisse weiterer Stufen (JSON-Form, nach Stufenname)."""
+    height: HeightResult
+    area: AreaResult
+    sections: dict[str, dict] = field(default_factory=dict)
+
+
+@contextmanager
+def _file_lock(lock_path: Path) -> Iterator[None]:
+    """Exklusive Sperre über eine Lock-Datei (ohne fcntl: keine Sperre, Schreiben bleibt atomar)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(lock_path, "a+b") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+class ResultCache:
+    """
+    Größenbegrenzter Datei-Cache (LRU) für HeightResult/AreaResult.
+
+    Jeder Eintrag liegt als <sha256>-<version>.json im Cache-Ordner. Ein Treffer
+    aktualisiert die mtime der Datei; beim Verdrängen werden die Einträge mit
+    der ältesten mtime gelöscht, bis max_bytes unterschritten ist.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, os.PathLike]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        version: Optional[str] = None,
+    ):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.version = version or processor_version()
+
+    # ------------------------------------------------------------
+    # Hilfsfunktionen
+    # ------------------------------------------------------------
+
+    def _entry_path(self, content_hash: str) -> Path:
+        return self.directory / f"{content_hash}-{self.version}.json"
+
+    def _entries(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return list(self.directory.glob("*.json"))
+
+    # ------------------------------------------------------------
+    # Öffentliche API
+    # ------------------------------------------------------------
+
+    def get(self, content_hash: str) -> Optional[tuple[HeightResult, AreaResult]]:
+        """Liefert die gespeicherten Ergebnisse oder None (kein Treffer / defekter Eintrag)."""
+        entry = self.get_entry(content_hash)
+        return None if entry is None else (entry.height, entry.area)
+
+    def get_entry(self, content_hash: str) -> Optional[CacheEntry]:
+        """Wie get, zusätzlich mit den gespeicherten sections."""
+        path = self._entry_path(content_hash)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            entry = CacheEntry(
+                height=HeightResult.from_dict(data["height"]),
+                area=AreaResult.from_dict(data["area"]),
+                sections=dict(data.get("sections") or {}),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        try:
+            os.utime(path)  # LRU: zuletzt benutzt
+        except OSError:
+            pass
+        return entry
+
+    def put(
+        self,
+        content_hash: str,
+        height: HeightResult,
+        area: AreaResult,
+        sections: Optional[dict[str, dict]] = None,
+    ) -> None:
+        """
+        Speichert die Ergebnisse atomar und verdrängt bei Bedarf alte Einträge.
+        sections ersetzt die bisherigen des Eintrags (bei Bedarf vorher zusammenführen).
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        height_data = height.to_dict()
+        height_data["extra_answers"] = None  # Antworten gehören zum Lauf, nicht zum Modell
+        area_data = area.to_dict()
+        height_data["timings"] = area_data["timings"] = {}  # Laufzeiten ebenso
+        # counts bleiben, ausser der Wiederverwendung aus der Vorrevision (gilt nur für diesen Lauf)
+        area_data["counts"] = {k: v for k, v in (area_data.get("counts") or {}).items() if k != "storeys_reused"}
+        payload = json.dumps(
+            {"version": self.version, "height": height_data, "area": area_data, "sections": sections or {}},
+            ensure_ascii=False,
+        )
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            os.replace(tmp_name, self._entry_path(content_hash))
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Löscht die am längsten nicht benutzten Einträge, bis max_bytes eingehalten ist."""
+        with _file_lock(self.directory / ".lock"):
+            entries = []
+            for path in self._entries():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue  # parallel gelöscht
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _mtime, size, _path in entries)
+            for _mtime, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                total -= size
+
+    def invalidate(self, all_versions: bool = False) -> int:
+        """
+        Löscht Einträge anderer Prozessor-Versionen (bzw. alle mit all_versions=True).
+        Gibt die Anzahl gelöschter Einträge zurück.
+        """
+        removed = 0
+        with _file_lock(self.directory / ".lock"):
+            for path in self._entries():
+                if not all_versions and path.stem.endswith(f"-{self.version}"):
+                    continue
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
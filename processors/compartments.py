@@ -0,0 +1,478 @@
+"""
+processors/compartments.py
+
+Brandabschnitte aus Zonen und Raumbegrenzungen.
+
+Räume werden über eine Union-Find-Struktur zu Brandabschnitten vereinigt:
+- Räume derselben Brandabschnitts-Zone (IfcZone, Name passend zu
+  COMPARTMENT_ZONE_PATTERN) gehören zusammen, auch über Geschosse hinweg.
+- Räume, die an dasselbe Bauteil grenzen (IfcRelSpaceBoundary), gehören auf
+  demselben Geschoss zusammen, ausser das Bauteil hat einen Feuerwiderstand
+  (Property FireRating o.ä., z.B. Brandwand oder Brandschutztür).
+- Räume ganz ohne Raumbegrenzung und ohne Zone werden mit Raumgeometrie
+  (Lademodus "full", spatial_index.SpatialIndex) über benachbarte Grundrisse
+  vereinigt, ausser ein Bauteil mit Feuerwiderstand liegt zwischen ihnen.
+  Ohne Grundriss bilden sie je Geschoss einen gemeinsamen Abschnitt
+  (bisherige Annahme: Geschoss = Brandabschnitt).
+
+Jede Relation wird einmal gelesen, die Vereinigung ist nahezu linear in der
+Anzahl Raumbegrenzungen; Flächen je Abschnitt werden über die Raumtabelle
+(space_table.SpaceTable) vektorisiert summiert und gegen die maximale
+Brandabschnittsfläche (vkf_rules) geprüft.
+
+Nutzung:
+    result = CompartmentService().compute_from_ifc(ifc, path, spaces=area.spaces)
+    for line in result.text_lines(): print(line)
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.area import BuildingAreaCalculator
+    from processors.ifc_loader import IfcLoader
+    from processors.footprint import supports_geometry
+    from processors.space_table import SpaceTable
+    from processors.spatial_index import WALL_GAP_M, SpatialIndex
+    from processors.timing import Timings
+    from processors.vkf_rules import STOREY_AREA_LIMIT_M2, compartment_area_comment
+else:
+    from .area import BuildingAreaCalculator
+    from .ifc_loader import IfcLoader
+    from .footprint import supports_geometry
+    from .space_table import SpaceTable
+    from .spatial_index import WALL_GAP_M, SpatialIndex
+    from .timing import Timings
+    from .vkf_rules import STOREY_AREA_LIMIT_M2, compartment_area_comment
+
+# Zonen, die als Brandabschnitt gelten (Name, ohne Gross-/Kleinschreibung)
+COMPARTMENT_ZONE_PATTERN = r"brand|fire|compartment|^BA\b"
+
+# Erkannte Property-Namen für den Feuerwiderstand (normalisiert wie AREA_QUANTITY_NAMES)
+FIRE_RATING_NAMES = frozenset({"FIRERATING", "FEUERWIDERSTAND", "FEUERWIDERSTANDSKLASSE"})
+# Werte, die keinen Feuerwiderstand bedeuten
+NOT_RATED_VALUES = frozenset({"", "-", "0", "NONE", "KEINE", "NOTDEFINED", "UNDEFINED", "NULL"})
+_NAME_SEPARATORS = str.maketrans("", "", " _")
+
+# Grundlage eines Brandabschnitts (Compartment.method)
+METHOD_ZONE = "zone"
+METHOD_BOUNDARIES = "boundaries"
+METHOD_GEOMETRY = "geometry"
+METHOD_STOREY = "storey"
+METHOD_LABELS = {
+    METHOD_ZONE: "Zone",
+    METHOD_BOUNDARIES: "Raumbegrenzungen",
+    METHOD_GEOMETRY: "Grundrisse",
+    METHOD_STOREY: "ganzes Geschoss",
+}
+
+
+class DisjointSet:
+    """Union-Find über 0..n-1 (Vereinigung nach Grösse, Pfadhalbierung)."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, a: int) -> int:
+        parent = self.parent
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def labels(self) -> np.ndarray:
+        """Fortlaufende Gruppennummer je Element (0..k-1, nach erstem Auftreten)."""
+        roots = np.fromiter((self.find(a) for a in range(len(self.parent))), dtype=np.int64, count=len(self.parent))
+        _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+        order = np.argsort(np.argsort(first))
+        return order[inverse]
+
+
+@dataclass
+class Compartment:
+    """Ein Brandabschnitt mit Fläche aus den Raumflächen (Mengen)."""
+    name: str
+    storeys: list[str]
+    spaces: int
+    area_m2: float
+    spaces_without_area: int = 0
+    zones: list[str] = field(default_factory=list)
+    method: str = METHOD_BOUNDARIES
+    comment: str = ""
+
+    @property
+    def method_label(self) -> str:
+        return METHOD_LABELS.get(self.method, self.method)
+
+
+@dataclass
+class CompartmentResult:
+    """
+    Brandabschnitte eines Modells.
+
+    limit_m2 = maximale Brandabschnittsfläche, gegen die comment geprüft wurde
+    timings  = Laufzeit je Teilschritt ("zones", "boundaries", "ratings", "geometry", "union", "sum")
+    counts   = Umfang ("boundaries", "rated_elements", "compartments", "space_footprints")
+    """
+    ifc_path: str
+    compartments: list[Compartment]
+    limit_m2: float = STOREY_AREA_LIMIT_M2
+    timings: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def exceeded(self) -> list[Compartment]:
+        return [c for c in self.compartments if c.comment]
+
+    def to_dict(self) -> dict:
+        """Serialisierbare Form (z.B. für den Ergebnis-Cache)."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompartmentResult":
+        return cls(
+            ifc_path=data.get("ifc_path", ""),
+            compartments=[Compartment(**c) for c in data.get("compartments") or []],
+            limit_m2=data.get("limit_m2", STOREY_AREA_LIMIT_M2),
+            timings=data.get("timings") or {},
+            counts=data.get("counts") or {},
+        )
+
+    def text_lines(self) -> list[str]:
+        if not self.compartments:
+            return ["Brandabschnitte: keine Räume gefunden."]
+        lines = [
+            f"Brandabschnitte: {len(self.compartments)} "
+            f"(davon {len(self.exceeded)} über {self.limit_m2:.0f} m²)"
+        ]
+        for c in self.compartments:
+            storeys = ", ".join(c.storeys) or "<ohne Geschoss>"
+            missing = f", {c.spaces_without_area} ohne Fläche" if c.spaces_without_area else ""
+            comment = f" -> {c.comment}" if c.comment else ""
+            lines.append(
+                f"  - {c.name} [{c.method_label}; {storeys}]: {c.area_m2:.1f} m² "
+                f"({c.spaces} Räume{missing}){comment}"
+            )
+        return lines
+
+
+def _is_rating(name: Optional[str]) -> bool:
+    return (name or "").upper().translate(_NAME_SEPARATORS) in FIRE_RATING_NAMES
+
+
+def property_value(value) -> Any:
+    """Inhalt eines NominalValue (ifcopenshell liefert z.B. IfcLabel(...) als Entität)."""
+    return getattr(value, "wrappedValue", value)
+
+
+def _rated_value(value) -> bool:
+    value = property_value(value)
+    if value is None or value is False:
+        return False
+    return str(value).strip().upper() not in NOT_RATED_VALUES
+
+
+def elements_with_property(ifc_file, candidates: set, matches: Callable[[Optional[str], Any], bool]) -> set:
+    """
+    #ids der Objekte aus candidates mit mindestens einer IfcPropertySingleValue,
+    für die matches(Name, NominalValue) gilt. Ein Durchgang über die
+    Property-Relationen; jedes Property-Set wird nur einmal geprüft.
+    """
+    found: set = set()
+    pset_matches: dict[int, bool] = {}
+    for rel in ifc_file.by_type("IfcRelDefinesByProperties") or []:
+        related = [obj.id() for obj in rel.get_argument(4) or ()]  # RelatedObjects
+        targets = [obj_id for obj_id in related if obj_id in candidates and obj_id not in found]
+        if not targets:
+            continue
+        prop_defs = rel.get_argument(5)  # RelatingPropertyDefinition
+        if not isinstance(prop_defs, (list, tuple)):
+            prop_defs = (prop_defs,)
+        for prop_def in prop_defs:
+            if prop_def is None:
+                continue
+            key = prop_def.id()
+            if key not in pset_matches:
+                pset_matches[key] = prop_def.is_a("IfcPropertySet") and any(
+                    prop.is_a("IfcPropertySingleValue") and matches(prop.get_argument(0), prop.get_argument(2))
+                    for prop in prop_def.get_argument(4) or ()  # HasProperties
+                )
+            if pset_matches[key]:
+                found.update(targets)
+                break
+    return found
+
+
+class CompartmentDetector:
+    """
+    Gruppiert die Räume der Raumtabelle eines Modells zu Brandabschnitten.
+
+    Alle Zugriffe über get_argument(Position), damit der Durchgang auch bei
+    tausenden Räumen und Raumbegrenzungen je Geschoss schnell bleibt
+    (ScannedEntity bietet dieselbe Methode). index (SpatialIndex der
+    Raumtabelle) wird ohne Angabe nur bei Räumen ohne Begrenzung und Zone
+    aufgebaut.
+    """
+
+    def __init__(
+        self,
+        ifc_file,
+        spaces: SpaceTable,
+        zone_pattern: Optional[str] = COMPARTMENT_ZONE_PATTERN,
+        on_progress: Optional[Callable[[str], None]] = None,
+        index: Optional[SpatialIndex] = None,
+    ):
+        self.ifc = ifc_file
+        self.spaces = spaces
+        self.index = index
+        self.zone_pattern = zone_pattern
+        self.timings = Timings(on_span=on_progress)
+        self._counts: dict[str, int] = {}
+
+    # ------------------------------------------------------------
+    # Indizes
+    # ------------------------------------------------------------
+
+    def compartment_zones(self) -> np.ndarray:
+        """Zonen-Codes der Raumtabelle, die als Brandabschnitt gelten (None = alle Zonen)."""
+        if self.zone_pattern is None:
+            return np.arange(len(self.spaces.zones))
+        pattern = re.compile(self.zone_pattern, re.IGNORECASE)
+        return np.array([i for i, name in enumerate(self.spaces.zones) if pattern.search(name)], dtype=np.int64)
+
+    def boundary_rows(self) -> dict[int, list[int]]:
+        """Bauteil-#id -> Tabellenzeilen der angrenzenden Räume (IfcRelSpaceBoundary)."""
+        row_of = {space_id: row for row, space_id in enumerate(self.spaces.space_id.tolist())}
+        rows_by_element: dict[int, list[int]] = {}
+        boundaries = 0
+        for rel in self.ifc.by_type("IfcRelSpaceBoundary") or []:
+            boundaries += 1
+            space = rel.get_argument(4)  # RelatingSpace
+            element = rel.get_argument(5)  # RelatedBuildingElement
+            if space is None or element is None:
+                continue
+            row = row_of.get(space.id())
+            if row is not None:
+                rows_by_element.setdefault(element.id(), []).append(row)
+        self._counts["boundaries"] = boundaries
+        return rows_by_element
+
+    def fire_rated_elements(self, candidates: set) -> set:
+        """#ids der Bauteile aus candidates mit Feuerwiderstand (ein Durchgang über die Property-Relationen)."""
+        rated = elements_with_property(self.ifc, candidates, lambda name, value: _is_rating(name) and _rated_value(value))
+        self._counts["rated_elements"] = self._counts.get("rated_elements", 0) + len(rated)
+        return rated
+
+    def spatial_index(self) -> Optional[SpatialIndex]:
+        """Index der Raumgrundrisse; None ohne Geometrie bzw. ohne Raum mit Grundriss."""
+        if self.index is None and supports_geometry(self.ifc):
+            self.index = SpatialIndex.for_model(self.ifc, self.spaces)
+        return self.index if self.index is not None and self.index.available else None
+
+    def geometric_pairs(self, index: SpatialIndex, rows: np.ndarray, checked: set, rated: set) -> np.ndarray:
+        """
+        Benachbarte Räume (Grundrisse im Abstand <= WALL_GAP_M) unter rows, ohne
+        Bauteil mit Feuerwiderstand auf der Verbindung ihrer Raumpunkte. Geprüft
+        werden die im selben Geschoss enthaltenen Bauteile; checked/rated = schon
+        über die Raumbegrenzungen geprüfte bzw. als feuerwiderstandsfähig erkannte.
+        """
+        import shapely
+
+        pairs = index.adjacent_pairs(WALL_GAP_M, rows)
+        if not len(pairs):
+            return pairs
+        table = self.spaces
+        storey_of = {storey_id: i for i, storey_id in enumerate(table.storey_id.tolist())}
+        element_storey: dict[int, int] = {}
+        for rel in self.ifc.by_type("IfcRelContainedInSpatialStructure") or []:
+            structure = rel.get_argument(5)  # RelatingStructure
+            storey = storey_of.get(structure.id()) if structure is not None else None
+            if storey is not None:
+                element_storey.update((e.id(), storey) for e in rel.get_argument(4) or ())
+        unchecked = set(element_storey) - checked
+        rated = {i for i in rated if i in element_storey} | (self.fire_rated_elements(unchecked) if unchecked else set())
+        footprints = index.element_footprints(self.ifc.by_id(i) for i in sorted(rated))
+        if not footprints:
+            return pairs
+
+        points = index.representative_points()
+        lines = shapely.linestrings(np.stack([points[pairs[:, 0]], points[pairs[:, 1]]], axis=1))
+        walls = shapely.STRtree(list(footprints.values()))
+        wall_storey = np.array([element_storey[i] for i in footprints], dtype=np.int64)
+        hit_line, hit_wall = walls.query(lines, predicate="intersects")
+        same = wall_storey[hit_wall] == table.storey[pairs[hit_line, 0]]
+        blocked = np.zeros(len(pairs), dtype=bool)
+        blocked[hit_line[same]] = True
+        return pairs[~blocked]
+
+    # ------------------------------------------------------------
+    # Hauptlogik
+    # ------------------------------------------------------------
+
+    def labels(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Brandabschnitt je Raum (0..k-1) sowie die Masken der Räume in einer
+        Brandabschnitts-Zone, mit mindestens einer Raumbegrenzung bzw. über
+        den Grundriss zugeordnet.
+        """
+        table = self.spaces
+        n = len(table)
+        sets = DisjointSet(n)
+        storey = table.storey.tolist()
+
+        with self.timings.span("zones"):
+            in_zone = np.isin(table.zone, self.compartment_zones())
+            first_in_zone: dict[int, int] = {}
+            for row in np.flatnonzero(in_zone).tolist():
+                sets.union(first_in_zone.setdefault(int(table.zone[row]), row), row)
+
+        with self.timings.span("boundaries"):
+            rows_by_element = self.boundary_rows()
+            bounded = np.zeros(n, dtype=bool)
+            bounded[[row for rows in rows_by_element.values() for row in rows]] = True
+            shared = {element for element, rows in rows_by_element.items() if len(rows) > 1}
+        with self.timings.span("ratings"):
+            rated = self.fire_rated_elements(shared) if shared else set()
+
+        # Räume ohne Begrenzung und Zone: benachbarte Grundrisse
+        lonely = ~bounded & ~in_zone
+        geometric = np.zeros(n, dtype=bool)
+        with self.timings.span("geometry"):
+            index = self.spatial_index() if lonely.any() else None
+            pairs = np.zeros((0, 2), dtype=np.int64)
+            if index is not None:
+                self._counts["space_footprints"] = len(index)
+                geometric = lonely & index.has_footprint
+                pairs = self.geometric_pairs(index, np.flatnonzero(geometric), shared, rated)
+
+        with self.timings.span("union"):
+            for element in shared - rated:
+                first_on_storey: dict[int, int] = {}
+                for row in rows_by_element[element]:
+                    sets.union(first_on_storey.setdefault(storey[row], row), row)
+            for a, b in pairs.tolist():
+                sets.union(a, b)
+            # übrige Räume ohne Begrenzung, Zone und Grundriss: Geschoss als Brandabschnitt
+            first_on_storey = {}
+            for row in np.flatnonzero(lonely & ~geometric).tolist():
+                sets.union(first_on_storey.setdefault(storey[row], row), row)
+            labels = sets.labels()
+        return labels, in_zone, bounded, geometric
+
+    def compartments(self, limit_m2: float = STOREY_AREA_LIMIT_M2) -> list[Compartment]:
+        labels, in_zone, bounded, geometric = self.labels()
+        table = self.spaces
+        with self.timings.span("sum"):
+            k = int(labels.max()) + 1 if len(labels) else 0
+            missing = np.isnan(table.area_m2)
+            areas = np.bincount(labels, weights=np.where(missing, 0.0, table.area_m2), minlength=k)
+            counts = np.bincount(labels, minlength=k)
+            without_area = np.bincount(labels, weights=missing, minlength=k).astype(np.int64)
+            with_zone = np.bincount(labels, weights=in_zone, minlength=k) > 0
+            with_boundary = np.bincount(labels, weights=bounded, minlength=k) > 0
+            with_geometry = np.bincount(labels, weights=geometric, minlength=k) > 0
+
+            storey_names = table.storey_labels()
+            storeys: list[list[int]] = [[] for _ in range(k)]
+            for label, code in _pairs(labels, table.storey):
+                storeys[label].append(code)
+            zones: list[list[str]] = [[] for _ in range(k)]
+            for label, code in _pairs(labels[in_zone], table.zone[in_zone]):
+                zones[label].append(table.zones[code])
+
+            result: list[Compartment] = []
+            sections: dict[int, int] = {}
+            for label in range(k):
+                names = [storey_names[c] if c >= 0 else "<ohne Geschoss>" for c in storeys[label]]
+                if with_zone[label]:
+                    method, name = METHOD_ZONE, " + ".join(zones[label])
+                elif with_boundary[label] or with_geometry[label]:
+                    first = storeys[label][0] if storeys[label] else -1
+                    sections[first] = sections.get(first, 0) + 1
+                    method = METHOD_BOUNDARIES if with_boundary[label] else METHOD_GEOMETRY
+                    name = f"{names[0] if names else '<ohne Geschoss>'} / Abschnitt {sections[first]}"
+                else:
+                    method, name = METHOD_STOREY, names[0] if names else "<ohne Geschoss>"
+                area = float(areas[label])
+                result.append(
+                    Compartment(
+                        name=name,
+                        storeys=names,
+                        spaces=int(counts[label]),
+                        area_m2=area,
+                        spaces_without_area=int(without_area[label]),
+                        zones=zones[label],
+                        method=method,
+                        comment=compartment_area_comment(area, limit_m2=limit_m2),
+                    )
+                )
+        self._counts["compartments"] = len(result)
+        return result
+
+    def counts(self) -> dict[str, int]:
+        return dict(self._counts)
+
+
+def _pairs(labels: np.ndarray, codes: np.ndarray) -> list[tuple[int, int]]:
+    """Eindeutige (Abschnitt, Code)-Paare, sortiert nach Abschnitt und Code."""
+    if not len(labels):
+        return []
+    pairs = np.unique(np.stack([labels.astype(np.int64), codes.astype(np.int64)], axis=1), axis=0)
+    return [(int(a), int(b)) for a, b in pairs.tolist()]
+
+
+class CompartmentService:
+    """Service-Klasse analog zu AreaService, aber für die Brandabschnitte."""
+
+    def __init__(
+        self,
+        loader: Optional[IfcLoader] = None,
+        zone_pattern: Optional[str] = COMPARTMENT_ZONE_PATTERN,
+        limit_m2: float = STOREY_AREA_LIMIT_M2,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ):
+        self.loader = loader
+        self.zone_pattern = zone_pattern
+        self.limit_m2 = limit_m2
+        self.on_progress = on_progress
+
+    def compute_from_path(self, ifc_path: str) -> CompartmentResult:
+        loader = self.loader or IfcLoader()
+        ifc = loader.load(ifc_path)
+        return self.compute_from_ifc(ifc, ifc_path)
+
+    def compute_from_ifc(self, ifc, ifc_path: str, spaces: Optional[SpaceTable] = None) -> CompartmentResult:
+        """
+        Wie compute_from_path, aber mit einem bereits geladenen Modell. spaces
+        (AreaResult.spaces desselben Modells) spart den Aufbau der Raumtabelle.
+        """
+        if spaces is None:
+            spaces = BuildingAreaCalculator(ifc, geometry_fallback=False).space_table()
+        detector = CompartmentDetector(ifc, spaces, zone_pattern=self.zone_pattern, on_progress=self.on_progress)
+        compartments = detector.compartments(self.limit_m2)
+        return CompartmentResult(
+            ifc_path=ifc_path,
+            compartments=compartments,
+            limit_m2=self.limit_m2,
+            timings=dict(detector.timings),
+            counts=detector.counts(),
+        )
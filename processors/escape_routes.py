@@ -0,0 +1,639 @@
+"""
+processors/escape_routes.py
+
+Fluchtweglängen je Raum über einen Graphen aus Räumen und Türen.
+
+Je Geschoss entsteht ein Graph:
+- Knoten sind die Räume der Raumtabelle (Punkt = Ursprung der ObjectPlacement)
+  und die Türen (IfcDoor, über IfcRelSpaceBoundary; Begrenzungen an Öffnungen
+  werden über IfcRelFillsElement der Tür zugeordnet).
+- Kanten verbinden jeden Raum mit seinen Türen und die Türen eines Raums
+  untereinander (Luftlinie im Grundriss, innerhalb eines Raums also der
+  kürzeste Weg ohne Möblierung und Einbauten).
+- Ziele sind Treppenhäuser (Räume mit IfcStair/IfcStairFlight oder passendem
+  Namen, STAIR_SPACE_PATTERN) samt ihren Türen und Ausgänge ins Freie (Türen
+  mit äusserer Raumbegrenzung oder IsExternal).
+
+Eine Dijkstra-Suche mit allen Zielen als Startknoten liefert für jeden Raum
+die Weglänge zum nächsten Treppenhaus bzw. Ausgang und welches Ziel das ist.
+Die Geschosse werden nacheinander durchsucht, der Aufwand ist
+O((Räume + Türen) log n) je Geschoss. Die Suche ist reiner Python-Code und
+hält den GIL, Threads brächten dort nichts; gegenüber Türen, Raumpunkten und
+Grundrissen fällt sie ohnehin kaum ins Gewicht. threads gilt daher nur für
+die Raumgrundrisse (SpatialIndex.for_model).
+
+Mit Raumgeometrie (Lademodus "full", processors/spatial_index.py) ist der
+Raumpunkt ein Punkt im Grundriss, Türen ohne Raumbegrenzung werden mit den
+Räumen ihres Geschosses im Abstand <= DOOR_REACH_M verbunden und Treppen im
+Geschoss dem Raum zugeordnet, in dessen Grundriss sie liegen. Ohne Geometrie
+gilt für Räume auf gemeinsamem Placement-Ursprung (Geometrie in absoluten
+Koordinaten, z.B. Revit) die Mitte ihrer Türen als Raumpunkt.
+
+Nutzung:
+    result = EscapeRouteService().compute_from_ifc(ifc, path, spaces=area.spaces)
+    for line in result.text_lines(): print(line)
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.area import BuildingAreaCalculator
+    from processors.compartments import elements_with_property, property_value
+    from processors.footprint import supports_geometry
+    from processors.ifc_loader import IfcLoader
+    from processors.placement import PlacementResolver
+    from processors.space_table import SpaceTable
+    from processors.spatial_index import WALL_GAP_M, SpatialIndex, unit_scale
+    from processors.timing import Timings
+    from processors.vkf_rules import ESCAPE_DISTANCE_LIMIT_M, escape_distance_comment
+    from processors.worker import default_worker_count
+else:
+    from .area import BuildingAreaCalculator
+    from .compartments import elements_with_property, property_value
+    from .footprint import supports_geometry
+    from .ifc_loader import IfcLoader
+    from .placement import PlacementResolver
+    from .space_table import SpaceTable
+    from .spatial_index import WALL_GAP_M, SpatialIndex, unit_scale
+    from .timing import Timings
+    from .vkf_rules import ESCAPE_DISTANCE_LIMIT_M, escape_distance_comment
+    from .worker import default_worker_count
+
+# Räume, die als Treppenhaus gelten (Name oder Nutzung, ohne Gross-/Kleinschreibung)
+STAIR_SPACE_PATTERN = r"treppe|stair"
+
+# Räume mit mehr Türen (z.B. lange Korridore) werden nur über den Raumpunkt
+# verbunden statt über alle Tür-Paare (sonst quadratisch viele Kanten)
+MAX_DIRECT_DOORS = 48
+
+# Türen ohne Raumbegrenzung verbinden die Räume bis zu diesem Abstand vom
+# Tür-Ursprung (Wandstärke, nur mit Raumgeometrie)
+DOOR_REACH_M = WALL_GAP_M
+
+_STAIR_TYPES = ("IfcStair", "IfcStairFlight")
+
+
+@dataclass
+class StoreyEscapeRoutes:
+    """Fluchtwege eines Geschosses."""
+    storey: str
+    spaces: int
+    doors: int
+    stairs: int  # Räume, die als Treppenhaus gelten
+    exits: int  # Ausgänge ins Freie
+    max_distance_m: Optional[float] = None
+    worst_space: str = ""
+    unreachable: int = 0
+    comment: str = ""
+
+
+@dataclass
+class EscapeRouteResult:
+    """
+    Fluchtweglängen eines Modells.
+
+    distance_m = Weglänge je Zeile der Raumtabelle spaces (NaN = kein Ziel erreichbar)
+    target     = Index in targets (Treppenhaus bzw. Ausgang) je Raum, -1 = keins
+    limit_m    = zulässige Fluchtweglänge, gegen die comment geprüft wurde
+    timings    = Laufzeit je Teilschritt ("index", "doors", "points", "stairs", "graph", "search")
+    counts     = Umfang ("doors", "stair_spaces", "exits", "route_edges", "space_footprints")
+    """
+    ifc_path: str
+    storeys: list[StoreyEscapeRoutes]
+    distance_m: np.ndarray = field(default_factory=lambda: np.zeros(0), repr=False)
+    target: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32), repr=False)
+    targets: tuple[str, ...] = ()
+    spaces: Optional[SpaceTable] = field(default=None, repr=False)
+    limit_m: float = ESCAPE_DISTANCE_LIMIT_M
+    timings: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def exceeded(self) -> list[StoreyEscapeRoutes]:
+        return [s for s in self.storeys if s.comment]
+
+    def to_dict(self) -> dict:
+        """Serialisierbare Form ohne Raumtabelle (z.B. für den Ergebnis-Cache); fehlende Wege als None."""
+        return {
+            "ifc_path": self.ifc_path,
+            "storeys": [asdict(s) for s in self.storeys],
+            "distance_m": [None if np.isnan(v) else v for v in self.distance_m.tolist()],
+            "target": self.target.tolist(),
+            "targets": list(self.targets),
+            "limit_m": self.limit_m,
+            "timings": self.timings,
+            "counts": self.counts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, spaces: Optional[SpaceTable] = None) -> "EscapeRouteResult":
+        """spaces: Raumtabelle, zu der distance_m/target gehören (AreaResult.spaces desselben Modells)."""
+        return cls(
+            ifc_path=data.get("ifc_path", ""),
+            storeys=[StoreyEscapeRoutes(**s) for s in data.get("storeys") or []],
+            distance_m=np.array([np.nan if v is None else v for v in data.get("distance_m") or []], dtype=np.float64),
+            target=np.array(data.get("target") or [], dtype=np.int32),
+            targets=tuple(data.get("targets") or ()),
+            spaces=spaces,
+            limit_m=data.get("limit_m", ESCAPE_DISTANCE_LIMIT_M),
+            timings=data.get("timings") or {},
+            counts=data.get("counts") or {},
+        )
+
+    def longest(self, count: int = 10) -> list[tuple[str, str, float, str]]:
+        """Die count längsten Fluchtwege als (Geschoss, Raum, Länge, Ziel)."""
+        if self.spaces is None or not len(self.distance_m):
+            return []
+        reachable = np.flatnonzero(~np.isnan(self.distance_m))
+        rows = reachable[np.argsort(-self.distance_m[reachable], kind="stable")[:count]]
+        storey_names = self.spaces.storey_labels()
+        return [
+            (
+                storey_names[self.spaces.storey[row]] if self.spaces.storey[row] >= 0 else "<ohne Geschoss>",
+                str(self.spaces.name[row]),
+                float(self.distance_m[row]),
+                self.targets[self.target[row]],
+            )
+            for row in rows.tolist()
+        ]
+
+    def text_lines(self) -> list[str]:
+        if not self.storeys:
+            return ["Fluchtwege: keine Räume gefunden."]
+        lines = [f"Fluchtwege (max. {self.limit_m:.0f} m bis Treppenhaus/Ausgang):"]
+        for s in self.storeys:
+            if s.max_distance_m is None:
+                lines.append(f"  - {s.storey}: kein Treppenhaus/Ausgang erreichbar ({s.spaces} Räume, {s.doors} Türen)")
+                continue
+            unreachable = f", {s.unreachable} Räume ohne Weg" if s.unreachable else ""
+            comment = f" -> {s.comment}" if s.comment else ""
+            lines.append(
+                f"  - {s.storey}: max. {s.max_distance_m:.1f} m ({s.worst_space}; "
+                f"{s.doors} Türen, {s.stairs} Treppenhäuser, {s.exits} Ausgänge{unreachable}){comment}"
+            )
+        return lines
+
+
+def multi_source_dijkstra(
+    n: int, a: np.ndarray, b: np.ndarray, weights: np.ndarray, sources: dict[int, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Kürzeste Wege im ungerichteten Graphen (Kanten a[i]-b[i]) von allen
+    Startknoten gleichzeitig. sources: Knoten -> Ziel-Nummer, die an alle
+    von dort aus erreichten Knoten weitergegeben wird.
+    Liefert (Distanz je Knoten, inf = unerreichbar; Ziel-Nummer je Knoten, -1).
+    """
+    heads = np.concatenate([a, b])
+    order = np.argsort(heads, kind="stable")
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(heads, minlength=n))]).tolist()
+    tails = np.concatenate([b, a])[order].tolist()
+    lengths = np.concatenate([weights, weights])[order].tolist()
+
+    dist = [float("inf")] * n
+    origin = [-1] * n
+    heap = []
+    for node, label in sources.items():
+        dist[node] = 0.0
+        origin[node] = label
+        heap.append((0.0, node))
+    heapq.heapify(heap)
+    pop, push = heapq.heappop, heapq.heappush
+    while heap:
+        d, u = pop(heap)
+        if d > dist[u]:
+            continue
+        label = origin[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = tails[k]
+            nd = d + lengths[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                origin[v] = label
+                push(heap, (nd, v))
+    return np.array(dist, dtype=np.float64), np.array(origin, dtype=np.int32)
+
+
+class EscapeRouteAnalyzer:
+    """
+    Baut den Raum-/Tür-Graphen eines Modells und sucht je Geschoss die
+    kürzesten Wege zu Treppenhäusern und Ausgängen.
+
+    Relationen werden je einmal über get_argument(Position) gelesen
+    (ScannedEntity bietet dieselbe Methode), Koordinaten gesammelt über den
+    PlacementResolver des Modells aufgelöst. index (SpatialIndex der
+    Raumtabelle) wird ohne Angabe bei Geometrie-Unterstützung aufgebaut,
+    mit threads Threads für die Grundrisse.
+    """
+
+    def __init__(
+        self,
+        ifc_file,
+        spaces: SpaceTable,
+        placements: Optional[PlacementResolver] = None,
+        threads: Optional[int] = None,
+        stair_pattern: Optional[str] = STAIR_SPACE_PATTERN,
+        on_progress: Optional[Callable[[str], None]] = None,
+        index: Optional[SpatialIndex] = None,
+    ):
+        self.ifc = ifc_file
+        self.spaces = spaces
+        self.index = index
+        self.placements = placements or PlacementResolver.for_model(ifc_file)
+        self.threads = max(1, threads or default_worker_count())
+        self.stair_pattern = stair_pattern
+        self.timings = Timings(on_span=on_progress)
+        self._counts: dict[str, int] = {}
+        self._row_of = {space_id: row for row, space_id in enumerate(spaces.space_id.tolist())}
+        self._stair_ids = {e.id() for t in _STAIR_TYPES for e in ifc_file.by_type(t) or []}
+
+    # ------------------------------------------------------------
+    # Türen, Treppen, Ausgänge
+    # ------------------------------------------------------------
+
+    def spatial_index(self) -> Optional[SpatialIndex]:
+        """Index der Raumgrundrisse; None ohne Geometrie bzw. ohne Raum mit Grundriss."""
+        if self.index is None and supports_geometry(self.ifc):
+            self.index = SpatialIndex.for_model(self.ifc, self.spaces, threads=self.threads)
+        return self.index if self.index is not None and self.index.available else None
+
+    def _containers(self, ids: set[int]) -> dict[int, object]:
+        """Element-#id -> enthaltende räumliche Struktur (IfcRelContainedInSpatialStructure) für ids."""
+        result: dict[int, object] = {}
+        for rel in (self.ifc.by_type("IfcRelContainedInSpatialStructure") or []) if ids else ():
+            structure = rel.get_argument(5)  # RelatingStructure
+            if structure is None:
+                continue
+            for element in rel.get_argument(4) or ():
+                if element.id() in ids:
+                    result[element.id()] = structure
+        return result
+
+    def _container_storeys(self, ids: set[int]) -> dict[int, int]:
+        """Element-#id -> Geschoss-Index der Raumtabelle (im Geschoss oder in einem Raum enthalten)."""
+        storey_of = {storey_id: i for i, storey_id in enumerate(self.spaces.storey_id.tolist())}
+        result: dict[int, int] = {}
+        for element_id, structure in self._containers(ids).items():
+            row = self._row_of.get(structure.id())
+            storey = int(self.spaces.storey[row]) if row is not None else storey_of.get(structure.id(), -1)
+            if storey >= 0:
+                result[element_id] = storey
+        return result
+
+    def doors(self) -> tuple[list, list[tuple[int, int]], set[int], set[int]]:
+        """
+        (Tür-Entitäten, (Tür-Index, Tabellenzeile) je Raumbegrenzung, Türen mit
+        äusserer Begrenzung, Zeilen der Räume, die an eine Treppe grenzen).
+        """
+        doors = {door.id(): door for door in self.ifc.by_type("IfcDoor") or []}
+        for rel in self.ifc.by_type("IfcRelFillsElement") or []:
+            opening, element = rel.get_argument(4), rel.get_argument(5)
+            if opening is not None and element is not None and element.id() in doors:
+                doors[opening.id()] = element  # Öffnung -> Tür
+
+        index: dict[int, int] = {}
+        entities: list = []
+        incidences: set[tuple[int, int]] = set()
+        external: set[int] = set()
+        stair_rows: set[int] = set()
+        for rel in self.ifc.by_type("IfcRelSpaceBoundary") or []:
+            space = rel.get_argument(4)  # RelatingSpace
+            element = rel.get_argument(5)  # RelatedBuildingElement
+            if space is None or element is None:
+                continue
+            row = self._row_of.get(space.id())
+            if row is None:
+                continue
+            door = doors.get(element.id())
+            if door is None:
+                if element.id() in self._stair_ids:
+                    stair_rows.add(row)
+                continue
+            i = index.get(door.id())
+            if i is None:
+                i = index[door.id()] = len(entities)
+                entities.append(door)
+            incidences.add((i, row))
+            if rel.get_argument(8) == "EXTERNAL":  # InternalOrExternalBoundary
+                external.add(i)
+        return entities, sorted(incidences), external, stair_rows
+
+    def unbounded_doors(
+        self, doors: list, incidences: list[tuple[int, int]], index: SpatialIndex
+    ) -> tuple[list, list[tuple[int, int]]]:
+        """
+        Ergänzt Türen ohne Raumbegrenzung: verbunden mit allen Räumen ihres
+        Geschosses (Enthaltensein, sonst Höhenband) im Abstand <= DOOR_REACH_M.
+        """
+        known = {door.id() for door in doors}
+        others = [
+            d for d in self.ifc.by_type("IfcDoor") or [] if d.id() not in known and d.get_argument(5) is not None
+        ]
+        if not others:
+            return doors, incidences
+        matrices = self.placements.matrices(d.get_argument(5) for d in others)
+        storeys = index.bands.storeys_at(matrices[:, 2, 3])
+        position = {d.id(): i for i, d in enumerate(others)}
+        for door_id, storey in self._container_storeys(set(position)).items():
+            storeys[position[door_id]] = storey
+        hit_door, hit_row = index.spaces_near(matrices[:, :2, 3], storeys, DOOR_REACH_M)
+
+        doors, added = list(doors), {}
+        new: list[tuple[int, int]] = []
+        for i, row in zip(hit_door.tolist(), hit_row.tolist()):
+            if i not in added:
+                added[i] = len(doors)
+                doors.append(others[i])
+            new.append((added[i], row))
+        return doors, sorted(set(incidences).union(new))
+
+    def external_doors(self, entities: list, incidences: list[tuple[int, int]], external: set[int]) -> set[int]:
+        """Ausgänge: Türen mit äusserer Begrenzung oder (an nur einem Raum) mit IsExternal."""
+        spaces_per_door = np.bincount([i for i, _row in incidences], minlength=len(entities))
+        single = {entities[i].id(): i for i in np.flatnonzero(spaces_per_door == 1).tolist() if i not in external}
+        if single:
+            flagged = elements_with_property(
+                self.ifc, set(single), lambda name, value: name == "IsExternal" and property_value(value) is True
+            )
+            external = external | {single[door_id] for door_id in flagged}
+        return external
+
+    def stair_rows(self, bounded: set[int], points: np.ndarray, index: Optional[SpatialIndex] = None) -> set[int]:
+        """
+        Zeilen der Treppenhaus-Räume: passender Name/Nutzung, Begrenzung an einer
+        Treppe, Treppe im Raum enthalten oder (im Geschoss enthalten) Raum, in
+        dessen Grundriss die Treppe liegt, sonst nächster Raum desselben Geschosses.
+        """
+        table = self.spaces
+        rows = set(bounded)
+        if self.stair_pattern is not None and len(table):
+            pattern = re.compile(self.stair_pattern, re.IGNORECASE)
+            usage_hits = [i for i, name in enumerate(table.usages) if pattern.search(name)]
+            rows.update(np.flatnonzero(np.isin(table.usage, usage_hits)).tolist())
+            rows.update(i for i, name in enumerate(table.name.tolist()) if pattern.search(name))
+
+        storey_of = {storey_id: i for i, storey_id in enumerate(table.storey_id.tolist())}
+        on_storey: list[tuple[int, int]] = []
+        for stair_id, structure in self._containers(self._stair_ids).items():
+            row = self._row_of.get(structure.id())
+            if row is not None:
+                rows.add(row)
+            elif structure.id() in storey_of:
+                on_storey.append((storey_of[structure.id()], stair_id))
+
+        if on_storey:
+            storeys = np.array([storey for storey, _stair in on_storey], dtype=np.int64)
+            origins = self.placements.matrices(self.ifc.by_id(s).get_argument(5) for _storey, s in on_storey)[:, :2, 3]
+            inside = index.spaces_at(origins, storeys) if index is not None else np.full(len(on_storey), -1)
+            for storey, xy, row in zip(storeys.tolist(), origins, inside.tolist()):
+                candidates = np.flatnonzero(table.storey == storey)
+                if row >= 0:
+                    rows.add(row)
+                elif len(candidates):
+                    nearest = np.argmin(np.hypot(*(points[candidates] - xy).T))
+                    rows.add(int(candidates[nearest]))
+        return rows
+
+    # ------------------------------------------------------------
+    # Koordinaten und Graph
+    # ------------------------------------------------------------
+
+    def points(
+        self, doors: list, incidences: list[tuple[int, int]], index: Optional[SpatialIndex] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Grundriss-Punkte (x, y) je Raum und je Tür aus den ObjectPlacements;
+        Räume mit Grundriss (index) über einen Punkt im Grundriss.
+        """
+        table = self.spaces
+        by_id = self.ifc.by_id
+        space_xy = self.placements.matrices(by_id(i).get_argument(5) for i in table.space_id.tolist())[:, :2, 3]
+        door_xy = self.placements.matrices(d.get_argument(5) for d in doors)[:, :2, 3]
+        if index is not None:
+            space_xy[index.has_footprint] = index.representative_points()[index.has_footprint]
+
+        # Räume ohne Grundriss auf gemeinsamem Ursprung: Mitte ihrer Türen
+        if len(table) and incidences:
+            key = np.column_stack([table.storey, np.round(space_xy * 1000.0)])
+            _, inverse, counts = np.unique(key, axis=0, return_inverse=True, return_counts=True)
+            shared = counts[inverse.ravel()] > 1
+            door_index, rows = np.array(incidences).T
+            hits = np.bincount(rows, minlength=len(table))
+            use = shared & (hits > 0)
+            if index is not None:
+                use &= ~index.has_footprint
+            if use.any():
+                sums = np.stack([np.bincount(rows, weights=door_xy[door_index, k], minlength=len(table)) for k in (0, 1)], axis=1)
+                space_xy[use] = sums[use] / hits[use, None]
+        return space_xy, door_xy
+
+    def edges(
+        self, incidences: list[tuple[int, int]], space_xy: np.ndarray, door_xy: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Kanten (a, b, Länge) über Knoten 0..n-1 = Räume, n.. = Türen."""
+        n = len(self.spaces)
+        if not incidences:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        door_index, rows = (np.array(incidences, dtype=np.int64).T)
+        a, b = [rows], [n + door_index]
+        lengths = [np.hypot(*(space_xy[rows] - door_xy[door_index]).T)]
+
+        # Tür-Paare je Raum (direkter Weg durch den Raum)
+        order = np.argsort(rows, kind="stable")
+        sorted_rows, sorted_doors = rows[order], door_index[order]
+        starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        ends = np.r_[starts[1:], len(sorted_rows)]
+        pairs = [
+            pair
+            for start, end in zip(starts.tolist(), ends.tolist())
+            if 2 <= end - start <= MAX_DIRECT_DOORS
+            for pair in itertools.combinations(sorted_doors[start:end].tolist(), 2)
+        ]
+        if pairs:
+            first, second = np.array(pairs, dtype=np.int64).T
+            a.append(n + first)
+            b.append(n + second)
+            lengths.append(np.hypot(*(door_xy[first] - door_xy[second]).T))
+        return np.concatenate(a), np.concatenate(b), np.concatenate(lengths)
+
+    # ------------------------------------------------------------
+    # Hauptlogik
+    # ------------------------------------------------------------
+
+    def analyze(self, limit_m: float = ESCAPE_DISTANCE_LIMIT_M) -> EscapeRouteResult:
+        table = self.spaces
+        n = len(table)
+        with self.timings.span("index"):
+            index = self.spatial_index()
+        with self.timings.span("doors"):
+            doors, incidences, external, bounded_stairs = self.doors()
+            if index is not None:
+                doors, incidences = self.unbounded_doors(doors, incidences, index)
+            exits = self.external_doors(doors, incidences, external) if doors else set()
+        with self.timings.span("points"):
+            space_xy, door_xy = self.points(doors, incidences, index)
+        with self.timings.span("stairs"):
+            stairs = self.stair_rows(bounded_stairs, space_xy, index)
+
+        with self.timings.span("graph"):
+            a, b, lengths = self.edges(incidences, space_xy, door_xy)
+            lengths = lengths * unit_scale(self.ifc)  # Placements in Projekteinheiten -> Meter
+            # Geschoss je Knoten; eine Tür gehört zum Geschoss ihres ersten Raums
+            door_storey = np.full(len(doors), -1, dtype=np.int64)
+            for i, row in reversed(incidences):
+                door_storey[i] = table.storey[row]
+            node_storey = np.concatenate([table.storey.astype(np.int64), door_storey])
+            same = node_storey[a] == node_storey[b]
+            a, b, lengths = a[same], b[same], lengths[same]
+
+            # Ziele: Treppenhaus-Räume samt ihren Türen, Ausgangstüren
+            targets: list[str] = []
+            sources: dict[int, int] = {}
+            names = table.name.tolist()
+            pattern = re.compile(self.stair_pattern or STAIR_SPACE_PATTERN, re.IGNORECASE)
+            for row in sorted(stairs):
+                sources[row] = len(targets)
+                targets.append(names[row] if pattern.search(names[row]) else f"Treppenhaus {names[row]}")
+            for i, row in incidences:
+                if row in stairs:
+                    sources.setdefault(n + i, sources[row])
+            for i in sorted(exits):
+                sources[n + i] = len(targets)
+                targets.append(f"Ausgang {doors[i].get_argument(2) or f'#{doors[i].id()}'}")
+
+            groups = self._storey_groups(node_storey, a, b, lengths, sources)
+
+        with self.timings.span("search"):
+            distance = np.full(len(node_storey), np.inf)
+            target = np.full(len(node_storey), -1, dtype=np.int32)
+            for nodes, *graph in groups:
+                distance[nodes], target[nodes] = multi_source_dijkstra(*graph)
+
+        space_distance = np.where(np.isinf(distance[:n]), np.nan, distance[:n])
+        storeys = self._summaries(space_distance, node_storey, doors, stairs, exits, limit_m)
+        self._counts.update(
+            doors=len(doors),
+            stair_spaces=len(stairs),
+            exits=len(exits),
+            route_edges=int(len(a)),
+            space_footprints=len(index) if index is not None else 0,
+        )
+        return EscapeRouteResult(
+            ifc_path="",
+            storeys=storeys,
+            distance_m=space_distance,
+            target=target[:n],
+            targets=tuple(targets),
+            spaces=table,
+            limit_m=limit_m,
+        )
+
+    @staticmethod
+    def _storey_groups(node_storey, a, b, lengths, sources) -> list[tuple]:
+        """Je Geschoss (Knoten, Anzahl, a, b, Längen, Startknoten) mit lokaler Nummerierung."""
+        order = np.argsort(node_storey, kind="stable")
+        values, starts = np.unique(node_storey[order], return_index=True)
+        ends = np.r_[starts[1:], len(order)]
+        local = np.empty(len(node_storey), dtype=np.int64)
+        edge_order = np.argsort(node_storey[a], kind="stable")
+        edge_starts = np.searchsorted(node_storey[a][edge_order], values, side="left")
+        edge_ends = np.searchsorted(node_storey[a][edge_order], values, side="right")
+
+        for start, end in zip(starts, ends):
+            local[order[start:end]] = np.arange(end - start)
+        group_sources: dict[int, dict[int, int]] = {}
+        for node, label in sources.items():
+            group_sources.setdefault(int(node_storey[node]), {})[int(local[node])] = label
+
+        groups = []
+        for value, start, end, e_start, e_end in zip(values.tolist(), starts, ends, edge_starts, edge_ends):
+            nodes = order[start:end]
+            edges = edge_order[e_start:e_end]
+            groups.append(
+                (nodes, len(nodes), local[a[edges]], local[b[edges]], lengths[edges], group_sources.get(value, {}))
+            )
+        return groups
+
+    def _summaries(self, distance, node_storey, doors, stairs, exits, limit_m) -> list[StoreyEscapeRoutes]:
+        table = self.spaces
+        n = len(table)
+        door_storey = node_storey[n:]
+        stair_storey = np.bincount([table.storey[r] for r in stairs if table.storey[r] >= 0], minlength=len(table.storey_id))
+        exit_storey = np.bincount([door_storey[i] for i in exits if door_storey[i] >= 0], minlength=len(table.storey_id))
+        door_count = np.bincount(door_storey[door_storey >= 0], minlength=len(table.storey_id))
+        space_count = table.storey_spaces()
+
+        result: list[StoreyEscapeRoutes] = []
+        names = table.name.tolist()
+        for storey, name in enumerate(table.storey_labels()):
+            rows = np.flatnonzero(table.storey == storey)
+            reachable = rows[~np.isnan(distance[rows])]
+            summary = StoreyEscapeRoutes(
+                storey=name,
+                spaces=int(space_count[storey]),
+                doors=int(door_count[storey]),
+                stairs=int(stair_storey[storey]),
+                exits=int(exit_storey[storey]),
+                unreachable=int(len(rows) - len(reachable)),
+            )
+            if len(reachable):
+                worst = reachable[np.argmax(distance[reachable])]
+                summary.max_distance_m = float(distance[worst])
+                summary.worst_space = names[worst]
+                summary.comment = escape_distance_comment(summary.max_distance_m, limit_m=limit_m)
+            result.append(summary)
+        return result
+
+    def counts(self) -> dict[str, int]:
+        return dict(self._counts)
+
+
+class EscapeRouteService:
+    """Service-Klasse analog zu CompartmentService, aber für die Fluchtwege."""
+
+    def __init__(
+        self,
+        loader: Optional[IfcLoader] = None,
+        threads: Optional[int] = None,
+        stair_pattern: Optional[str] = STAIR_SPACE_PATTERN,
+        limit_m: float = ESCAPE_DISTANCE_LIMIT_M,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ):
+        self.loader = loader
+        self.threads = threads
+        self.stair_pattern = stair_pattern
+        self.limit_m = limit_m
+        self.on_progress = on_progress
+
+    def compute_from_path(self, ifc_path: str) -> EscapeRouteResult:
+        loader = self.loader or IfcLoader()
+        ifc = loader.load(ifc_path)
+        return self.compute_from_ifc(ifc, ifc_path)
+
+    def compute_from_ifc(self, ifc, ifc_path: str, spaces: Optional[SpaceTable] = None) -> EscapeRouteResult:
+        """
+        Wie compute_from_path, aber mit einem bereits geladenen Modell. spaces
+        (AreaResult.spaces desselben Modells) spart den Aufbau der Raumtabelle.
+        """
+        if spaces is None:
+            spaces = BuildingAreaCalculator(ifc, geometry_fallback=False).space_table()
+        analyzer = EscapeRouteAnalyzer(
+            ifc, spaces, threads=self.threads, stair_pattern=self.stair_pattern, on_progress=self.on_progress
+        )
+        result = analyzer.analyze(self.limit_m)
+        result.ifc_path = ifc_path
+        result.timings = dict(analyzer.timings)
+        result.counts = analyzer.counts()
+        return result
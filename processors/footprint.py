@@ -0,0 +1,137 @@
+"""
+processors/footprint.py
+
+Geschossflächen aus der Geometrie, wenn Mengen (IfcQuantityArea) fehlen.
+
+Die betroffenen Bauteile (Räume ohne Flächenmenge bzw. Bodenplatten/Decken)
+werden mit dem Geometrie-Iterator von ifcopenshell trianguliert, die Dreiecke
+in die XY-Ebene projiziert und je Geschoss mit shapely vereinigt. Die
+Vereinigung verhindert, dass sich überlappende Bauteile doppelt zählen.
+Geschosse werden parallel verarbeitet (shapely gibt die GIL bei den
+vektorisierten Operationen frei).
+
+Benötigt ein vollständig geladenes Modell (Lademodus "full") sowie shapely.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:  # NumPy/shapely werden erst für die Geometrie importiert
+    import numpy as np
+
+# Platten, die als Geschossfläche zählen (keine Dach-/Podestplatten; ohne Typ = Decke)
+FLOOR_SLAB_TYPES = frozenset({"FLOOR", "BASESLAB", "NOTDEFINED"})
+
+# Dreiecke mit kleinerer Grundrissfläche (senkrechte Flächen) werden verworfen
+_MIN_TRIANGLE_AREA_M2 = 1e-9
+
+
+def supports_geometry(ifc) -> bool:
+    """True für vollständig mit ifcopenshell geladene Modelle (nicht für den STEP-Scanner)."""
+    ifcopenshell = sys.modules.get("ifcopenshell")  # ohne Import: ein solches Modell hat ihn schon geladen
+    return ifcopenshell is not None and isinstance(ifc, ifcopenshell.file)
+
+
+def floor_slabs(storey) -> list:
+    """Bodenplatten/Decken, die im Geschoss enthalten sind."""
+    slabs = []
+    for rel in getattr(storey, "ContainsElements", None) or []:
+        for element in rel.RelatedElements or []:
+            if element.is_a("IfcSlab") and (element.PredefinedType or "NOTDEFINED") in FLOOR_SLAB_TYPES:
+                slabs.append(element)
+    return slabs
+
+
+class FootprintAreaCalculator:
+    """Grundrissflächen (m²) je Gruppe von Bauteilen, z.B. je Geschoss."""
+
+    def __init__(self, ifc, threads: Optional[int] = None):
+        # Kompatibilitäts-Import wie bei HeightService / AreaService (erst hier: zieht multiprocessing nach)
+        if __package__ in (None, ""):
+            import os as _os, sys as _sys
+
+            _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+            from processors.worker import default_worker_count
+        else:
+            from .worker import default_worker_count
+
+        self.ifc = ifc
+        self.threads = max(1, threads or default_worker_count())
+
+    def triangles_by_element(self, elements: Iterable) -> dict[int, np.ndarray]:
+        """Projizierte Dreiecke (n, 3, 2) in Meter je Element-#id; ohne Geometrie kein Eintrag."""
+        import ifcopenshell.geom
+        import numpy as np
+
+        elements = [e for e in elements if e.Representation is not None]
+        if not elements:
+            return {}
+        settings = ifcopenshell.geom.settings()
+        settings.set("use-world-coords", True)
+        iterator = ifcopenshell.geom.iterator(settings, self.ifc, self.threads, include=elements)
+        result: dict[int, np.ndarray] = {}
+        if not iterator.initialize():
+            return result
+        while True:
+            shape = iterator.get()
+            verts = np.asarray(shape.geometry.verts, dtype=float).reshape(-1, 3)
+            faces = np.asarray(shape.geometry.faces, dtype=np.int64).reshape(-1, 3)
+            if len(faces):
+                triangles = verts[faces][:, :, :2]
+                a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+                doubled = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1]))
+                result[shape.id] = triangles[doubled > 2 * _MIN_TRIANGLE_AREA_M2]
+            if not iterator.next():
+                break
+        return result
+
+    @staticmethod
+    def union(triangles: list[np.ndarray]):
+        """Vereinigung aller Dreiecke als shapely-Geometrie (None ohne Dreiecke)."""
+        import numpy as np
+        import shapely
+
+        triangles = [t for t in triangles if len(t)]
+        if not triangles:
+            return None
+        stacked = np.concatenate(triangles)
+        rings = np.concatenate([stacked, stacked[:, :1]], axis=1)  # geschlossene Ringe
+        return shapely.union_all(shapely.polygons(rings))
+
+    @classmethod
+    def union_area_m2(cls, triangles: list[np.ndarray]) -> float:
+        """Fläche der Vereinigung aller Dreiecke."""
+        union = cls.union(triangles)
+        return float(union.area) if union is not None else 0.0
+
+    def footprints(self, elements: Iterable) -> dict[int, object]:
+        """Grundriss je Element-#id (shapely-Geometrie in Meter); ohne Geometrie kein Eintrag."""
+        triangles = self.triangles_by_element(elements)
+        keys = list(triangles)
+        if len(keys) <= 1 or self.threads == 1:
+            shapes = [self.union([triangles[k]]) for k in keys]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                shapes = list(pool.map(lambda k: self.union([triangles[k]]), keys))
+        return {k: shape for k, shape in zip(keys, shapes) if shape is not None and not shape.is_empty}
+
+    def areas_m2(self, groups: dict[int, list]) -> dict[int, float]:
+        """
+        Fläche je Gruppe (z.B. Geschoss-#id -> Bauteile). Alle Bauteile werden
+        in einem Iterator-Lauf trianguliert, die Vereinigung läuft je Gruppe parallel.
+        """
+        triangles = self.triangles_by_element(e for elements in groups.values() for e in elements)
+        keys = list(groups)
+        per_group = [[triangles[e.id()] for e in groups[k] if e.id() in triangles] for k in keys]
+        if len(keys) <= 1 or self.threads == 1:
+            areas = [self.union_area_m2(t) for t in per_group]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(self.threads, len(keys))) as pool:
+                areas = list(pool.map(self.union_area_m2, per_group))
+        return dict(zip(keys, areas))
@@ -0,0 +1,158 @@
+"""
+processors/geometry_height.py
+
+Exakte Gebäudehöhe aus der Geometrie (optional, langsamer als die Schätzung
+über die Geschosshöhen in HeightCalculator).
+
+Die Hüllbauteile (Dächer, Wände, Decken/Platten, Bekleidungen) werden mit dem
+Geometrie-Iterator von ifcopenshell in mehreren Threads trianguliert; je
+Bauteil werden mit NumPy die Z-Extrema der Vertices bestimmt. So zählen auch
+Dachaufbauten, Brüstungen/Attiken und alles oberhalb der obersten
+Geschosskote zur Höhe.
+
+Höhe = höchster Vertex - Bezugskote. Bezugskote ist wie bei der Schätzung das
+tiefste Geschoss (in Meter umgerechnet), ohne Geschosse der tiefste Vertex.
+Benötigt ein vollständig geladenes Modell (Lademodus "full").
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.height import HeightCalculator, unit_scale
+    from processors.worker import default_worker_count
+else:
+    from .height import HeightCalculator, unit_scale
+    from .worker import default_worker_count
+
+# Für die Gebäudehöhe relevante Klassen (inkl. Untertypen, z.B. IfcWallStandardCase)
+ENVELOPE_CLASSES: tuple[str, ...] = ("IfcRoof", "IfcWall", "IfcSlab", "IfcCovering")
+
+
+@dataclass
+class GeometryHeight:
+    """
+    Ergebnis der Geometrie-Auswertung inkl. Laufzeitbericht.
+
+    timings = Sekunden je Schritt ("setup", "tessellation", "reduction")
+    element_top_z_m = höchster Vertex je Bauteil-#id (für die Höhe je Gebäude, siehe buildings.py)
+    """
+    height_m: Optional[float]
+    top_z_m: Optional[float]
+    base_z_m: Optional[float]
+    top_element: Optional[str] = None  # GlobalId des höchsten Bauteils
+    elements: int = 0
+    vertices: int = 0
+    threads: int = 1
+    timings: dict[str, float] = field(default_factory=dict)
+    element_top_z_m: dict[int, float] = field(default_factory=dict, repr=False)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.timings.values())
+
+    def timing_lines(self) -> list[str]:
+        rate = self.elements / self.total_seconds if self.total_seconds > 0 else 0.0
+        lines = [
+            f"Geometrie-Höhe ({self.threads} Threads, {self.elements} Bauteile, {self.vertices} Vertices):",
+            *(f"  - {name}: {seconds:.3f} s" for name, seconds in self.timings.items()),
+            f"  = Total: {self.total_seconds:.3f} s ({rate:.0f} Bauteile/s)",
+        ]
+        if self.top_element:
+            lines.append(f"  Höchstes Bauteil: {self.top_element} (z = {self.top_z_m:.3f} m)")
+        return lines
+
+
+class GeometryHeightCalculator:
+    def __init__(
+        self,
+        ifc,
+        threads: Optional[int] = None,
+        classes: Sequence[str] = ENVELOPE_CLASSES,
+    ):
+        self.ifc = ifc
+        self.threads = max(1, threads or default_worker_count())
+        self.classes = tuple(classes)
+
+    def _elements(self) -> list:
+        seen: dict[int, object] = {}
+        for ifc_class in self.classes:
+            for element in self.ifc.by_type(ifc_class) or []:
+                if element.Representation is not None:
+                    seen.setdefault(element.id(), element)
+        return list(seen.values())
+
+    def _base_z_m(self) -> Optional[float]:
+        """Tiefstes Geschoss in Meter (Elevation bzw. Placement wie in HeightCalculator)."""
+        zs = HeightCalculator(self.ifc).storey_z_values()
+        if not zs:
+            return None
+        return min(zs) * unit_scale(self.ifc)
+
+    def compute(self) -> GeometryHeight:
+        try:
+            import ifcopenshell
+            import ifcopenshell.geom
+        except Exception as e:
+            raise ImportError("Die exakte Höhe benötigt ifcopenshell mit Geometrie-Modul (ifcopenshell.geom).") from e
+        if not isinstance(self.ifc, ifcopenshell.file):
+            raise ValueError("Die exakte Höhe benötigt ein vollständig geladenes Modell (Lademodus 'full').")
+
+        timings: dict[str, float] = {}
+        start = time.perf_counter()
+        elements = self._elements()
+        result = GeometryHeight(height_m=None, top_z_m=None, base_z_m=self._base_z_m(), threads=self.threads)
+        if not elements:
+            timings["setup"] = time.perf_counter() - start
+            result.timings = timings
+            return result
+
+        settings = ifcopenshell.geom.settings()
+        settings.set("use-world-coords", True)  # Vertices direkt in Modellkoordinaten (Meter)
+        iterator = ifcopenshell.geom.iterator(settings, self.ifc, self.threads, include=elements)
+        initialized = iterator.initialize()
+        timings["setup"] = time.perf_counter() - start
+
+        guids: list[str] = []
+        z_max: list[float] = []
+        z_min: list[float] = []
+        reduction = 0.0
+        start = time.perf_counter()
+        if initialized:
+            while True:
+                shape = iterator.get()
+                verts = shape.geometry.verts
+                t = time.perf_counter()
+                if verts:
+                    z = np.asarray(verts, dtype=float)[2::3]
+                    z_max.append(float(z.max()))
+                    result.element_top_z_m[shape.id] = z_max[-1]
+                    z_min.append(float(z.min()))
+                    guids.append(shape.guid)
+                    result.vertices += len(z)
+                reduction += time.perf_counter() - t
+                if not iterator.next():
+                    break
+        timings["tessellation"] = time.perf_counter() - start - reduction
+        timings["reduction"] = reduction
+        result.timings = timings
+        result.elements = len(z_max)
+        if not z_max:
+            return result
+
+        top = int(np.argmax(z_max))
+        result.top_z_m = z_max[top]
+        result.top_element = guids[top]
+        if result.base_z_m is None:
+            result.base_z_m = float(min(z_min))
+        result.height_m = result.top_z_m - result.base_z_m
+        return result
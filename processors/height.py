@@ -7,26 +7,91 @@ Lädt ein IFC, berechnet die Gebäudehöhe und ordnet sie in die VKF-Kategorien
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Optional
 
 # Kompatibilitäts-Import: funktioniert als Modul (-m) und bei Direktaufruf
 if __package__ in (None, ""):
     import os as _os, sys as _sys
 
     _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.footprint import supports_geometry
     from processors.ifc_loader import IfcLoader
+    from processors.timing import Timings
     from processors.vkf_rules import height_category
 else:
+    from .footprint import supports_geometry
     from .ifc_loader import IfcLoader
+    from .timing import Timings
     from .vkf_rules import height_category
 
+if TYPE_CHECKING:  # placement zieht NumPy nach, erst bei Bedarf importieren
+    from .placement import PlacementResolver
+
+# SI-Präfixe der Längeneinheit (IfcSIUnit.Prefix) für Modelle aus dem STEP-Scanner
+SI_PREFIXES = {"KILO": 1e3, "HECTO": 1e2, "DECA": 1e1, "DECI": 1e-1, "CENTI": 1e-2, "MILLI": 1e-3, "MICRO": 1e-6}
+
+
+def unit_scale(ifc) -> float:
+    """
+    Meter je Projekteinheit (Längeneinheit aus IfcProject.UnitsInContext); 1.0,
+    wenn die Einheiten nicht lesbar sind. Vollständig geladene Modelle über
+    ifcopenshell.util.unit.calculate_unit_scale, Modelle aus dem STEP-Scanner
+    (Lademodus "fast") über SI-Präfix bzw. Umrechnungsfaktor.
+    """
+    try:
+        if supports_geometry(ifc):
+            import ifcopenshell.util.unit
+
+            return float(ifcopenshell.util.unit.calculate_unit_scale(ifc)) or 1.0
+        projects = ifc.by_type("IfcProject") or []
+        units = projects[0].UnitsInContext if projects else None
+        for unit in (units.Units or ()) if units is not None else ():
+            if getattr(unit, "UnitType", None) != "LENGTHUNIT":
+                continue
+            scale = 1.0
+            while unit is not None and unit.is_a("IfcConversionBasedUnit"):
+                factor = unit.ConversionFactor
+                scale *= float(getattr(factor.ValueComponent, "wrappedValue", factor.ValueComponent))
+                unit = factor.UnitComponent
+            if unit is not None and unit.is_a("IfcSIUnit"):
+                scale *= SI_PREFIXES.get(unit.Prefix or "", 1.0)
+            return scale or 1.0
+    except Exception:
+        pass
+    return 1.0
+
 @dataclass
 class HeightResult:
+    """
+    Gebäudehöhe und VKF-Kategorie.
+
+    timings = Laufzeit je Teilschritt in Sekunden ("storeys", "vkf", ggf. "geometry")
+    counts  = Umfang des Modells (z.B. "storeys"), um Laufzeiten zu normieren
+    """
     ifc_path: str
     height_m: Optional[float]
     vkf_category: str
     extra_answers: Optional[dict[str, str]] = None
+    method: str = "storeys"  # "storeys" (Geschosskoten) oder "geometry" (exakt, siehe geometry_height)
+    timings: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """Serialisierbare Form (z.B. für den Ergebnis-Cache)."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HeightResult":
+        return cls(
+            ifc_path=data["ifc_path"],
+            height_m=data.get("height_m"),
+            vkf_category=data.get("vkf_category", "n/a"),
+            extra_answers=data.get("extra_answers"),
+            method=data.get("method", "storeys"),
+            timings=data.get("timings") or {},
+            counts=data.get("counts") or {},
+        )
 
     @property
     def rounded_height_m(self) -> Optional[float]:
@@ -35,68 +100,65 @@ class HeightResult:
     def text_lines(self) -> tuple[str, str]:
         if self.height_m is None:
             return ("Höhe [m]=n/a", "Gebäudekategorie (VKF, Höhe): n/a")
+        suffix = " (aus Geometrie)" if self.method == "geometry" else ""
         return (
-            f"Höhe [m]={self.rounded_height_m}",
+            f"Höhe [m]={self.rounded_height_m}{suffix}",
             f"Gebäudekategorie (VKF, Höhe): {self.vkf_category}",
         )
 
 
 class HeightCalculator:
-    def __init__(self, ifc):
+    def __init__(self, ifc, placements: Optional[PlacementResolver] = None):
         self.ifc = ifc
+        if placements is None:
+            if __package__ in (None, ""):
+                from processors.placement import PlacementResolver
+            else:
+                from .placement import PlacementResolver
+            placements = PlacementResolver.for_model(ifc)
+        self.placements = placements
 
     @staticmethod
-    def _placement_chain_z(local_placement) -> float:
-        """Summiert die Z-Verschiebung entlang der Placement-Kette."""
-
-        def z_of(lp):
-            try:
-                return float(lp.RelativePlacement.Location.Coordinates[2])
-            except Exception:
-                try:
-                    return float(lp.RelativePlacement.Location[2])
-                except Exception:
-                    return 0.0
-
-        z = 0.0
-        seen = set()
-        lp = local_placement
-        for _ in range(64):
-            if lp is None:
-                break
-            key = getattr(lp, "id", None) or id(lp)
-            if key in seen:
-                break
-            seen.add(key)
-            z += z_of(lp)
-            try:
-                lp = lp.PlacementRelTo
-            except Exception:
-                lp = None
-        return z
-
-    @classmethod
-    def _storey_abs_z(cls, storey) -> float:
+    def _elevation(storey) -> Optional[float]:
         try:
             elev = storey.Elevation
             if elev is not None:
                 return float(elev)
         except Exception:
             pass
+        return None
+
+    def _placement_z(self, storey) -> float:
+        """Z des absoluten Placement-Ursprungs (inkl. Rotation/Neigung der Eltern)."""
         try:
-            return cls._placement_chain_z(storey.ObjectPlacement)
+            return self.placements.origin(storey.ObjectPlacement)[2]
         except Exception:
             return 0.0
 
+    def _storey_abs_z(self, storey) -> float:
+        elev = self._elevation(storey)
+        return elev if elev is not None else self._placement_z(storey)
+
+    def storey_z_values(self) -> list[float]:
+        """Absolute Z-Kote je Geschoss (in Modelleinheiten), Reihenfolge wie by_type."""
+        storeys = self.ifc.by_type("IfcBuildingStorey") or []
+        elevations = [self._elevation(s) for s in storeys]
+        # Placements der Geschosse ohne Elevation gesammelt auflösen
+        missing = [s.ObjectPlacement for s, e in zip(storeys, elevations) if e is None]
+        if missing:
+            try:
+                self.placements.resolve(p for p in missing if p is not None)
+            except Exception:
+                pass
+        return [e if e is not None else self._placement_z(s) for s, e in zip(storeys, elevations)]
+
     def compute_height_m(self) -> Optional[float]:
+        """Oberstes minus unterstes Geschoss in Meter (wie die exakte Höhe aus der Geometrie)."""
         try:
-            storeys = self.ifc.by_type("IfcBuildingStorey") or []
-            if not storeys:
-                return None
-            zs = [self._storey_abs_z(s) for s in storeys]
+            zs = self.storey_z_values()
             if not zs:
                 return None
-            return float(max(zs) - min(zs))
+            return float(max(zs) - min(zs)) * unit_scale(self.ifc)
         except Exception:
             return None
 
@@ -107,11 +169,60 @@ class HeightService:
 
     def compute_from_path(self, path: str, extra_answers: Optional[dict[str, str]] = None) -> HeightResult:
         ifc = self.loader.load(path)
-        height = HeightCalculator(ifc).compute_height_m()
-        category = height_category(height)
+        return self.compute_from_ifc(ifc, path, extra_answers=extra_answers)
+
+    def compute_from_ifc(
+        self,
+        ifc,
+        path: str,
+        extra_answers: Optional[dict[str, str]] = None,
+    ) -> HeightResult:
+        """Wie compute_from_path, aber mit einem bereits geladenen Modell."""
+        timings = Timings()
+        height = timings.measure("storeys", HeightCalculator(ifc).compute_height_m)
+        category = timings.measure("vkf", lambda: height_category(height))
         return HeightResult(
             ifc_path=path,
             height_m=height,
             vkf_category=category,
             extra_answers=extra_answers or None,
+            timings=dict(timings),
+            counts={"storeys": len(ifc.by_type("IfcBuildingStorey") or [])},
+        )
+
+    def compute_exact_from_ifc(
+        self,
+        ifc,
+        path: str,
+        extra_answers: Optional[dict[str, str]] = None,
+        threads: Optional[int] = None,
+    ) -> tuple[HeightResult, "GeometryHeight"]:
+        """
+        Exakte Höhe aus der Geometrie der Hüllbauteile (siehe geometry_height).
+        Ohne auswertbare Geometrie bleibt es bei der Schätzung über die Geschosse.
+        """
+        if __package__ in (None, ""):
+            from processors.geometry_height import GeometryHeightCalculator
+        else:
+            from .geometry_height import GeometryHeightCalculator
+
+        timings = Timings()
+        report = timings.measure("geometry", GeometryHeightCalculator(ifc, threads=threads).compute)
+        if report.height_m is None:
+            return self.compute_from_ifc(ifc, path, extra_answers=extra_answers), report
+        category = timings.measure("vkf", lambda: height_category(report.height_m))
+        return (
+            HeightResult(
+                ifc_path=path,
+                height_m=report.height_m,
+                vkf_category=category,
+                extra_answers=extra_answers or None,
+                method="geometry",
+                timings=dict(timings),
+                counts={
+                    "storeys": len(ifc.by_type("IfcBuildingStorey") or []),
+                    "elements": report.elements,
+                },
+            ),
+            report,
         )
@@ -2,13 +2,50 @@
 """
 processors/ifc_loader.py
 OOP-Variante: IfcLoader mit .load() und .summarize()
+
+Modi:
+    "full" (Standard) - komplettes Modell über ifcopenshell.open
+    "fast"            - nur Raumstruktur, Relationen und Mengen über den
+                        STEP-Scanner (processors/step_scanner.py), ohne Geometrie
+
+Quellen (load_source): Pfad, bytes/memoryview oder Datei-Objekt (z.B. Streamlit-Upload).
+Puffer werden ohne Kopie auf die Platte gelesen, sofern der Lademodus es zulässt;
+sonst wird einmal blockweise in eine temporäre Datei geschrieben und dabei der
+SHA-256 berechnet. Speicherbedarf siehe README (benchmarks/bench_upload_memory.py).
+
+Fortschritt und Budgets (IfcLoader(on_progress=..., max_bytes=..., max_seconds=...)):
+    on_progress erhält LoadProgress (gelesene Bytes, Sekunden, MB/s). Im Modus
+    "fast" meldet der Scanner die tatsächliche Position in der Datei. ifcopenshell.open
+    ("full") liest die Datei in einem Stück und meldet nichts; hier kommt alle
+    PROGRESS_INTERVAL_S ein Lebenszeichen mit der verstrichenen Zeit, die Bytes erst am Ende.
+    Zu grosse Dateien scheitern vor dem Laden mit LoadBudgetExceeded. Das Zeitbudget
+    bricht den Scan ab, sobald es überschritten ist; im Modus "full" wird die Ladezeit
+    vorab über FULL_MODE_MB_PER_S geschätzt (harte Grenze: Zeitlimit des Worker-Prozesses).
+    Die Werte des letzten Ladevorgangs stehen in IfcLoader.last_load.
+
 Modulstart:
     python3 processors/ifc_loader.py "/Users/hannazaugg/Library/Mobile Documents/com~apple~CloudDocs/HSLU/HS25/DT_Programming/Brandschutzkochbuch/Modelle/ARC_Modell_NEST_230328.ifc"
 """
 
 from __future__ import annotations
+import hashlib
+import importlib.util
+import os
+import tempfile
+import threading
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import BinaryIO, Callable, Optional, Union
+
+HASH_CHUNK_BYTES = 1024 * 1024
+# Bis zu dieser Grösse liest der "full"-Modus Puffer direkt (ifcopenshell.file.from_string),
+# darüber wird einmal auf die Platte gestreamt: from_string braucht eine str-Kopie und
+# ifcopenshell kopiert diese nochmals, gemessen ~3x Dateigrösse mehr Spitzen-RSS.
+DEFAULT_IN_MEMORY_LIMIT_BYTES = 32 * 1024 * 1024
+# Gemessener Durchsatz von ifcopenshell.open (0.9, benchmarks/suite.py), für die Vorab-Schätzung
+FULL_MODE_MB_PER_S = 20.0
+# Abstand der Fortschrittsmeldungen beim Laden
+PROGRESS_INTERVAL_S = 0.5
 
 @dataclass
 class IfcSummary:
@@ -17,21 +54,327 @@ class IfcSummary:
     n_products: int
     n_storeys: int
 
-class IfcLoader:
-    def __init__(self):
+LOADER_MODES = ("full", "fast")
+
+
+class LoadBudgetExceeded(RuntimeError):
+    """Die IFC-Datei ist grösser als max_bytes oder das Laden dauert länger als max_seconds."""
+
+
+@dataclass
+class LoadProgress:
+    """Stand eines Ladevorgangs (done=True bei der letzten Meldung)."""
+    bytes_read: int
+    bytes_total: int
+    seconds: float
+    done: bool = False
+
+    @property
+    def fraction(self) -> float:
+        return min(1.0, self.bytes_read / self.bytes_total) if self.bytes_total else 0.0
+
+    @property
+    def mb_per_s(self) -> Optional[float]:
+        if not self.bytes_read or self.seconds <= 0:
+            return None
+        return self.bytes_read / 1e6 / self.seconds
+
+    def describe(self) -> str:
+        """Z.B. "120.3 / 260.0 MB (46 %), 35.2 MB/s, 3.4 s" (ohne Zwischenstände nur Grösse und Zeit)."""
+        if not self.bytes_read and not self.done:
+            return f"{self.bytes_total / 1e6:.1f} MB, {self.seconds:.1f} s"
+        text = f"{self.bytes_read / 1e6:.1f} / {self.bytes_total / 1e6:.1f} MB ({self.fraction:.0%})"
+        if self.mb_per_s is not None:
+            text += f", {self.mb_per_s:.1f} MB/s"
+        return f"{text}, {self.seconds:.1f} s"
+
+
+def check_size(size: int, max_bytes: Optional[int]) -> None:
+    """LoadBudgetExceeded, wenn size (Bytes) über max_bytes liegt (None = unbegrenzt)."""
+    if max_bytes is not None and size > max_bytes:
+        raise LoadBudgetExceeded(f"IFC-Datei zu gross: {size / 1e6:.1f} MB (Budget {max_bytes / 1e6:.1f} MB)")
+
+
+def sha256_stream(stream: BinaryIO, chunk_size: int = HASH_CHUNK_BYTES) -> str:
+    """SHA-256 eines Datei-Objekts, blockweise gelesen."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_file(path: Union[str, os.PathLike]) -> str:
+    with open(path, "rb") as fh:
+        return sha256_stream(fh)
+
+
+def spool_to_tempfile(
+    stream: BinaryIO,
+    chunk_size: int = HASH_CHUNK_BYTES,
+    on_chunk: Optional[Callable[[int], None]] = None,
+) -> tuple[str, str, int]:
+    """
+    Schreibt ein Datei-Objekt blockweise in eine temporäre .ifc-Datei und
+    berechnet im selben Durchgang den SHA-256. Liefert (Pfad, Hash, Bytes).
+    on_chunk(bytes_bisher) nach jedem Block (Fortschritt; eine Exception bricht ab).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".ifc") as tmp:
         try:
-            import ifcopenshell  # type: ignore
-        except Exception as e:
-            raise ImportError(
-                "ifcopenshell nicht installiert. (pip install ifcopenshell)"
-            ) from e
-        self.ifcopenshell = ifcopenshell
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+                if on_chunk is not None:
+                    on_chunk(size)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return tmp.name, digest.hexdigest(), size
+
+
+class IfcSource:
+    """
+    Vorbereitete IFC-Quelle: entweder ein Pfad oder ein Speicherpuffer.
+
+    Über prepare_source() erzeugen; temporäre Dateien werden mit close()
+    (bzw. am Ende des with-Blocks) gelöscht. sha256 wird bei Bedarf berechnet,
+    beim Streamen in eine temporäre Datei fällt er ohne zweiten Durchgang an.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        buffer: Optional[memoryview] = None,
+        sha256: Optional[str] = None,
+        temporary: bool = False,
+    ):
+        self.path = path
+        self.buffer = buffer
+        self.temporary = temporary
+        self._sha256 = sha256
+
+    @property
+    def size(self) -> int:
+        if self.buffer is not None:
+            return self.buffer.nbytes
+        return os.path.getsize(self.path)
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            if self.buffer is not None:
+                self._sha256 = hashlib.sha256(self.buffer).hexdigest()
+            else:
+                self._sha256 = sha256_file(self.path)
+        return self._sha256
+
+    def spool(self) -> str:
+        """Schreibt einen Puffer in eine temporäre Datei (einmalig) und liefert deren Pfad."""
+        if self.path is None:
+            import io
+
+            self.path, digest, _size = spool_to_tempfile(io.BytesIO(self.buffer))
+            self._sha256 = self._sha256 or digest
+            self.temporary = True
+        return self.path
+
+    def close(self) -> None:
+        if self.temporary and self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass  # z.B. unter Windows noch eingeblendet; liegt im Temp-Ordner
+            self.temporary = False
+
+    def __enter__(self) -> "IfcSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def prepare_source(source) -> IfcSource:
+    """
+    Macht aus Pfad, bytes/bytearray/memoryview oder Datei-Objekt eine IfcSource.
+
+    Objekte mit getbuffer() (io.BytesIO, Streamlit-UploadedFile) werden ohne
+    Kopie übernommen; andere Datei-Objekte werden in eine temporäre Datei gestreamt.
+    """
+    if isinstance(source, IfcSource):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        return IfcSource(path=os.fspath(source))
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return IfcSource(buffer=memoryview(source).cast("B"))
+    if hasattr(source, "getbuffer"):
+        return IfcSource(buffer=source.getbuffer().cast("B"))
+    if hasattr(source, "read"):
+        path, digest, _size = spool_to_tempfile(source)
+        return IfcSource(path=path, sha256=digest, temporary=True)
+    raise TypeError(f"Unbekannte IFC-Quelle: {type(source).__name__}")
+
+
+class _LoadMonitor:
+    """Meldet den Fortschritt eines Ladevorgangs gedrosselt und prüft das Zeitbudget."""
+
+    def __init__(self, loader: "IfcLoader", total: int):
+        self.loader = loader
+        self.total = total
+        self.started = time.perf_counter()
+        self._next_report = 0.0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def update(self, bytes_read: int) -> None:
+        """Aufruf je Datensatz/Block; gemeldet wird nur alle PROGRESS_INTERVAL_S."""
+        seconds = self.elapsed()
+        self.loader._check_seconds(seconds, bytes_read, self.total)
+        if seconds < self._next_report:
+            return
+        self._next_report = seconds + PROGRESS_INTERVAL_S
+        self.loader._report(LoadProgress(bytes_read, self.total, seconds))
+
+    def heartbeat(self, stop: threading.Event) -> None:
+        """Lebenszeichen im Modus "full" (ifcopenshell gibt die GIL beim Parsen frei)."""
+        while not stop.wait(PROGRESS_INTERVAL_S):
+            self.loader._report(LoadProgress(0, self.total, self.elapsed()))
+
+    def finish(self) -> LoadProgress:
+        progress = LoadProgress(self.total, self.total, self.elapsed(), done=True)
+        self.loader.last_load = progress
+        self.loader._report(progress)
+        return progress
+
+
+class IfcLoader:
+    def __init__(
+        self,
+        mode: str = "full",
+        in_memory_limit_bytes: int = DEFAULT_IN_MEMORY_LIMIT_BYTES,
+        on_progress: Optional[Callable[[LoadProgress], None]] = None,
+        max_bytes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+    ):
+        if mode not in LOADER_MODES:
+            raise ValueError(f"Unbekannter Lademodus: {mode!r} (erlaubt: {', '.join(LOADER_MODES)})")
+        self.mode = mode
+        self.in_memory_limit_bytes = in_memory_limit_bytes
+        self.on_progress = on_progress
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.last_load: Optional[LoadProgress] = None
+        self._ifcopenshell = None
+        if mode == "fast":
+            return  # Scanner kommt ohne ifcopenshell aus
+        # Nur prüfen, ob ifcopenshell vorhanden ist; importiert wird erst beim Laden
+        if importlib.util.find_spec("ifcopenshell") is None:
+            raise ImportError("ifcopenshell nicht installiert. (pip install ifcopenshell)", name="ifcopenshell")
+
+    @property
+    def ifcopenshell(self):
+        """ifcopenshell-Modul, beim ersten Zugriff importiert (None im Lademodus "fast")."""
+        if self._ifcopenshell is None and self.mode != "fast":
+            try:
+                import ifcopenshell  # type: ignore
+            except Exception as e:
+                raise ImportError(
+                    "ifcopenshell nicht installiert. (pip install ifcopenshell)", name="ifcopenshell"
+                ) from e
+            self._ifcopenshell = ifcopenshell
+        return self._ifcopenshell
+
+    @staticmethod
+    def _scanner():
+        if __package__ in (None, ""):
+            from step_scanner import ScannedModel  # Direktaufruf: gleicher Ordner im sys.path
+        else:
+            from .step_scanner import ScannedModel
+        return ScannedModel
+
+    def _report(self, progress: LoadProgress) -> None:
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+    def _check_seconds(self, seconds: float, bytes_read: int, total: int) -> None:
+        if self.max_seconds is not None and seconds > self.max_seconds:
+            raise LoadBudgetExceeded(
+                f"Laden nach {seconds:.1f} s abgebrochen (Budget {self.max_seconds:g} s, "
+                f"{bytes_read / 1e6:.1f} von {total / 1e6:.1f} MB gelesen)"
+            )
+
+    def _check_estimate(self, size: int) -> None:
+        """Vorab-Schätzung für "full": ifcopenshell.open lässt sich nicht unterbrechen."""
+        if self.max_seconds is None:
+            return
+        estimate = size / 1e6 / FULL_MODE_MB_PER_S
+        if estimate > self.max_seconds:
+            raise LoadBudgetExceeded(
+                f"Geschätzte Ladezeit {estimate:.0f} s ({size / 1e6:.1f} MB bei ~{FULL_MODE_MB_PER_S:.0f} MB/s) "
+                f"über dem Budget von {self.max_seconds:g} s; Lademodus \"fast\" verwenden oder Budget erhöhen"
+            )
+
+    def _load_monitored(self, data, size: int, open_full: Callable[[], object]):
+        """Lädt data (Pfad oder Puffer) mit Fortschrittsmeldungen und Budgets."""
+        check_size(size, self.max_bytes)
+        monitor = _LoadMonitor(self, size)
+        self._report(LoadProgress(0, size, 0.0))
+        if self.mode == "fast":
+            model = self._scanner()(data, progress=monitor.update)
+        else:
+            self._check_estimate(size)
+            stop = threading.Event()
+            beat = None
+            if self.on_progress is not None:
+                beat = threading.Thread(target=monitor.heartbeat, args=(stop,), daemon=True)
+                beat.start()
+            try:
+                model = open_full()
+            finally:
+                stop.set()
+                if beat is not None:
+                    beat.join()
+        monitor.finish()
+        return model
 
     def load(self, path: str):
-        import os
         if not os.path.exists(path):
             raise FileNotFoundError(f"IFC-Datei nicht gefunden: {path}")
-        return self.ifcopenshell.open(path)
+        return self._load_monitored(path, os.path.getsize(path), lambda: self.ifcopenshell.open(path))
+
+    def load_source(self, source):
+        """
+        Lädt aus Pfad, Puffer oder Datei-Objekt (siehe prepare_source).
+
+        "fast" liest Puffer direkt. "full" übergibt Puffer bis
+        in_memory_limit_bytes als Text an ifcopenshell, grössere (oder nicht
+        UTF-8-lesbare) Puffer werden einmal in eine temporäre Datei geschrieben.
+        Eine übergebene IfcSource bleibt beim Aufrufer (der sie schliesst).
+        """
+        owned = not isinstance(source, IfcSource)
+        src = prepare_source(source)
+        try:
+            if src.buffer is None:
+                return self.load(src.path)
+            check_size(src.buffer.nbytes, self.max_bytes)  # vor dem Umweg über die Platte
+            if self.mode == "fast":
+                return self._load_monitored(src.buffer, src.buffer.nbytes, None)
+            if src.buffer.nbytes <= self.in_memory_limit_bytes:
+                try:
+                    text = str(src.buffer, "utf-8")
+                except UnicodeDecodeError:
+                    text = None
+                if text is not None:
+                    return self._load_monitored(
+                        src.buffer, src.buffer.nbytes, lambda: self.ifcopenshell.file.from_string(text)
+                    )
+            return self.load(src.spool())
+        finally:
+            if owned:
+                src.close()
 
     @staticmethod
     def _schema(ifc_file) -> Optional[str]:
@@ -58,11 +401,12 @@ def load_ifc(path: str):
 # ----- CLI bei Modulstart -----
 def _main():
     import sys
-    if len(sys.argv) < 2:
-        print("Nutzung:\n  python -m processors.ifc_loader \"/Pfad/zum/Modell.ifc\"")
+    args = [a for a in sys.argv[1:] if a != "--fast"]
+    if not args:
+        print("Nutzung:\n  python -m processors.ifc_loader \"/Pfad/zum/Modell.ifc\" [--fast]")
         raise SystemExit(2)
-    path = sys.argv[1]
-    loader = IfcLoader()
+    path = args[0]
+    loader = IfcLoader(mode="fast" if "--fast" in sys.argv[1:] else "full")
     ifc = loader.load(path)
     s = loader.summarize(ifc)
     print(f"[OK] Schema={s.schema}  Produkte={s.n_products}  Geschosse={s.n_storeys}")
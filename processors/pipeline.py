@@ -0,0 +1,501 @@
+"""
+processors/pipeline.py
+
+Zentrale Auswertung eines IFC-Modells: Die Datei wird genau einmal geladen und
+das geladene ifcopenshell-Modell allen Prozessoren (Höhe, Fläche, ...) geteilt.
+Für jede Stufe wird die Laufzeit gemessen (siehe timing.py), auf Wunsch auch
+ein cProfile-Profil je Stufe (profile_dir).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.ifc_loader import IfcLoader, IfcSource, LoadProgress, prepare_source
+    from processors.height import HeightResult, HeightService
+    from processors.area import AreaResult, AreaService
+    from processors.cache import ResultCache
+    from processors.revision import ModelFingerprint, RevisionDiff, RevisionService, diff_fingerprints
+    from processors.timing import Timings, format_spans, per_item
+else:
+    from .ifc_loader import IfcLoader, IfcSource, LoadProgress, prepare_source
+    from .height import HeightResult, HeightService
+    from .area import AreaResult, AreaService
+    from .cache import ResultCache
+    from .revision import ModelFingerprint, RevisionDiff, RevisionService, diff_fingerprints
+    from .timing import Timings, format_spans, per_item
+
+if TYPE_CHECKING:  # placement/buildings/compartments/escape_routes ziehen NumPy nach, erst bei Bedarf importieren
+    from .buildings import BuildingResult
+    from .compartments import CompartmentResult
+    from .escape_routes import EscapeRouteResult
+    from .placement import PlacementResolver
+
+# Fortschrittsmeldungen (on_progress) in Ablaufreihenfolge mit Beschriftung;
+# Teilschritte der Fläche kommen als "area.<schritt>"
+PROGRESS_STAGES = {
+    "hash": "Prüfsumme berechnen",
+    "cache": "Ergebnis-Cache",
+    "load": "IFC einlesen",
+    "height": "Höhe",
+    "height_geometry": "Höhe aus Geometrie",
+    "area": "Flächen",
+    "area.quantities": "Raumflächen (Mengen)",
+    "area.mapping": "Zuordnung Räume zu Geschossen",
+    "area.fingerprint": "Fingerabdruck der Geschosse",
+    "area.geometry": "Grundrisse aus Geometrie",
+    "area.sum": "Geschossflächen",
+    "buildings": "Aufteilung nach Gebäude",
+    "compartments": "Brandabschnitte",
+    "escape_routes": "Fluchtwege",
+}
+
+# Beschriftung der Modellumfänge (HeightResult.counts / AreaResult.counts)
+COUNT_LABELS = {
+    "buildings": "Gebäude",
+    "storeys": "Geschosse",
+    "spaces": "Räume",
+    "spaces_with_area": "Räume mit Flächenmenge",
+    "quantity_sets": "Mengen-Sets",
+    "elements": "Geometrie-Bauteile",
+    "storeys_reused": "Geschosse aus der Vorrevision",
+    "boundaries": "Raumbegrenzungen",
+    "rated_elements": "Bauteile mit Feuerwiderstand",
+    "compartments": "Brandabschnitte",
+    "doors": "Türen",
+    "stair_spaces": "Treppenhäuser",
+    "exits": "Ausgänge",
+    "route_edges": "Wegkanten",
+    "space_footprints": "Raumgrundrisse",
+}
+
+
+@dataclass
+class AnalysisResult:
+    """
+    Ergebnis einer vollständigen Modellauswertung.
+
+    timings = Laufzeit je Stufe in Sekunden (z.B. "load", "height", "area");
+              Teilschritte stehen in height.timings / area.timings
+    extras  = Ergebnisse zusätzlicher Prozessoren, nach Stufenname
+    cached  = True, wenn Höhe/Fläche aus dem Ergebnis-Cache stammen
+    load    = Dateigrösse und Durchsatz des Ladevorgangs (None bei Cache-Treffern)
+    fingerprint = Fingerabdruck je Geschoss (nur mit fingerprint/previous, siehe revision.py)
+    revision    = Unterschiede zur Vorrevision (nur mit previous)
+    compartments = Brandabschnitte (nur mit compartments=True, siehe compartments.py)
+    escape_routes = Fluchtweglängen (nur mit escape_routes=True, siehe escape_routes.py)
+    buildings     = Höhe und Flächen je IfcBuilding (siehe buildings.py); leer ohne Gebäude
+    """
+    ifc_path: str
+    height: HeightResult
+    area: AreaResult
+    timings: dict[str, float] = field(default_factory=dict)
+    extras: dict[str, Any] = field(default_factory=dict)
+    cached: bool = False
+    load: Optional[LoadProgress] = None
+    fingerprint: Optional[ModelFingerprint] = None
+    revision: Optional[RevisionDiff] = None
+    compartments: Optional[CompartmentResult] = None
+    escape_routes: Optional[EscapeRouteResult] = None
+    buildings: list[BuildingResult] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Modellumfang aus Höhe, Fläche, Brandabschnitten und Fluchtwegen (zum Normieren der Laufzeiten)."""
+        compartments = self.compartments.counts if self.compartments is not None else {}
+        escape_routes = self.escape_routes.counts if self.escape_routes is not None else {}
+        return {**self.height.counts, **self.area.counts, **compartments, **escape_routes}
+
+    def timing_lines(self) -> list[str]:
+        height_stage = "height_geometry" if self.height.method == "geometry" else "height"
+        spans = {height_stage: self.height.timings, "area": self.area.timings}
+        if self.compartments is not None:
+            spans["compartments"] = self.compartments.timings
+        if self.escape_routes is not None:
+            spans["escape_routes"] = self.escape_routes.timings
+        lines = []
+        for name, seconds in self.timings.items():
+            lines.append(f"  - {name}: {seconds:.3f} s")
+            if name == "load" and self.load is not None and self.load.mb_per_s is not None:
+                lines.append(f"      ({self.load.bytes_total / 1e6:.1f} MB, {self.load.mb_per_s:.1f} MB/s)")
+            if spans.get(name):
+                lines.append(f"      ({format_spans(spans[name])})")
+        header = "Laufzeiten je Stufe (aus Cache):" if self.cached else "Laufzeiten je Stufe:"
+        return [header, *lines, f"  = Total: {self.total_seconds:.3f} s", *self.count_lines()]
+
+    def compact(self) -> AnalysisResult:
+        """
+        Ergebnis ohne Zwischendaten, die nur während der Auswertung gebraucht werden
+        (höchster Vertex je Bauteil der Geometrie-Höhe), z.B. für die Rückgabe aus
+        einem Worker-Prozess. Das geladene Modell ist nie Teil des Ergebnisses.
+        """
+        geometry = self.extras.get("height_geometry")
+        if geometry is None or not geometry.element_top_z_m:
+            return self
+        return replace(self, extras={**self.extras, "height_geometry": replace(geometry, element_top_z_m={})})
+
+    def count_lines(self) -> list[str]:
+        """Modellumfang und Laufzeit je Raum/Geschoss."""
+        counts = self.counts
+        if not counts:
+            return []
+        parts = [f"{counts[key]} {label}" for key, label in COUNT_LABELS.items() if key in counts]
+        lines = [f"Modell: {', '.join(parts)}"]
+        for stage, key, unit in (("load", "spaces", "Raum"), ("area", "spaces", "Raum"), ("height", "storeys", "Geschoss")):
+            us = per_item(self.timings.get(stage, 0.0), counts.get(key))
+            if us is not None and stage in self.timings:
+                lines.append(f"  - {stage}: {us:.1f} µs/{unit}")
+        return lines
+
+
+class ModelSession:
+    """
+    Hält ein geladenes IFC-Modell für mehrere Prozessoren.
+
+    Das Modell wird beim ersten Zugriff auf .ifc geladen (Stufe "load") und
+    danach wiederverwendet. Mit run_stage() lassen sich beliebige Prozessoren
+    gegen dasselbe Modell ausführen; ihre Laufzeit landet in .timings.
+    Mit profile_dir wird jede Stufe zusätzlich mit cProfile aufgezeichnet,
+    on_progress(stufe) wird zu Beginn jeder Stufe aufgerufen.
+    """
+
+    def __init__(
+        self,
+        source,
+        loader: Optional[IfcLoader] = None,
+        profile_dir=None,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ):
+        # source: Pfad, Puffer, Datei-Objekt oder IfcSource (siehe IfcLoader.load_source)
+        self.source = source
+        self.loader = loader or IfcLoader()
+        self.timings = Timings(profile_dir=profile_dir, on_span=on_progress)
+        self.load: Optional[LoadProgress] = None  # Grösse/Durchsatz nach dem Laden
+        self._ifc = None
+
+    @property
+    def ifc(self):
+        if self._ifc is None:
+            self._ifc = self.run_stage("load", lambda: self.loader.load_source(self.source))
+            self.load = self.loader.last_load
+        return self._ifc
+
+    @property
+    def placements(self) -> PlacementResolver:
+        """Gemeinsamer PlacementResolver des Modells (für Höhe, Fläche und weitere Prozessoren)."""
+        if __package__ in (None, ""):
+            from processors.placement import PlacementResolver
+        else:
+            from .placement import PlacementResolver
+        return PlacementResolver.for_model(self.ifc)
+
+    def run_stage(self, name: str, func: Callable[[], Any]) -> Any:
+        """Führt eine Stufe aus und misst ihre Laufzeit."""
+        return self.timings.measure(name, func)
+
+
+# Zusätzlicher Prozessor: erhält das geladene Modell, liefert ein beliebiges Ergebnis
+Processor = Callable[[Any], Any]
+
+
+class AnalysisService:
+    """
+    Einstiegspunkt für die komplette Auswertung (Höhe + Fläche + weitere Prozessoren).
+
+    Ersetzt die getrennten Aufrufe von HeightService und AreaService, die das
+    IFC jeweils neu geladen haben. Mit einem ResultCache werden Höhe/Fläche
+    für bereits bekannte Dateien (gleicher Inhalt) ohne Laden geliefert;
+    zusätzliche Prozessoren brauchen das Modell und umgehen den Cache.
+
+    exact_height=True ergänzt die Schätzung über die Geschosse um die exakte
+    Höhe aus der Geometrie (Stufe "height_geometry", geometry_threads Threads).
+    Die Schätzung wird vorher an on_height_estimate übergeben; der Bericht
+    der Geometrie-Auswertung liegt in extras["height_geometry"].
+
+    profile_dir: je Stufe ein cProfile-Profil (<stufe>.prof/.txt) in diesen Ordner schreiben.
+    on_progress: erhält zu Beginn jeder Stufe deren Namen (siehe PROGRESS_STAGES).
+    fingerprint=True bzw. previous (Fingerabdruck der Vorrevision) berechnen die
+    Fläche über RevisionService: Grundrisse nur für geänderte Geschosse, dazu
+    AnalysisResult.fingerprint und mit previous der Vergleich in .revision.
+    Der Fingerabdruck liegt als section im Cache-Eintrag; bei einem Treffer wird
+    nur der Vergleich mit previous gerechnet.
+    Höhe und Flächen werden zusätzlich je IfcBuilding aufgeteilt (Stufe
+    "buildings", AnalysisResult.buildings), auch bei Cache-Treffern; mit
+    exact_height liegen dafür die Oberkanten je Gebäude als section im Cache.
+    compartments=True ergänzt die Brandabschnitte (Stufe "compartments",
+    AnalysisResult.compartments), escape_routes=True die Fluchtweglängen (Stufe
+    "escape_routes", geometry_threads Threads für die Raumgrundrisse). Beide liegen
+    wie der Fingerabdruck als section im Cache-Eintrag; nur zusätzliche
+    Prozessoren brauchen immer das Modell und umgehen den Cache.
+    """
+
+    def __init__(
+        self,
+        loader: Optional[IfcLoader] = None,
+        processors: Optional[dict[str, Processor]] = None,
+        cache: Optional[ResultCache] = None,
+        exact_height: bool = False,
+        geometry_threads: Optional[int] = None,
+        on_height_estimate: Optional[Callable[[HeightResult], None]] = None,
+        profile_dir=None,
+        on_progress: Optional[Callable[[str], None]] = None,
+        fingerprint: bool = False,
+        previous: Optional[ModelFingerprint] = None,
+        compartments: bool = False,
+        escape_routes: bool = False,
+    ):
+        self.loader = loader or IfcLoader()
+        self.processors = dict(processors or {})
+        self.cache = cache
+        self.exact_height = exact_height
+        self.geometry_threads = geometry_threads
+        self.on_height_estimate = on_height_estimate
+        self.profile_dir = profile_dir
+        self.on_progress = on_progress
+        self.previous = previous
+        self.fingerprint = fingerprint or previous is not None
+        self.compartments = compartments
+        self.escape_routes = escape_routes
+        if exact_height and getattr(self.loader, "mode", "full") != "full":
+            raise ValueError("Die exakte Höhe benötigt den Lademodus 'full'.")
+
+    def _cache_key(self, content_hash: str) -> str:
+        """Ergebnisse je Lademodus/Höhenmodus getrennt ablegen ("full" behält den reinen Hash)."""
+        mode = getattr(self.loader, "mode", "full")
+        key = content_hash if mode == "full" else f"{content_hash}.{mode}"
+        return f"{key}.geometry" if self.exact_height else key
+
+    def compute_from_path(
+        self,
+        path: str,
+        extra_answers: Optional[dict[str, str]] = None,
+        content_hash: Optional[str] = None,
+    ) -> AnalysisResult:
+        """
+        Wertet die Datei aus. content_hash (SHA-256 der Bytes) kann übergeben
+        werden, wenn er bereits bekannt ist; sonst wird er bei aktivem Cache berechnet.
+        """
+        return self.compute_from_source(path, extra_answers=extra_answers, content_hash=content_hash, label=path)
+
+    def compute_from_source(
+        self,
+        source,
+        extra_answers: Optional[dict[str, str]] = None,
+        content_hash: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> AnalysisResult:
+        """
+        Wie compute_from_path, aber für Pfad, bytes/memoryview oder Datei-Objekt
+        (z.B. Streamlit-Upload) ohne Umweg über eine temporäre Datei, wo möglich.
+        label erscheint als ifc_path in den Ergebnissen.
+        """
+        with prepare_source(source) as src:
+            return self._compute(src, label or src.path or "<Upload>", extra_answers, content_hash)
+
+    def _compute(
+        self,
+        src: IfcSource,
+        path: str,
+        extra_answers: Optional[dict[str, str]],
+        content_hash: Optional[str],
+    ) -> AnalysisResult:
+        session = ModelSession(src, loader=self.loader, profile_dir=self.profile_dir, on_progress=self.on_progress)
+        use_cache = self.cache is not None and not self.processors
+
+        # Cache-Eintrag samt sections; fehlende Stufen werden unten nachgerechnet
+        hit = None
+        if use_cache:
+            if content_hash is None:
+                content_hash = session.run_stage("hash", lambda: src.sha256)
+            cache_key = self._cache_key(content_hash)
+            hit = session.run_stage("cache", lambda: self.cache.get_entry(cache_key))
+        sections: dict[str, dict] = dict(hit.sections) if hit is not None else {}
+        missing = [name for name in self._sections() if name not in sections]
+        # Modell in eigener Stufe "load" öffnen, bevor eine Stufe es braucht
+        ifc = session.ifc if hit is None or missing else None
+
+        extras: dict[str, Any] = {}
+        fingerprint = revision = None
+        if hit is not None and "fingerprint" not in missing and "buildings" not in missing:
+            height = replace(hit.height, ifc_path=path, extra_answers=extra_answers or None)
+            area = replace(hit.area, ifc_path=path)
+        else:
+            height = session.run_stage(
+                "height",
+                lambda: HeightService(self.loader).compute_from_ifc(ifc, path, extra_answers=extra_answers),
+            )
+            if self.exact_height:
+                if self.on_height_estimate is not None:
+                    self.on_height_estimate(height)
+                height, extras["height_geometry"] = session.run_stage(
+                    "height_geometry",
+                    lambda: HeightService(self.loader).compute_exact_from_ifc(
+                        ifc, path, extra_answers=extra_answers, threads=self.geometry_threads
+                    ),
+                )
+            area_progress = None
+            if self.on_progress is not None:
+                area_progress = lambda step: self.on_progress(f"area.{step}")  # noqa: E731
+            if self.fingerprint:
+                area, fingerprint = session.run_stage(
+                    "area",
+                    lambda: RevisionService(on_progress=area_progress).compute_from_ifc(
+                        ifc, path, self.previous
+                    ),
+                )
+                fingerprint.height_m = height.height_m
+                fingerprint.vkf_category = height.vkf_category
+                sections["fingerprint"] = fingerprint.to_dict()
+            else:
+                area = session.run_stage(
+                    "area",
+                    lambda: AreaService(self.loader, on_progress=area_progress).compute_from_ifc(ifc, path),
+                )
+        if self.fingerprint:
+            if fingerprint is None:
+                fingerprint = replace(ModelFingerprint.from_dict(sections["fingerprint"]), ifc_path=path)
+            if self.previous is not None:
+                revision = diff_fingerprints(self.previous, fingerprint)
+
+        geometry = extras.get("height_geometry")
+
+        def split_buildings() -> list[BuildingResult]:
+            # Oberkanten je Gebäude aus der Geometrie liegen als section im Cache
+            if self.exact_height and "buildings" not in sections:
+                sections["buildings"] = {"tops_m": self._building_tops(area, geometry, ifc)}
+            return self._buildings(height, area, sections.get("buildings", {}).get("tops_m"))
+
+        buildings = session.run_stage("buildings", split_buildings)
+
+        compartments = None
+        if self.compartments:
+            if __package__ in (None, ""):
+                from processors.compartments import CompartmentResult, CompartmentService
+            else:
+                from .compartments import CompartmentResult, CompartmentService
+            if "compartments" in sections:
+                compartments = replace(CompartmentResult.from_dict(sections["compartments"]), ifc_path=path)
+            else:
+                compartments = session.run_stage(
+                    "compartments",
+                    lambda: CompartmentService(self.loader).compute_from_ifc(ifc, path, spaces=area.spaces),
+                )
+                sections["compartments"] = {**compartments.to_dict(), "timings": {}}
+
+        escape_routes = None
+        if self.escape_routes:
+            if __package__ in (None, ""):
+                from processors.escape_routes import EscapeRouteResult, EscapeRouteService
+            else:
+                from .escape_routes import EscapeRouteResult, EscapeRouteService
+            if "escape_routes" in sections:
+                escape_routes = EscapeRouteResult.from_dict(sections["escape_routes"], spaces=area.spaces)
+                escape_routes.ifc_path = path
+            else:
+                service = EscapeRouteService(self.loader, threads=self.geometry_threads)
+                escape_routes = session.run_stage(
+                    "escape_routes", lambda: service.compute_from_ifc(ifc, path, spaces=area.spaces)
+                )
+                sections["escape_routes"] = {**escape_routes.to_dict(), "timings": {}}
+
+        for name, proc in self.processors.items():
+            extras[name] = session.run_stage(name, lambda proc=proc: proc(ifc))
+        cached = hit is not None and not missing
+        if use_cache and not cached:
+            try:
+                session.run_stage("cache", lambda: self.cache.put(cache_key, height, area, sections))
+            except OSError:
+                pass  # Cache ist nur eine Beschleunigung, Auswertung bleibt gültig
+
+        return AnalysisResult(
+            ifc_path=path,
+            height=height,
+            area=area,
+            timings=dict(session.timings),
+            extras=extras,
+            cached=cached,
+            load=session.load,
+            fingerprint=fingerprint,
+            revision=revision,
+            compartments=compartments,
+            escape_routes=escape_routes,
+            buildings=buildings,
+        )
+
+    def _sections(self) -> list[str]:
+        """Angeforderte Stufen, deren Ergebnis als section im Cache-Eintrag liegt."""
+        flags = {
+            "fingerprint": self.fingerprint,
+            "buildings": self.exact_height,
+            "compartments": self.compartments,
+            "escape_routes": self.escape_routes,
+        }
+        return [name for name, wanted in flags.items() if wanted]
+
+    @staticmethod
+    def _buildings(height: HeightResult, area: AreaResult, tops_m=None) -> list[BuildingResult]:
+        if __package__ in (None, ""):
+            from processors.buildings import BuildingService
+        else:
+            from .buildings import BuildingService
+        return BuildingService().compute(height, area, tops_m=tops_m)
+
+    @staticmethod
+    def _building_tops(area: AreaResult, geometry, ifc) -> Optional[list]:
+        """Höchster Vertex je Gebäude (Meter) aus dem Bericht der exakten Höhe, None ohne Gebäude."""
+        if geometry is None or ifc is None or area.spaces is None or not area.spaces.buildings:
+            return None
+        if __package__ in (None, ""):
+            from processors.buildings import BuildingService
+        else:
+            from .buildings import BuildingService
+        return BuildingService.geometry_tops(ifc, geometry, len(area.spaces.buildings))
+
+
+def analyze_task(task: dict, report: Callable[[Any], None]) -> AnalysisResult:
+    """
+    Auswertung als Hintergrundaufgabe (siehe worker.BackgroundTask), meldet die
+    Stufen (str), den Ladefortschritt (LoadProgress) und mit exact_height die
+    Schätzung über die Geschosse (HeightResult) über report.
+    task: path, label, content_hash, loader_mode, use_cache, max_bytes, max_seconds,
+    fingerprint (bool), previous (ModelFingerprint.to_dict() der Vorrevision),
+    compartments und escape_routes (bool), exact_height (bool), threads,
+    profile_dir, extra_answers.
+    Das Modell bleibt im Prozess; zurück kommt nur das kompakte Ergebnis (compact()).
+    """
+    loader = IfcLoader(
+        mode=task.get("loader_mode", "full"),
+        on_progress=report,
+        max_bytes=task.get("max_bytes"),
+        max_seconds=task.get("max_seconds"),
+    )
+    service = AnalysisService(
+        loader=loader,
+        cache=ResultCache() if task.get("use_cache", True) else None,
+        on_progress=report,
+        fingerprint=bool(task.get("fingerprint")),
+        previous=ModelFingerprint.from_dict(task["previous"]) if task.get("previous") else None,
+        compartments=bool(task.get("compartments")),
+        escape_routes=bool(task.get("escape_routes")),
+        exact_height=bool(task.get("exact_height")),
+        geometry_threads=task.get("threads"),
+        on_height_estimate=report,
+        profile_dir=task.get("profile_dir"),
+    )
+    result = service.compute_from_source(
+        task["path"],
+        extra_answers=task.get("extra_answers"),
+        content_hash=task.get("content_hash"),
+        label=task.get("label") or task["path"],
+    )
+    return result.compact()
@@ -0,0 +1,272 @@
+"""
+processors/placement.py
+
+Absolute Lage (4×4-Transformation) von IfcLocalPlacement-Ketten.
+
+Jede IfcLocalPlacement wird genau einmal aufgelöst, gemeinsame Eltern-Ketten
+(Grundstück -> Gebäude -> Geschoss -> ...) also nur einmal gerechnet. Die
+lokalen Achsensysteme (IfcAxis2Placement3D/2D) werden vektorisiert
+orthonormiert, die Verkettung mit den Eltern-Placements läuft als gebündelte
+Matrixmultiplikation über alle Placements gleichzeitig (Pointer Jumping). Rotationen und Neigungen der Eltern werden
+damit korrekt berücksichtigt (nicht nur die Z-Verschiebungen).
+
+Nutzung:
+    resolver = PlacementResolver.for_model(ifc)
+    x, y, z = resolver.origin(storey.ObjectPlacement)
+
+for_model() liefert je Modell dieselbe Instanz, sodass Höhe, Fläche und
+weitere Prozessoren die bereits aufgelösten Placements teilen.
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import Any, Iterable
+
+import numpy as np
+
+_ORIGIN = (0.0, 0.0, 0.0)
+_X_AXIS = (1.0, 0.0, 0.0)
+_Z_AXIS = (0.0, 0.0, 1.0)
+_EPS = 1e-12
+
+_resolvers: "weakref.WeakKeyDictionary[Any, PlacementResolver]" = weakref.WeakKeyDictionary()
+
+
+def _key(entity) -> int:
+    try:
+        return entity.id()
+    except Exception:
+        return id(entity)
+
+
+def _vector(values, default: tuple[float, float, float]) -> tuple[float, float, float]:
+    """Koordinaten/Richtung als 3-Tupel (2D wird mit z=0 ergänzt)."""
+    try:
+        v = [float(c) for c in values][:3]
+    except (TypeError, ValueError):
+        return default
+    if not v:
+        return default
+    return tuple(v + [0.0] * (3 - len(v)))
+
+
+class _AxisReader:
+    """
+    Liest (Ursprung, Z-Achse, X-Referenz) aus IfcAxis2Placement3D/2D.
+
+    Zugriff über get_argument(Position) statt per Name (deutlich schneller bei
+    ifcopenshell, ScannedEntity bietet dieselbe Methode); Punkte und Richtungen werden oft geteilt und daher je #id
+    nur einmal gelesen.
+    """
+
+    def __init__(self):
+        self._vectors: dict[int, tuple[float, float, float]] = {}
+        self._placements: dict[int, tuple[tuple, tuple, tuple]] = {}
+
+    def _read(self, entity, default: tuple[float, float, float]) -> tuple[float, float, float]:
+        if entity is None:
+            return default
+        key = _key(entity)
+        v = self._vectors.get(key)
+        if v is None:
+            try:
+                values = entity.get_argument(0)  # Coordinates bzw. DirectionRatios
+            except Exception:
+                values = entity  # bereits Koordinaten-Tupel
+            v = self._vectors[key] = _vector(values, default)
+        return v
+
+    def parameters(self, axis_placement) -> tuple[tuple, tuple, tuple]:
+        """Fehlende Werte werden durch die IFC-Standardwerte ersetzt."""
+        if axis_placement is None:
+            return _ORIGIN, _Z_AXIS, _X_AXIS
+        key = _key(axis_placement)
+        p = self._placements.get(key)
+        if p is not None:
+            return p
+        location = axis = ref = None
+        try:
+            location = axis_placement.get_argument(0)
+            if len(axis_placement) == 3:  # IfcAxis2Placement3D: Location, Axis, RefDirection
+                axis, ref = axis_placement.get_argument(1), axis_placement.get_argument(2)
+            else:  # IfcAxis2Placement2D: Location, RefDirection
+                ref = axis_placement.get_argument(1)
+        except Exception:
+            pass
+        p = self._placements[key] = (
+            self._read(location, _ORIGIN),
+            self._read(axis, _Z_AXIS),
+            self._read(ref, _X_AXIS),
+        )
+        return p
+
+
+def _normalize(v: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(v, axis=1, keepdims=True)
+    degenerate = norm[:, 0] < _EPS
+    out = v / np.where(degenerate[:, None], 1.0, norm)
+    out[degenerate] = fallback[degenerate]
+    return out
+
+
+def local_matrices(locations: np.ndarray, axes: np.ndarray, refs: np.ndarray) -> np.ndarray:
+    """
+    Lokale 4×4-Matrizen für n Achsensysteme (je Zeile Ursprung, Z-Achse, X-Referenz).
+
+    Wie in IFC definiert: Z = Axis, X = RefDirection projiziert auf die Ebene
+    senkrecht zu Z, Y = Z × X. Ist RefDirection parallel zu Z, wird eine
+    beliebige Senkrechte gewählt.
+    """
+    n = len(locations)
+    z = _normalize(axes, np.tile(_Z_AXIS, (n, 1)))
+    x = refs - np.einsum("ij,ij->i", refs, z)[:, None] * z
+    helper = np.where(np.abs(z[:, :1]) < 0.9, _X_AXIS, (0.0, 1.0, 0.0))
+    perpendicular = helper - np.einsum("ij,ij->i", helper, z)[:, None] * z
+    x = _normalize(x, _normalize(perpendicular, np.tile(_X_AXIS, (n, 1))))
+    y = np.cross(z, x)
+
+    m = np.zeros((n, 4, 4))
+    m[:, :3, 0] = x
+    m[:, :3, 1] = y
+    m[:, :3, 2] = z
+    m[:, :3, 3] = locations
+    m[:, 3, 3] = 1.0
+    return m
+
+
+class PlacementResolver:
+    """
+    Absolute Transformationen (Modellkoordinaten) von IfcLocalPlacement.
+
+    Aufgelöst wird bei Bedarf (matrix/origin) oder gesammelt über resolve()
+    bzw. resolve_all(); bereits bekannte Placements werden nie neu gerechnet.
+    Unbekannte Placement-Typen (z.B. IfcGridPlacement) gelten als
+    Einheitsmatrix, Zyklen in PlacementRelTo führen nicht zu Endlosschleifen.
+    """
+
+    def __init__(self, ifc=None):
+        self.ifc = ifc
+        self._rows: dict[int, int] = {}
+        self._matrices = np.empty((0, 4, 4))
+
+    @classmethod
+    def for_model(cls, ifc) -> "PlacementResolver":
+        """Gemeinsamer Resolver je geladenem Modell."""
+        try:
+            resolver = _resolvers.get(ifc)
+        except TypeError:  # Modell nicht weak-referenzierbar
+            return cls(ifc)
+        if resolver is None:
+            resolver = _resolvers[ifc] = cls(ifc)
+        return resolver
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------
+    # Auflösen
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _arguments(placement) -> tuple[Any, Any]:
+        """(PlacementRelTo, RelativePlacement); andere Placement-Typen ohne Eltern/Achsen."""
+        try:
+            if placement.is_a("IfcLocalPlacement"):
+                return placement.get_argument(0), placement.get_argument(1)
+        except Exception:
+            pass
+        return None, None
+
+    def resolve(self, placements: Iterable) -> None:
+        """Löst die Placements inkl. aller noch unbekannten Vorfahren in einem Durchgang auf."""
+        relatives: dict[int, Any] = {}
+        parents: dict[int, int] = {}
+        pending = list(placements)
+        while pending:
+            lp = pending.pop()
+            key = _key(lp)
+            if key in self._rows or key in relatives:
+                continue
+            parent, relatives[key] = self._arguments(lp)
+            if parent is not None:
+                parents[key] = _key(parent)
+                pending.append(parent)
+
+        if not relatives:
+            return
+
+        keys = list(relatives)
+        offset = len(self._matrices)
+        for i, key in enumerate(keys):
+            self._rows[key] = offset + i
+
+        reader = _AxisReader()
+        locations, axes, refs = [], [], []
+        for key in keys:
+            location, axis, ref = reader.parameters(relatives[key])
+            locations.append(location)
+            axes.append(axis)
+            refs.append(ref)
+        local = local_matrices(np.array(locations, dtype=float), np.array(axes, dtype=float), np.array(refs, dtype=float))
+
+        # Pointer Jumping: invariant absolut(i) = absolut(P[i]) @ M[i]. Je Runde
+        # M[i] = M[P[i]] @ M[i], P[i] = P[P[i]] -> Ketten der Tiefe d nach log2(d)
+        # Runden aufgelöst. Bereits bekannte Zeilen sind absolut (P = -1).
+        matrices = np.concatenate([self._matrices, local])
+        parent_row = np.full(len(matrices), -1, dtype=np.int64)
+        rows = self._rows
+        parent_row[offset:] = [rows[parents[k]] if k in parents else -1 for k in keys]
+        for _ in range(len(matrices).bit_length() + 1):  # Zyklen (ungültiges Modell) brechen hier ab
+            open_rows = np.nonzero(parent_row >= 0)[0]
+            if not open_rows.size:
+                break
+            up = parent_row[open_rows]
+            matrices[open_rows] = matrices[up] @ matrices[open_rows]
+            parent_row[open_rows] = parent_row[up]
+        self._matrices = matrices
+
+    def resolve_all(self) -> int:
+        """Löst alle IfcLocalPlacement des Modells auf und gibt deren Anzahl zurück."""
+        if self.ifc is None:
+            return 0
+        placements = self.ifc.by_type("IfcLocalPlacement") or []
+        self.resolve(placements)
+        return len(placements)
+
+    # ------------------------------------------------------------
+    # Abfragen
+    # ------------------------------------------------------------
+
+    def matrix(self, placement) -> np.ndarray:
+        """Absolute 4×4-Matrix (Einheitsmatrix für None); Kopie, darf verändert werden."""
+        if placement is None:
+            return np.eye(4)
+        key = _key(placement)
+        if key not in self._rows:
+            self.resolve((placement,))
+        return self._matrices[self._rows[key]].copy()
+
+    def matrices(self, placements: Iterable) -> np.ndarray:
+        """Absolute Matrizen als Array (n, 4, 4), in der Reihenfolge der Eingabe."""
+        placements = list(placements)
+        self.resolve(p for p in placements if p is not None)
+        out = np.tile(np.eye(4), (len(placements), 1, 1))
+        rows = [(i, self._rows[_key(p)]) for i, p in enumerate(placements) if p is not None]
+        if rows:
+            index, row = np.array(rows).T
+            out[index] = self._matrices[row]
+        return out
+
+    def origin(self, placement) -> tuple[float, float, float]:
+        """Ursprung der Placement in Modellkoordinaten."""
+        x, y, z = self.matrix(placement)[:3, 3]
+        return float(x), float(y), float(z)
+
+    def object_matrix(self, product) -> np.ndarray:
+        """Absolute Matrix der ObjectPlacement eines Produkts (Einheitsmatrix ohne Placement)."""
+        try:
+            placement = product.ObjectPlacement
+        except Exception:
+            placement = None
+        return self.matrix(placement)
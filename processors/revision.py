@@ -0,0 +1,396 @@
+"""
+processors/revision.py
+
+Inkrementelle Auswertung von Modellrevisionen über GlobalId-Fingerabdrücke.
+
+Je Geschoss wird ein Fingerabdruck aus GlobalId, Name und Kote gebildet, dazu je
+Raum GlobalId und Flächenmenge. Bauteile, deren Fläche aus der Geometrie kommt
+(Räume ohne Mengen, ohne Räume die Bodenplatten), tragen zusätzlich ihren
+Placement-Ursprung und einen Hash ihrer Darstellung bei; bei Räumen mit Menge
+hängt die Fläche nicht von der Lage ab. Bei einer neuen Revision werden
+Grundrisse nur für Geschosse mit geändertem Fingerabdruck neu trianguliert; für
+unveränderte Geschosse wird der gespeicherte Geometrie-Anteil übernommen. Die
+Mengen-Summen sind billig und werden immer neu gebildet (sie stecken ohnehin im
+Fingerabdruck).
+
+diff_fingerprints() vergleicht zwei Revisionen: geänderte Geschossflächen
+(StoreyArea) und umschlagende VKF-Bewertungen (height_category,
+small_building_comment, storey_area_comment).
+
+Nutzung:
+    area, fingerprint = RevisionService().compute_from_ifc(ifc, path, previous=alter_fingerabdruck)
+    diff = diff_fingerprints(alter_fingerabdruck, fingerprint)
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.area import AreaResult, BuildingAreaCalculator, StoreyArea
+    from processors.footprint import supports_geometry
+    from processors.vkf_rules import small_building_comment, storey_area_comment
+else:
+    from .area import AreaResult, BuildingAreaCalculator, StoreyArea
+    from .footprint import supports_geometry
+    from .vkf_rules import small_building_comment, storey_area_comment
+
+# Koordinaten und Flächen werden vor dem Hashen gerundet (Export-Rauschen)
+DIGEST_DECIMALS = 6
+# Geschossflächen gelten ab dieser Abweichung als geändert
+AREA_TOLERANCE_M2 = 1e-6
+
+
+def _digest(*parts) -> str:
+    return hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(float(value), DIGEST_DECIMALS)
+
+
+def _literal(value):
+    """Attributwert ohne Verweise (#ids ändern sich bei jedem Export)."""
+    if hasattr(value, "is_a"):
+        return "#"
+    if isinstance(value, (list, tuple)):
+        return tuple(_literal(v) for v in value)
+    if isinstance(value, float):
+        return _round(value)
+    return value
+
+
+def representation_digest(ifc, product) -> Optional[str]:
+    """Hash über Typen und Werte aller Entitäten der Darstellung eines Bauteils."""
+    representation = getattr(product, "Representation", None)
+    if representation is None:
+        return None
+    digest = hashlib.blake2b(digest_size=8)
+    for entity in ifc.traverse(representation):
+        digest.update(entity.is_a().encode())
+        digest.update(repr(tuple(_literal(entity[i]) for i in range(len(entity)))).encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class StoreyFingerprint:
+    """
+    Fingerabdruck eines Geschosses.
+
+    spaces           = GlobalId -> Fingerabdruck je Raum bzw. Geometrie-Bauteil
+    geometry_area_m2 = Anteil aus Grundrissen (wird bei unverändertem digest übernommen)
+    area             = Ergebnis des Geschosses (None ohne Fläche)
+    """
+    global_id: str
+    name: str
+    digest: str
+    spaces: dict[str, str] = field(default_factory=dict)
+    geometry_area_m2: float = 0.0
+    area: Optional[StoreyArea] = None
+
+
+@dataclass
+class ModelFingerprint:
+    """Fingerabdrücke aller Geschosse einer Revision samt Höhe und Gebäudefläche."""
+    ifc_path: str
+    storeys: list[StoreyFingerprint] = field(default_factory=list)
+    height_m: Optional[float] = None
+    vkf_category: str = "n/a"
+    building_area_m2: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """Serialisierbare Form (z.B. für die Projektablage)."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelFingerprint":
+        storeys = []
+        for item in data.get("storeys") or []:
+            item = dict(item)
+            area = item.pop("area", None)
+            storeys.append(StoreyFingerprint(**item, area=StoreyArea(**area) if area else None))
+        return cls(
+            ifc_path=data.get("ifc_path", ""),
+            storeys=storeys,
+            height_m=data.get("height_m"),
+            vkf_category=data.get("vkf_category", "n/a"),
+            building_area_m2=data.get("building_area_m2"),
+        )
+
+    def by_global_id(self) -> dict[str, StoreyFingerprint]:
+        return {s.global_id: s for s in self.storeys}
+
+
+def _global_id(entity) -> str:
+    """GlobalId (erstes Attribut jedes IfcRoot, per Position gelesen) oder ersatzweise die #id."""
+    try:
+        global_id = entity.get_argument(0)
+    except Exception:
+        global_id = None
+    return global_id if isinstance(global_id, str) and global_id else f"#{entity.id()}"
+
+
+def storey_fingerprints(calc: BuildingAreaCalculator) -> dict[int, StoreyFingerprint]:
+    """
+    Fingerabdruck je Geschoss-#id aus den Indizes des Calculators (Flächen noch leer).
+
+    Darstellungen werden nur für Bauteile gehasht, deren Fläche aus der Geometrie
+    käme (mit geometry_fallback und Geometrie-Unterstützung des Modells).
+    """
+    ifc = calc.ifc
+    geometry = calc.geometry_fallback and supports_geometry(ifc)
+    spaces_by_storey = calc._spaces_by_storey()
+    missing = calc._missing_elements_by_storey() if geometry else {}
+
+    placements = [e.ObjectPlacement for elements in missing.values() for e in elements if e.ObjectPlacement]
+    if placements:
+        try:
+            calc.placements.resolve(placements)
+        except Exception:
+            pass  # origin() fällt je Placement auf () zurück
+
+    def origin(product) -> tuple:
+        placement = getattr(product, "ObjectPlacement", None)
+        if placement is None:
+            return ()
+        try:
+            return tuple(_round(v) for v in calc.placements.origin(placement))
+        except Exception:
+            return ()
+
+    fingerprints: dict[int, StoreyFingerprint] = {}
+    for storey, spaces in spaces_by_storey.items():
+        parts: dict[str, str] = {}
+        for space in spaces:
+            parts[_global_id(space)] = _digest(_round(calc._space_area_m2(space)))
+        for element in missing.get(storey.id(), []):
+            key = _global_id(element)
+            parts[key] = _digest(parts.get(key), origin(element), representation_digest(ifc, element))
+        name = getattr(storey, "LongName", None) or getattr(storey, "Name", None) or ""
+        fingerprints[storey.id()] = StoreyFingerprint(
+            global_id=_global_id(storey),
+            name=name,
+            digest=_digest(_global_id(storey), name, _round(calc._storey_elevation(storey)), sorted(parts.items())),
+            spaces=parts,
+        )
+    return fingerprints
+
+
+class RevisionService:
+    """
+    Flächenauswertung mit Fingerabdruck; mit previous werden nur geänderte
+    Geschosse neu trianguliert (siehe Modul-Docstring).
+    """
+
+    def __init__(self, geometry_fallback: bool = True, on_progress: Optional[Callable[[str], None]] = None):
+        self.geometry_fallback = geometry_fallback
+        self.on_progress = on_progress  # Teilschritte wie bei AreaService, zusätzlich "fingerprint"
+
+    def compute_from_ifc(
+        self, ifc, ifc_path: str, previous: Optional[ModelFingerprint] = None
+    ) -> tuple[AreaResult, ModelFingerprint]:
+        calc = BuildingAreaCalculator(ifc, geometry_fallback=self.geometry_fallback, on_progress=self.on_progress)
+        calc.build_indexes()
+        with calc.timings.span("fingerprint"):
+            fingerprints = storey_fingerprints(calc)
+
+        known: dict[int, float] = {}
+        if previous is not None:
+            before = previous.by_global_id()
+            for storey_id, fp in fingerprints.items():
+                old = before.get(fp.global_id)
+                if old is not None and old.digest == fp.digest:
+                    known[storey_id] = old.geometry_area_m2
+
+        storeys = calc.compute_storey_areas(known_geometry=known)
+        for storey_id, fp in fingerprints.items():
+            fp.geometry_area_m2 = calc.geometry_areas.get(storey_id, 0.0)
+            fp.area = calc.storey_areas.get(storey_id)
+
+        building_area_m2 = sum(s.area_m2 for s in storeys) if storeys else None
+        counts = calc.counts()
+        counts["storeys_reused"] = len(known)
+        area = AreaResult(
+            ifc_path=ifc_path,
+            building_area_m2=building_area_m2,
+            storeys=storeys,
+            timings=dict(calc.timings),
+            counts=counts,
+            spaces=calc.space_table(),
+        )
+        fingerprint = ModelFingerprint(
+            ifc_path=ifc_path,
+            storeys=list(fingerprints.values()),
+            building_area_m2=building_area_m2,
+        )
+        return area, fingerprint
+
+
+# ------------------------------------------------------------
+# Vergleich zweier Revisionen
+# ------------------------------------------------------------
+
+STATUS_CHANGED = "changed"
+STATUS_ADDED = "added"
+STATUS_REMOVED = "removed"
+STATUS_LABELS = {STATUS_CHANGED: "geändert", STATUS_ADDED: "neu", STATUS_REMOVED: "entfernt"}
+
+
+@dataclass
+class StoreyChange:
+    """Ein Geschoss mit geändertem Fingerabdruck (oder neu/entfernt)."""
+    global_id: str
+    name: str
+    status: str
+    before: Optional[StoreyArea] = None
+    after: Optional[StoreyArea] = None
+    spaces_added: int = 0
+    spaces_removed: int = 0
+    spaces_changed: int = 0
+
+    @staticmethod
+    def _area(storey: Optional[StoreyArea]) -> float:
+        return storey.area_m2 if storey is not None else 0.0
+
+    @property
+    def area_changed(self) -> bool:
+        if abs(self._area(self.before) - self._area(self.after)) > AREA_TOLERANCE_M2:
+            return True
+        before_method = self.before.method if self.before is not None else None
+        after_method = self.after.method if self.after is not None else None
+        return before_method != after_method
+
+    @property
+    def comment_before(self) -> str:
+        return storey_area_comment(self._area(self.before))
+
+    @property
+    def comment_after(self) -> str:
+        return storey_area_comment(self._area(self.after))
+
+
+@dataclass
+class RuleFlip:
+    """Eine VKF-Bewertung, die zwischen den Revisionen umschlägt."""
+    rule: str  # Name der Funktion in vkf_rules
+    subject: str  # "Gebäude" oder Geschossname
+    before: str
+    after: str
+
+
+@dataclass
+class RevisionDiff:
+    """
+    Unterschiede zwischen zwei Revisionen.
+
+    changes   = Geschosse mit geändertem Fingerabdruck, neu oder entfernt
+    flips     = umschlagende VKF-Bewertungen
+    unchanged = Anzahl Geschosse mit gleichem Fingerabdruck (nicht neu trianguliert)
+    """
+    previous_path: str
+    current_path: str
+    changes: list[StoreyChange] = field(default_factory=list)
+    flips: list[RuleFlip] = field(default_factory=list)
+    unchanged: int = 0
+    height_before: Optional[float] = None
+    height_after: Optional[float] = None
+    area_before: Optional[float] = None
+    area_after: Optional[float] = None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.changes or self.flips) or self.height_before != self.height_after
+
+    def text_lines(self) -> list[str]:
+        lines = [f"Vergleich mit Revision: {self.previous_path}"]
+        if not self.changed:
+            lines.append(f"  Keine Änderungen ({self.unchanged} Geschosse unverändert).")
+            return lines
+        lines.append(f"  {len(self.changes)} Geschosse geändert, {self.unchanged} unverändert (übernommen)")
+        for change in self.changes:
+            label = change.name or "<ohne Name>"
+            before = "-" if change.before is None else f"{change.before.area_m2:.1f} m²"
+            after = "-" if change.after is None else f"{change.after.area_m2:.1f} m²"
+            spaces = (
+                f"Räume +{change.spaces_added} / -{change.spaces_removed} / ~{change.spaces_changed}"
+            )
+            if change.area_changed:
+                delta = StoreyChange._area(change.after) - StoreyChange._area(change.before)
+                area = f"{before} -> {after} ({delta:+.2f} m²)"
+            else:
+                area = f"Fläche unverändert {after}"
+            lines.append(f"  - {label} [{STATUS_LABELS[change.status]}]: {area} ({spaces})")
+        if self.height_before != self.height_after:
+            fmt = lambda v: "n/a" if v is None else f"{v:.2f} m"  # noqa: E731
+            lines.append(f"  Höhe: {fmt(self.height_before)} -> {fmt(self.height_after)}")
+        for flip in self.flips:
+            lines.append(
+                f"  VKF ({flip.rule}, {flip.subject}): {flip.before or '(kein Kommentar)'} -> "
+                f"{flip.after or '(kein Kommentar)'}"
+            )
+        return lines
+
+
+def diff_fingerprints(previous: ModelFingerprint, current: ModelFingerprint) -> RevisionDiff:
+    """Vergleicht zwei Revisionen Geschoss für Geschoss (über die GlobalId)."""
+    before = previous.by_global_id()
+    after = current.by_global_id()
+    diff = RevisionDiff(
+        previous_path=previous.ifc_path,
+        current_path=current.ifc_path,
+        height_before=previous.height_m,
+        height_after=current.height_m,
+        area_before=previous.building_area_m2,
+        area_after=current.building_area_m2,
+    )
+
+    for gid, new in after.items():
+        old = before.get(gid)
+        if old is None:
+            diff.changes.append(
+                StoreyChange(gid, new.name, STATUS_ADDED, after=new.area, spaces_added=len(new.spaces))
+            )
+        elif old.digest == new.digest:
+            diff.unchanged += 1
+        else:
+            old_spaces, new_spaces = set(old.spaces), set(new.spaces)
+            diff.changes.append(
+                StoreyChange(
+                    gid,
+                    new.name,
+                    STATUS_CHANGED,
+                    before=old.area,
+                    after=new.area,
+                    spaces_added=len(new_spaces - old_spaces),
+                    spaces_removed=len(old_spaces - new_spaces),
+                    spaces_changed=sum(1 for k in old_spaces & new_spaces if old.spaces[k] != new.spaces[k]),
+                )
+            )
+    for gid, old in before.items():
+        if gid not in after:
+            diff.changes.append(
+                StoreyChange(gid, old.name, STATUS_REMOVED, before=old.area, spaces_removed=len(old.spaces))
+            )
+
+    # VKF-Bewertungen vor/nach der Revision
+    rules = [
+        ("height_category", "Gebäude", previous.vkf_category, current.vkf_category),
+        (
+            "small_building_comment",
+            "Gebäude",
+            small_building_comment(previous.building_area_m2),
+            small_building_comment(current.building_area_m2),
+        ),
+    ]
+    rules += [
+        ("storey_area_comment", change.name or change.global_id, change.comment_before, change.comment_after)
+        for change in diff.changes
+    ]
+    diff.flips = [RuleFlip(rule, subject, old, new) for rule, subject, old, new in rules if old != new]
+    return diff
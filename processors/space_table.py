@@ -0,0 +1,312 @@
+"""
+processors/space_table.py
+
+Spaltenweise Raumtabelle eines Modells (NumPy) mit vektorisierten Summen.
+
+Statt je Raum ein Objekt zu halten, liegen alle Räume als gleich lange Spalten
+vor (GlobalId, Name, Geschoss, Fläche, Nutzung, Zone). Geschoss, Nutzung und
+Zone sind Codes in eine Kategorienliste (-1 = ohne), die Geschosse selbst
+stehen in den storey_*-Spalten, das Gebäude je Geschoss in storey_building.
+Summen nach Gebäude × Geschoss × Nutzung × Zone laufen
+über np.unique/np.bincount statt über Python-Schleifen; die Geschossflächen
+(StoreyArea) werden daraus abgeleitet (siehe area.storey_areas_from_table).
+
+Nutzung:
+    table = BuildingAreaCalculator(ifc).space_table()
+    table.aggregate(("storey", "usage"))            # Spalten für st.dataframe
+    table.aggregate(("zone",), mask=table.mask(usage="Büro"))
+
+Flächen aus der Geometrie (Räume ohne Mengen, Bodenplatten) sind nur je
+Geschoss bekannt (storey_geometry_m2, vereinigter Grundriss) und fliessen
+daher nicht in die Aufteilung nach Nutzung/Zone ein.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+# Herkunft der Fläche eines Raums (SpaceTable.source)
+SOURCE_NONE = -1  # weder Menge noch Geometrie
+SOURCE_QUANTITIES = 0  # IfcQuantityArea des Raums
+SOURCE_GEOMETRY = 1  # Raum ohne Menge, Geschoss mit Grundriss aus Geometrie
+SOURCE_LABELS = {
+    SOURCE_NONE: "ohne Fläche",
+    SOURCE_QUANTITIES: "Mengen",
+    SOURCE_GEOMETRY: "Geometrie",
+}
+
+# Gruppierbare Spalten (aggregate/mask)
+DIMENSIONS = ("building", "storey", "usage", "zone")
+DIMENSION_LABELS = {"building": "Gebäude", "storey": "Geschoss", "usage": "Nutzung", "zone": "Zone"}
+NONE_LABEL = "(ohne)"
+
+
+def _strings(values: Sequence[str]) -> np.ndarray:
+    """Text-Spalte mit fester Breite (kompakter als object-Arrays, auch leer)."""
+    return np.array(list(values), dtype=str) if len(values) else np.zeros(0, dtype="<U1")
+
+
+def _categories(values: Sequence[Optional[str]]) -> tuple[np.ndarray, tuple[str, ...]]:
+    """Texte -> (int32-Codes, Kategorien in Reihenfolge des ersten Auftretens); leer/None -> -1."""
+    index: dict[str, int] = {}
+    codes = np.fromiter(
+        (index.setdefault(v, len(index)) if v else -1 for v in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, tuple(index)
+
+
+@dataclass
+class SpaceTable:
+    """
+    Alle Räume eines Modells als Spalten (eine Zeile je IfcSpace).
+
+    space_id           = #id je Raum (nur innerhalb desselben geladenen Modells gültig)
+    global_id, name    = Texte je Raum
+    storey             = Index in storey_* (-1 = keinem Geschoss zugeordnet)
+    area_m2            = Fläche aus IfcQuantityArea (NaN = ohne Menge)
+    usage, zone        = Index in usages / zones (-1 = ohne)
+    storey_id          = #id je Geschoss (Reihenfolge wie im Modell)
+    storey_name        = LongName bzw. Name je Geschoss
+    storey_elevation   = Höhenkote je Geschoss (NaN = unbekannt)
+    storey_geometry_m2 = Grundrissfläche der Bauteile ohne Mengen je Geschoss
+    storey_building    = Index in buildings je Geschoss (-1 = keinem Gebäude zugeordnet)
+    unit_scale         = Meter je Projekteinheit der Höhenkoten
+    """
+    space_id: np.ndarray
+    global_id: np.ndarray
+    name: np.ndarray
+    storey: np.ndarray
+    area_m2: np.ndarray
+    usage: np.ndarray
+    zone: np.ndarray
+    storey_id: np.ndarray
+    storey_name: np.ndarray
+    storey_elevation: np.ndarray
+    storey_geometry_m2: np.ndarray
+    storey_building: np.ndarray
+    usages: tuple[str, ...] = ()
+    zones: tuple[str, ...] = ()
+    buildings: tuple[str, ...] = ()
+    unit_scale: float = 1.0
+
+    @classmethod
+    def from_rows(
+        cls,
+        spaces: Sequence[tuple[int, str, str, int, Optional[float], Optional[str], Optional[str]]],
+        storeys: Sequence[tuple[int, str, Optional[float], int]],
+        buildings: Sequence[str] = (),
+        unit_scale: float = 1.0,
+    ) -> "SpaceTable":
+        """
+        spaces:     (#id, GlobalId, Name, Geschoss-Index, Fläche, Nutzung, Zone) je Raum
+        storeys:    (#id, Name, Höhenkote, Gebäude-Index) je Geschoss
+        buildings:  Name je Gebäude
+        unit_scale: Meter je Projekteinheit der Höhenkoten
+        """
+        space_ids, global_ids, names, storey_codes, areas, usages, zones = zip(*spaces) if spaces else ((),) * 7
+        usage_codes, usage_labels = _categories(usages)
+        zone_codes, zone_labels = _categories(zones)
+        return cls(
+            space_id=np.array(space_ids, dtype=np.int64),
+            global_id=_strings(global_ids),
+            name=_strings(names),
+            storey=np.array(storey_codes, dtype=np.int32),
+            area_m2=np.array([np.nan if a is None else a for a in areas], dtype=np.float64),
+            usage=usage_codes,
+            zone=zone_codes,
+            storey_id=np.array([s[0] for s in storeys], dtype=np.int64),
+            storey_name=_strings([s[1] for s in storeys]),
+            storey_elevation=np.array([np.nan if s[2] is None else s[2] for s in storeys], dtype=np.float64),
+            storey_geometry_m2=np.zeros(len(storeys), dtype=np.float64),
+            storey_building=np.array([s[3] for s in storeys], dtype=np.int32),
+            usages=usage_labels,
+            zones=zone_labels,
+            buildings=tuple(buildings),
+            unit_scale=unit_scale,
+        )
+
+    def __len__(self) -> int:
+        return len(self.storey)
+
+    @property
+    def nbytes(self) -> int:
+        """Speicherbedarf der Spalten in Bytes (ohne Kategorienlisten)."""
+        return sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+
+    # ------------------------------------------------------------
+    # Abgeleitete Spalten
+    # ------------------------------------------------------------
+
+    @property
+    def elevation(self) -> np.ndarray:
+        """Höhenkote des Geschosses je Raum (NaN ohne Geschoss/Kote)."""
+        return np.append(self.storey_elevation, np.nan)[self.storey]  # -1 -> NaN
+
+    @property
+    def source(self) -> np.ndarray:
+        """Herkunft der Fläche je Raum (SOURCE_*), Geometrie nur wenn das Geschoss einen Grundriss hat."""
+        has_geometry = np.append(self.storey_geometry_m2, 0.0)[self.storey] > 0.0  # -1 -> ohne Geschoss
+        return np.where(
+            ~np.isnan(self.area_m2),
+            SOURCE_QUANTITIES,
+            np.where(has_geometry, SOURCE_GEOMETRY, SOURCE_NONE),
+        ).astype(np.int8)
+
+    @property
+    def building(self) -> np.ndarray:
+        """Gebäude-Index je Raum (über das Geschoss, -1 ohne Geschoss/Gebäude)."""
+        return np.append(self.storey_building, -1)[self.storey]
+
+    def storey_labels(self) -> list[str]:
+        """
+        Bezeichnung je Geschoss für Auflistungen: bei mehreren Gebäuden mit dem
+        Gebäudenamen davor ("Haus A / Geschoss 1"), sofern der Geschossname ihn
+        nicht schon enthält, damit gleich benannte Geschosse unterscheidbar bleiben.
+        """
+        names = self.storey_name.tolist()
+        if len(self.buildings) < 2:
+            return names
+        return [
+            f"{self.buildings[b]} / {name}" if b >= 0 and not name.startswith(self.buildings[b]) else name
+            for name, b in zip(names, self.storey_building.tolist())
+        ]
+
+    def storey_quantity_m2(self) -> np.ndarray:
+        """Summe der Raumflächen aus Mengen je Geschoss (Länge wie storey_id)."""
+        assigned = (self.storey >= 0) & ~np.isnan(self.area_m2)
+        return np.bincount(self.storey[assigned], weights=self.area_m2[assigned], minlength=len(self.storey_id))
+
+    def storey_spaces(self) -> np.ndarray:
+        """Anzahl Räume je Geschoss."""
+        return np.bincount(self.storey[self.storey >= 0], minlength=len(self.storey_id))
+
+    # ------------------------------------------------------------
+    # Auswahl und Gruppierung
+    # ------------------------------------------------------------
+
+    def _labels(self, dimension: str) -> Sequence[str]:
+        if dimension == "building":
+            return self.buildings
+        if dimension == "storey":
+            return self.storey_name.tolist()
+        if dimension == "usage":
+            return self.usages
+        if dimension == "zone":
+            return self.zones
+        raise ValueError(f"Unbekannte Spalte {dimension!r}, erlaubt: {', '.join(DIMENSIONS)}")
+
+    def mask(self, **criteria: Union[str, Sequence[str], None]) -> np.ndarray:
+        """
+        Zeilen, deren storey/usage/zone einem der angegebenen Namen entspricht,
+        z.B. mask(usage="Büro", zone=("BA 1", "BA 2")); None bzw. NONE_LABEL = ohne.
+        """
+        rows = np.ones(len(self), dtype=bool)
+        for dimension, wanted in criteria.items():
+            labels = self._labels(dimension)
+            if wanted is None or isinstance(wanted, str):
+                wanted = (wanted,)
+            codes = [i for i, label in enumerate(labels) if label in wanted]
+            if None in wanted or NONE_LABEL in wanted:
+                codes.append(-1)
+            rows &= np.isin(getattr(self, dimension), codes)
+        return rows
+
+    def select(self, rows: np.ndarray) -> "SpaceTable":
+        """Teiltabelle mit den Zeilen rows (Maske oder Indizes); Geschosse und Kategorien bleiben."""
+        return SpaceTable(
+            space_id=self.space_id[rows],
+            global_id=self.global_id[rows],
+            name=self.name[rows],
+            storey=self.storey[rows],
+            area_m2=self.area_m2[rows],
+            usage=self.usage[rows],
+            zone=self.zone[rows],
+            storey_id=self.storey_id,
+            storey_name=self.storey_name,
+            storey_elevation=self.storey_elevation,
+            storey_geometry_m2=self.storey_geometry_m2,
+            storey_building=self.storey_building,
+            usages=self.usages,
+            zones=self.zones,
+            buildings=self.buildings,
+            unit_scale=self.unit_scale,
+        )
+
+    def aggregate(self, by: Sequence[str] = DIMENSIONS, mask: Optional[np.ndarray] = None) -> dict[str, np.ndarray]:
+        """
+        Flächen aus Mengen gruppiert nach den Spalten in by (Teilmenge von DIMENSIONS).
+
+        Liefert gleich lange Spalten: je Gruppierung die Namen (NONE_LABEL = ohne),
+        dazu area_m2, spaces (Anzahl Räume) und spaces_without_area. Gruppen ohne
+        Räume fehlen; Reihenfolge nach Geschoss, dann Kategorie.
+        """
+        codes = [getattr(self, dimension) for dimension in by]
+        sizes = [len(self._labels(dimension)) + 1 for dimension in by]
+        area = self.area_m2
+        if mask is not None:
+            codes = [c[mask] for c in codes]
+            area = area[mask]
+
+        if codes:
+            key = np.ravel_multi_index([c + 1 for c in codes], sizes)
+        else:
+            key = np.zeros(len(area), dtype=np.int64)
+        groups, inverse = np.unique(key, return_inverse=True)
+        missing = np.isnan(area)
+
+        result: dict[str, np.ndarray] = {}
+        if codes:
+            for dimension, index in zip(by, np.unravel_index(groups, sizes)):
+                labels = np.array((NONE_LABEL, *self._labels(dimension)), dtype=object)
+                result[dimension] = labels[index]
+        result["area_m2"] = np.bincount(inverse, weights=np.where(missing, 0.0, area), minlength=len(groups))
+        result["spaces"] = np.bincount(inverse, minlength=len(groups))
+        result["spaces_without_area"] = np.bincount(inverse, weights=missing, minlength=len(groups)).astype(np.int64)
+        return result
+
+    # ------------------------------------------------------------
+    # Serialisierung (Ergebnis-Cache)
+    # ------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        """JSON-taugliche Form; fehlende Flächen/Koten als None."""
+        data: dict = {}
+        for key, value in vars(self).items():
+            if isinstance(value, np.ndarray) and value.dtype.kind == "f":
+                data[key] = [None if np.isnan(v) else v for v in value.tolist()]
+            elif isinstance(value, np.ndarray):
+                data[key] = value.tolist()
+            elif isinstance(value, float):
+                data[key] = value
+            else:
+                data[key] = list(value)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpaceTable":
+        def floats(key: str) -> np.ndarray:
+            return np.array([np.nan if v is None else v for v in data[key]], dtype=np.float64)
+
+        return cls(
+            space_id=np.array(data["space_id"], dtype=np.int64),
+            global_id=_strings(data["global_id"]),
+            name=_strings(data["name"]),
+            storey=np.array(data["storey"], dtype=np.int32),
+            area_m2=floats("area_m2"),
+            usage=np.array(data["usage"], dtype=np.int32),
+            zone=np.array(data["zone"], dtype=np.int32),
+            storey_id=np.array(data["storey_id"], dtype=np.int64),
+            storey_name=_strings(data["storey_name"]),
+            storey_elevation=floats("storey_elevation"),
+            storey_geometry_m2=floats("storey_geometry_m2"),
+            storey_building=np.array(data.get("storey_building") or [-1] * len(data["storey_id"]), dtype=np.int32),
+            usages=tuple(data.get("usages") or ()),
+            zones=tuple(data.get("zones") or ()),
+            buildings=tuple(data.get("buildings") or ()),
+            unit_scale=float(data.get("unit_scale", 1.0)),
+        )
@@ -0,0 +1,301 @@
+"""
+processors/spatial_index.py
+
+Räumlicher Index über die Grundrisse der Räume je Geschoss.
+
+Statt Nachbarschaft, Überlappung oder "in welchem Raum liegt dieser Punkt"
+über alle Raumpaare zu prüfen, liegt je Geschoss ein STRtree (shapely) über
+den Raumgrundrissen; das Geschoss zu einer Höhe liefern Höhenbänder (Kote
+bis zur nächsthöheren Kote). Abfragen kosten damit O(log n + Treffer) statt
+O(n), Massenabfragen (adjacent_pairs, spaces_at) laufen vektorisiert in GEOS.
+
+Nutzung:
+    index = SpatialIndex.for_model(ifc, area.spaces)   # einmal je Modell aufgebaut
+    row = index.space_at(x, y, z=z)                     # Zeile der Raumtabelle, -1 = keiner
+    index.neighbours(row)                               # Räume im Abstand <= WALL_GAP_M
+    index.overlapping(wall_footprint, storey)           # Räume, die ein Bauteil berührt
+    index.adjacent_pairs()                              # alle Nachbarpaare je Geschoss
+
+Die Grundrisse kommen aus der Geometrie (footprint.FootprintAreaCalculator,
+nur im Lademodus "full" mit shapely). Ohne Geometrie bleibt der Index leer
+(available = False); die Höhenbänder (ElevationBands) brauchen nur die Koten.
+Koordinaten sind wie Placements und Koten in Projekteinheiten, Abstände
+(distance) in Meter.
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.footprint import FootprintAreaCalculator, supports_geometry
+    from processors.height import unit_scale
+    from processors.space_table import SpaceTable
+else:
+    from .footprint import FootprintAreaCalculator, supports_geometry
+    from .height import unit_scale
+    from .space_table import SpaceTable
+
+# Räume mit höchstens diesem Abstand gelten als benachbart (Wandstärke)
+WALL_GAP_M = 0.5
+# Punkte knapp unter einer Geschosskote (Bodenaufbau, Rundung) gehören noch zu diesem Geschoss
+ELEVATION_TOLERANCE_M = 0.2
+
+
+def _to_project_units(shapes: dict[int, Any], scale: float) -> dict[int, Any]:
+    """Grundrisse aus der Geometrie (Meter) in Projekteinheiten."""
+    if scale == 1.0 or not shapes:
+        return shapes
+    import shapely
+
+    keys = list(shapes)
+    scaled = shapely.transform(np.array([shapes[k] for k in keys], dtype=object), lambda xy: xy / scale)
+    return dict(zip(keys, scaled.tolist()))
+
+
+_indexes: "weakref.WeakKeyDictionary[Any, SpatialIndex]" = weakref.WeakKeyDictionary()
+
+
+class ElevationBands:
+    """
+    Geschosse als Höhenbänder: Geschoss i reicht von seiner Kote bis zur
+    nächsthöheren. Teilen sich mehrere Geschosse dieselbe Kote (z.B. mehrere
+    Gebäude), ist das Band mehrdeutig und liefert -1.
+    """
+
+    def __init__(self, elevations: Sequence[Optional[float]], unit_scale: float = 1.0):
+        self.tolerance = ELEVATION_TOLERANCE_M / unit_scale
+        values = np.array([np.nan if e is None else e for e in elevations], dtype=np.float64)
+        known = np.flatnonzero(~np.isnan(values))
+        order = known[np.argsort(values[known], kind="stable")]
+        bottoms, first, counts = np.unique(values[order], return_index=True, return_counts=True)
+        self._bottoms = bottoms
+        self._storeys = np.where(counts == 1, order[first], -1)
+
+    def storeys_at(self, z: Iterable[float]) -> np.ndarray:
+        """Geschoss-Index je Höhe (-1 unter dem untersten Band, bei mehrdeutigem Band oder ohne Koten)."""
+        z = np.asarray(list(z) if not isinstance(z, np.ndarray) else z, dtype=np.float64)
+        if not len(self._bottoms):
+            return np.full(z.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self._bottoms, z + self.tolerance, side="right") - 1
+        return np.where(pos >= 0, self._storeys[np.maximum(pos, 0)], -1)
+
+    def storey_at(self, z: float) -> int:
+        return int(self.storeys_at([z])[0])
+
+
+class SpatialIndex:
+    """
+    STRtree je Geschoss über die Grundrisse der Räume einer Raumtabelle.
+
+    footprints = shapely-Geometrie je Zeile der Raumtabelle (None = ohne Grundriss)
+    storeys    = Geschoss-Index je Zeile (wie SpaceTable.storey, -1 = ohne Geschoss)
+    unit_scale = Meter je Projekteinheit (für Abstände in Meter)
+    Alle Abfragen liefern Zeilen der Raumtabelle.
+    """
+
+    def __init__(
+        self,
+        footprints: Sequence,
+        storeys: np.ndarray,
+        bands: Optional[ElevationBands] = None,
+        unit_scale: float = 1.0,
+    ):
+        import shapely
+
+        self.footprints = np.empty(len(footprints), dtype=object)
+        self.footprints[:] = list(footprints)
+        self.storeys = np.asarray(storeys, dtype=np.int64)
+        self.bands = bands or ElevationBands((), unit_scale)
+        self.unit_scale = unit_scale
+        self.has_footprint = np.array([g is not None for g in footprints], dtype=bool)
+        self._trees: dict[int, tuple[Any, np.ndarray]] = {}
+        for storey in np.unique(self.storeys[self.has_footprint]).tolist():
+            rows = np.flatnonzero(self.has_footprint & (self.storeys == storey))
+            self._trees[storey] = (shapely.STRtree(self.footprints[rows]), rows)
+        self._element_footprints: dict[int, Any] = {}
+        self._ifc = None
+        self._threads: Optional[int] = None
+        self.space_ids: Optional[np.ndarray] = None
+
+    @classmethod
+    def for_model(cls, ifc, spaces: SpaceTable, threads: Optional[int] = None) -> "SpatialIndex":
+        """
+        Gemeinsamer Index je geladenem Modell und Raumtabelle (Grundrisse aus der
+        Geometrie, ohne Geometrie-Unterstützung leer).
+        """
+        try:
+            index = _indexes.get(ifc)
+        except TypeError:  # Modell nicht weak-referenzierbar
+            index = None
+        if index is not None and index.space_ids is not None and np.array_equal(index.space_ids, spaces.space_id):
+            return index
+
+        scale = unit_scale(ifc)
+        footprints: list = [None] * len(spaces)
+        if supports_geometry(ifc) and len(spaces):
+            try:
+                shapes = FootprintAreaCalculator(ifc, threads=threads).footprints(
+                    ifc.by_id(space_id) for space_id in spaces.space_id.tolist()
+                )
+            except Exception:  # z.B. shapely/ifcopenshell.geom nicht installiert
+                shapes = {}
+            shapes = _to_project_units(shapes, scale)
+            footprints = [shapes.get(space_id) for space_id in spaces.space_id.tolist()]
+        bands = ElevationBands(spaces.storey_elevation.tolist(), scale)
+        index = cls(footprints, spaces.storey, bands, scale)
+        index._ifc, index._threads, index.space_ids = ifc, threads, spaces.space_id
+        try:
+            _indexes[ifc] = index
+        except TypeError:
+            pass
+        return index
+
+    def __len__(self) -> int:
+        return int(self.has_footprint.sum())
+
+    @property
+    def available(self) -> bool:
+        """True, wenn mindestens ein Raum einen Grundriss hat."""
+        return bool(self._trees)
+
+    # ------------------------------------------------------------
+    # Abfragen
+    # ------------------------------------------------------------
+
+    def _query_points(self, xy, storeys, distance: float) -> tuple[np.ndarray, np.ndarray]:
+        """(Punkt, Raum)-Paare je Geschoss: Punkt im Grundriss bzw. höchstens distance entfernt."""
+        import shapely
+
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        storeys = np.asarray(storeys, dtype=np.int64)
+        points, spaces = [], []
+        for storey in np.unique(storeys).tolist():
+            if storey not in self._trees:
+                continue
+            tree, rows = self._trees[storey]
+            selected = np.flatnonzero(storeys == storey)
+            geometries = shapely.points(xy[selected])
+            if distance > 0:
+                hit_point, hit_space = tree.query(
+                    geometries, predicate="dwithin", distance=distance / self.unit_scale
+                )
+            else:
+                hit_point, hit_space = tree.query(geometries, predicate="intersects")
+            points.append(selected[hit_point])
+            spaces.append(rows[hit_space])
+        if not points:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(points), np.concatenate(spaces)
+
+    def spaces_at(
+        self,
+        xy: np.ndarray,
+        storeys: Optional[np.ndarray] = None,
+        z: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Raum je Punkt (n, 2) auf dem angegebenen Geschoss (bzw. dem Höhenband von z);
+        -1, wenn kein Grundriss den Punkt enthält.
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        if storeys is None:
+            storeys = self.bands.storeys_at(z) if z is not None else np.full(len(xy), -1)
+        points, spaces = self._query_points(xy, storeys, 0.0)
+        result = np.full(len(xy), -1, dtype=np.int64)
+        result[points[::-1]] = spaces[::-1]  # bei überlappenden Räumen gilt der erste Treffer
+        return result
+
+    def spaces_near(
+        self, xy: np.ndarray, storeys: np.ndarray, distance: float = WALL_GAP_M
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Alle (Punkt, Raum)-Paare mit Abstand <= distance auf dem Geschoss des jeweiligen Punkts."""
+        return self._query_points(xy, storeys, distance)
+
+    def space_at(self, x: float, y: float, storey: Optional[int] = None, z: Optional[float] = None) -> int:
+        storeys = None if storey is None else [storey]
+        return int(self.spaces_at(np.array([[x, y]]), storeys, None if z is None else [z])[0])
+
+    def overlapping(self, geometry, storey: int, distance: float = 0.0) -> np.ndarray:
+        """Räume des Geschosses, deren Grundriss geometry schneidet (bzw. höchstens distance entfernt ist)."""
+        if storey not in self._trees or geometry is None:
+            return np.zeros(0, dtype=np.int64)
+        tree, rows = self._trees[storey]
+        if distance > 0:
+            hits = tree.query(geometry, predicate="dwithin", distance=distance / self.unit_scale)
+        else:
+            hits = tree.query(geometry, predicate="intersects")
+        return np.sort(rows[hits])
+
+    def neighbours(self, row: int, distance: float = WALL_GAP_M) -> np.ndarray:
+        """Räume auf demselben Geschoss im Abstand <= distance (ohne row selbst)."""
+        if not self.has_footprint[row]:
+            return np.zeros(0, dtype=np.int64)
+        hits = self.overlapping(self.footprints[row], int(self.storeys[row]), distance)
+        return hits[hits != row]
+
+    def adjacent_pairs(self, distance: float = WALL_GAP_M, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Alle Raumpaare (a < b) je Geschoss mit Abstand <= distance als Array (k, 2);
+        mit rows (Maske/Indizes) nur Paare innerhalb dieser Räume.
+        """
+        selected = np.zeros(len(self.footprints), dtype=bool)
+        selected[np.arange(len(self.footprints)) if rows is None else rows] = True
+        pairs = []
+        for tree, tree_rows in self._trees.values():
+            keep = selected[tree_rows]
+            if not keep.any():
+                continue
+            query_rows = tree_rows[keep]
+            source, hit = tree.query(
+                self.footprints[query_rows], predicate="dwithin", distance=distance / self.unit_scale
+            )
+            a, b = query_rows[source], tree_rows[hit]
+            wanted = (a < b) & selected[b]
+            pairs.append(np.stack([a[wanted], b[wanted]], axis=1))
+        if not pairs:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.concatenate(pairs)
+
+    def representative_points(self) -> np.ndarray:
+        """Punkt (x, y) je Raum im Grundriss (Schwerpunkt bzw. bei konkaven Räumen ein innerer Punkt, NaN ohne)."""
+        import shapely
+
+        result = np.full((len(self.footprints), 2), np.nan)
+        rows = np.flatnonzero(self.has_footprint)
+        if len(rows):
+            shapes = self.footprints[rows]
+            centroids = shapely.centroid(shapes)
+            inside = shapely.contains(shapes, centroids)
+            points = np.where(inside, centroids, shapely.point_on_surface(shapes))
+            result[rows] = shapely.get_coordinates(points)
+        return result
+
+    # ------------------------------------------------------------
+    # Bauteile
+    # ------------------------------------------------------------
+
+    def element_footprints(self, elements: Iterable) -> dict[int, Any]:
+        """Grundrisse der Bauteile je #id (aus der Geometrie, je Bauteil einmal berechnet)."""
+        elements = list(elements)
+        missing = [e for e in elements if e.id() not in self._element_footprints]
+        if missing and self._ifc is not None and supports_geometry(self._ifc):
+            try:
+                shapes = FootprintAreaCalculator(self._ifc, threads=self._threads).footprints(missing)
+            except Exception:
+                shapes = {}
+            shapes = _to_project_units(shapes, self.unit_scale)
+            for element in missing:
+                self._element_footprints[element.id()] = shapes.get(element.id())
+        return {
+            e.id(): self._element_footprints[e.id()]
+            for e in elements
+            if self._element_footprints.get(e.id()) is not None
+        }
@@ -0,0 +1,526 @@
+"""
+processors/step_scanner.py
+
+Schneller IFC-Leser für die Raumstruktur ("fast"-Modus von IfcLoader).
+
+Statt das ganze Modell inkl. Geometrie mit ifcopenshell aufzubauen, wird die
+.ifc-Datei per mmap eingeblendet und nur nach den Datensätzen durchsucht, die
+Höhe, Fläche, Brandabschnitte und Fluchtwege brauchen (Geschosse, Räume,
+Relationen, Mengen, Zonen, Raumbegrenzungen, Türen, Treppen). Diese werden
+erst beim Zugriff geparst.
+Referenzierte Datensätze ausserhalb dieser Auswahl (z.B. die Placement-Kette)
+werden per Binärsuche über die Datensatz-Nummern nachgeladen; STEP-Dateien
+sind praktisch immer nach #id sortiert, sonst wird einmalig ein Index aufgebaut.
+
+ScannedModel/ScannedEntity bilden die Teile der ifcopenshell-API nach, die die
+Prozessoren verwenden: by_type, by_id, is_a, id, Attribute per Name und die
+inversen Attribute IsDefinedBy, Decomposes, IsDecomposedBy,
+ContainedInStructure, ContainsElements.
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import re
+from array import array
+from typing import Any, Optional
+
+# Datensatz-Typen, die beim Scan gesammelt werden (STEP-Schreibweise -> IFC-Name)
+SCANNED_TYPES: dict[str, str] = {
+    "IFCPROJECT": "IfcProject",
+    "IFCSITE": "IfcSite",
+    "IFCBUILDING": "IfcBuilding",
+    "IFCBUILDINGSTOREY": "IfcBuildingStorey",
+    "IFCSPACE": "IfcSpace",
+    "IFCRELAGGREGATES": "IfcRelAggregates",
+    "IFCRELCONTAINEDINSPATIALSTRUCTURE": "IfcRelContainedInSpatialStructure",
+    "IFCRELDEFINESBYPROPERTIES": "IfcRelDefinesByProperties",
+    "IFCELEMENTQUANTITY": "IfcElementQuantity",
+    "IFCQUANTITYAREA": "IfcQuantityArea",
+    "IFCPROPERTYSET": "IfcPropertySet",
+    "IFCRELASSIGNSTOGROUP": "IfcRelAssignsToGroup",
+    "IFCRELSPACEBOUNDARY": "IfcRelSpaceBoundary",
+    "IFCRELSPACEBOUNDARY1STLEVEL": "IfcRelSpaceBoundary1stLevel",
+    "IFCRELSPACEBOUNDARY2NDLEVEL": "IfcRelSpaceBoundary2ndLevel",
+    "IFCLOCALPLACEMENT": "IfcLocalPlacement",
+    "IFCAXIS2PLACEMENT3D": "IfcAxis2Placement3D",
+    "IFCDOOR": "IfcDoor",
+    "IFCDOORSTANDARDCASE": "IfcDoorStandardCase",
+    "IFCSTAIR": "IfcStair",
+    "IFCSTAIRFLIGHT": "IfcStairFlight",
+    "IFCRELFILLSELEMENT": "IfcRelFillsElement",
+}
+
+# Weitere Typen, die nur bei Bedarf (über Referenzen) nachgeladen werden
+LAZY_TYPES: dict[str, str] = {
+    "IFCCARTESIANPOINT": "IfcCartesianPoint",
+    "IFCDIRECTION": "IfcDirection",
+    "IFCAXIS2PLACEMENT2D": "IfcAxis2Placement2D",
+    "IFCZONE": "IfcZone",
+    "IFCPROPERTYSINGLEVALUE": "IfcPropertySingleValue",
+    "IFCOPENINGELEMENT": "IfcOpeningElement",
+    "IFCUNITASSIGNMENT": "IfcUnitAssignment",
+    "IFCSIUNIT": "IfcSIUnit",
+    "IFCCONVERSIONBASEDUNIT": "IfcConversionBasedUnit",
+    "IFCMEASUREWITHUNIT": "IfcMeasureWithUnit",
+}
+
+_ROOT = ("GlobalId", "OwnerHistory", "Name", "Description")
+_PRODUCT = _ROOT + ("ObjectType", "ObjectPlacement", "Representation", "LongName", "CompositionType")
+_ELEMENT = _ROOT + ("ObjectType", "ObjectPlacement", "Representation", "Tag")
+_DOOR = _ELEMENT + ("OverallHeight", "OverallWidth", "PredefinedType", "OperationType", "UserDefinedOperationType")
+_BOUNDARY = _ROOT + (
+    "RelatingSpace", "RelatedBuildingElement", "ConnectionGeometry", "PhysicalOrVirtualBoundary", "InternalOrExternalBoundary",
+)
+
+# Attributnamen je Typ in STEP-Reihenfolge (IFC2X3 und IFC4 sind für diese Teilmenge gleich,
+# ausser IfcSpace, IfcZone, Türen und Treppen, siehe _SCHEMA_OVERRIDES)
+ATTRIBUTES: dict[str, tuple[str, ...]] = {
+    "IfcProject": _ROOT + ("ObjectType", "LongName", "Phase", "RepresentationContexts", "UnitsInContext"),
+    "IfcSite": _PRODUCT
+    + ("RefLatitude", "RefLongitude", "RefElevation", "LandTitleNumber", "SiteAddress"),
+    "IfcBuilding": _PRODUCT + ("ElevationOfRefHeight", "ElevationOfTerrain", "BuildingAddress"),
+    "IfcBuildingStorey": _PRODUCT + ("Elevation",),
+    "IfcSpace": _PRODUCT + ("PredefinedType", "ElevationWithFlooring"),
+    "IfcRelAggregates": _ROOT + ("RelatingObject", "RelatedObjects"),
+    "IfcRelContainedInSpatialStructure": _ROOT + ("RelatedElements", "RelatingStructure"),
+    "IfcRelDefinesByProperties": _ROOT + ("RelatedObjects", "RelatingPropertyDefinition"),
+    "IfcElementQuantity": _ROOT + ("MethodOfMeasurement", "Quantities"),
+    "IfcPropertySet": _ROOT + ("HasProperties",),
+    "IfcRelAssignsToGroup": _ROOT + ("RelatedObjects", "RelatedObjectsType", "RelatingGroup"),
+    "IfcZone": _ROOT + ("ObjectType", "LongName"),
+    "IfcRelSpaceBoundary": _BOUNDARY,
+    "IfcRelSpaceBoundary1stLevel": _BOUNDARY + ("ParentBoundary",),
+    "IfcRelSpaceBoundary2ndLevel": _BOUNDARY + ("ParentBoundary", "CorrespondingBoundary"),
+    "IfcDoor": _DOOR,
+    "IfcDoorStandardCase": _DOOR,
+    "IfcStair": _ELEMENT + ("PredefinedType",),
+    "IfcStairFlight": _ELEMENT + ("NumberOfRisers", "NumberOfTreads", "RiserHeight", "TreadLength", "PredefinedType"),
+    "IfcOpeningElement": _ELEMENT + ("PredefinedType",),
+    "IfcRelFillsElement": _ROOT + ("RelatingOpeningElement", "RelatedBuildingElement"),
+    "IfcPropertySingleValue": ("Name", "Specification", "NominalValue", "Unit"),
+    "IfcQuantityArea": ("Name", "Description", "Unit", "AreaValue", "Formula"),
+    "IfcLocalPlacement": ("PlacementRelTo", "RelativePlacement"),
+    "IfcAxis2Placement3D": ("Location", "Axis", "RefDirection"),
+    "IfcAxis2Placement2D": ("Location", "RefDirection"),
+    "IfcCartesianPoint": ("Coordinates",),
+    "IfcDirection": ("DirectionRatios",),
+    "IfcUnitAssignment": ("Units",),
+    "IfcSIUnit": ("Dimensions", "UnitType", "Prefix", "Name"),
+    "IfcConversionBasedUnit": ("Dimensions", "UnitType", "Name", "ConversionFactor"),
+    "IfcMeasureWithUnit": ("ValueComponent", "UnitComponent"),
+}
+
+_SCHEMA_OVERRIDES: dict[tuple[str, str], tuple[str, ...]] = {
+    ("IFC2X3", "IfcSpace"): _PRODUCT + ("InteriorOrExteriorSpace", "ElevationWithFlooring"),
+    ("IFC2X3", "IfcZone"): _ROOT + ("ObjectType",),
+    ("IFC2X3", "IfcPropertySingleValue"): ("Name", "Description", "NominalValue", "Unit"),
+    ("IFC2X3", "IfcDoor"): _ELEMENT + ("OverallHeight", "OverallWidth"),
+    ("IFC2X3", "IfcStair"): _ELEMENT + ("ShapeType",),
+    ("IFC2X3", "IfcStairFlight"): _ELEMENT + ("NumberOfRiser", "NumberOfTreads", "RiserHeight", "TreadLength"),
+    ("IFC2X3", "IfcOpeningElement"): _ELEMENT,
+}
+
+# Obertypen für is_a() (nur für die gescannten Typen)
+_BUILDING_ELEMENT = ("IfcBuildingElement", "IfcBuiltElement", "IfcElement", "IfcProduct", "IfcObject", "IfcObjectDefinition", "IfcRoot")
+SUPERTYPES: dict[str, tuple[str, ...]] = {
+    "IfcProject": ("IfcObject", "IfcObjectDefinition", "IfcRoot"),
+    "IfcSite": ("IfcSpatialStructureElement", "IfcSpatialElement", "IfcProduct", "IfcObject", "IfcObjectDefinition", "IfcRoot"),
+    "IfcBuilding": ("IfcSpatialStructureElement", "IfcSpatialElement", "IfcProduct", "IfcObject", "IfcObjectDefinition", "IfcRoot"),
+    "IfcBuildingStorey": ("IfcSpatialStructureElement", "IfcSpatialElement", "IfcProduct", "IfcObject", "IfcObjectDefinition", "IfcRoot"),
+    "IfcSpace": ("IfcSpatialStructureElement", "IfcSpatialElement", "IfcProduct", "IfcObject", "IfcObjectDefinition", "IfcRoot"),
+    "IfcRelAggregates": ("IfcRelDecomposes", "IfcRelationship", "IfcRoot"),
+    "IfcRelContainedInSpatialStructure": ("IfcRelConnects", "IfcRelationship", "IfcRoot"),
+    "IfcRelDefinesByProperties": ("IfcRelDefines", "IfcRelationship", "IfcRoot"),
+    "IfcElementQuantity": ("IfcQuantitySet", "IfcPropertySetDefinition", "IfcPropertyDefinition", "IfcRoot"),
+    "IfcPropertySet": ("IfcPropertySetDefinition", "IfcPropertyDefinition", "IfcRoot"),
+    "IfcRelAssignsToGroup": ("IfcRelAssigns", "IfcRelationship", "IfcRoot"),
+    "IfcZone": ("IfcSystem", "IfcGroup", "IfcObject", "IfcObjectDefinition", "IfcRoot"),
+    "IfcRelSpaceBoundary": ("IfcRelConnects", "IfcRelationship", "IfcRoot"),
+    "IfcRelSpaceBoundary1stLevel": ("IfcRelSpaceBoundary", "IfcRelConnects", "IfcRelationship", "IfcRoot"),
+    "IfcRelSpaceBoundary2ndLevel": (
+        "IfcRelSpaceBoundary1stLevel", "IfcRelSpaceBoundary", "IfcRelConnects", "IfcRelationship", "IfcRoot",
+    ),
+    "IfcDoor": _BUILDING_ELEMENT,
+    "IfcDoorStandardCase": ("IfcDoor",) + _BUILDING_ELEMENT,
+    "IfcStair": _BUILDING_ELEMENT,
+    "IfcStairFlight": _BUILDING_ELEMENT,
+    "IfcOpeningElement": ("IfcFeatureElementSubtraction", "IfcFeatureElement", "IfcElement", "IfcProduct", "IfcObject", "IfcObjectDefinition", "IfcRoot"),
+    "IfcRelFillsElement": ("IfcRelConnects", "IfcRelationship", "IfcRoot"),
+    "IfcPropertySingleValue": ("IfcSimpleProperty", "IfcProperty"),
+    "IfcQuantityArea": ("IfcPhysicalSimpleQuantity", "IfcPhysicalQuantity"),
+    "IfcLocalPlacement": ("IfcObjectPlacement",),
+    "IfcAxis2Placement3D": ("IfcPlacement", "IfcGeometricRepresentationItem", "IfcRepresentationItem"),
+    "IfcAxis2Placement2D": ("IfcPlacement", "IfcGeometricRepresentationItem", "IfcRepresentationItem"),
+    "IfcCartesianPoint": ("IfcPoint", "IfcGeometricRepresentationItem", "IfcRepresentationItem"),
+    "IfcDirection": ("IfcGeometricRepresentationItem", "IfcRepresentationItem"),
+}
+
+# Inverse Attribute: Name -> (Relationstyp, Attribut der Relation, das auf das Objekt zeigt)
+INVERSES: dict[str, tuple[str, str]] = {
+    "IsDefinedBy": ("IfcRelDefinesByProperties", "RelatedObjects"),
+    "Decomposes": ("IfcRelAggregates", "RelatedObjects"),
+    "IsDecomposedBy": ("IfcRelAggregates", "RelatingObject"),
+    "ContainedInStructure": ("IfcRelContainedInSpatialStructure", "RelatedElements"),
+    "ContainsElements": ("IfcRelContainedInSpatialStructure", "RelatingStructure"),
+}
+
+_HEADER_RE = re.compile(rb"#(\d+)\s*=\s*([A-Za-z0-9_]+)\s*\(")
+_SCAN_RE = re.compile(
+    rb"#(\d+)\s*=\s*(" + b"|".join(t.encode() for t in sorted(SCANNED_TYPES, key=len, reverse=True)) + rb")\s*\(",
+)
+_SCHEMA_RE = re.compile(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']*)'", re.IGNORECASE)
+# Datensatz-Inhalt bis zum abschliessenden ";" (Semikolons in Strings werden übersprungen)
+_RECORD_BODY_RE = re.compile(rb"(?:[^';]|'(?:[^']|'')*')*")
+# Jede Gruppe ist bei einem Treffer nicht leer (Strings inkl. Anführungszeichen)
+_TOKEN_RE = re.compile(
+    rb"('(?:[^']|'')*')"  # String
+    rb"|#(\d+)"  # Referenz
+    rb"|(\$|\*)"  # leer / abgeleitet
+    rb"|(\.[A-Za-z0-9_]+\.)"  # Enum / Boolean
+    rb"|([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"  # Zahl
+    rb"|([A-Za-z][A-Za-z0-9_]*)\s*\("  # typisierter Wert, z.B. IFCLABEL('x')
+    rb"|(\()|(\))|(,)"
+    rb'|("[0-9A-Fa-f]*")'  # Binärwert
+)
+_ENCODED_RE = re.compile(r"\\X2\\((?:[0-9A-F]{4})+)\\X0\\|\\X4\\((?:[0-9A-F]{8})+)\\X0\\|\\X\\([0-9A-F]{2})|\\S\\(.)")
+
+
+class StepParseError(ValueError):
+    """Datensatz konnte nicht gelesen werden."""
+
+
+class _Ref(int):
+    """Referenz auf einen anderen Datensatz (#id), wird beim Attributzugriff aufgelöst."""
+
+
+def decode_step_string(raw: str) -> str:
+    """Dekodiert STEP-Strings ('' sowie \\X2\\, \\X4\\, \\X\\ und \\S\\ Kodierungen)."""
+    text = raw.replace("''", "'")
+    if "\\" not in text:
+        return text
+
+    def repl(m: re.Match) -> str:
+        if m.group(1):
+            hexs = m.group(1)
+            return "".join(chr(int(hexs[i : i + 4], 16)) for i in range(0, len(hexs), 4))
+        if m.group(2):
+            hexs = m.group(2)
+            return "".join(chr(int(hexs[i : i + 8], 16)) for i in range(0, len(hexs), 8))
+        if m.group(3):
+            return bytes([int(m.group(3), 16)]).decode("latin-1")
+        return chr(ord(m.group(4)) + 128)
+
+    return _ENCODED_RE.sub(repl, text).replace("\\\\", "\\")
+
+
+def parse_arguments(buf, pos: int) -> tuple[list, int]:
+    """
+    Parst die Argumentliste ab buf[pos] (direkt nach der öffnenden Klammer).
+    Liefert (Argumente, Position des abschliessenden Semikolons).
+
+    Der Datensatz wird einmal per Regex in Tokens zerlegt (findall in C),
+    danach nur noch über die Token-Tupel iteriert.
+    """
+    end = _RECORD_BODY_RE.match(buf, pos).end()
+    stack: list[list] = [[]]
+    for string, ref, empty, enum, number, typed, lpar, rpar, comma, binary in _TOKEN_RE.findall(bytes(buf[pos:end])):
+        if comma:
+            continue
+        current = stack[-1]
+        if ref:
+            current.append(_Ref(ref))
+        elif number:
+            if b"." in number or b"e" in number or b"E" in number:
+                current.append(float(number))
+            else:
+                current.append(int(number))
+        elif string:
+            current.append(decode_step_string(string[1:-1].decode("latin-1")))
+        elif empty:
+            current.append(None)
+        elif rpar:
+            done = stack.pop()
+            if not stack:
+                return done, end
+            if isinstance(done, _TypedValue):
+                stack[-1].append(done[0] if done else None)
+            else:
+                stack[-1].append(tuple(done))
+        elif lpar:
+            stack.append([])
+        elif typed:
+            # typisierte Werte wie IFCLABEL('x') werden auf ihren Inhalt reduziert
+            stack.append(_TypedValue())
+        elif enum:
+            value = enum[1:-1].decode("ascii").upper()
+            current.append({"T": True, "F": False, "U": None}.get(value, value))
+        elif binary:
+            current.append(binary[1:-1].decode("ascii"))
+    raise StepParseError(f"Ungültiger STEP-Datensatz bei Byte {pos}")
+
+
+class _TypedValue(list):
+    pass
+
+
+class ScannedEntity:
+    """Leichtgewichtiger Ersatz für ifcopenshell.entity_instance (nur lesend)."""
+
+    __slots__ = ("_model", "_id", "_type", "_offset", "_args")
+
+    def __init__(self, model: "ScannedModel", eid: int, ifc_type: str, offset: int):
+        self._model = model
+        self._id = eid
+        self._type = ifc_type
+        self._offset = offset  # Position direkt nach "(" des Datensatzes
+        self._args: Optional[list] = None
+
+    def id(self) -> int:
+        return self._id
+
+    def is_a(self, name: Optional[str] = None):
+        if name is None:
+            return self._type
+        lowered = name.lower()
+        return lowered == self._type.lower() or any(
+            lowered == s.lower() for s in SUPERTYPES.get(self._type, ())
+        )
+
+    def _arguments(self) -> list:
+        if self._args is None:
+            self._args, _end = parse_arguments(self._model._buffer, self._offset)
+        return self._args
+
+    def get_info(self) -> dict[str, Any]:
+        info: dict[str, Any] = {"id": self._id, "type": self._type}
+        for name in self._model._attribute_names(self._type):
+            info[name] = getattr(self, name, None)
+        return info
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in INVERSES:
+            return self._model._inverse(name, self._id)
+        names = self._model._attribute_names(self._type)
+        try:
+            index = names.index(name)
+        except ValueError:
+            raise AttributeError(f"{self._type} hat kein Attribut {name!r}") from None
+        args = self._arguments()
+        if index >= len(args):
+            return None
+        return self._model._resolve(args[index])
+
+    def __getitem__(self, index: int):
+        return self._model._resolve(self._arguments()[index])
+
+    def get_argument(self, index: int):
+        args = self._arguments()
+        return self._model._resolve(args[index]) if index < len(args) else None
+
+    def __len__(self) -> int:
+        return len(self._arguments())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ScannedEntity) and other._id == self._id and other._model is self._model
+
+    def __hash__(self) -> int:
+        return hash(self._id)
+
+    def __repr__(self) -> str:
+        return f"#{self._id}={self._type.upper()}(...)"
+
+
+class ScannedModel:
+    """
+    Teilmodell aus einem Scan der STEP-Datei.
+
+    by_type() liefert nur Typen aus SCANNED_TYPES (bzw. deren Obertypen, z.B.
+    IfcProduct -> Site/Building/Storey/Space); andere Entitäten sind nur über
+    Referenzen erreichbar.
+    """
+
+    def __init__(self, source, progress=None):
+        """
+        source = Pfad (wird per mmap eingeblendet) oder bytes-artiger Puffer (ohne Kopie).
+        progress(offset) wird je gefundenem Datensatz mit der Position in der Datei aufgerufen.
+        """
+        self._file = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.filepath = ""
+            self._buffer = memoryview(source).cast("B")
+        else:
+            self.filepath = str(source)
+            self._file = open(source, "rb")
+            try:
+                self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # leere Datei
+                self._file.close()
+                raise StepParseError(f"Leere IFC-Datei: {source}") from None
+        self.schema = self._read_schema()
+        self._entities: dict[int, ScannedEntity] = {}
+        self._by_type: dict[str, list[ScannedEntity]] = {}
+        self._inverses: Optional[dict[str, dict[int, list[int]]]] = None
+        self._offset_index: Optional[dict[int, tuple[str, int]]] = None
+        self._sorted = True
+        # #id, Anfang und Ende des Kopfs je gescanntem Datensatz (grenzt die Binärsuche ein)
+        self._scanned_ids = array("q")
+        self._scanned_starts = array("q")
+        self._scanned_ends = array("q")
+        try:
+            self._scan(progress)
+        except BaseException:  # z.B. Zeitbudget aus dem progress-Callback
+            self.close()
+            raise
+
+    # ------------------------------------------------------------
+    # Scan
+    # ------------------------------------------------------------
+
+    def _read_schema(self) -> Optional[str]:
+        m = _SCHEMA_RE.search(self._buffer, 0, min(len(self._buffer), 64 * 1024))
+        if m is None:
+            if not bytes(self._buffer[:64]).lstrip().upper().startswith(b"ISO-10303-21"):
+                raise StepParseError(f"Keine STEP/IFC-Datei: {self.filepath or '<Puffer>'}")
+            return None
+        return m.group(1).decode("ascii", "replace").upper()
+
+    def _scan(self, progress=None) -> None:
+        last_id = -1
+        for m in _SCAN_RE.finditer(self._buffer):
+            eid = int(m.group(1))
+            ifc_type = SCANNED_TYPES[m.group(2).upper().decode("ascii")]
+            entity = ScannedEntity(self, eid, ifc_type, m.end())
+            self._entities[eid] = entity
+            self._by_type.setdefault(ifc_type, []).append(entity)
+            self._scanned_ids.append(eid)
+            self._scanned_starts.append(m.start())
+            self._scanned_ends.append(m.end())
+            if eid < last_id:
+                self._sorted = False
+            last_id = eid
+            if progress is not None:
+                progress(m.end())
+
+    # ------------------------------------------------------------
+    # Nachladen einzelner Datensätze
+    # ------------------------------------------------------------
+
+    def _lookup_sorted(self, eid: int) -> Optional[tuple[str, int]]:
+        """
+        Binärsuche nach #eid über die Datei (setzt aufsteigende #ids voraus),
+        beschränkt auf den Abschnitt zwischen den benachbarten gescannten Datensätzen.
+        """
+        buf = self._buffer
+        i = bisect.bisect_left(self._scanned_ids, eid)
+        lo = self._scanned_ends[i - 1] if i else 0
+        hi = self._scanned_starts[i] if i < len(self._scanned_ids) else len(buf)
+        search = _HEADER_RE.search
+        while lo < hi:
+            mid = (lo + hi) // 2
+            m = search(buf, mid)
+            if m is None:
+                hi = mid
+                continue
+            found = int(m.group(1))
+            if found == eid:
+                return m.group(2).decode("ascii").upper(), m.end()
+            if found < eid:
+                lo = m.end()
+            else:
+                hi = mid
+        return None
+
+    def _lookup_indexed(self, eid: int) -> Optional[tuple[str, int]]:
+        if self._offset_index is None:
+            self._offset_index = {
+                int(m.group(1)): (m.group(2).decode("ascii").upper(), m.end())
+                for m in _HEADER_RE.finditer(self._buffer)
+            }
+        return self._offset_index.get(eid)
+
+    def by_id(self, eid: int) -> ScannedEntity:
+        entity = self._entities.get(eid)
+        if entity is not None:
+            return entity
+        hit = self._lookup_sorted(eid) if self._sorted else None
+        if hit is None:
+            hit = self._lookup_indexed(eid)
+        if hit is None:
+            raise RuntimeError(f"Instance #{eid} not found")
+        step_type, offset = hit
+        ifc_type = SCANNED_TYPES.get(step_type) or LAZY_TYPES.get(step_type) or _camel(step_type)
+        entity = ScannedEntity(self, eid, ifc_type, offset)
+        self._entities[eid] = entity
+        return entity
+
+    def _resolve(self, value):
+        if isinstance(value, _Ref):
+            try:
+                return self.by_id(int(value))
+            except RuntimeError:
+                return None
+        if isinstance(value, tuple):
+            return tuple(self._resolve(v) for v in value)
+        return value
+
+    def _attribute_names(self, ifc_type: str) -> tuple[str, ...]:
+        return _SCHEMA_OVERRIDES.get((self.schema or "", ifc_type)) or ATTRIBUTES.get(ifc_type, ())
+
+    # ------------------------------------------------------------
+    # Inverse Attribute
+    # ------------------------------------------------------------
+
+    def _build_inverses(self) -> dict[str, dict[int, list[int]]]:
+        inverses: dict[str, dict[int, list[int]]] = {name: {} for name in INVERSES}
+        for inv_name, (rel_type, attr) in INVERSES.items():
+            names = self._attribute_names(rel_type)
+            index = names.index(attr)
+            target = inverses[inv_name]
+            for rel in self._by_type.get(rel_type, ()):
+                value = rel._arguments()[index] if index < len(rel._arguments()) else None
+                refs = value if isinstance(value, tuple) else (value,)
+                for ref in refs:
+                    if isinstance(ref, _Ref):
+                        target.setdefault(int(ref), []).append(rel._id)
+        return inverses
+
+    def _inverse(self, name: str, eid: int) -> tuple:
+        if self._inverses is None:
+            self._inverses = self._build_inverses()
+        return tuple(self._entities[rid] for rid in self._inverses[name].get(eid, ()))
+
+    # ------------------------------------------------------------
+    # ifcopenshell-ähnliche API
+    # ------------------------------------------------------------
+
+    def by_type(self, name: str, include_subtypes: bool = True) -> list[ScannedEntity]:
+        lowered = name.lower()
+        result: list[ScannedEntity] = []
+        for ifc_type, entities in self._by_type.items():
+            if ifc_type.lower() == lowered or (
+                include_subtypes and any(lowered == s.lower() for s in SUPERTYPES.get(ifc_type, ()))
+            ):
+                result.extend(entities)
+        return result
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._buffer.close()
+            self._file.close()
+        else:
+            self._buffer.release()
+
+    def __enter__(self) -> "ScannedModel":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _camel(step_type: str) -> str:
+    """Name für nicht gelistete Typen (z.B. IFCWALL -> Ifcwall); is_a() vergleicht ohne Gross-/Kleinschreibung."""
+    return "Ifc" + step_type[3:].capitalize() if step_type.startswith("IFC") else step_type
@@ -0,0 +1,403 @@
+"""
+processors/store.py
+
+Lokale Projektablage (SQLite) für Portfolio-Abfragen über viele Projekte.
+
+Tabellen:
+    projects  Projektnummer, Name, Nutzung, Bauweise, Höhe/VKF-Kategorie,
+              Gebäudefläche und grösste Geschossfläche (für schnelle Filter)
+    storeys   Geschossflächen je Projekt (StoreyArea)
+    answers   Antworten je Projekt, Schlüssel = Question.key
+    fingerprints  Fingerabdruck der zuletzt gespeicherten Revision (JSON, siehe revision.py)
+
+Indizes auf Projektnummer, VKF-Kategorie, grösster Geschossfläche und
+Antworten (key, value) halten Abfragen auch bei Zehntausenden Projekten im
+Millisekundenbereich. Jede Operation öffnet eine eigene Verbindung (WAL-Modus),
+sodass CLI, Batch und mehrere Streamlit-Sessions dieselbe Datei nutzen können.
+
+Nutzung:
+    store = ProjectStore()
+    store.save_project("P123", name="Schulhaus", height=height_result, area=area_result, answers=answers)
+    store.query(ProjectQuery(min_storey_area_m2=STOREY_AREA_LIMIT_M2))
+    store.query(ProjectQuery(categories=("Hochhaus",)), order_by="height")
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+# Kompatibilitäts-Import wie bei HeightService / AreaService
+if __package__ in (None, ""):
+    import os as _os, sys as _sys
+
+    _sys.path.append(_os.path.dirname(_os.path.dirname(__file__)))
+    from processors.area import AreaResult, StoreyArea
+    from processors.height import HeightResult
+    from processors.revision import ModelFingerprint
+else:
+    from .area import AreaResult, StoreyArea
+    from .height import HeightResult
+    from .revision import ModelFingerprint
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    number TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL DEFAULT '',
+    usage TEXT NOT NULL DEFAULT '-',
+    construction_type TEXT NOT NULL DEFAULT '-',
+    ifc_path TEXT,
+    height_m REAL,
+    height_method TEXT,
+    vkf_category TEXT NOT NULL DEFAULT 'n/a',
+    building_area_m2 REAL,
+    max_storey_area_m2 REAL,
+    storey_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_category ON projects (vkf_category, number);
+CREATE INDEX IF NOT EXISTS idx_projects_max_storey ON projects (max_storey_area_m2);
+
+CREATE TABLE IF NOT EXISTS storeys (
+    project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    elevation REAL,
+    area_m2 REAL NOT NULL,
+    method TEXT NOT NULL DEFAULT 'quantities',
+    PRIMARY KEY (project_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS answers (
+    project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (project_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_answers_key_value ON answers (key, value);
+
+CREATE TABLE IF NOT EXISTS fingerprints (
+    project_id INTEGER PRIMARY KEY REFERENCES projects (id) ON DELETE CASCADE,
+    data TEXT NOT NULL
+);
+"""
+
+# Erlaubte Sortierungen für query() (Spaltenname -> SQL)
+ORDER_BY = {
+    "number": "number",
+    "name": "name COLLATE NOCASE, number",
+    "height": "height_m DESC, number",
+    "area": "building_area_m2 DESC, number",
+    "max_storey_area": "max_storey_area_m2 DESC, number",
+    "updated": "updated_at DESC, number",
+}
+
+_SUMMARY_COLUMNS = (
+    "number, name, usage, construction_type, ifc_path, height_m, height_method, vkf_category, "
+    "building_area_m2, max_storey_area_m2, storey_count, updated_at"
+)
+
+
+def default_store_path() -> Path:
+    """Datenbank: $BRANDSCHUTZ_STORE oder ~/.local/share/brandschutzkochbuch/projects.sqlite3."""
+    env = os.environ.get("BRANDSCHUTZ_STORE")
+    if env:
+        return Path(env)
+    return Path.home() / ".local" / "share" / "brandschutzkochbuch" / "projects.sqlite3"
+
+
+@dataclass
+class ProjectRecord:
+    """
+    Ein Projekt der Ablage.
+
+    storeys/answers werden nur von get_project() gefüllt; query() liefert
+    die Übersichtsfelder.
+    """
+    number: str
+    name: str = ""
+    usage: str = "-"
+    construction_type: str = "-"
+    ifc_path: Optional[str] = None
+    height_m: Optional[float] = None
+    height_method: Optional[str] = None
+    vkf_category: str = "n/a"
+    building_area_m2: Optional[float] = None
+    max_storey_area_m2: Optional[float] = None
+    storey_count: int = 0
+    updated_at: str = ""
+    storeys: list[StoreyArea] = field(default_factory=list)
+    answers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ProjectQuery:
+    """
+    Filter für query()/count(); leere Felder filtern nicht.
+
+    categories         = VKF-Kategorien (z.B. ("Hochhaus",))
+    min_storey_area_m2 = mindestens ein Geschoss grösser als dieser Wert
+    answers            = Question.key -> erwartete Antwort
+    search             = Teilstring in Projektnummer oder -name
+    """
+    categories: tuple[str, ...] = ()
+    min_storey_area_m2: Optional[float] = None
+    min_height_m: Optional[float] = None
+    answers: dict[str, str] = field(default_factory=dict)
+    search: str = ""
+
+    def where(self) -> tuple[str, list]:
+        clauses: list[str] = []
+        params: list = []
+        if self.categories:
+            clauses.append(f"vkf_category IN ({', '.join('?' * len(self.categories))})")
+            params.extend(self.categories)
+        if self.min_storey_area_m2 is not None:
+            clauses.append("max_storey_area_m2 > ?")
+            params.append(self.min_storey_area_m2)
+        if self.min_height_m is not None:
+            clauses.append("height_m > ?")
+            params.append(self.min_height_m)
+        for key, value in self.answers.items():
+            clauses.append("id IN (SELECT project_id FROM answers WHERE key = ? AND value = ?)")
+            params.extend((key, value))
+        if self.search:
+            clauses.append("(number LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\')")
+            pattern = "%" + self.search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params.extend((pattern, pattern))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class ProjectStore:
+    """Projekt- und Ergebnisablage in einer SQLite-Datei."""
+
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = Path(path) if path is not None else default_store_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Eigene Verbindung je Operation; commit bei Erfolg, sonst rollback."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------
+    # Schreiben
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _upsert(
+        conn: sqlite3.Connection,
+        number: str,
+        name: str,
+        height: Optional[HeightResult],
+        area: Optional[AreaResult],
+        answers: Optional[dict[str, str]],
+        usage: Optional[str],
+        construction_type: Optional[str],
+        updated_at: str,
+        fingerprint: Optional[ModelFingerprint] = None,
+    ) -> int:
+        answers = dict(answers or {})
+        storeys = list(area.storeys) if area is not None else []
+        usage = usage or answers.get("usage") or "-"
+        construction_type = construction_type or answers.get("construction_type") or "-"
+        row = conn.execute(
+            """
+            INSERT INTO projects (number, name, usage, construction_type, ifc_path, height_m, height_method,
+                                  vkf_category, building_area_m2, max_storey_area_m2, storey_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (number) DO UPDATE SET
+                name = excluded.name, usage = excluded.usage, construction_type = excluded.construction_type,
+                ifc_path = excluded.ifc_path, height_m = excluded.height_m, height_method = excluded.height_method,
+                vkf_category = excluded.vkf_category, building_area_m2 = excluded.building_area_m2,
+                max_storey_area_m2 = excluded.max_storey_area_m2, storey_count = excluded.storey_count,
+                updated_at = excluded.updated_at
+            RETURNING id
+            """,
+            (
+                number,
+                name or "",
+                usage,
+                construction_type,
+                (height.ifc_path if height is not None else None) or (area.ifc_path if area is not None else None),
+                height.height_m if height is not None else None,
+                height.method if height is not None else None,
+                height.vkf_category if height is not None else "n/a",
+                area.building_area_m2 if area is not None else None,
+                max((s.area_m2 for s in storeys), default=None),
+                len(storeys),
+                updated_at,
+            ),
+        ).fetchone()
+        project_id = row[0]
+        conn.execute("DELETE FROM storeys WHERE project_id = ?", (project_id,))
+        conn.executemany(
+            "INSERT INTO storeys (project_id, position, name, elevation, area_m2, method) VALUES (?, ?, ?, ?, ?, ?)",
+            [(project_id, i, s.name or "", s.elevation, s.area_m2, s.method) for i, s in enumerate(storeys)],
+        )
+        conn.execute("DELETE FROM answers WHERE project_id = ?", (project_id,))
+        conn.executemany(
+            "INSERT INTO answers (project_id, key, value) VALUES (?, ?, ?)",
+            [(project_id, key, str(value)) for key, value in answers.items() if value is not None],
+        )
+        # Ohne neuen Fingerabdruck passt der alte nicht mehr zu den gespeicherten Werten
+        conn.execute("DELETE FROM fingerprints WHERE project_id = ?", (project_id,))
+        if fingerprint is not None:
+            conn.execute(
+                "INSERT INTO fingerprints (project_id, data) VALUES (?, ?)",
+                (project_id, json.dumps(fingerprint.to_dict(), ensure_ascii=False)),
+            )
+        return project_id
+
+    def save_project(
+        self,
+        number: str,
+        name: str = "",
+        height: Optional[HeightResult] = None,
+        area: Optional[AreaResult] = None,
+        answers: Optional[dict[str, str]] = None,
+        usage: Optional[str] = None,
+        construction_type: Optional[str] = None,
+        fingerprint: Optional[ModelFingerprint] = None,
+    ) -> None:
+        """
+        Legt ein Projekt an oder ersetzt es (gleiche Projektnummer) samt Geschossen
+        und Antworten. Nutzung/Bauweise fallen auf answers["usage"] bzw.
+        answers["construction_type"] zurück. fingerprint ist die Basis für den
+        nächsten Revisionsvergleich (siehe get_fingerprint).
+        """
+        if not str(number).strip():
+            raise ValueError("Projektnummer darf nicht leer sein.")
+        with self._connect() as conn:
+            self._upsert(
+                conn, str(number).strip(), name, height, area, answers, usage, construction_type,
+                datetime.now().isoformat(timespec="seconds"), fingerprint,
+            )
+
+    def save_many(self, projects: Iterable[dict]) -> int:
+        """
+        Speichert viele Projekte in einer Transaktion (z.B. Batch-Import).
+        Jedes Element enthält die Argumente von save_project als dict.
+        """
+        updated_at = datetime.now().isoformat(timespec="seconds")
+        count = 0
+        with self._connect() as conn:
+            for project in projects:
+                project = dict(project)
+                number = str(project.pop("number", "")).strip()
+                if not number:
+                    raise ValueError("Projektnummer darf nicht leer sein.")
+                self._upsert(
+                    conn,
+                    number,
+                    project.get("name", ""),
+                    project.get("height"),
+                    project.get("area"),
+                    project.get("answers"),
+                    project.get("usage"),
+                    project.get("construction_type"),
+                    updated_at,
+                    project.get("fingerprint"),
+                )
+                count += 1
+        return count
+
+    def delete_project(self, number: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM projects WHERE number = ?", (number,)).rowcount > 0
+
+    # ------------------------------------------------------------
+    # Lesen
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _record(row: tuple) -> ProjectRecord:
+        return ProjectRecord(*row)
+
+    def get_project(self, number: str) -> Optional[ProjectRecord]:
+        """Projekt inkl. Geschossen (nach Position) und Antworten."""
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT id, {_SUMMARY_COLUMNS} FROM projects WHERE number = ?", (number,)
+            ).fetchone()
+            if row is None:
+                return None
+            project_id, *values = row
+            record = self._record(tuple(values))
+            record.storeys = [
+                StoreyArea(name=name, elevation=elevation, area_m2=area_m2, method=method)
+                for name, elevation, area_m2, method in conn.execute(
+                    "SELECT name, elevation, area_m2, method FROM storeys WHERE project_id = ? ORDER BY position",
+                    (project_id,),
+                )
+            ]
+            record.answers = dict(
+                conn.execute("SELECT key, value FROM answers WHERE project_id = ? ORDER BY key", (project_id,))
+            )
+        return record
+
+    def get_fingerprint(self, number: str) -> Optional[ModelFingerprint]:
+        """Fingerabdruck der zuletzt gespeicherten Revision eines Projekts (oder None)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT f.data FROM fingerprints f JOIN projects p ON p.id = f.project_id WHERE p.number = ?",
+                (number,),
+            ).fetchone()
+        return ModelFingerprint.from_dict(json.loads(row[0])) if row else None
+
+    def query(
+        self,
+        filters: Optional[ProjectQuery] = None,
+        order_by: str = "number",
+        limit: Optional[int] = 100,
+        offset: int = 0,
+    ) -> list[ProjectRecord]:
+        """Projekte (Übersichtsfelder) passend zu filters, seitenweise über limit/offset."""
+        where, params = (filters or ProjectQuery()).where()
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM projects{where} ORDER BY {ORDER_BY[order_by]}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = [*params, limit, offset]
+        with self._connect() as conn:
+            return [self._record(row) for row in conn.execute(sql, params)]
+
+    def count(self, filters: Optional[ProjectQuery] = None) -> int:
+        where, params = (filters or ProjectQuery()).where()
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM projects{where}", params).fetchone()[0]
+
+    def category_counts(self, filters: Optional[ProjectQuery] = None) -> dict[str, int]:
+        """Anzahl Projekte je VKF-Kategorie."""
+        where, params = (filters or ProjectQuery()).where()
+        with self._connect() as conn:
+            return dict(
+                conn.execute(
+                    f"SELECT vkf_category, COUNT(*) FROM projects{where} GROUP BY vkf_category ORDER BY vkf_category",
+                    params,
+                )
+            )
+
+    def answer_values(self, key: str) -> list[str]:
+        """Vorkommende Antworten zu einer Frage (für Filter-Auswahlen)."""
+        with self._connect() as conn:
+            return [v for (v,) in conn.execute("SELECT DISTINCT value FROM answers WHERE key = ? ORDER BY value", (key,))]
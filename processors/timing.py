@@ -0,0 +1,107 @@
+"""
+processors/timing.py
+
+Leichtgewichtige Laufzeitmessung (Spans) für die Auswertung.
+
+Nutzung:
+    timings = Timings()
+    with timings.span("index"):
+        ...
+    timings.measure("area", lambda: ...)
+
+Mit profile_dir wird jede Stufe zusätzlich mit cProfile aufgezeichnet und als
+<profile_dir>/<stufe>.prof (für pstats/snakeviz) sowie <stufe>.txt (Top-Funktionen
+nach kumulierter Zeit) abgelegt. Profiling nur auf der obersten Ebene
+aktivieren: cProfile lässt sich nicht verschachteln.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+# Anzahl Funktionen im Text-Bericht je Stufe
+PROFILE_TOP = 40
+
+
+def dump_profile(profiler: cProfile.Profile, directory, name: str) -> Path:
+    """Schreibt <name>.prof und <name>.txt (sortiert nach kumulierter Zeit) nach directory."""
+    import io
+    import pstats
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    prof_path = directory / f"{stem}.prof"
+    profiler.dump_stats(prof_path)
+
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP)
+    (directory / f"{stem}.txt").write_text(buffer.getvalue(), encoding="utf-8")
+    return prof_path
+
+
+class Timings(dict):
+    """
+    Laufzeit je Stufe in Sekunden (Reihenfolge der ersten Messung).
+
+    Mehrfach gemessene Stufen werden aufsummiert. Ein Timings ist ein dict und
+    lässt sich direkt in Ergebnisse/JSON übernehmen. on_span(name) wird zu
+    Beginn jeder Stufe aufgerufen (Fortschrittsanzeige).
+    """
+
+    def __init__(
+        self,
+        *args,
+        profile_dir=None,
+        on_span: Optional[Callable[[str], None]] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.profile_dir = profile_dir
+        self.on_span = on_span
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        if self.on_span is not None:
+            self.on_span(name)
+        profiler = None
+        if self.profile_dir:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[name] = self.get(name, 0.0) + time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                dump_profile(profiler, self.profile_dir, name)
+
+    def measure(self, name: str, func: Callable[[], Any]) -> Any:
+        """Führt func aus und misst die Laufzeit unter name."""
+        with self.span(name):
+            return func()
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.values())
+
+
+def format_spans(timings: dict[str, float]) -> str:
+    """Kompakte Form für Unterstufen, z.B. "index 0.012 s, storeys 0.003 s"."""
+    return ", ".join(f"{name} {seconds:.3f} s" for name, seconds in timings.items())
+
+
+def per_item(seconds: float, count: Optional[int]) -> Optional[float]:
+    """Mikrosekunden je Element (None ohne Elemente)."""
+    if not count:
+        return None
+    return seconds / count * 1e6
@@ -1,41 +1,230 @@
+"""
+processors/vkf_rules.py
+
+VKF-Regeln als Tabellen von Grenzwerten, je Ausgabe der Brandschutzrichtlinien.
+
+Jede Regel (Rule) ordnet einem Wert (Höhe, Fläche, Weglänge) die Bezeichnung
+der ersten Stufe zu, deren Grenze er nicht überschreitet (Wert <= Grenze);
+darüber gilt above, ohne Wert (None/NaN) missing. Dieselbe Tabelle wird
+skalar (height_category(), small_building_comment(), ...) und vektorisiert
+über ganze Arrays bzw. DataFrame-Spalten ausgewertet (RuleSet.evaluate /
+evaluate_frame, np.searchsorted statt Schleife je Zeile). NumPy wird erst für
+die vektorisierte Auswertung importiert.
+
+Nutzung:
+    height_category(12.0)                          # "Gebäude mittlerer Höhe"
+    rules = rule_set()                             # aktuelle Ausgabe (DEFAULT_EDITION)
+    rules.evaluate("storey_area", storey_areas)    # Kommentar je Geschoss (object-Array)
+    rules.evaluate_frame(df)                       # Spalten nach FRAME_COLUMNS ergänzt
+    rule_set("2015", storey_area=1200.0)           # Ausgabe mit abweichendem Grenzwert
+"""
+
 from __future__ import annotations
 
-from typing import Optional
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Sequence, Union
+
+if TYPE_CHECKING:  # NumPy erst bei der vektorisierten Auswertung
+    import numpy as np
 
 SMALL_BUILDING_LIMIT_M2 = 600.0
 STOREY_AREA_LIMIT_M2 = 1000.0
+ESCAPE_DISTANCE_LIMIT_M = 35.0  # Fluchtweglänge bis zum Treppenhaus bzw. Ausgang ins Freie
+HEIGHT_LIMITS_M = (11.0, 30.0)  # Gebäude geringer / mittlerer Höhe, darüber Hochhaus
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Eine Regel als Stufentabelle.
+
+    limits  = aufsteigende Grenzen, Wert <= limits[i] -> labels[i]
+    labels  = Bezeichnung je Stufe (leer = kein Kommentar)
+    above   = Bezeichnung oberhalb der letzten Grenze
+    missing = Bezeichnung ohne Wert (None/NaN)
+    """
+    name: str
+    limits: tuple[float, ...]
+    labels: tuple[str, ...]
+    above: str
+    missing: str = ""
+
+    def __post_init__(self):
+        if len(self.limits) != len(self.labels):
+            raise ValueError(f"Regel {self.name!r}: {len(self.limits)} Grenzen, aber {len(self.labels)} Stufen")
+        if any(b < a for a, b in zip(self.limits, self.limits[1:])):
+            raise ValueError(f"Regel {self.name!r}: Grenzen müssen aufsteigend sein")
+
+    @property
+    def categories(self) -> tuple[str, ...]:
+        """Alle Bezeichnungen in der Reihenfolge der Codes (Stufen, above, missing)."""
+        return (*self.labels, self.above, self.missing)
+
+    def with_limits(self, *limits: float) -> "Rule":
+        """Dieselbe Regel mit anderen Grenzen (gleich viele Stufen)."""
+        return replace(self, limits=tuple(float(limit) for limit in limits))
+
+    def label(self, value: Optional[float]) -> str:
+        """Bezeichnung für einen einzelnen Wert."""
+        if value is None or value != value:  # None / NaN
+            return self.missing
+        for limit, label in zip(self.limits, self.labels):
+            if value <= limit:
+                return label
+        return self.above
+
+    def codes(self, values: Any) -> np.ndarray:
+        """Index in categories je Wert (vektorisiert, int8)."""
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.searchsorted(np.asarray(self.limits, dtype=np.float64), values, side="left").astype(np.int8)
+        codes[np.isnan(values)] = len(self.limits) + 1
+        return codes
+
+    def evaluate(self, values: Any) -> np.ndarray:
+        """Bezeichnung je Wert als object-Array (gleiche Texte wie label())."""
+        import numpy as np
+
+        categories = np.empty(len(self.limits) + 2, dtype=object)
+        categories[:] = self.categories
+        return categories[self.codes(values)]
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Alle Regeln einer Ausgabe der VKF-Brandschutzrichtlinien."""
+    edition: str
+    rules: tuple[Rule, ...]
+
+    def __getitem__(self, name: str) -> Rule:
+        for rule in self.rules:
+            if rule.name == name:
+                return rule
+        raise KeyError(f"Unbekannte Regel {name!r}, vorhanden: {', '.join(r.name for r in self.rules)}")
+
+    def with_limits(self, **limits: Union[float, Sequence[float]]) -> "RuleSet":
+        """Kopie mit abweichenden Grenzen je Regel, z.B. with_limits(storey_area=1200.0)."""
+        for name in limits:
+            self[name]  # unbekannte Regel -> KeyError
+        rules = tuple(
+            rule.with_limits(*(value if isinstance(value, (tuple, list)) else (value,)))
+            if (value := limits.get(rule.name)) is not None
+            else rule
+            for rule in self.rules
+        )
+        return replace(self, rules=rules)
 
+    def label(self, name: str, value: Optional[float]) -> str:
+        return self[name].label(value)
 
-def height_category(height_m: Optional[float]) -> str:
+    def evaluate(self, name: str, values: Any) -> np.ndarray:
+        """Regel name auf ein Array (bzw. Liste/Series) von Werten anwenden."""
+        return self[name].evaluate(values)
+
+    def evaluate_frame(self, frame, columns: Optional[Mapping[str, str]] = None):
+        """
+        DataFrame mit zusätzlicher Spalte je Regel (Name der Regel), ausgewertet
+        auf den vorhandenen Eingabespalten aus columns (Standard: FRAME_COLUMNS).
+        """
+        columns = FRAME_COLUMNS if columns is None else columns
+        return frame.assign(
+            **{rule: self.evaluate(rule, frame[column]) for column, rule in columns.items() if column in frame}
+        )
+
+
+# Eingabespalte -> Regel für RuleSet.evaluate_frame
+FRAME_COLUMNS = {
+    "height_m": "height_category",
+    "total_area_m2": "small_building",
+    "storey_area_m2": "storey_area",
+    "compartment_area_m2": "compartment_area",
+    "distance_m": "escape_distance",
+}
+
+VKF_2015 = RuleSet(
+    edition="VKF 2015",
+    rules=(
+        Rule(
+            "height_category",
+            HEIGHT_LIMITS_M,
+            ("Gebäude geringer Höhe", "Gebäude mittlerer Höhe"),
+            above="Hochhaus",
+            missing="n/a",
+        ),
+        Rule(
+            "small_building",
+            (SMALL_BUILDING_LIMIT_M2,),
+            ("Gebäude geringer Abmessung",),
+            above="Kein Gebäude geringer Abmessung",
+        ),
+        Rule("storey_area", (STOREY_AREA_LIMIT_M2,), ("",), above="Brandabschnittsunterteilung erforderlich"),
+        Rule("compartment_area", (STOREY_AREA_LIMIT_M2,), ("",), above="Brandabschnittsfläche überschritten"),
+        Rule("escape_distance", (ESCAPE_DISTANCE_LIMIT_M,), ("",), above="Fluchtweglänge überschritten"),
+    ),
+)
+
+# Ausgaben der Brandschutzrichtlinien; eine neue Ausgabe = neue Tabelle hier
+VKF_EDITIONS: dict[str, RuleSet] = {"2015": VKF_2015}
+DEFAULT_EDITION = "2015"
+
+
+def rule_set(edition: Optional[str] = None, **limits: Union[float, Sequence[float]]) -> RuleSet:
+    """Regeln einer Ausgabe (Standard: DEFAULT_EDITION), optional mit abweichenden Grenzen."""
+    key = edition or DEFAULT_EDITION
+    if key not in VKF_EDITIONS:
+        raise ValueError(f"Unbekannte VKF-Ausgabe {key!r}, vorhanden: {', '.join(VKF_EDITIONS)}")
+    rules = VKF_EDITIONS[key]
+    return rules.with_limits(**limits) if limits else rules
+
+
+def _label(name: str, value: Optional[float], edition: Optional[str], limit: Optional[float]) -> str:
+    rule = rule_set(edition)[name]
+    if limit is not None and rule.limits != (limit,):
+        rule = rule.with_limits(limit)
+    return rule.label(value)
+
+
+def height_category(height_m: Optional[float], *, edition: Optional[str] = None) -> str:
     """Gibt die VKF-Kategorie anhand der Gebäudehöhe zurück."""
-    if height_m is None:
-        return "n/a"
-    if height_m <= 11:
-        return "Gebäude geringer Höhe"
-    if height_m <= 30:
-        return "Gebäude mittlerer Höhe"
-    return "Hochhaus"
+    return _label("height_category", height_m, edition, None)
 
 
 def small_building_comment(
     total_area_m2: Optional[float],
     *,
-    limit_m2: float = SMALL_BUILDING_LIMIT_M2,
+    limit_m2: Optional[float] = None,
+    edition: Optional[str] = None,
 ) -> str:
     """Bewertet, ob die Gesamtfläche einem Gebäude geringer Abmessung entspricht."""
-    if total_area_m2 is None:
-        return ""
-    if total_area_m2 <= limit_m2:
-        return "Gebäude geringer Abmessung"
-    return "Kein Gebäude geringer Abmessung"
+    return _label("small_building", total_area_m2, edition, limit_m2)
 
 
 def storey_area_comment(
     storey_area_m2: float,
     *,
-    limit_m2: float = STOREY_AREA_LIMIT_M2,
+    limit_m2: Optional[float] = None,
+    edition: Optional[str] = None,
 ) -> str:
     """Kommentar für Geschosse, die eine maximale Brandabschnittsfläche überschreiten."""
-    if storey_area_m2 > limit_m2:
-        return "Brandabschnittsunterteilung erforderlich"
-    return ""
+    return _label("storey_area", storey_area_m2, edition, limit_m2)
+
+
+def compartment_area_comment(
+    compartment_area_m2: float,
+    *,
+    limit_m2: Optional[float] = None,
+    edition: Optional[str] = None,
+) -> str:
+    """Kommentar für Brandabschnitte, die die maximale Brandabschnittsfläche überschreiten."""
+    return _label("compartment_area", compartment_area_m2, edition, limit_m2)
+
+
+def escape_distance_comment(
+    distance_m: Optional[float],
+    *,
+    limit_m: Optional[float] = None,
+    edition: Optional[str] = None,
+) -> str:
+    """Kommentar für Fluchtwege, die länger als die zulässige Fluchtweglänge sind."""
+    return _label("escape_distance", distance_m, edition, limit_m)
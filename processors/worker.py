@@ -0,0 +1,325 @@
+"""
+processors/worker.py
+
+Führt Auswertungen in eigenen Prozessen aus (ein Prozess je Aufgabe).
+
+Anders als ein ProcessPoolExecutor reisst ein abgestürzter Prozess (z.B.
+Segfault in ifcopenshell) hier nicht den ganzen Pool mit, und Aufgaben mit
+Zeitüberschreitung werden gezielt beendet.
+
+BackgroundTask startet eine einzelne Aufgabe im Hintergrund (z.B. aus der
+Streamlit-App), liefert Fortschrittsmeldungen ohne zu blockieren und lässt
+sich jederzeit abbrechen.
+
+Beide begrenzen auf Wunsch Speicher (memory_limit_mb, Adressraum des Prozesses
+über RLIMIT_AS; nicht unter Windows) und Laufzeit (timeout) je Aufgabe. Ein
+riesiges oder defektes Modell scheitert so im eigenen Prozess statt den
+aufrufenden Prozess (App-Server, Batch) in den OOM-Killer zu treiben; der
+Speicher geht mit dem Prozessende vollständig an das Betriebssystem zurück.
+Jedes Ergebnis nennt den Spitzen-RSS des Prozesses (peak_rss_mb).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+@dataclass
+class WorkerOutcome:
+    """
+    Ergebnis einer Aufgabe.
+
+    status = "ok" | "error" (Exception im Prozess) | "memory" (Speicherlimit überschritten)
+             | "timeout" | "crashed" | "cancelled"
+    peak_rss_mb = Spitzen-RSS des Prozesses (None, wenn er vorher beendet wurde oder
+                  das Betriebssystem ihn nicht meldet)
+    """
+    status: str
+    value: Any = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+def default_worker_count() -> int:
+    """Anzahl nutzbarer CPU-Kerne (berücksichtigt CPU-Affinität, falls verfügbar)."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Spitzen-RSS des aktuellen Prozesses in MB (None ohne Modul resource, z.B. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def limit_memory(limit_mb: Optional[float]) -> bool:
+    """
+    Begrenzt den Adressraum des aktuellen Prozesses auf limit_mb (RLIMIT_AS);
+    Speicheranforderungen darüber scheitern mit MemoryError. Gibt False zurück,
+    wenn kein Limit gesetzt wurde (None oder nicht unterstützt).
+    """
+    if not limit_mb:
+        return False
+    try:
+        import resource
+    except ImportError:
+        return False
+    limit = int(limit_mb * 1024 * 1024)
+    _soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):  # z.B. macOS
+        return False
+    return True
+
+
+def _child(conn, func: Callable[[Any], Any], item: Any, memory_limit_mb: Optional[float] = None) -> None:
+    limit_memory(memory_limit_mb)
+    try:
+        value = func(item)
+    except MemoryError as exc:
+        conn.send(("memory", f"{type(exc).__name__}: {exc}", traceback.format_exc(), peak_rss_mb()))
+    except BaseException as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}", traceback.format_exc(), peak_rss_mb()))
+    else:
+        conn.send(("ok", value, None, peak_rss_mb()))
+    finally:
+        conn.close()
+
+
+def _outcome(status: str, value: Any, peak: Optional[float], memory_limit_mb: Optional[float]) -> WorkerOutcome:
+    """WorkerOutcome aus der letzten Nachricht des Prozesses."""
+    if status == "ok":
+        return WorkerOutcome("ok", value=value, peak_rss_mb=peak)
+    if status == "memory":
+        limit = f" von {memory_limit_mb:.0f} MB" if memory_limit_mb else ""
+        return WorkerOutcome("memory", error=f"Speicherlimit{limit} überschritten ({value})", peak_rss_mb=peak)
+    return WorkerOutcome("error", error=value, peak_rss_mb=peak)
+
+
+def _crashed(process, memory_limit_mb: Optional[float]) -> WorkerOutcome:
+    process.join(timeout=5)
+    error = f"Prozess beendet (Exitcode {process.exitcode})"
+    if memory_limit_mb:  # z.B. std::bad_alloc in ifcopenshell endet mit abort()
+        error += f", evtl. Speicherlimit von {memory_limit_mb:.0f} MB überschritten"
+    return WorkerOutcome("crashed", error=error)
+
+
+@dataclass
+class _Running:
+    item: Any
+    process: Any
+    conn: Any
+    started: float
+
+
+class WorkerPool:
+    """
+    Führt func(item) für alle items in höchstens max_workers parallelen Prozessen aus.
+
+    func und die Rückgabewerte müssen picklebar sein (Funktion auf Modulebene).
+    timeout gilt je Aufgabe in Sekunden, memory_limit_mb je Prozess (None = unbegrenzt).
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[float] = None,
+    ):
+        self.max_workers = max_workers or default_worker_count()
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._ctx = multiprocessing.get_context()
+
+    def _start(self, func, item) -> _Running:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_child, args=(child_conn, func, item, self.memory_limit_mb), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Running(item=item, process=process, conn=parent_conn, started=time.perf_counter())
+
+    @staticmethod
+    def _finish(run: _Running, outcome: WorkerOutcome) -> tuple[Any, WorkerOutcome]:
+        outcome.seconds = time.perf_counter() - run.started
+        run.conn.close()
+        run.process.join(timeout=5)
+        if run.process.is_alive():
+            run.process.kill()
+            run.process.join()
+        return run.item, outcome
+
+    def _receive(self, run: _Running) -> WorkerOutcome:
+        try:
+            status, value, _trace, peak = run.conn.recv()
+        except (EOFError, OSError):
+            return _crashed(run.process, self.memory_limit_mb)
+        return _outcome(status, value, peak, self.memory_limit_mb)
+
+    def imap_unordered(self, func: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[tuple[Any, WorkerOutcome]]:
+        """Liefert (item, WorkerOutcome) in der Reihenfolge, in der die Aufgaben fertig werden."""
+        pending = list(items)
+        pending.reverse()
+        running: list[_Running] = []
+
+        try:
+            while pending or running:
+                while pending and len(running) < self.max_workers:
+                    running.append(self._start(func, pending.pop()))
+
+                wait_timeout = None
+                if self.timeout is not None:
+                    now = time.perf_counter()
+                    wait_timeout = max(0.0, min(r.started + self.timeout - now for r in running))
+
+                ready = wait([r.conn for r in running], timeout=wait_timeout)
+                for run in [r for r in running if r.conn in ready]:
+                    running.remove(run)
+                    yield self._finish(run, self._receive(run))
+
+                if self.timeout is not None:
+                    now = time.perf_counter()
+                    for run in [r for r in running if now - r.started >= self.timeout]:
+                        running.remove(run)
+                        run.process.kill()
+                        yield self._finish(
+                            run,
+                            WorkerOutcome("timeout", error=f"Zeitlimit von {self.timeout:.0f} s überschritten"),
+                        )
+        finally:
+            for run in running:
+                run.process.kill()
+                run.process.join()
+                run.conn.close()
+
+
+def _background_child(
+    conn, func: Callable[[Any, Callable[[Any], None]], Any], item: Any, memory_limit_mb: Optional[float] = None
+) -> None:
+    def report(message: Any) -> None:
+        conn.send(("progress", message, None, None))
+
+    _child(conn, lambda value: func(value, report), item, memory_limit_mb)
+
+
+class BackgroundTask:
+    """
+    Führt func(item, report) in einem eigenen Prozess aus, ohne auf das Ende zu warten.
+
+    report(meldung) im Prozess erscheint beim nächsten poll(): Texte gelten als
+    Stufe (stage), andere (picklebare) Meldungen als Details dazu (detail). Es
+    bleibt nur die jeweils letzte Meldung; jede einzelne erhält on_progress von
+    poll() bzw. wait().
+    poll() blockiert nie und setzt outcome, sobald die Aufgabe fertig ist;
+    cancel() beendet den Prozess sofort (status "cancelled"). Nach timeout Sekunden
+    beendet das nächste poll() den Prozess (status "timeout"); memory_limit_mb wie
+    bei WorkerPool.
+    Standard ist "spawn": ein fork aus einem Server mit Threads (Streamlit) ist unsicher.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[Any, Callable[[Any], None]], Any],
+        item: Any,
+        context: str = "spawn",
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[float] = None,
+    ):
+        self.func = func
+        self.item = item
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.stage: Optional[str] = None  # letzte Stufe (Text-Meldung)
+        self.detail: Any = None  # letzte Detail-Meldung der aktuellen Stufe
+        self.outcome: Optional[WorkerOutcome] = None
+        self._ctx = multiprocessing.get_context(context)
+        self._run: Optional[_Running] = None
+
+    def start(self) -> "BackgroundTask":
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_background_child, args=(child_conn, self.func, self.item, self.memory_limit_mb), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._run = _Running(item=self.item, process=process, conn=parent_conn, started=time.perf_counter())
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._run is not None and self.outcome is None
+
+    @property
+    def done(self) -> bool:
+        return self.outcome is not None
+
+    @property
+    def seconds(self) -> float:
+        if self.outcome is not None:
+            return self.outcome.seconds
+        return time.perf_counter() - self._run.started if self._run else 0.0
+
+    def poll(self, on_progress: Optional[Callable[[Any], None]] = None) -> Optional[WorkerOutcome]:
+        """
+        Übernimmt alle anstehenden Meldungen (jede auch an on_progress); gibt das
+        Ergebnis zurück, sobald fertig.
+        """
+        while self.running and self._run.conn.poll():
+            try:
+                status, value, _trace, peak = self._run.conn.recv()
+            except (EOFError, OSError):
+                self._finish(_crashed(self._run.process, self.memory_limit_mb))
+                break
+            if status == "progress":
+                if isinstance(value, str):
+                    self.stage, self.detail = value, None
+                else:
+                    self.detail = value
+                if on_progress is not None:
+                    on_progress(value)
+            else:
+                self._finish(_outcome(status, value, peak, self.memory_limit_mb))
+        if self.running and self.timeout is not None and self.seconds >= self.timeout:
+            self._run.process.kill()
+            self._finish(WorkerOutcome("timeout", error=f"Zeitlimit von {self.timeout:.0f} s überschritten"))
+        return self.outcome
+
+    def wait(self, on_progress: Optional[Callable[[Any], None]] = None, interval: float = 0.1) -> WorkerOutcome:
+        """Blockiert bis zum Ende und reicht jede neue Meldung an on_progress weiter (z.B. CLI)."""
+        while True:
+            outcome = self.poll(on_progress)
+            if outcome is not None:
+                return outcome
+            self._run.conn.poll(interval)
+
+    def cancel(self) -> None:
+        """Beendet den Prozess (ohne Wirkung, wenn die Aufgabe schon fertig ist)."""
+        self.poll()
+        if self.running:
+            self._run.process.kill()
+            self._finish(WorkerOutcome("cancelled", error="Abgebrochen"))
+
+    def _finish(self, outcome: WorkerOutcome) -> None:
+        _item, self.outcome = WorkerPool._finish(self._run, outcome)
@@ -7,16 +7,96 @@ Nutzung (im Projekt-Root):
 
     # Direkt mit Pfad
     python3 run_height.py "/Pfad/zum/Modell.ifc"
+
+    # Batch: viele Modelle ohne Rückfragen (siehe batch.py)
+    python3 run.py --batch "/Pfad/zu/Modellen" --answers antworten.json
+
+    # Exakte Höhe aus der Geometrie (Dach, Attika, ...), 4 Threads
+    python3 run.py "/Pfad/zum/Modell.ifc" --exact-height --threads 4
+
+    # Projekt als weiteres Blatt an die bestehende Excel-Datei anhängen (statt sie zu ersetzen)
+    python3 run.py "/Pfad/zum/Modell.ifc" --append
+
+    # Ergebnis zusätzlich in der Projektablage (SQLite, Seite "Portfolio") speichern
+    python3 run.py "/Pfad/zum/Modell.ifc" --store
+
+    # Neue Revision mit der gespeicherten vergleichen, nur geänderte Geschosse neu berechnen
+    python3 run.py "/Pfad/zum/Modell_rev2.ifc" --project P123 --incremental --store
+
+    # Laufzeiten je Stufe ausgeben, cProfile je Stufe nach ./profile schreiben
+    python3 run.py "/Pfad/zum/Modell.ifc" --timings --profile profile
+
+    # Grosse Modelle: höchstens 500 MB und 10 Minuten Ladezeit, Fortschritt auf stderr
+    python3 run.py "/Pfad/zum/Modell.ifc" --fast --max-mb 500 --max-load-seconds 600 --progress
+
+    # Auswertung in eigenem Prozess mit höchstens 4 GB Speicher und 30 Minuten Laufzeit
+    python3 run.py "/Pfad/zum/Modell.ifc" --max-memory-mb 4096 --timeout 1800
     
     /Users/hannazaugg/Library/Mobile Documents/com~apple~CloudDocs/HSLU/HS25/DT_Programming/Brandschutzkochbuch/Modelle/ARC_Modell_NEST_230328.ifc
 """
 from __future__ import annotations
 import argparse
+import sys
+from pathlib import Path
+from typing import Callable, Optional
 
-from processors.height import HeightService
-from processors.area import AreaService
+from processors.cache import ResultCache
+from processors.height import HeightResult
+from processors.ifc_loader import IfcLoader, LoadBudgetExceeded, LoadProgress
+from processors.pipeline import AnalysisResult, AnalysisService
+from processors.timing import Timings
 from questions import DEFAULT_QUESTIONS, answers_for_excel, ask_questions
 
+PROGRESS_BAR_WIDTH = 30
+
+
+def print_load_progress(progress: LoadProgress) -> None:
+    """Fortschrittsbalken für das Laden auf stderr (eine Zeile, wird überschrieben)."""
+    if progress.bytes_read or progress.done:
+        filled = int(progress.fraction * PROGRESS_BAR_WIDTH)
+        bar = "#" * filled + "-" * (PROGRESS_BAR_WIDTH - filled)
+        line = f"IFC einlesen [{bar}] {progress.describe()}"
+    else:  # ifcopenshell meldet keine Zwischenstände
+        line = f"IFC einlesen ({progress.bytes_total / 1e6:.1f} MB) ... {progress.seconds:.1f} s"
+    print(f"\r{line:<100}", end="\n" if progress.done else "", file=sys.stderr, flush=True)
+
+
+def analyze_in_worker(
+    task: dict,
+    timeout: Optional[float],
+    memory_limit_mb: Optional[float],
+    on_load_progress: Optional[Callable[[LoadProgress], None]],
+    on_height_estimate: Callable[[HeightResult], None],
+) -> AnalysisResult:
+    """
+    Wertet das Modell in einem eigenen Prozess aus (siehe worker.BackgroundTask,
+    pipeline.analyze_task) und gibt Ladefortschritt und Höhenschätzung weiter.
+    Beendet das Skript mit Exit-Code 1, wenn die Auswertung scheitert.
+    """
+    from processors.pipeline import analyze_task
+    from processors.worker import BackgroundTask
+
+    def relay(message) -> None:
+        if isinstance(message, LoadProgress):
+            if on_load_progress is not None:
+                on_load_progress(message)
+        elif isinstance(message, HeightResult):
+            on_height_estimate(message)
+
+    worker = BackgroundTask(analyze_task, task, timeout=timeout, memory_limit_mb=memory_limit_mb)
+    outcome = worker.start().wait(relay)
+    peak = "" if outcome.peak_rss_mb is None else f", Spitzen-RSS {outcome.peak_rss_mb:.0f} MB"
+    if not outcome.ok:
+        error = outcome.error or outcome.status
+        if error.startswith("LoadBudgetExceeded"):
+            print(f"\n[ABBRUCH] {error.split(': ', 1)[-1]}", file=sys.stderr)
+        else:
+            print(f"\n[FEHLER] Auswertung nach {outcome.seconds:.1f} s ({outcome.status}{peak}): {error}", file=sys.stderr)
+        raise SystemExit(1)
+    print(f"Auswertung in eigenem Prozess: {outcome.seconds:.1f} s{peak}")
+    return outcome.value
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Liest IFC, berechnet Gesamthöhe und VKF-Kategorie.")
     parser.add_argument("path", nargs="?", help="Pfad zur IFC-Datei")
@@ -27,7 +107,138 @@ def main() -> None:
         default="Brandschutzkochbuch.xlsx",
         help="Pfad zu einer Excel-Datei (Standard: Brandschutzkochbuch.xlsx im aktuellen Ordner)",
     )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Projekt als eigenes Blatt (plus Zeile im Blatt 'Übersicht') an die Excel-Datei anhängen",
+    )
+    parser.add_argument(
+        "--store",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DATENBANK",
+        help="Projekt in der SQLite-Projektablage speichern (Standard: ~/.local/share/brandschutzkochbuch/projects.sqlite3)",
+    )
+    parser.add_argument(
+        "--project",
+        metavar="NUMMER",
+        help="Projektnummer für --store/--incremental (Standard: Dateiname ohne Endung)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Mit der zuletzt gespeicherten Revision des Projekts vergleichen und nur geänderte Geschosse neu berechnen",
+    )
+    parser.add_argument(
+        "--compartments",
+        action="store_true",
+        help="Brandabschnitte aus Zonen und Raumbegrenzungen ermitteln und mit dem Flächengrenzwert prüfen",
+    )
+    parser.add_argument(
+        "--escape-routes",
+        action="store_true",
+        help="Fluchtweglängen je Raum bis zum nächsten Treppenhaus/Ausgang ermitteln (Raumgrundrisse mit --threads)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ergebnis-Cache nicht verwenden (IFC immer neu auswerten)",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Schneller Lademodus: nur Raumstruktur/Mengen lesen, keine Geometrie (STEP-Scanner)",
+    )
+    parser.add_argument(
+        "--exact-height",
+        action="store_true",
+        help="Höhe zusätzlich exakt aus der Geometrie von Dach/Wänden/Decken bestimmen (langsamer, nicht mit --fast)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Threads für --exact-height und --escape-routes (Standard: Anzahl Kerne)",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Laufzeiten je Stufe (Laden mit MB/s, Höhe, Fläche, VKF, Export) und Modellumfang ausgeben",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Ladefortschritt auf stderr anzeigen (Standard: nur wenn stderr ein Terminal ist)",
+    )
+    parser.add_argument("--max-mb", type=float, default=None, help="Grössere IFC-Dateien nicht laden (MB)")
+    parser.add_argument(
+        "--max-load-seconds",
+        type=float,
+        default=None,
+        help="Laden nach so vielen Sekunden abbrechen (im vollständigen Modus vorab geschätzt)",
+    )
+    parser.add_argument(
+        "--max-memory-mb",
+        type=float,
+        default=None,
+        help="Modell in eigenem Prozess mit höchstens so viel Speicher (Adressraum, MB) auswerten; auch im Batch-Modus",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Zeitlimit je Modell in Sekunden (Einzelmodell: Auswertung in eigenem Prozess)",
+    )
+    parser.add_argument(
+        "--isolate",
+        action="store_true",
+        help="Modell in eigenem Prozess auswerten (automatisch mit --max-memory-mb/--timeout); meldet den Spitzen-RSS",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="ORDNER",
+        help="Jede Stufe mit cProfile aufzeichnen und als <stufe>.prof/.txt in ORDNER ablegen",
+    )
+    batch_group = parser.add_argument_group("Batch-Modus (ohne Rückfragen)")
+    batch_group.add_argument("--batch", metavar="ORDNER_ODER_GLOB", help="Alle IFC-Dateien in Ordner/Glob auswerten")
+    batch_group.add_argument("--answers", help="Antwortdatei (JSON/CSV) je Projektnummer")
+    batch_group.add_argument("--out-dir", default="batch_output", help="Ordner für die Excel-Dateien je Projekt")
+    batch_group.add_argument(
+        "--workbook",
+        help="Alle Projekte in diese eine Excel-Datei schreiben (je Projekt ein Blatt, statt einer Datei je Projekt)",
+    )
+    batch_group.add_argument("--jobs", type=int, default=None, help="Parallele Prozesse (Standard: Anzahl Kerne)")
+    batch_group.add_argument("--jsonl", help="JSON Lines in diese Datei statt auf stdout schreiben")
     args = parser.parse_args()
+    max_bytes = None if args.max_mb is None else int(args.max_mb * 1e6)
+    if args.exact_height and args.fast:
+        parser.error("--exact-height benötigt das vollständige Modell und ist nicht mit --fast kombinierbar.")
+
+    if args.batch:
+        from batch import run_batch
+
+        out = open(args.jsonl, "w", encoding="utf-8") if args.jsonl else sys.stdout
+        try:
+            failed = run_batch(
+                args.batch,
+                answers_path=args.answers,
+                out_dir=args.out_dir,
+                jobs=args.jobs,
+                timeout=args.timeout,
+                memory_limit_mb=args.max_memory_mb,
+                use_cache=not args.no_cache,
+                loader_mode="fast" if args.fast else "full",
+                workbook=args.workbook,
+                store=args.store,
+                max_bytes=max_bytes,
+                max_load_seconds=args.max_load_seconds,
+                out=out,
+            )
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        raise SystemExit(1 if failed else 0)
 
     # Interaktiver Prompt, falls kein Pfad übergeben wurde
     if not args.path:
@@ -41,39 +252,152 @@ def main() -> None:
         raise SystemExit(2)
 
     survey_answers = ask_questions(DEFAULT_QUESTIONS)
+    project = args.project or Path(args.path).stem
 
-    service = HeightService()
-    height_result = service.compute_from_path(args.path, extra_answers=survey_answers)
-    
-    area_service = AreaService()
-    area_result = area_service.compute_from_path(args.path)
+    # Vorrevision aus der Projektablage (Fingerabdruck je Geschoss)
+    previous = None
+    if args.incremental:
+        from processors.store import ProjectStore
+
+        previous = ProjectStore(args.store or None).get_fingerprint(project)
+        if previous is None:
+            print(f"Keine gespeicherte Revision für Projekt {project}: vollständige Auswertung.")
+
+    # Modell einmal laden und Höhe + Flächen auf demselben Modell berechnen
+    show_progress = args.progress or sys.stderr.isatty()
+
+    def print_estimate(estimate):
+        print(f"Schätzung über Geschosse: {estimate.text_lines()[0]} (exakte Höhe wird berechnet ...)")
+
+    isolated = args.isolate or args.max_memory_mb is not None or args.timeout is not None
+    if isolated:
+        # Modell bleibt im Worker-Prozess, zurück kommen nur die Ergebnisse
+        task = {
+            "path": args.path,
+            "loader_mode": "fast" if args.fast else "full",
+            "use_cache": not args.no_cache,
+            "max_bytes": max_bytes,
+            "max_seconds": args.max_load_seconds,
+            "fingerprint": args.incremental,
+            "previous": previous.to_dict() if previous is not None else None,
+            "compartments": args.compartments,
+            "escape_routes": args.escape_routes,
+            "exact_height": args.exact_height,
+            "threads": args.threads,
+            "profile_dir": args.profile,
+            "extra_answers": survey_answers,
+        }
+        analysis = analyze_in_worker(
+            task,
+            timeout=args.timeout,
+            memory_limit_mb=args.max_memory_mb,
+            on_load_progress=print_load_progress if show_progress else None,
+            on_height_estimate=print_estimate,
+        )
+    else:
+        loader = IfcLoader(
+            mode="fast" if args.fast else "full",
+            on_progress=print_load_progress if show_progress else None,
+            max_bytes=max_bytes,
+            max_seconds=args.max_load_seconds,
+        )
+        service = AnalysisService(
+            loader=loader,
+            cache=None if args.no_cache else ResultCache(),
+            exact_height=args.exact_height,
+            geometry_threads=args.threads,
+            on_height_estimate=print_estimate,
+            profile_dir=args.profile,
+            fingerprint=args.incremental,
+            previous=previous,
+            compartments=args.compartments,
+            escape_routes=args.escape_routes,
+        )
+        try:
+            analysis = service.compute_from_path(args.path, extra_answers=survey_answers)
+        except LoadBudgetExceeded as exc:
+            print(f"\n[ABBRUCH] {exc}", file=sys.stderr)
+            raise SystemExit(1)
+    height_result = analysis.height
+    area_result = analysis.area
+    buildings = analysis.buildings if len(analysis.buildings) > 1 else []
 
     def print_text():
+        if buildings:  # Höhe über alle Gebäude ist nicht aussagekräftig
+            print(f"{len(buildings)} Gebäude, Höhe und Flächen je Gebäude:")
+            for building in buildings:
+                for line in building.text_lines():
+                    print(line)
+            print(f"Summe aller Gebäude: {area_result.rounded_area_m2} m²")
+            return
         for line in height_result.text_lines():
             print(line)
         for line in area_result.text_lines():
             print(line)
 
+    def print_timings():
+        for line in analysis.timing_lines():
+            print(line)
+        if not isolated:
+            from processors.worker import peak_rss_mb
+
+            peak = peak_rss_mb()
+            if peak is not None:
+                print(f"Spitzen-RSS (dieser Prozess): {peak:.0f} MB")
+        geometry = analysis.extras.get("height_geometry")
+        if geometry is not None:
+            for line in geometry.timing_lines():
+                print(line)
+
     print_text()
+    if analysis.revision is not None:
+        for line in analysis.revision.text_lines():
+            print(line)
+    if analysis.compartments is not None:
+        for line in analysis.compartments.text_lines():
+            print(line)
+    if analysis.escape_routes is not None:
+        for line in analysis.escape_routes.text_lines():
+            print(line)
 
     excel_path = args.excel or "Brandschutzkochbuch.xlsx"
     try:
-        from excel import write_result_to_excel
+        from excel import ProjectWorkbook, write_result_to_excel
     except ModuleNotFoundError as exc:
         missing = exc.name or "pandas"
         print(
             f"Excel-Export benötigt das Paket '{missing}'. "
-            "Bitte installiere es (z.B. `pip install pandas openpyxl`)."
+            "Bitte installiere es (z.B. `pip install openpyxl`)."
         )
         raise SystemExit(1)
 
-    write_result_to_excel(
-        height_result,
-        area_result,
-        excel_path,
-        extra_columns=answers_for_excel(survey_answers, DEFAULT_QUESTIONS),
-    )
-    print(f"Ergebnis in Excel geschrieben: {excel_path}")
+    extra_columns = answers_for_excel(survey_answers, DEFAULT_QUESTIONS)
+    export_timings = Timings(profile_dir=args.profile)
+    with export_timings.span("export"):
+        if args.append:
+            with ProjectWorkbook(excel_path, keep_existing=True) as book:
+                sheet = book.add_project(Path(args.path).stem, height_result, area_result, extra_columns, buildings)
+        else:
+            write_result_to_excel(height_result, area_result, excel_path, extra_columns=extra_columns, buildings=buildings)
+    analysis.timings.update(export_timings)
+    if args.append:
+        print(f"Ergebnis als Blatt '{sheet}' an Excel angehängt: {excel_path}")
+    else:
+        print(f"Ergebnis in Excel geschrieben: {excel_path}")
+    if args.store is not None:
+        from processors.store import ProjectStore
+
+        store = ProjectStore(args.store or None)
+        store.save_project(
+            project, height=height_result, area=area_result, answers=survey_answers, fingerprint=analysis.fingerprint
+        )
+        print(f"Projekt {project} in der Projektablage gespeichert: {store.path}")
+    elif args.incremental:
+        print("Hinweis: ohne --store bleibt die bisherige Revision die Vergleichsbasis.")
+    if args.timings:
+        print_timings()
+    if args.profile:
+        print(f"Profile je Stufe (.prof/.txt) in: {args.profile}")
 
 
 if __name__ == "__main__":